@@ -24,9 +24,13 @@ from api import(
     v1,
     v2,
     responses,
+    auth,
 )
 from api.conf import conf
+from api.context_vars import initiators_context
 from api.context_vars import locale_context
+from api.controllers.websocket_managers import websocket_manager
+from api.modules.city.infrastructure.db_table import city_zone_infos_load
 from api.dependencies.clients import (
     aclose_pos_terminal_client,
     aclose_freedom_bank_otp_client,
@@ -80,6 +84,48 @@ async def health_check():
     return {}
 
 
+@app.get(
+    "/api/v1/service/geocoder",
+    response_model=dict,
+    tags=["service_status"],
+    dependencies=[fastapi.Security(auth.get_current_superuser)],
+)
+async def geocoder_cache_stats():
+    """Hit/miss counters of geocoder caches, shared by all processes through Redis."""
+    return await services.geocoder.get_cache_stats()
+
+
+@app.get(
+    "/api/v1/service/outbox",
+    response_model=dict,
+    tags=["service_status"],
+    dependencies=[fastapi.Security(auth.get_current_superuser)],
+)
+async def outbox_stats():
+    """
+    Outbox counters and lag.
+
+    relayed, failures, dispatched, retried and dead are counted by the
+    process which served the request since its start, they are not totals of
+    the cluster. pending, lag and the stream lengths are shared.
+    """
+    return await models.outbox_stats()
+
+
+@app.get(
+    "/api/v1/service/redis",
+    response_model=dict,
+    tags=["service_status"],
+    dependencies=[fastapi.Security(auth.get_current_superuser)],
+)
+async def redis_publisher_stats():
+    """
+    Publisher counters and connections of the process which served the
+    request since its start, they are not totals of the cluster.
+    """
+    return redis_module.publisher.get_stats()
+
+
 app.include_router(v1.api_router, prefix='/api')
 app.include_router(v2.api_router, prefix='/api')
 
@@ -103,6 +149,7 @@ def add_context_vars_middleware(request: fastapi.Request, call_next):
         )
     )
     request.state.locale = conf.api.locale.default_locale
+    initiators_context.set({})
     return call_next(request)
 
 
@@ -114,18 +161,32 @@ async def redirect_to_api_docs():
 @app.on_event('startup')
 async def startup():
     executors.executors_setup()
-    monitoring.initialize()
 
     await database.initialize()
+    await city_zone_infos_load()
     await redis_module.connect(conf.redis.uri)
+    monitoring.initialize()
+    await models.catalog.load()
+    models.catalog.start()
+    await models.token_revoked_sync()
+    if conf.outbox.run_in_api:
+        models.outbox_relay.start()
+        models.outbox_dispatcher.start()
+    if conf.statistics.compact_in_api:
+        models.order_statistics_compactor.start()
 
 
 @app.on_event('shutdown')
 async def shutdown():
     executors.executors_shutdown()
 
+    await models.outbox_relay.close()
+    await models.outbox_dispatcher.close()
+    await models.order_statistics_compactor.close()
     await database.close_connections()
     await monitoring.shutdown()
+    await models.catalog.close()
+    await websocket_manager.hub.shutdown()
     await redis_module.disconnect()
     await services.terminate_services()
     await aclose_freedom_bank_otp_client()
@@ -1,11 +1,14 @@
 # TODO: wrap return values into schemas
 
+import aioredis
 import fastapi.security
 import tortoise.transactions
 from tortoise.models import Q
 
 from api import exceptions
+from loguru import logger
 from .conf import conf
+from .services import principal
 from .services import sms
 from . import enums
 from . import models
@@ -67,9 +70,6 @@ async def get_current_user(
     if security_scopes is None:
         security_scopes = fastapi.security.SecurityScopes()
 
-    if await models.RevokedToken.filter(token=token).exists():
-        raise exc
-
     try:
         decoded_token = security.unsign_token(token)
     except security.InvalidToken:
@@ -79,6 +79,49 @@ async def get_current_user(
     if client_id is None:
         raise exc
 
+    try:
+        revoked, user = await principal.service.get(token, client_id)
+    except aioredis.RedisError as e:
+        logger.warning(f'Principal cache is unavailable: {e}')
+        revoked = await models.RevokedToken.filter(token=token).exists()
+        user = None
+    if revoked:
+        raise exc
+
+    if user is None:
+        user = await _get_principal(decoded_token, client_id, exc)
+        try:
+            await principal.service.set(token, user, exp=decoded_token.get('exp'))
+        except aioredis.RedisError as e:
+            logger.warning(f'Principal cache is unavailable: {e}')
+
+    scopes = decoded_token.get('scopes', '').split(' ')
+
+    if user.is_superuser:
+        return user
+
+    for scope in security_scopes.scopes:
+        if scope not in scopes:
+            raise exceptions.HTTPUnauthorizedException(
+                f'Not permitted',
+            )
+    return user
+
+
+async def get_current_superuser(
+    user=fastapi.Security(get_current_user),
+):
+    """Get currently authorized user, permitted to superusers only."""
+    if not user.is_superuser:
+        raise exceptions.HTTPUnauthorizedException('Not permitted')
+    return user
+
+
+async def _get_principal(
+    decoded_token: dict,
+    client_id: int,
+    exc: exceptions.HTTPException,
+) -> schemas.UserCurrent:
     try:
         profile_type_token = decoded_token.get('profile_type')
         profile_id_token = decoded_token.get('profile_id')
@@ -93,16 +136,6 @@ async def get_current_user(
     if not (is_active or (profile_type is None or profile_type != enums.ProfileType.COURIER)):
         raise exceptions.HTTPUnauthenticatedException('User is not active')
 
-    scopes = decoded_token.get('scopes', '').split(' ')
-
-    if user['is_superuser']:
-        return schemas.UserCurrent(**user)
-
-    for scope in security_scopes.scopes:
-        if scope not in scopes:
-            raise exceptions.HTTPUnauthorizedException(
-                f'Not permitted',
-            )
     return schemas.UserCurrent(**user)
 
 
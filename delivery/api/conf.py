@@ -1,10 +1,12 @@
 from pathlib import Path
 from typing import Dict
 from typing import List
+from typing import Optional
 
 from pydantic import BaseSettings
 from pydantic import Field
 
+from .enums import RouterBackend
 from .enums import SMSProvider
 
 
@@ -17,11 +19,16 @@ class Token(BaseSettings):
     access_lifetime: int = Field(15, env='ACCESS_TOKEN_LIFETIME')
     refresh_lifetime: int = Field(60 * 24 * 365, env='REFRESH_TOKEN_LIFETIME')
     front_token: str = Field('invalid_front_token', env='FRONT_TOKEN')
+    principal_cache_ttl: int = Field(60, env='PRINCIPAL_CACHE_TTL')
 
 
 class Monitoring(BaseSettings):
-    timeout: int = 90
-    ttl: int = 5
+    snapshot_ttl: int = Field(60 * 10, env='MONITORING_SNAPSHOT_TTL')
+    max_couriers: int = Field(100000, env='MONITORING_MAX_COURIERS')
+    send_queue_size: int = Field(64, env='MONITORING_SEND_QUEUE_SIZE')
+    send_timeout: float = Field(5, env='MONITORING_SEND_TIMEOUT')
+    max_dropped: int = Field(32, env='MONITORING_MAX_DROPPED')
+    location_ttl: int = Field(60 * 60 * 24, env='MONITORING_LOCATION_TTL')
 
 
 class Postgres(BaseSettings):
@@ -31,6 +38,11 @@ class Postgres(BaseSettings):
     password: str = Field('mypassword', env='POSTGRES_PASSWORD')
     database: str = Field('mydatabase', env='POSTGRES_DB')
     maxsize: int = 900
+    # raw SQL reads, e.g. statistics and reports, may be served by a replica
+    read_uri: Optional[str] = Field(None, env='POSTGRES_READ_URI')
+    read_pool_min_size: int = Field(1, env='POSTGRES_READ_POOL_MIN_SIZE')
+    read_pool_max_size: int = Field(10, env='POSTGRES_READ_POOL_MAX_SIZE')
+    read_timeout: float = Field(120, env='POSTGRES_READ_TIMEOUT')
 
     @property
     def uri(self) -> str:
@@ -99,6 +111,7 @@ class SMS(BaseSettings):
 class Redis(BaseSettings):
     host: str = Field('127.0.0.1', env='REDIS_HOST')
     port: int = Field(6379, env='REDIS_PORT')
+    publish_batch_size: int = Field(1000, env='REDIS_PUBLISH_BATCH_SIZE')
 
     @property
     def uri(self) -> str:
@@ -133,6 +146,11 @@ class GeoCoder(BaseSettings):
     key_2gis: str = Field('rukiqk4169', env='API_KEY')
     url_2gis: str = Field('https://catalog.api.2gis.com/', env='GEOCODER_URL')
     url_osm: str = Field('https://nominatim.openstreetmap.org/', env='OSM_URL')
+    cache_ttl: int = Field(60 * 60 * 24 * 30, env='GEOCODER_CACHE_TTL')
+    negative_cache_ttl: int = Field(60 * 60 * 24, env='GEOCODER_NEGATIVE_CACHE_TTL')
+    retries: int = Field(2, env='GEOCODER_RETRIES')
+    backoff: float = Field(0.5, env='GEOCODER_BACKOFF')
+    concurrency: int = Field(10, env='GEOCODER_CONCURRENCY')
 
 
 class OSM(BaseSettings):
@@ -140,6 +158,55 @@ class OSM(BaseSettings):
     url: str = Field('https://router.project-osrm.org/', env='OSM_URL')
 
 
+class Router(BaseSettings):
+    backend: RouterBackend = Field(RouterBackend.ORTOOLS, env='ROUTER_BACKEND')
+    time_limit: int = Field(10, env='ROUTER_TIME_LIMIT')
+    workers: int = Field(2, env='ROUTER_WORKERS')
+
+
+class History(BaseSettings):
+    buffer_size: int = Field(500, env='HISTORY_BUFFER_SIZE')
+    flush_interval: float = Field(1, env='HISTORY_FLUSH_INTERVAL')
+
+
+class Geolocation(BaseSettings):
+    batch_size: int = Field(1000, env='GEOLOCATION_BATCH_SIZE')
+    max_age: int = Field(60 * 60 * 24 * 7, env='GEOLOCATION_MAX_AGE')
+    track_max_points: int = Field(500, env='GEOLOCATION_TRACK_MAX_POINTS')
+    retention_months: int = Field(6, env='GEOLOCATION_RETENTION_MONTHS')
+
+
+class Catalog(BaseSettings):
+    ttl: int = Field(60, env='CATALOG_TTL')
+
+
+class Outbox(BaseSettings):
+    # relay and dispatcher run in API processes unless the CLI ones are deployed
+    run_in_api: bool = Field(True, env='OUTBOX_RUN_IN_API')
+    batch_size: int = Field(500, env='OUTBOX_BATCH_SIZE')
+    poll_interval: float = Field(0.2, env='OUTBOX_POLL_INTERVAL')
+    stream: str = Field('outbox', env='OUTBOX_STREAM')
+    # length of the dead letter stream, the outbox one is trimmed by acknowledgements
+    stream_maxlen: int = Field(100000, env='OUTBOX_STREAM_MAXLEN')
+    group: str = Field('dispatchers', env='OUTBOX_GROUP')
+    retry_interval: float = Field(30, env='OUTBOX_RETRY_INTERVAL')
+    max_deliveries: int = Field(10, env='OUTBOX_MAX_DELIVERIES')
+
+
+class Statistics(BaseSettings):
+    # the rollups compactor runs in API processes unless the CLI one is deployed
+    compact_in_api: bool = Field(True, env='STATISTICS_COMPACT_IN_API')
+    compact_interval: float = Field(10, env='STATISTICS_COMPACT_INTERVAL')
+
+
+class Jobs(BaseSettings):
+    ttl: int = Field(60 * 60 * 24, env='JOBS_TTL')
+    concurrency: int = Field(2, env='JOBS_CONCURRENCY')
+    # jobs not touched by their worker for this many seconds are taken by another one
+    visibility_timeout: int = Field(60, env='JOBS_VISIBILITY_TIMEOUT')
+    max_attempts: int = Field(3, env='JOBS_MAX_ATTEMPTS')
+
+
 class DataLoader(BaseSettings):
     timeout: int = 60
     url: str = Field('https://dev-dataloader.trafficwave.kz/', env='DATALOADER_URL')
@@ -299,6 +366,13 @@ class Settings(BaseSettings):
     redis: Redis = Redis()
     geocoder: GeoCoder = GeoCoder()
     osm: OSM = OSM()
+    router: Router = Router()
+    jobs: Jobs = Jobs()
+    history: History = History()
+    catalog: Catalog = Catalog()
+    outbox: Outbox = Outbox()
+    statistics: Statistics = Statistics()
+    geolocation: Geolocation = Geolocation()
     dataloader: DataLoader = DataLoader()
     biometry: Biometry = Biometry()
     otp: OTP = OTP()
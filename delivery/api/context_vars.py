@@ -1,3 +1,5 @@
 from contextvars import ContextVar
 
 locale_context: ContextVar[str] = ContextVar('locale_context', default='en')
+# initiators of history resolved during the request
+initiators_context: ContextVar[dict | None] = ContextVar('initiators_context', default=None)
@@ -17,7 +17,7 @@ async def create_comment(
     except DoesNotExist:
         raise exceptions.CommentCreateException('Order does not exist')
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     try:
         comment = await models.Comment.create(
@@ -3,7 +3,7 @@ from typing import Optional, Dict
 from tortoise.exceptions import DoesNotExist
 
 from api import models, schemas
-from api.domain.order import Order, DeliveryGraph
+from api.domain.order import Order
 from api.enums import InitiatorType, HistoryModelName, RequestMethods, OrderStatusCodes
 from .handler_protocol import OrderStatusTransitionHandlerProtocol
 from .handlers.pos_terminal_registration.exceptions import BasePOSTerminalRegistrationHandlerError
@@ -33,16 +33,13 @@ class OrderStatusTransitionController:
 
         # Получаем текущий и следующий статусы
         try:
-            current_status = await models.Status.get(id=order_obj.current_status_id)
-            next_status = await models.Status.get(id=status_id)
+            current_status = await models.catalog.status_get(order_obj.current_status_id)
+            next_status = await models.catalog.status_get(status_id)
         except DoesNotExist:
             raise DoesNotExist(f'Status with given ID: {status_id} was not found')
 
-        # Получаем деливери граф
-        delivery_graph_obj = await order_obj.deliverygraph
-
         # Получаем модель деливери графа
-        delivery_graph = DeliveryGraph(delivery_graph_obj.graph)
+        delivery_graph = await models.catalog.deliverygraph_steps(order_obj.deliverygraph_id)
 
         # Получаем модель заявки
         order = Order(
@@ -69,10 +66,10 @@ class OrderStatusTransitionController:
             raise StatusHandlerExecutionError(e) from e
 
         # Получим локальное время у заявки
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
 
         # Получим локальное время у заявки
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
 
         # Запишем в историю об изменении статуса
         await models.history_create(
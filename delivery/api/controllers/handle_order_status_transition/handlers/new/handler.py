@@ -24,7 +24,7 @@ class NewHandler(OrderStatusTransitionHandlerProtocol):
 
         await models.OrderStatuses.filter(order_id=order_obj.id).delete()
 
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
         await models.OrderStatuses.create(order=order_obj, status=status, created_at=order_time)
         order_obj.current_status = status
         await models.SMSPostControl.filter(order_id=order_obj.id).delete()
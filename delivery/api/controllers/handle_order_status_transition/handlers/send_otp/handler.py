@@ -67,7 +67,7 @@ class SendOTPHandler(OrderStatusTransitionHandlerProtocol):
         else:
             raise SendOTPPartnerNotFoundError(f'No OTP service for partner, partner_id: {partner_id}')
 
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
 
         # Сохраним гео локацию, если передали координаты
         geolocation = await order_obj.geolocation
@@ -88,7 +88,7 @@ class VerifyOTPHandler(OrderStatusTransitionHandlerProtocol):
 
         # TODO: Пока тут делаем переход на следующий статус, пока не ясно, переходить на текущий статус или на следующий.
         next_status = await models.Status.get(code='photo_capturing')
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
         order_obj.current_status = next_status
         async with in_transaction():
             await models.OrderStatuses.create(order=order_obj, status=next_status, created_at=order_time)
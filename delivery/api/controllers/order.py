@@ -396,8 +396,10 @@ async def order_reschedule(current_user: UserCurrent, order_id, update):
     return await models.order_reschedule(order_id, update, **kwargs)
 
 
-async def order_report(query, profile_type, **kwargs):
+async def order_report(query, profile_type, streaming: bool = False, **kwargs):
     try:
+        if streaming:
+            return await models.order_report_streaming(query, profile_type, **kwargs)
         return await models.order_report(query, profile_type, **kwargs)
     except ValueError as e:
         raise exceptions.HTTPBadRequestException(str(e))
@@ -427,7 +429,7 @@ async def listen_order_updates(websocket: WebSocket):
     await websocket.accept()
     try:
         current_user = await ws_authenticate(websocket)
-        websocket_manager.connect_manager(
+        await websocket_manager.connect_manager(
             current_user.profile['profile_content']['partner_id'],
             websocket,
         )
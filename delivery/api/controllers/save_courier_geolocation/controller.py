@@ -1,6 +1,11 @@
 import typing
 
-from api import schemas, models, enums
+from tortoise.exceptions import DoesNotExist
+from tortoise.timezone import now
+
+from api import schemas, models
+from api.modules.monitoring.infrastructure.repository import GeolocationRepository
+from api.modules.monitoring.schemas import GeolocationPoint
 
 
 async def save_courier_geolocation(
@@ -8,24 +13,18 @@ async def save_courier_geolocation(
         data: schemas.SaveCourierGeolocation,
         default_filter_args: typing.List,
 ):
-    order_obj = await models.Order.filter(*default_filter_args).get(id=data.order_id)
-    order_time = await order_obj.localtime
+    exists = await models.Order.filter(*default_filter_args, id=data.order_id).exists()
+    if not exists:
+        raise DoesNotExist('Object does not exist')
 
-    await models.history_create(
-        schemas.HistoryCreate(
-            initiator_type=enums.InitiatorType.USER,
-            initiator_id=courier.id,
-            initiator_role=courier.profile['profile_type'],
-            model_type=enums.HistoryModelName.ORDER,
-            model_id=order_obj.id,
-            request_method=enums.RequestMethods.POST,
-            action_type=enums.ActionType.SAVE_COURIER_GEOLOCATION,
-            action_data={
-                'coordinates': {
-                    'latitude': data.latitude,
-                    'longitude': data.longitude
-                },
-            },
-            created_at=order_time,
-        )
+    await GeolocationRepository().create_many(
+        courier_id=courier.profile.get('id'),
+        points=[
+            GeolocationPoint(
+                latitude=data.latitude,
+                longitude=data.longitude,
+                recorded_at=now(),
+                order_id=data.order_id,
+            ),
+        ],
     )
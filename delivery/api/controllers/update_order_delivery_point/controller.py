@@ -122,7 +122,7 @@ class UpdateOrderDeliveryPoint:
         """
 
         await models.OrderStatuses.filter(order_id=order_obj.id).delete()
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
         status = await models.Status.get(slug=enums.StatusSlug.NEW.value)
         # Обнуляем все статусы до нового статуса
         await models.OrderStatuses.create(
@@ -231,7 +231,7 @@ class UpdateOrderDeliveryPoint:
             await delivery_point.save()
             await order_obj.save()
 
-        created_at = await order_obj.localtime
+        created_at = order_obj.localtime
         await models.history_create(
             HistoryCreate(
                 initiator_type=enums.InitiatorType.USER,
@@ -204,8 +204,8 @@ async def user_delete(user_id: int, current_user) -> None:
                 )
                 order_ids = []
                 for order_obj in orders:
-                    order_time = await order_obj.localtime
-                    histories.append(models.History(
+                    order_time = order_obj.localtime
+                    histories.append(schemas.HistoryCreate(
                         initiator_id=current_user.id,
                         initiator_type=enums.InitiatorType.USER.value,
                         initiator_role=current_user.profile['profile_type'],
@@ -223,7 +223,7 @@ async def user_delete(user_id: int, current_user) -> None:
                         created_at=order_time,
                     ))
                     order_ids.append(order_obj.id)
-                await models.History.bulk_create(histories, batch_size=500)
+                await models.history_bulk_create(histories)
                 await models.OrderStatuses.bulk_create(new_statuses, batch_size=500)
                 await models.Order.filter(id__in=order_ids).update(current_status_id=OrderStatus.NEW.value)
                 # Удаление прошлых сохраненных ОТП у заявок
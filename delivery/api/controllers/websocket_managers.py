@@ -1,60 +1,206 @@
 #TODO: it needs to be refactor
 
+import asyncio
+import collections
 import json
 import typing
-from typing import Dict
-from typing import List
 
+from loguru import logger
 from starlette.websockets import WebSocket
-from starlette.websockets import WebSocketDisconnect
 
 from .. import schemas
 from .. import enums
+from ..conf import conf
 from ..services import ws_monitoring
 
+# close code for evicted sockets, clients are expected to reconnect
+TRY_AGAIN_LATER = 1013
+
+
+def dumps(message: typing.Any) -> str:
+    # the same separators as WebSocket.send_json uses
+    return json.dumps(message, separators=(',', ':'), default=str)
+
+
+class _Subscriber:
+    __slots__ = ('websocket', 'queue', 'task', 'dropped')
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.task: typing.Optional[asyncio.Task] = None
+        self.dropped = 0
+
+
+class BroadcastHub:
+    """
+    Delivers messages to websockets subscribed to topics.
+
+    A message is serialized once per publish and put to a bounded send queue
+    of every subscribed socket, so publishing never waits for the network.
+    Each socket is served by its own sender task. When a queue is full the
+    oldest message is dropped, a socket that keeps its queue full or does not
+    accept a message within the send timeout is evicted and closed.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = None,
+        send_timeout: float = None,
+        max_dropped: int = None,
+    ):
+        self.queue_size = queue_size or conf.monitoring.send_queue_size
+        self.send_timeout = send_timeout or conf.monitoring.send_timeout
+        self.max_dropped = max_dropped or conf.monitoring.max_dropped
+        # dicts are used as ordered sets
+        self._topics: typing.Dict[typing.Hashable, typing.Dict[WebSocket, None]] = {}
+        self._subscriptions: typing.Dict[WebSocket, typing.Set[typing.Hashable]] = {}
+        self._subscribers: typing.Dict[WebSocket, _Subscriber] = {}
+        self._closing: typing.Set[asyncio.Task] = set()
+        self.stats = collections.Counter()
+
+    def subscribe(self, topic: typing.Hashable, websocket: WebSocket) -> None:
+        self._topics.setdefault(topic, {})[websocket] = None
+        self._subscriptions.setdefault(websocket, set()).add(topic)
+        if websocket not in self._subscribers:
+            subscriber = _Subscriber(websocket, self.queue_size)
+            subscriber.task = asyncio.create_task(self._send(subscriber))
+            self._subscribers[websocket] = subscriber
+
+    def unsubscribe(self, websocket: WebSocket, topic: typing.Hashable = None) -> None:
+        """Removes socket from the topic or from all its topics."""
+        topics = self._subscriptions.get(websocket)
+        if topics is None:
+            return
+        for unsubscribed in [topic] if topic is not None else list(topics):
+            if unsubscribed not in topics:
+                continue
+            topics.discard(unsubscribed)
+            sockets = self._topics[unsubscribed]
+            sockets.pop(websocket, None)
+            if not sockets:
+                del self._topics[unsubscribed]
+        if not topics:
+            del self._subscriptions[websocket]
+            self._subscribers.pop(websocket).task.cancel()
+
+    def subscribers(self, topic: typing.Hashable) -> typing.List[WebSocket]:
+        return list(self._topics.get(topic, ()))
+
+    def publish(self, topics: typing.Iterable[typing.Hashable], message: typing.Any) -> int:
+        """Queues message for sockets of the topics, returns the number of sockets."""
+        sockets = {}
+        for topic in topics:
+            sockets.update(self._topics.get(topic, {}))
+        if not sockets:
+            return 0
+
+        text = message if isinstance(message, str) else dumps(message)
+        for websocket in sockets:
+            subscriber = self._subscribers.get(websocket)
+            if subscriber is not None:
+                self._enqueue(subscriber, text)
+        self.stats['published'] += 1
+        return len(sockets)
+
+    def _enqueue(self, subscriber: _Subscriber, text: str) -> None:
+        try:
+            subscriber.queue.put_nowait(text)
+            subscriber.dropped = 0
+            return
+        except asyncio.QueueFull:
+            pass
+
+        subscriber.dropped += 1
+        if subscriber.dropped > self.max_dropped:
+            self._evict(subscriber, 'send queue is full')
+            return
+        subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(text)
+        self.stats['dropped'] += 1
+
+    async def _send(self, subscriber: _Subscriber) -> None:
+        while True:
+            text = await subscriber.queue.get()
+            try:
+                await asyncio.wait_for(
+                    subscriber.websocket.send_text(text), self.send_timeout,
+                )
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self._evict(subscriber, 'send timed out')
+                return
+            except Exception as e:
+                self._evict(subscriber, str(e) or e.__class__.__name__)
+                return
+            self.stats['sent'] += 1
+
+    def _evict(self, subscriber: _Subscriber, reason: str) -> None:
+        logger.warning(f'Evicting websocket subscriber: {reason}')
+        self.stats['evicted'] += 1
+        self.unsubscribe(subscriber.websocket)
+        task = asyncio.create_task(self._close(subscriber.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=TRY_AGAIN_LATER), self.send_timeout,
+            )
+        except Exception:
+            pass
+
+    async def shutdown(self) -> None:
+        tasks = [subscriber.task for subscriber in self._subscribers.values()]
+        tasks.extend(self._closing)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._topics.clear()
+        self._subscriptions.clear()
+        self._subscribers.clear()
+
+
+class Topic:
+    COURIER = 'courier'
+    MONITOR = 'monitor'
+    MANAGER = 'manager'
+    CLIENT = 'client'
+
 
 class ConnectionManager:
     def __init__(self):
-        self.active_couriers: dict[int, WebSocket] = {}
-        self.active_monitors: Dict[int, List[WebSocket]] = {}
-        self.active_managers: dict[int, List[WebSocket]] = {}
-        self.active_clients: dict[str, List[WebSocket]] = {}
+        self.hub = BroadcastHub()
 
     async def connect_monitor(self, websocket: WebSocket, courier_service_id: int):
-        if self.active_monitors.get(courier_service_id) is None:
-            self.active_monitors[courier_service_id] = []
-        self.active_monitors[courier_service_id].append(websocket)
+        self.hub.subscribe((Topic.MONITOR, courier_service_id), websocket)
 
     async def connect_client(self, order_id, websocket: WebSocket):
-        if self.active_clients.get(order_id) is None:
-            self.active_clients[order_id] = []
-        self.active_clients[order_id].append(websocket)
+        self.hub.subscribe((Topic.CLIENT, str(order_id)), websocket)
 
     async def connect_courier(self, courier_id, websocket: WebSocket):
-        self.active_couriers[courier_id] = websocket
+        topic = (Topic.COURIER, courier_id)
+        # the last connection of the courier receives orders
+        for previous in self.hub.subscribers(topic):
+            self.hub.unsubscribe(previous, topic)
+        self.hub.subscribe(topic, websocket)
 
     async def connect_manager(self, partner_id, websocket: WebSocket):
-        if self.active_managers.get(partner_id) is None:
-            self.active_managers[partner_id] = []
-        self.active_managers[partner_id].append(websocket)
+        self.hub.subscribe((Topic.MANAGER, partner_id), websocket)
 
     def disconnect_monitor(self, websocket: WebSocket, city_id: int):
-        if websocket in self.active_monitors[city_id]:
-            self.active_monitors[city_id].remove(websocket)
+        self.hub.unsubscribe(websocket, (Topic.MONITOR, city_id))
 
     def disconnect_courier(self, websocket: WebSocket):
-        for courier_id in list(self.active_couriers.keys()):
-            if self.active_couriers[courier_id] == websocket:
-                del self.active_couriers[courier_id]
+        self.hub.unsubscribe(websocket)
 
     def disconnect_manager(self, websocket: WebSocket):
-        for partner_id in list(self.active_managers.keys()):
-            if websocket in self.active_managers[partner_id]:
-                self.active_managers[partner_id].remove(websocket)
+        self.hub.unsubscribe(websocket)
 
     def disconnect_client(self, websocket: WebSocket, phone_number: str):
-        if websocket in self.active_clients[phone_number]:
-            self.active_clients[phone_number].remove(websocket)
+        self.hub.unsubscribe(websocket, (Topic.CLIENT, str(phone_number)))
 
     async def send_all_locations(self, websocket: WebSocket, courier_service_id: int):
         couriers = await ws_monitoring.service.get_locations(courier_service_id)
@@ -87,24 +233,18 @@ class ConnectionManager:
                 'is_active': True
             }
         }
-        for active_monitor in self.active_monitors.get(courier_service_id, []):
-            await active_monitor.send_json(message)
+        await self.send_location_message(courier_service_id, order_ids, message)
 
-        for order_id in order_ids:
-            if str(order_id) in list(self.active_clients.keys()):
-                for socket in self.active_clients.get(str(order_id)):
-                    await socket.send_json(message)
+    async def send_location_message(
+            self, courier_service_id: int, order_ids: typing.List[int], message: dict,
+    ):
+        """Sends courier location message to monitors of the service and clients of the orders."""
+        topics = [(Topic.MONITOR, courier_service_id)]
+        topics.extend((Topic.CLIENT, str(order_id)) for order_id in order_ids or [])
+        self.hub.publish(topics, message)
 
     async def send_message_for_managers(self, partner_id: int, message: dict):
-        partners = self.active_managers.get(partner_id)
-        if partners:
-            for websocket in partners:
-                try:
-                    await websocket.send_json(
-                        message
-                    )
-                except (WebSocketDisconnect, RuntimeError):
-                    self.active_managers[partner_id].remove(websocket)
+        self.hub.publish([(Topic.MANAGER, partner_id)], message)
 
     async def send_new_order(self, courier_id, order: schemas.OrderGet):
         order = order.json(encoder=str)
@@ -114,21 +254,14 @@ class ConnectionManager:
             'type': enums.MessageType.NEW_ORDER.value,
             'data': data
         }
-        if courier_id in self.active_couriers:
-            await self.active_couriers[courier_id].send_json(message)
+        self.hub.publish([(Topic.COURIER, courier_id)], message)
 
     async def send_order_status_update(self, order_id, order_status):
         message = {
             'type': enums.MessageType.ORDER_STATUS_UPDATE.value,
             'data': json.dumps(order_status, default=str)
         }
-
-        if clients := self.active_clients.get(str(order_id)):
-            for websocket in clients:
-                try:
-                    await websocket.send_json(message)
-                except WebSocketDisconnect:
-                    self.active_clients[order_id].remove(websocket)
+        self.hub.publish([(Topic.CLIENT, str(order_id))], message)
 
 
 websocket_manager = ConnectionManager()
@@ -1,8 +1,10 @@
 # TODO: should wrap name into "" if name of UUID type
+import asyncio
 import contextlib
 import typing
 
 import asyncpg
+from loguru import logger
 import tortoise
 import tortoise.backends.base.client
 import tortoise.transactions
@@ -40,6 +42,71 @@ async def database_connection(dsn: typing.Optional[str] = None) -> typing.AsyncC
         await connection.close()
 
 
+_read_pool: typing.Optional[asyncpg.Pool] = None
+_read_pool_loop: typing.Optional[asyncio.AbstractEventLoop] = None
+_read_pool_lock: typing.Optional[asyncio.Lock] = None
+
+
+def _read_pool_terminate(pool: asyncpg.Pool) -> None:
+    """Closes connections of the pool opened in another event loop."""
+    try:
+        # the pool can not be awaited here, its connections belong to the other loop
+        pool.terminate()
+    except Exception as e:
+        # e.g. the loop of the pool is closed already
+        logger.warning(f'Read pool of the previous event loop was not terminated: {e}')
+
+
+async def read_pool_open() -> asyncpg.Pool:
+    """
+    Returns the shared pool of connections for raw SQL reads.
+
+    The pool is opened on first use and is sized separately from the
+    Tortoise pool, it is connected to ``conf.postgres.read_uri`` if set.
+    """
+    global _read_pool, _read_pool_loop, _read_pool_lock
+
+    loop = asyncio.get_running_loop()
+    if _read_pool_loop is not loop:
+        # pools can not be shared between event loops, e.g. of celery tasks
+        if _read_pool is not None:
+            _read_pool_terminate(_read_pool)
+        _read_pool, _read_pool_loop, _read_pool_lock = None, loop, asyncio.Lock()
+
+    async with _read_pool_lock:
+        if _read_pool is None:
+            _read_pool = await asyncpg.create_pool(
+                dsn=conf.postgres.read_uri or conf.postgres.uri,
+                min_size=conf.postgres.read_pool_min_size,
+                max_size=conf.postgres.read_pool_max_size,
+                command_timeout=conf.postgres.read_timeout,
+            )
+    return _read_pool
+
+
+async def read_pool_close() -> None:
+    global _read_pool
+
+    if _read_pool is None or _read_pool_loop is not asyncio.get_running_loop():
+        return
+
+    pool, _read_pool = _read_pool, None
+    await pool.close()
+
+
+@contextlib.asynccontextmanager
+async def read_connection() -> typing.AsyncContextManager[asyncpg.Connection]:
+    pool = await read_pool_open()
+    async with pool.acquire() as connection:
+        yield connection
+
+
+async def read_fetch(query: str, *args) -> typing.List[asyncpg.Record]:
+    """Runs read query with positional ``$n`` arguments on a pooled connection."""
+    async with read_connection() as connection:
+        return await connection.fetch(query, *args)
+
+
 async def initialize(generate_safe: bool = True) -> None:
     await tortoise.Tortoise.init(config=conf.tortoise.dict())
     # await tortoise.Tortoise.generate_schemas(safe=generate_safe)
@@ -47,6 +114,7 @@ async def initialize(generate_safe: bool = True) -> None:
 
 async def close_connections():
     await tortoise.Tortoise.close_connections()
+    await read_pool_close()
 
 
 async def database_exists(db_name: str) -> bool:
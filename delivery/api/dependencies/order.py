@@ -691,7 +691,7 @@ async def order_status_validate_payload(
     order_obj = await models.Order.get(id=order_id).select_related('deliverygraph', 'item')
     graph = order_obj.deliverygraph.graph
     graph_statuses = tuple(g['slug'] for g in graph)
-    status = await models.Status.get(id=status_id)
+    status = await models.catalog.status_get(status_id)
 
     status_not_belong_to_graph = 'This status does not belong to order deliverygraph'
     is_status_exist_in_graph = any(item['slug'] == status.slug for item in graph)
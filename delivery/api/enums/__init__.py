@@ -1,3 +1,4 @@
+from .config import RouterBackend  # noqa: F401
 from .config import SMSProvider  # noqa: F401
 from .deliverygraph import DeliveryGraphIcons  # noqa: F401
 from .deliverygraph import DeliverygraphSlugs  # noqa: F401
@@ -35,6 +36,7 @@ from .profile import ProfileType  # noqa: F401
 from .partner import PartnerType  # noqa: F401
 from .request_methods import RequestMethods  # noqa: F401
 from .statistics import ProgressInterval  # noqa: F401
+from .statistics import StatisticsMetric  # noqa: F401
 from .token import TokenTypeHint  # noqa: F401
 from .transport import TransportType  # noqa: F401
 from .verification import SMSActions  # noqa: F401
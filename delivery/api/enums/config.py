@@ -4,3 +4,8 @@ from . import descriptor
 class SMSProvider(descriptor.Descriptor):
     DATALOADER = 'dataloader'
     SMS_TRAFFIC = 'sms_traffic'
+
+
+class RouterBackend(descriptor.Descriptor):
+    ORTOOLS = 'ortools'
+    SERVICE = 'service'
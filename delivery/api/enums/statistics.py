@@ -32,3 +32,9 @@ progress_interval_to_query_map = {
         (to_date(to_char(dates, 'YYYY'), 'YYYY') + interval '1 year')::date -1) 
     """
 }
+
+
+class StatisticsMetric(descriptor.Descriptor):
+    STATUS = 'status'
+    STATE = 'state'
+    DELIVERY_STATUS = 'delivery_status'
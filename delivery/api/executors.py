@@ -1,9 +1,12 @@
 import asyncio
 import concurrent
+import concurrent.futures
 import enum
 import logging
 import typing
 
+from .conf import conf
+
 
 logger = logging.getLogger(__name__)
 
@@ -12,18 +15,21 @@ _executors = None
 
 class ExecutorType(enum.Enum):
     DEFAULT = 'default'
+    ROUTER = 'router'
 
 
 _executor_types = {
     ExecutorType.DEFAULT: concurrent.futures.ThreadPoolExecutor,
+    ExecutorType.ROUTER: concurrent.futures.ProcessPoolExecutor,
 }
 
 _executors_kwargs = {
     ExecutorType.DEFAULT: {},
+    ExecutorType.ROUTER: {'max_workers': conf.router.workers},
 }
 
 
-def _executors_get(executor_type: ExecutorType) -> concurrent.futures.ThreadPoolExecutor:
+def _executors_get(executor_type: ExecutorType) -> concurrent.futures.Executor:
     if executor_type not in ExecutorType.__members__.values():
         raise ValueError(f'Executor type {executor_type} does not exists')
 
@@ -75,6 +81,8 @@ def executors_shutdown():
                         thread._tstate_lock.release()
                     except Exception as e:
                         logger.info(f'Unable to stop thread: {thread} due to {e!r}')
+            else:
+                executor.shutdown(wait=False, cancel_futures=True)
 
         _executors = None
 
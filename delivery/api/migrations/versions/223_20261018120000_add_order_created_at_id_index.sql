@@ -0,0 +1,4 @@
+-- upgrade --
+CREATE INDEX IF NOT EXISTS "order_created_at_id_idx" ON "order" ("created_at" DESC, "id" DESC);
+-- downgrade --
+DROP INDEX IF EXISTS "order_created_at_id_idx";
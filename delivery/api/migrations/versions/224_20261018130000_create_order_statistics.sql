@@ -0,0 +1,126 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "order_statistics" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "partner_id" INT NOT NULL,
+    "city_id" INT NOT NULL DEFAULT 0,
+    "hour" TIMESTAMPTZ NOT NULL,
+    "metric" VARCHAR(16) NOT NULL,
+    "status" VARCHAR(32) NOT NULL,
+    "count" INT NOT NULL DEFAULT 0,
+    CONSTRAINT "uid_order_stati_partner_6d1f0e" UNIQUE ("partner_id", "city_id", "hour", "metric", "status")
+);
+CREATE INDEX IF NOT EXISTS "idx_order_stati_metric_3b9c41" ON "order_statistics" ("metric", "hour");
+COMMENT ON TABLE "order_statistics" IS 'Hourly order counters by partner, city and status';
+COMMENT ON COLUMN "order_statistics"."city_id" IS '0 for orders without city';
+COMMENT ON COLUMN "order_statistics"."metric" IS 'STATUS: status transitions, STATE: orders by creation hour and current delivery status, DELIVERY_STATUS: delivery status transitions';
+
+CREATE OR REPLACE FUNCTION order_delivery_status_bucket(delivery_status JSONB) RETURNS VARCHAR
+LANGUAGE SQL IMMUTABLE AS $$
+    SELECT CASE
+        WHEN delivery_status = '{}' THEN 'new'
+        WHEN delivery_status->>'status' IN ('cancelled', 'postponed', 'is_delivered', 'on-the-way-to-call-point')
+            THEN delivery_status->>'status'
+        WHEN delivery_status->>'status' IS NOT NULL THEN 'others'
+        ELSE 'unknown'
+    END
+$$;
+
+-- aerich splits statements by ";\n", so semicolons of function bodies are kept inside lines
+CREATE OR REPLACE FUNCTION order_statistics_statuses_inserted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT o.partner_id, coalesce(o.city_id, 0), date_trunc('hour', n.created_at), 'status', n.status_id::text, count(*)
+    FROM new_rows n
+    JOIN "order" o ON o.id = n.order_id
+    GROUP BY 1, 2, 3, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_statuses_deleted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT o.partner_id, coalesce(o.city_id, 0), date_trunc('hour', d.created_at), 'status', d.status_id::text, -count(*)
+    FROM old_rows d
+    JOIN "order" o ON o.id = d.order_id
+    GROUP BY 1, 2, 3, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_inserted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', h.hour), h.metric,
+           order_delivery_status_bucket(n.delivery_status), count(*)
+    FROM new_rows n
+    CROSS JOIN LATERAL (VALUES ('state', n.created_at), ('delivery_status', now())) AS h(metric, hour)
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_updated() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT partner_id, city_id, hour, metric, status, sum(count)
+    FROM (
+        SELECT d.partner_id, coalesce(d.city_id, 0) AS city_id, date_trunc('hour', d.created_at) AS hour,
+               'state' AS metric, order_delivery_status_bucket(d.delivery_status) AS status, -1 AS count
+        FROM old_rows d
+        UNION ALL
+        SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', n.created_at),
+               'state', order_delivery_status_bucket(n.delivery_status), 1
+        FROM new_rows n
+        UNION ALL
+        SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', now()),
+               'delivery_status', order_delivery_status_bucket(n.delivery_status), 1
+        FROM new_rows n
+        JOIN old_rows d ON d.id = n.id
+        WHERE order_delivery_status_bucket(d.delivery_status) <> order_delivery_status_bucket(n.delivery_status)
+    ) changes
+    GROUP BY partner_id, city_id, hour, metric, status
+    HAVING sum(count) <> 0
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_deleted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT d.partner_id, coalesce(d.city_id, 0), date_trunc('hour', d.created_at), 'state',
+           order_delivery_status_bucket(d.delivery_status), -count(*)
+    FROM old_rows d
+    GROUP BY 1, 2, 3, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE TRIGGER "order_statistics_statuses_inserted" AFTER INSERT ON "order.statuses"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_statistics_statuses_inserted();
+CREATE TRIGGER "order_statistics_statuses_deleted" AFTER DELETE ON "order.statuses"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_statistics_statuses_deleted();
+CREATE TRIGGER "order_statistics_orders_inserted" AFTER INSERT ON "order"
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_statistics_orders_inserted();
+CREATE TRIGGER "order_statistics_orders_updated" AFTER UPDATE ON "order"
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_statistics_orders_updated();
+CREATE TRIGGER "order_statistics_orders_deleted" AFTER DELETE ON "order"
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION order_statistics_orders_deleted();
+-- downgrade --
+DROP TRIGGER IF EXISTS "order_statistics_orders_deleted" ON "order";
+DROP TRIGGER IF EXISTS "order_statistics_orders_updated" ON "order";
+DROP TRIGGER IF EXISTS "order_statistics_orders_inserted" ON "order";
+DROP TRIGGER IF EXISTS "order_statistics_statuses_deleted" ON "order.statuses";
+DROP TRIGGER IF EXISTS "order_statistics_statuses_inserted" ON "order.statuses";
+DROP FUNCTION IF EXISTS order_statistics_orders_deleted();
+DROP FUNCTION IF EXISTS order_statistics_orders_updated();
+DROP FUNCTION IF EXISTS order_statistics_orders_inserted();
+DROP FUNCTION IF EXISTS order_statistics_statuses_deleted();
+DROP FUNCTION IF EXISTS order_statistics_statuses_inserted();
+DROP FUNCTION IF EXISTS order_delivery_status_bucket(JSONB);
+DROP TABLE IF EXISTS "order_statistics";
@@ -0,0 +1,32 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "courier_geolocation" (
+    "courier_id" INT NOT NULL,
+    "order_id" INT,
+    "recorded_at" TIMESTAMPTZ NOT NULL,
+    "latitude" DOUBLE PRECISION NOT NULL,
+    "longitude" DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY ("courier_id", "recorded_at")
+) PARTITION BY RANGE ("recorded_at");
+CREATE INDEX IF NOT EXISTS "idx_courier_geo_order_8c2f1a" ON "courier_geolocation" ("order_id", "recorded_at") WHERE "order_id" IS NOT NULL;
+COMMENT ON TABLE "courier_geolocation" IS 'Append-only courier geolocation pings partitioned by month';
+COMMENT ON COLUMN "courier_geolocation"."courier_id" IS 'ID of courier profile';
+COMMENT ON COLUMN "courier_geolocation"."recorded_at" IS 'Time the point was recorded on the device';
+
+-- aerich splits statements by ";\n", so semicolons of function bodies are kept inside lines
+CREATE OR REPLACE FUNCTION courier_geolocation_partition_create(month DATE) RETURNS VOID
+LANGUAGE plpgsql AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month)::date; BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF courier_geolocation FOR VALUES FROM (%L) TO (%L)',
+        'courier_geolocation_' || to_char(start_date, 'YYYY_MM'),
+        start_date,
+        (start_date + interval '1 month')::date
+    ); END
+$$;
+
+SELECT courier_geolocation_partition_create((date_trunc('month', now()) + make_interval(months => m))::date)
+FROM generate_series(-1, 2) AS m;
+-- downgrade --
+DROP FUNCTION IF EXISTS courier_geolocation_partition_create(DATE);
+DROP TABLE IF EXISTS "courier_geolocation";
@@ -0,0 +1,11 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "outbox" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "channel" VARCHAR(128) NOT NULL,
+    "message" JSONB NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+COMMENT ON TABLE "outbox" IS 'Messages to be published to Redis channels once their transactions are committed';
+COMMENT ON COLUMN "outbox"."channel" IS 'Redis channel the message is published to';
+-- downgrade --
+DROP TABLE IF EXISTS "outbox";
@@ -0,0 +1,155 @@
+-- upgrade --
+CREATE TABLE IF NOT EXISTS "order_statistics_delta" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "partner_id" INT NOT NULL,
+    "city_id" INT NOT NULL DEFAULT 0,
+    "hour" TIMESTAMPTZ NOT NULL,
+    "metric" VARCHAR(16) NOT NULL,
+    "status" VARCHAR(32) NOT NULL,
+    "count" INT NOT NULL
+);
+COMMENT ON TABLE "order_statistics_delta" IS 'Changes of order_statistics appended by triggers, merged into it by the compactor';
+
+-- triggers only append changes, so concurrent writers never wait for the same rollup rows
+CREATE OR REPLACE FUNCTION order_statistics_statuses_inserted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics_delta (partner_id, city_id, hour, metric, status, count)
+    SELECT o.partner_id, coalesce(o.city_id, 0), date_trunc('hour', n.created_at), 'status', n.status_id::text, count(*)
+    FROM new_rows n
+    JOIN "order" o ON o.id = n.order_id
+    GROUP BY 1, 2, 3, 5; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_statuses_deleted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics_delta (partner_id, city_id, hour, metric, status, count)
+    SELECT o.partner_id, coalesce(o.city_id, 0), date_trunc('hour', d.created_at), 'status', d.status_id::text, -count(*)
+    FROM old_rows d
+    JOIN "order" o ON o.id = d.order_id
+    GROUP BY 1, 2, 3, 5; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_inserted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics_delta (partner_id, city_id, hour, metric, status, count)
+    SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', h.hour), h.metric,
+           order_delivery_status_bucket(n.delivery_status), count(*)
+    FROM new_rows n
+    CROSS JOIN LATERAL (VALUES ('state', n.created_at), ('delivery_status', now())) AS h(metric, hour)
+    GROUP BY 1, 2, 3, 4, 5; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_updated() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics_delta (partner_id, city_id, hour, metric, status, count)
+    SELECT partner_id, city_id, hour, metric, status, sum(count)
+    FROM (
+        SELECT d.partner_id, coalesce(d.city_id, 0) AS city_id, date_trunc('hour', d.created_at) AS hour,
+               'state' AS metric, order_delivery_status_bucket(d.delivery_status) AS status, -1 AS count
+        FROM old_rows d
+        UNION ALL
+        SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', n.created_at),
+               'state', order_delivery_status_bucket(n.delivery_status), 1
+        FROM new_rows n
+        UNION ALL
+        SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', now()),
+               'delivery_status', order_delivery_status_bucket(n.delivery_status), 1
+        FROM new_rows n
+        JOIN old_rows d ON d.id = n.id
+        WHERE order_delivery_status_bucket(d.delivery_status) <> order_delivery_status_bucket(n.delivery_status)
+    ) changes
+    GROUP BY partner_id, city_id, hour, metric, status
+    HAVING sum(count) <> 0; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_deleted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics_delta (partner_id, city_id, hour, metric, status, count)
+    SELECT d.partner_id, coalesce(d.city_id, 0), date_trunc('hour', d.created_at), 'state',
+           order_delivery_status_bucket(d.delivery_status), -count(*)
+    FROM old_rows d
+    GROUP BY 1, 2, 3, 5; RETURN NULL; END
+$$;
+-- downgrade --
+CREATE OR REPLACE FUNCTION order_statistics_statuses_inserted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT o.partner_id, coalesce(o.city_id, 0), date_trunc('hour', n.created_at), 'status', n.status_id::text, count(*)
+    FROM new_rows n
+    JOIN "order" o ON o.id = n.order_id
+    GROUP BY 1, 2, 3, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_statuses_deleted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT o.partner_id, coalesce(o.city_id, 0), date_trunc('hour', d.created_at), 'status', d.status_id::text, -count(*)
+    FROM old_rows d
+    JOIN "order" o ON o.id = d.order_id
+    GROUP BY 1, 2, 3, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_inserted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', h.hour), h.metric,
+           order_delivery_status_bucket(n.delivery_status), count(*)
+    FROM new_rows n
+    CROSS JOIN LATERAL (VALUES ('state', n.created_at), ('delivery_status', now())) AS h(metric, hour)
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_updated() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT partner_id, city_id, hour, metric, status, sum(count)
+    FROM (
+        SELECT d.partner_id, coalesce(d.city_id, 0) AS city_id, date_trunc('hour', d.created_at) AS hour,
+               'state' AS metric, order_delivery_status_bucket(d.delivery_status) AS status, -1 AS count
+        FROM old_rows d
+        UNION ALL
+        SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', n.created_at),
+               'state', order_delivery_status_bucket(n.delivery_status), 1
+        FROM new_rows n
+        UNION ALL
+        SELECT n.partner_id, coalesce(n.city_id, 0), date_trunc('hour', now()),
+               'delivery_status', order_delivery_status_bucket(n.delivery_status), 1
+        FROM new_rows n
+        JOIN old_rows d ON d.id = n.id
+        WHERE order_delivery_status_bucket(d.delivery_status) <> order_delivery_status_bucket(n.delivery_status)
+    ) changes
+    GROUP BY partner_id, city_id, hour, metric, status
+    HAVING sum(count) <> 0
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+CREATE OR REPLACE FUNCTION order_statistics_orders_deleted() RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT d.partner_id, coalesce(d.city_id, 0), date_trunc('hour', d.created_at), 'state',
+           order_delivery_status_bucket(d.delivery_status), -count(*)
+    FROM old_rows d
+    GROUP BY 1, 2, 3, 5
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count; RETURN NULL; END
+$$;
+
+LOCK TABLE "order_statistics_delta" IN EXCLUSIVE MODE;
+INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+SELECT partner_id, city_id, hour, metric, status, sum(count)
+FROM order_statistics_delta
+GROUP BY partner_id, city_id, hour, metric, status
+ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count;
+DROP TABLE IF EXISTS "order_statistics_delta";
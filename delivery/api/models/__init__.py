@@ -29,6 +29,8 @@ from .country import country_get_list  # noqa: F401
 from .country import country_update  # noqa: F401
 from .comment import Comment
 from .comment import CommentImage
+from .reference_catalog import ReferenceCatalog  # noqa: F401
+from .reference_catalog import catalog  # noqa: F401
 from .deliverygraph import DeliveryGraph  # noqa: F401
 from .deliverygraph import deliverygraph_create  # noqa: F401
 from .deliverygraph import deliverygraph_delete  # noqa: F401
@@ -73,9 +75,14 @@ from .group import group_permission_remove  # noqa: F401
 from .group import group_user_add  # noqa: F401
 from .group import group_user_remove  # noqa: F401
 from .history import History  # noqa: F401
+from .history import HistoryBuffer  # noqa: F401
 from .history import HistoryCreationError  # noqa: F401
+from .history import InitiatorResolver  # noqa: F401
+from .history import history_buffer  # noqa: F401
+from .history import history_bulk_create  # noqa: F401
 from .history import history_create  # noqa: F401
 from .history import history_get_list  # noqa: F401
+from .history import serialize_initiator_info  # noqa: F401
 from .invited_user import InvitedUser  # noqa: F401
 from .invited_user import InvitedUserEntityError  # noqa: F401
 from .invited_user import InvitedUserNotFound  # noqa: F401
@@ -118,11 +125,13 @@ from .order import OrderStatuses  # noqa: F401
 from .order import StatusAfterError  # noqa: F401
 from .order import StatusAlreadyCurrent  # noqa: F401
 from .order import check_is_delivery_points_in_polygon  # noqa: F401
+from .order import orders_area_assign  # noqa: F401
 from .order import external_order_create  # noqa: F401
 from .order import external_order_create_v2 # noqa: F401
 from .order import get_external_order
 from .order import order_address_get_list  # noqa: F401
 from .order import order_address_update  # noqa: F401
+from .order import order_coordinates_get_list  # noqa: F401
 from .order import order_address_update_v2  # noqa: F401
 from .order import order_average_time_deviation  # noqa: F401
 from .order import order_biometry_verify  # noqa: F401
@@ -151,6 +160,7 @@ from .order import order_mass_status_update  # noqa: F401
 from .order import order_pan  # noqa: F401
 from .order import order_pan_v2  # noqa: F401
 from .order import order_report  # noqa: F401
+from .order import order_report_streaming  # noqa: F401
 from .order import order_reschedule  # noqa: F401
 from .order import order_restore  # noqa: F401
 from .order import order_accept_cancel  # noqa: F401
@@ -168,9 +178,21 @@ from .order import order_update_delivery_status_on_status_change  # noqa: F401
 from .order import order_update_status  # noqa: F401
 from .order import order_revise  # noqa: F401
 from .order import order_finalize_at_cs  # noqa: F401
+from .order import orders_bulk_set_datetime  # noqa: F401
 from .order import orders_get_count  # noqa: F401
+from .order import orders_get_local_times  # noqa: F401
+from .order import orders_local_times  # noqa: F401
 from .order import order_statuses_get_count  # noqa: F401
 from .order import order_status_bulk_update  # noqa: F401
+from .order import send_new_orders_to_couriers  # noqa: F401
+from .outbox import OutboxDispatcher  # noqa: F401
+from .outbox import OutboxMessage  # noqa: F401
+from .outbox import OutboxRelay  # noqa: F401
+from .outbox import outbox_add  # noqa: F401
+from .outbox import outbox_add_many  # noqa: F401
+from .outbox import outbox_dispatcher  # noqa: F401
+from .outbox import outbox_relay  # noqa: F401
+from .outbox import outbox_stats  # noqa: F401
 from .partner import Partner  # noqa: F401
 from .partner import PartnerCity  # noqa: F401
 from .partner import PartnerActionException  # noqa: F401
@@ -235,6 +257,7 @@ from .profile import StatusAlreadySet  # noqa: F401
 from .profile import courier_list  # noqa: F401
 from .profile import courier_stats  # noqa: F401
 from .profile import courier_stats_get  # noqa: F401
+from .profile import couriers_get_stats  # noqa: F401
 from .profile import courier_end_work  # noqa: F401
 from .profile import courier_start_work  # noqa: F401
 from .profile import get_all_user_profiles  # noqa: F401
@@ -259,8 +282,14 @@ from .public_api_token import public_api_token_get  # noqa: F401
 from .rate import Rate  # noqa: F401
 from .rate import rate_list  # noqa: F401
 from .statistics import CourierStat  # noqa: F401
+from .statistics import OrderStatistics  # noqa: F401
+from .statistics import OrderStatisticsCompactor  # noqa: F401
+from .statistics import OrderStatisticsDelta  # noqa: F401
 from .statistics import courier_progress_get  # noqa: F401
 from .statistics import courier_stat_get  # noqa: F401
+from .statistics import order_statistics_backfill  # noqa: F401
+from .statistics import order_statistics_compact  # noqa: F401
+from .statistics import order_statistics_compactor  # noqa: F401
 from .statistics import statistics_get  # noqa: F401
 from .statistics import statistics_get_by_date  # noqa: F401
 from .statistics import statistics_get_by_hour  # noqa: F401
@@ -275,6 +304,7 @@ from .status import status_update  # noqa: F401
 from .token import RevokedToken  # noqa: F401
 from .token import token_get  # noqa: F401
 from .token import token_revoke  # noqa: F401
+from .token import token_revoked_sync  # noqa: F401
 from .transport import Transport  # noqa: F401
 from .transport import TransportNotFound  # noqa: F401
 from .transport import transport_create  # noqa: F401
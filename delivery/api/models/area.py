@@ -94,7 +94,14 @@ async def area_create(area: schemas.AreaCreate):
 async def area_delete(area_id: int, default_filter_args: list = None):
     if default_filter_args is None:
         default_filter_args = ()
-    await Area.all_objects.filter(*default_filter_args).distinct().get(id=area_id).delete()
+    try:
+        area = await Area.all_objects.filter(*default_filter_args).distinct().get(id=area_id)
+    except DoesNotExist:
+        raise DoesNotExist(
+            f'area with given ID: {area_id} was not found',
+        )
+    # the instance is deleted, so post_delete signals invalidate area indexes of the catalog
+    await area.delete()
 
 
 @atomic()
@@ -133,7 +133,7 @@ async def feedback_create(
         **kwargs,
     )
     order_obj = await created.order
-    created.created_at = await order_obj.localtime
+    created.created_at = order_obj.localtime
     if reasons:
         reason_objects = await FeedbackReason.filter(id__in=reasons)
         final_score = 0
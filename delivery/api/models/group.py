@@ -7,6 +7,7 @@ from .permission import Permission
 from .user import User
 from .. import enums
 from .. import schemas
+from ..services import principal
 
 
 class GroupNotFound(Exception):
@@ -102,6 +103,7 @@ async def group_permission_change(group_slug: str, permission_slug: str,
         await group.permission_set.add(permission)
     elif action == action.PERM_REMOVE:
         await group.permission_set.remove(permission)
+    await principal.service.invalidate_all()
 
     group.permissions = await group.permission_set
 
@@ -118,6 +120,7 @@ async def group_user_change(group_slug: str, user_id: int,
         await group.user_set.add(user)
     elif action.USER_REMOVE:
         await group.user_set.remove(user)
+    await principal.service.invalidate_user(user_id)
 
     group.users = await group.user_set
 
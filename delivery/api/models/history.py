@@ -1,10 +1,17 @@
+import asyncio
+import typing
+
 import tortoise
 from fastapi_pagination.ext.tortoise import paginate
+from loguru import logger
+from tortoise.transactions import in_transaction
 
 from .. import enums
 from .. import models
 from .. import schemas
 from .. import utils
+from ..conf import conf
+from ..context_vars import initiators_context
 from ..modules.order_chain.infrastructure.db_table import OrderChainHistory
 from ..modules.shipment_point.infrastructure.db_table import PartnerShipmentPointHistory
 
@@ -34,50 +41,229 @@ class History(tortoise.Model):
         table = 'history'
 
 
+# multi-row inserts are split to stay below the limit of query parameters
+HISTORY_INSERT_BATCH_SIZE = 1000
+
+
+def _history_model(model_type: str) -> typing.Type[tortoise.Model]:
+    if model_type == enums.HistoryModelName.ORDER_CHAIN.value:
+        return OrderChainHistory
+    if model_type == enums.HistoryModelName.PARTNER_SHIPMENT_POINTS.value:
+        return PartnerShipmentPointHistory
+    return History
+
+
 @utils.as_dict(from_model=True)
 async def history_create(schema: schemas.HistoryCreate):
     try:
-        if schema.model_type == enums.HistoryModelName.ORDER_CHAIN.value:
-            return await OrderChainHistory.create(**schema.dict(exclude_unset=True))
+        model = _history_model(schema.model_type)
+        return await model.create(**schema.dict(exclude_unset=True))
+    except tortoise.exceptions.IntegrityError as e:
+        raise HistoryCreationError(e)
+
+
+async def _history_insert(model: typing.Type[tortoise.Model], entries: list, connection) -> None:
+    fields_map = model._meta.fields_map
+    columns = [
+        column for column in model._meta.fields_db_projection
+        if not fields_map[column].generated
+    ]
+    quoted_columns = ', '.join(f'"{model._meta.fields_db_projection[column]}"' for column in columns)
+    for start in range(0, len(entries), HISTORY_INSERT_BATCH_SIZE):
+        rows, values = [], []
+        for entry in entries[start:start + HISTORY_INSERT_BATCH_SIZE]:
+            # converted the same way as by create, e.g. created_at is set by auto_now_add
+            values.extend(fields_map[column].to_db_value(getattr(entry, column), entry) for column in columns)
+            first = len(values) - len(columns) + 1
+            rows.append('(' + ', '.join(f'${i}' for i in range(first, len(values) + 1)) + ')')
+        await connection.execute_query(
+            f'INSERT INTO "{model._meta.db_table}" ({quoted_columns}) VALUES {", ".join(rows)}',
+            values,
+        )
+
 
-        if schema.model_type == enums.HistoryModelName.PARTNER_SHIPMENT_POINTS.value:
-            return await PartnerShipmentPointHistory.create(**schema.dict(exclude_unset=True))
+async def history_bulk_create(entries: typing.Iterable[schemas.HistoryCreate]) -> int:
+    """
+    Creates history entries with a single multi-row INSERT per history table.
 
-        return await History.create(**schema.dict(exclude_unset=True))
+    Entries of order chains and partner shipment points are written to their
+    own tables, all entries are written in one transaction.
+    """
+    models_entries: typing.Dict[typing.Type[tortoise.Model], list] = {}
+    count = 0
+    for schema in entries:
+        model = _history_model(schema.model_type)
+        models_entries.setdefault(model, []).append(model(**schema.dict(exclude_unset=True)))
+        count += 1
+    if not count:
+        return 0
+
+    try:
+        async with in_transaction('default') as connection:
+            for model, model_entries in models_entries.items():
+                await _history_insert(model, model_entries, connection)
     except tortoise.exceptions.IntegrityError as e:
         raise HistoryCreationError(e)
+    return count
+
+
+class HistoryBuffer:
+    """
+    Write-behind buffer of history entries which are not critical to lose.
+
+    Entries are written by history_bulk_create when the buffer gets full or
+    after the flush interval. Entries of a failed write are logged and dropped.
+    Until the buffer is started, entries are written immediately.
+
+    No entries are buffered at the moment, so the application doesn't start
+    the buffer. A producer starts it at startup and shuts it down on exit.
+    """
+
+    def __init__(self, size: int = None, flush_interval: float = None):
+        self.size = size or conf.history.buffer_size
+        self.flush_interval = flush_interval or conf.history.flush_interval
+        self.started = False
+        self._entries: typing.List[schemas.HistoryCreate] = []
+        self._timer: typing.Optional[asyncio.Task] = None
+        self._flushes: typing.Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self.started = True
+
+    async def add(self, schema: schemas.HistoryCreate) -> None:
+        if not self.started:
+            await history_create(schema)
+            return
+
+        self._entries.append(schema)
+        if len(self._entries) >= self.size:
+            task = asyncio.create_task(self.flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        entries, self._entries = self._entries, []
+        if not entries:
+            return
+        try:
+            await history_bulk_create(entries)
+        except Exception:
+            logger.exception(f'Failed to write {len(entries)} buffered history entries')
+
+    async def shutdown(self) -> None:
+        self.started = False
+        if self._timer is not None:
+            self._timer.cancel()
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+
+history_buffer = HistoryBuffer()
+
+
+PARTNER_INITIATOR_FIELDS = ('id', 'name_en', 'name_kk', 'name_ru', 'name_zh')
+USER_INITIATOR_FIELDS = ('id', 'first_name', 'last_name', 'middle_name')
+USER_INITIATOR_TYPES = (enums.InitiatorType.USER.value, enums.InitiatorType.IMPORT.value)
+
+
+class InitiatorResolver:
+    """
+    Resolves initiators of history entries with one query per entity type:
+    users, their profiles and partners.
+
+    Resolved entities are memoized in ``memo``, which is kept for the whole
+    request by ``initiators_context``.
+    """
+
+    def __init__(self, memo: dict = None):
+        self.memo = memo if memo is not None else {}
+        self.users: dict = self.memo.setdefault('users', {})
+        self.profile_types: dict = self.memo.setdefault('profile_types', {})
+        self.partners: dict = self.memo.setdefault('partners', {})
+
+    async def resolve(self, entries) -> None:
+        user_ids, profile_user_ids, partner_ids = set(), set(), set()
+        for entry in entries:
+            if entry.initiator_type in USER_INITIATOR_TYPES:
+                user_ids.add(entry.initiator_id)
+                if not entry.initiator_role:
+                    profile_user_ids.add(entry.initiator_id)
+            else:
+                partner_ids.add(entry.initiator_id)
+
+        await self._load_users(user_ids - self.users.keys())
+        await self._load_profile_types({
+            user_id for user_id in profile_user_ids - self.profile_types.keys()
+            if self.users[user_id] is not None
+        })
+        await self._load_partners(partner_ids - self.partners.keys())
+
+        for entry in entries:
+            if entry.initiator_type in USER_INITIATOR_TYPES:
+                entry.initiator = self._user_initiator(entry)
+            else:
+                partner = self.partners[entry.initiator_id] or {}
+                entry.initiator = {field: partner.get(field) for field in PARTNER_INITIATOR_FIELDS}
+
+    def _user_initiator(self, entry) -> dict:
+        user = self.users[entry.initiator_id]
+        if user is None:
+            return {}
+        profile_types = (
+            [entry.initiator_role] if entry.initiator_role
+            else self.profile_types[entry.initiator_id]
+        )
+        return {
+            'id': user['id'],
+            'profile_types': profile_types,
+            'first_name': user['first_name'],
+            'last_name': user['last_name'],
+            'middle_name': user['middle_name'],
+        }
+
+    async def _load_users(self, user_ids: set) -> None:
+        if not user_ids:
+            return
+        users = await models.User.filter(id__in=user_ids).values(*USER_INITIATOR_FIELDS)
+        self.users.update(dict.fromkeys(user_ids))
+        self.users.update((user['id'], user) for user in users)
+
+    async def _load_profile_types(self, user_ids: set) -> None:
+        if not user_ids:
+            return
+        profile_types = list(models.profile_types_to_models)
+        query = ' UNION ALL '.join(
+            f'SELECT {position} AS "position", "user_id" FROM "{model._meta.db_table}" '
+            f'WHERE "user_id" = ANY($1::int[])'
+            for position, model in enumerate(models.profile_types_to_models.values())
+        )
+        connection = tortoise.Tortoise.get_connection('default')
+        _, rows = await connection.execute_query(
+            f'SELECT DISTINCT "position", "user_id" FROM ({query}) AS "profiles" ORDER BY "position"',
+            [list(user_ids)],
+        )
+        for user_id in user_ids:
+            self.profile_types[user_id] = []
+        for row in rows:
+            self.profile_types[row['user_id']].append(profile_types[row['position']])
+
+    async def _load_partners(self, partner_ids: set) -> None:
+        if not partner_ids:
+            return
+        partners = await models.Partner.filter(id__in=partner_ids).values(*PARTNER_INITIATOR_FIELDS)
+        self.partners.update(dict.fromkeys(partner_ids))
+        self.partners.update((partner['id'], partner) for partner in partners)
+
 
 async def serialize_initiator_info(queryset):
-    for history in queryset:
-        if history.initiator_type in [
-            enums.InitiatorType.USER.value, enums.InitiatorType.IMPORT.value
-        ]:
-            try:
-                initiator = await models.user_get(with_history=False,
-                                                  id=history.initiator_id)
-                profiles = await models.get_all_user_profiles(initiator['id'])
-                profile_types = ([history.initiator_role, ] if history.initiator_role
-                                 else [value['type'] for value in profiles])
-                history.initiator = {
-                    'id': initiator['id'],
-                    'profile_types': profile_types,
-                    'first_name': initiator['first_name'],
-                    'last_name': initiator['last_name'],
-                    'middle_name': initiator['middle_name'],
-                }
-            except models.UserNotFound:
-                history.initiator = {}
-        else:
-            initiator = await models.partner_get(
-                partner_id=history.initiator_id, with_info=False
-            )
-            history.initiator = {
-                'id': initiator.get('id', None),
-                'name_en': initiator.get('name_en', None),
-                'name_kk': initiator.get('name_kk', None),
-                'name_ru': initiator.get('name_ru', None),
-                'name_zh': initiator.get('name_zh', None),
-            }
+    await InitiatorResolver(initiators_context.get()).resolve(queryset)
+
 
 async def history_get_list(pagination_params=None, **kwargs):
     if kwargs.get('model_type', None) == enums.HistoryModelName.ORDER_CHAIN.value:
@@ -1,4 +1,7 @@
+import copy
 import os
+from typing import Iterable
+from typing import List
 from typing import Optional
 
 import tortoise
@@ -28,3 +31,83 @@ class DeleteFilesMixin:
     def file_fields(self):
         return [name for name, field in self._meta.fields_map.items() if
                 isinstance(field, custom_fields.FileField)]
+
+
+class TrackChangesMixin:
+    """
+    Remembers field values of the instance loaded from or saved to the database.
+
+    The changed fields are therefore known without fetching the row again.
+    ``save()`` without ``update_fields`` writes the changed fields only and
+    skips the query when nothing has changed.
+    """
+
+    _snapshot: Optional[dict] = None
+
+    @classmethod
+    def _init_from_db(cls, **kwargs):
+        self = super()._init_from_db(**kwargs)
+        self._take_snapshot()
+        return self
+
+    def _take_snapshot(self, field_names: Optional[Iterable[str]] = None) -> None:
+        if field_names is None or self._snapshot is None:
+            self._snapshot = {}
+            field_names = self._meta.fields_db_projection
+        for name in field_names:
+            if name in self._meta.fields_db_projection and hasattr(self, name):
+                value = getattr(self, name)
+                if isinstance(value, (dict, list)):
+                    # JSON values may be changed in place
+                    value = copy.deepcopy(value)
+                self._snapshot[name] = value
+
+    @property
+    def is_tracked(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def changed_fields(self) -> List[str]:
+        if self._snapshot is None:
+            return []
+        return [name for name in self._meta.fields_db_projection if self.has_changed(name)]
+
+    def has_changed(self, field_name: str) -> bool:
+        if self._snapshot is None:
+            return False
+        if field_name not in self._snapshot:
+            # a field of partial instance may be set after loading
+            return hasattr(self, field_name)
+        return getattr(self, field_name) != self._snapshot[field_name]
+
+    def initial_value(self, field_name: str):
+        return self._snapshot[field_name]
+
+    async def refresh_from_db(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        using_db: Optional[BaseDBAsyncClient] = None,
+    ) -> None:
+        await super().refresh_from_db(fields, using_db)
+        # refreshed values are not changes
+        self._take_snapshot(fields)
+
+    async def save(
+        self,
+        using_db: Optional[BaseDBAsyncClient] = None,
+        update_fields: Optional[Iterable[str]] = None,
+        force_create: bool = False,
+        force_update: bool = False,
+    ) -> None:
+        if update_fields is None and not force_create and self.is_tracked and self.pk is not None:
+            update_fields = self.changed_fields
+            if not update_fields:
+                return
+            update_fields.extend(
+                name for name, field in self._meta.fields_map.items()
+                if getattr(field, 'auto_now', False) and name not in update_fields
+                and hasattr(self, name)
+            )
+
+        await super().save(using_db, update_fields, force_create, force_update)
+        self._take_snapshot(update_fields)
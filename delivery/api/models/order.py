@@ -1,7 +1,7 @@
 import datetime
 import io
-import json
 import typing
+from itertools import groupby
 from tempfile import SpooledTemporaryFile
 from typing import List, Iterable
 from typing import Optional
@@ -15,8 +15,7 @@ import xlsxwriter
 from fastapi_pagination.ext.tortoise import paginate
 from loguru import logger
 from pydantic import parse_obj_as
-from shapely.geometry import Point
-from shapely.geometry.polygon import Polygon
+from starlette.concurrency import run_in_threadpool
 from starlette.datastructures import UploadFile
 from tortoise import BaseDBAsyncClient
 from tortoise import Model
@@ -37,20 +36,23 @@ from api.modules.delivery_point.infrastructure.repository import DeliveryPointRe
 from api.modules.shipment_point.infrastructure.repository import ShipmentPointRepository
 from .fields import ArrayField
 from .managers import ArchiveManager
+from .mixins import TrackChangesMixin
 from .partner_callbacks import get_headers
 from .profile import ProfileCourier
 from api import exceptions, enums
 from .. import common
 from .. import models
-from .. import redis_module
 from .. import schemas
 from .. import services
 from ..conf import conf
 from ..controllers.websocket_managers import websocket_manager
+from ..utils.pagination import paginate_by_cursor
 from api.domain.order.delivery_graph_old import get_delivery_graph_step
 from ..enums import *
 from ..enums.descriptions import delivery_status_description
 from ..modules.city.infrastructure.db_table import City
+from ..modules.city.infrastructure.db_table import cities_localtime_get
+from ..modules.city.infrastructure.db_table import city_zone_info
 from ..modules.city.infrastructure.repository import CityRepository
 from ..modules.delivery_point import DeliveryPoint
 from ..modules.delivery_point.schemas import DeliveryPointCreate, DeliveryPointGet
@@ -64,6 +66,7 @@ from ..schemas import UserCurrent
 from ..schemas.deliverygraph import DeliveryGraphItemGet
 from ..schemas.order_payload import CardPayload, POSTerminalPayload
 from ..services import router, sms
+from ..services.excel_loader.excel_loader import iterate_orders_for_report
 from ..services.excel_loader.excel_loader import prepare_orders_for_report
 from ..services.sms.notification import send_courier_assigned_notification
 from ..services.sms.notification import send_feedback_link
@@ -71,7 +74,7 @@ from ..services.sms.notification import send_post_control_otp
 from api.domain.pan import Pan
 
 from api.adapters.freedom_bank_otp import FreedomBankOTPAdapter
-from .publisher import publish_callback, call_task
+from .publisher import publish_callback, call_task, call_tasks
 
 
 class OrderAlreadyExists(Exception):
@@ -148,7 +151,7 @@ class OrderAlreadyHaveCourierError(Exception):
     """Raises when all polygons do not contain point"""
 
 
-class Order(Model):
+class Order(TrackChangesMixin, Model):
     id = fields.IntField(pk=True)
     city: fields.ForeignKeyNullableRelation['City'] = fields.ForeignKeyField(
         'versions.City',
@@ -304,8 +307,8 @@ class Order(Model):
         :raises IncompleteInstanceError: If the model is partial and the fields are not available for persistence.
         :raises IntegrityError: If the model can't be created or updated (specifically if force_create or force_update has been set)
 
-        We overrided this method to achieve old and new state of the object, hence send respective notifications
-        on model change.
+        We overrided this method to compare old and new state of the object, hence send respective notifications
+        on model change. The old state is known from the values the object was loaded with.
         """
         save_coro = super().save(using_db, update_fields, force_create, force_update)
 
@@ -316,15 +319,22 @@ class Order(Model):
                 return result
             await send_new_order_to_courier(self)
             return result
-        if not (old_obj := await self.__class__.get_or_none(id=self.id)):
-            return await save_coro
+        if not self.is_tracked:
+            # the object was not loaded from the database
+            if not (old_obj := await self.__class__.get_or_none(id=self.id)):
+                return await save_coro
+            courier_changed = self.courier_id != old_obj.courier_id
+            delivery_status_changed = self.delivery_status != old_obj.delivery_status
+        else:
+            courier_changed = self.has_changed('courier_id')
+            delivery_status_changed = self.has_changed('delivery_status')
 
         await save_coro
 
-        if self.courier_id and self.courier_id != old_obj.courier_id:
+        if self.courier_id and courier_changed:
             await send_new_order_to_courier(self)
 
-        if self.delivery_status != old_obj.delivery_status:
+        if delivery_status_changed:
             await websocket_manager.send_message_for_managers(
                 self.partner_id, {
                     'type': MessageType.DELIVERY_STATUS_UPDATE,
@@ -335,18 +345,15 @@ class Order(Model):
                 })
 
     @property
-    async def city_tz(self) -> ZoneInfo:
-        if not isinstance(self.city, City):
-            await self.fetch_related('city')
-        if self.city is None:
-            return ZoneInfo('UTC')
-        return self.city.tz
+    def city_tz(self) -> ZoneInfo:
+        if isinstance(self.city, City):
+            return self.city.tz
+        return city_zone_info(self.city_id)
 
     @property
-    async def localtime(self) -> datetime.datetime:
+    def localtime(self) -> datetime.datetime:
         current_time = now()
-        city_tz = await self.city_tz
-        return current_time + city_tz.utcoffset(current_time)
+        return current_time + self.city_tz.utcoffset(current_time)
 
 
 class OrderAddress(Model):
@@ -539,6 +546,55 @@ async def order_address_get_list(order_id: int) -> list:
     return result
 
 
+async def order_coordinates_get_list(order_ids: List[int]) -> dict:
+    """Returns shipment and delivery coordinates of many orders in one query.
+
+    Old style ``order.addresses`` rows take precedence over the shipment and
+    delivery point references, the same way ``order_address_get_list`` does.
+    """
+    rows = await Order.all_objects.filter(id__in=order_ids).order_by(
+        'id', 'address_set__position',
+    ).values(
+        'id',
+        'address_set__type',
+        'address_set__place__latitude',
+        'address_set__place__longitude',
+        'shipment_point_id',
+        'shipment_point__latitude',
+        'shipment_point__longitude',
+        'delivery_point_id',
+        'delivery_point__latitude',
+        'delivery_point__longitude',
+    )
+    result = {}
+    for row in rows:
+        coordinates = result.setdefault(row['id'], {
+            'shipment_point': None,
+            'delivery_points': [],
+        })
+        if row['address_set__type'] is None:
+            if row['shipment_point_id'] is not None:
+                coordinates['shipment_point'] = (
+                    row['shipment_point__latitude'],
+                    row['shipment_point__longitude'],
+                )
+            if row['delivery_point_id'] is not None:
+                coordinates['delivery_points'].append((
+                    row['delivery_point__latitude'],
+                    row['delivery_point__longitude'],
+                ))
+            continue
+        point = (
+            row['address_set__place__latitude'],
+            row['address_set__place__longitude'],
+        )
+        if row['address_set__type'] == AddressType.SHIPMENT_POINT:
+            coordinates['shipment_point'] = coordinates['shipment_point'] or point
+        elif row['address_set__type'] == AddressType.DELIVERY_POINT:
+            coordinates['delivery_points'].append(point)
+    return result
+
+
 async def orders_get_count(default_filter_args, filter_args) -> int:
     has_ready_for_shipment = f"order__deliverygraph.graph @? '$.slug[*] ? (@ == \"{StatusSlug.READY_FOR_SHIPMENT}\")'"
 
@@ -613,7 +669,7 @@ async def order_statuses_get_count(order_default_args, order_group_default_args,
 
 async def get_current_orders_for_courier(courier_id):
     courier_obj = await models.ProfileCourier.get(id=courier_id).select_related('city')
-    courier_time = await courier_obj.localtime
+    courier_time = courier_obj.localtime
     return await Order.filter(
         ~Q(delivery_status__filter={
             'status': OrderDeliveryStatus.IS_DELIVERED.value}
@@ -624,6 +680,12 @@ async def get_current_orders_for_courier(courier_id):
         courier_id=courier_id, ).order_by('-delivery_datetime')
 
 
+async def _order_paginate(qs, count_qs, pagination_params):
+    if isinstance(pagination_params, schemas.CursorParams):
+        return await paginate_by_cursor(qs, pagination_params, count_query=count_qs)
+    return await paginate(qs, params=pagination_params)
+
+
 async def order_get_list(pagination_params, default_filter_args, filter_args, profile_type: ProfileType = None):
     has_ready_for_shipment = f"order__deliverygraph.graph @? '$.slug[*] ? (@ == \"{StatusSlug.READY_FOR_SHIPMENT}\")'"
 
@@ -642,7 +704,7 @@ async def order_get_list(pagination_params, default_filter_args, filter_args, pr
             'order_chain_stages_set', OrderChainStage.all(), 'order_chain_stages',
         ),
     ).select_related('area', 'city', 'courier__user', 'item', 'deliverygraph', 'partner',)
-    paginated_result = await paginate(qs, params=pagination_params)
+    paginated_result = await _order_paginate(qs, instance_qs, pagination_params)
     for order_item in getattr(paginated_result, 'items'):
         await order_fill_old_addresses_field(order_item)
         if profile_type == ProfileType.COURIER:
@@ -675,7 +737,7 @@ async def order_get_list_mobile(pagination_params, default_filter_args, filter_a
             'order_chain_stages_set', OrderChainStage.all(), 'order_chain_stages',
         ),
     ).select_related('area', 'city', 'courier__user', 'item', 'deliverygraph', 'partner', 'product')
-    paginated_result = await paginate(qs, params=pagination_params)
+    paginated_result = await _order_paginate(qs, instance_qs, pagination_params)
     for order_item in getattr(paginated_result, 'items'):
         await order_fill_old_addresses_field(order_item)
         if order_item.current_status_id == int(OrderStatus.ENDED.value):
@@ -708,7 +770,7 @@ async def order_get_list_v2(pagination_params, default_filter_args, filter_args,
                  'statuses'),
     ).select_related('area', 'city', 'courier__user', 'item', 'current_status',
                      'partner', 'shipment_point', 'delivery_point', 'product')
-    paginated_result = await paginate(qs, params=pagination_params)
+    paginated_result = await _order_paginate(qs, instance_qs, pagination_params)
 
     for order_item in getattr(paginated_result, 'items'):
         if profile_type == ProfileType.COURIER:
@@ -852,22 +914,64 @@ async def order_ensure_exists(order_id: str):
 
 async def check_is_delivery_points_in_polygon(order: Order,
                                               courier_partner_id: int) -> bool:
-    delivery_point = await order.delivery_point
+    return bool(await orders_area_assign([order], courier_partner_id))
+
+
+async def orders_area_assign(
+    orders: Iterable[Order],
+    courier_partner_id: int,
+) -> typing.Dict[int, int]:
+    """
+    Assigns areas of the courier partner containing delivery points to the orders.
 
-    areas = await models.Area.filter(
-        partner_id=courier_partner_id, archived=False, city_id=order.city_id
+    Delivery points are loaded with one query and looked up in the area
+    indexes of the catalog, orders are updated with one query per area.
+    Orders which points are not in any area are left as they are.
+
+    Returns:
+        area IDs by IDs of the assigned orders
+    """
+    orders = [order for order in orders if order.delivery_point_id]
+    points = {
+        point_id: (latitude, longitude)
+        for point_id, latitude, longitude in await DeliveryPoint.filter(
+            id__in={order.delivery_point_id for order in orders},
+            latitude__isnull=False,
+            longitude__isnull=False,
+        ).values_list('id', 'latitude', 'longitude')
+    }
+
+    assigned = {}
+    orders_located = sorted(
+        (order for order in orders if order.delivery_point_id in points),
+        key=lambda order: order.city_id or 0,
     )
-    for area in areas:
-        polygon = [
-            list(map(float, point.values()))
-            for point in area.scope
-        ]
-        polygon = Polygon(polygon)
-        point = Point(*list(map(float, (delivery_point.latitude, delivery_point.longitude))))
-        if point.within(polygon):
-            await order.update_from_dict({'area': area}).save(update_fields=['area_id'])
-            return True
-    return False
+    for city_id, city_orders in groupby(orders_located, key=lambda order: order.city_id or 0):
+        city_orders = list(city_orders)
+        index = await models.catalog.area_index(courier_partner_id, city_id)
+        area_ids = index.find_many(
+            tuple(map(float, points[order.delivery_point_id])) for order in city_orders
+        )
+        for order, area_id in zip(city_orders, area_ids):
+            if area_id is not None:
+                assigned[order.id] = area_id
+    if not assigned:
+        return assigned
+
+    areas = await models.Area.all_objects.in_bulk(set(assigned.values()), 'id')
+    order_ids_by_area = {}
+    for order in orders:
+        if (area_id := assigned.get(order.id)) is None:
+            continue
+        if area_id not in areas:
+            # the area was deleted after the index of the catalog was built
+            del assigned[order.id]
+            continue
+        order.area = areas[area_id]
+        order_ids_by_area.setdefault(area_id, []).append(order.id)
+    for area_id, order_ids in order_ids_by_area.items():
+        await Order.all_objects.filter(id__in=order_ids).update(area_id=area_id)
+    return assigned
 
 
 # Используется только для api/v1/order/{order_id} + api/v1/order/{order_id}/pan
@@ -1205,10 +1309,9 @@ async def order_create(
     await order_update_status(order_created, OrderStatus.NEW)
 
     if create_dict.get('courier_id'):
-        if assigned_status := await models.Status.filter(
-            slug=StatusSlug.COURIER_ASSIGNED.value,
-            partner_id__isnull=True,
-        ).first():
+        if assigned_status := await models.catalog.status_by_slug(
+            StatusSlug.COURIER_ASSIGNED.value,
+        ):
             try:
                 await order_update_status(order_created, assigned_status.id)
             except IntegrityError:
@@ -1305,16 +1408,15 @@ async def order_create_v2(
     await order_update_status(order_created, OrderStatus.NEW)
 
     if create_dict.get('courier_id'):
-        if assigned_status := await models.Status.filter(
-            slug=StatusSlug.COURIER_ASSIGNED.value,
-            partner_id__isnull=True,
-        ).first():
+        if assigned_status := await models.catalog.status_by_slug(
+            StatusSlug.COURIER_ASSIGNED.value,
+        ):
             try:
                 await order_update_status(order_created, assigned_status.id)
             except IntegrityError:
                 pass
     try:
-        order_time = await order_created.localtime
+        order_time = order_created.localtime
         await models.history_create(
             schemas.HistoryCreate(
                 initiator_type=InitiatorType.USER,
@@ -1402,7 +1504,7 @@ async def order_expel_courier(order_id: int, current_user: schemas.UserCurrent,
     except DoesNotExist as e:
         raise DoesNotExist(
             f'Order with provided ID: {order_id} was not found') from e
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
     new_status = await models.Status.get(
         slug=StatusSlug.NEW.value,
         partner_id__isnull=True,
@@ -1451,11 +1553,11 @@ async def order_accept_cancel(
             action_data={
                 'delivery_status': delivery_status,
             },
-            created_at=await order_obj.localtime,
+            created_at=order_obj.localtime,
         )
     )
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     if callback_url := order_obj.callbacks.get('set_status', None):
         data = schemas.DeliveryStatusExternal(
@@ -1501,7 +1603,7 @@ async def order_accept_cancel(
     if not isinstance(order_obj.courier, Model):
         await order_obj.fetch_related('courier')
 
-    courier_time = await order_obj.courier.localtime
+    courier_time = order_obj.courier.localtime
 
     orders = await Order.filter(
         delivery_datetime__year=courier_time.year,
@@ -1548,7 +1650,7 @@ async def order_request_cancellation(
             action_data={
                 'delivery_status': delivery_status,
             },
-            created_at=await order_obj.localtime,
+            created_at=order_obj.localtime,
         )
     )
 
@@ -1583,13 +1685,12 @@ async def order_postpone(order_id: int, until: datetime, comment: str, user: Use
             action_data={
                 'delivery_status': delivery_status,
             },
-            created_at=await order_obj.localtime,
+            created_at=order_obj.localtime,
         )
     )
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
-    conn = redis_module.get_connection()
     if callback_url := order_obj.callbacks.get('set_status', None):
         data = schemas.DeliveryStatusExternal(
             status=order_obj.delivery_status['status'],
@@ -1622,15 +1723,11 @@ async def order_postpone(order_id: int, until: datetime, comment: str, user: Use
                 'delivery_status': OrderDeliveryStatus.POSTPONED.value,
             }
         )
-        pubsub_message = json.dumps({
-            'task_name': 'firebase-send',
-            'kwargs': message_data.dict(),
-        })
-        await conn.publish('send-to-celery', pubsub_message)
+        await call_task('firebase-send', message_data.dict())
 
     if order_obj.courier is None:
         return
-    courier_time = await order_obj.courier.localtime
+    courier_time = order_obj.courier.localtime
 
     orders = await Order.filter(
         delivery_datetime__year=courier_time.year,
@@ -1679,7 +1776,7 @@ async def order_finalize_at_cs(order_id: int, comment: str, user: UserCurrent, d
             action_data={
                 'delivery_status': delivery_status,
             },
-            created_at=await order_obj.localtime,
+            created_at=order_obj.localtime,
         )
     )
 
@@ -1718,10 +1815,10 @@ async def order_noncall(order_id: int, comment: str, user: UserCurrent, default_
             action_data={
                 'delivery_status': delivery_status,
             },
-            created_at=await order_obj.localtime,
+            created_at=order_obj.localtime,
         )
     )
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     if callback_url := order_obj.callbacks.get('set_status', None):
         data = schemas.DeliveryStatusExternal(
@@ -1739,7 +1836,7 @@ async def order_noncall(order_id: int, comment: str, user: UserCurrent, default_
 
     if order_obj.courier is None:
         return
-    courier_time = await order_obj.courier.localtime
+    courier_time = order_obj.courier.localtime
     orders = await Order.filter(
         delivery_datetime__year=courier_time.year,
         delivery_datetime__month=courier_time.month,
@@ -1803,11 +1900,11 @@ async def order_resume(
             action_data={
                 'delivery_status': delivery_status,
             },
-            created_at=await order_obj.localtime,
+            created_at=order_obj.localtime,
         )
     )
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     if callback_url := order_obj.callbacks.get('set_status', None):
         data = schemas.DeliveryStatusExternal(
@@ -1825,7 +1922,7 @@ async def order_resume(
 
     if order_obj.courier is None:
         return
-    courier_time = await order_obj.courier.localtime
+    courier_time = order_obj.courier.localtime
 
     orders = await Order.filter(
         delivery_datetime__year=courier_time.year,
@@ -1870,7 +1967,7 @@ async def order_restore(
                     data = schemas.DeliveryStatusExternal(
                         status=new_delivery_status.get('status'),
                         comment=new_delivery_status.get('reason'),
-                        status_datetime=str(await order_obj.localtime)).dict()
+                        status_datetime=str(order_obj.localtime)).dict()
 
                     # В зависимости от партнера, получаем HTTP заголовки для вызова callback метода
                     headers = get_headers(order_obj.partner_id)
@@ -1886,7 +1983,7 @@ async def order_restore(
         await models.OrderStatuses.filter(order_id=order_id).delete()
         new_status = await models.Status.get(slug=StatusSlug.NEW.value)
 
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
         history_created_at = order_time
         await OrderStatuses.create(order=order_obj, status=new_status, created_at=order_time)
         order_obj.current_status = new_status
@@ -1960,7 +2057,7 @@ async def order_courier_assign(default_filters: list, order_id: int, courier_id:
                         'new': courier_id,
                     },
                 },
-                created_at=await order_obj.localtime,
+                created_at=order_obj.localtime,
             )
         )
     try:
@@ -1982,47 +2079,92 @@ async def order_revise(default_filters: list, order_id: int, revised: bool):
     await order_to_revise.save()
 
 
+async def orders_local_times(orders: Iterable[Order]) -> dict:
+    """
+    Returns city local time of the orders by ID from cached time zones,
+    only cities missing in the cache are queried.
+    """
+    orders = list(orders)
+    localtimes = await cities_localtime_get(order.city_id for order in orders)
+    return {order.id: localtimes[order.city_id] for order in orders}
+
+
+async def orders_get_local_times(order_ids: Iterable[int]) -> dict:
+    """Returns city local time of every existing order with a single query."""
+    cities = await Order.filter(id__in=order_ids).values_list('id', 'city_id')
+    localtimes = await cities_localtime_get(city_id for _, city_id in cities)
+    return {order_id: localtimes[city_id] for order_id, city_id in cities}
+
+
+async def orders_bulk_set_datetime(field: str, values: dict, only_null: bool = False) -> None:
+    """Sets per-order values of a datetime field in a single UPDATE statement.
+
+    Tortoise can't bulk update timestamp fields until 0.19.0, hence raw SQL.
+    """
+    if not values:
+        return
+    column = Order._meta.fields_db_projection[field]
+    query = f"""
+        UPDATE "order" SET "{column}" = "new_values"."value"
+        FROM (
+            SELECT UNNEST($1::int[]) AS "id", UNNEST($2::timestamptz[]) AS "value"
+        ) AS "new_values"
+        WHERE "order"."id" = "new_values"."id"
+    """
+    if only_null:
+        query += f' AND "order"."{column}" IS NULL'
+    async with in_transaction('default') as conn:
+        await conn.execute_query(query, [list(values.keys()), list(values.values())])
+
+
 async def order_status_bulk_update(
     order_ids: List[int],
     status_id: Union[int, OrderStatus],
     default_filter_args: list = None,
 ):
-    status = await models.Status.get(id=status_id)
-    order_statuses = []
-    order_ids_to_be_updated = []
-
-    for order_id in order_ids:
-        exists = await OrderStatuses.filter(order_id=order_id, status_id=status_id).exists()
-        if not exists:
-            order_obj = await Order.get(id=order_id).select_related('city')
-            order_time = await order_obj.localtime
-            order_statuses.append(
-                OrderStatuses(order_id=order_id, status_id=status_id, created_at=order_time)
-            )
-            order_ids_to_be_updated.append(order_id)
+    status = await models.catalog.status_get(status_id)
+    existing_order_ids = set(await OrderStatuses.filter(
+        order_id__in=order_ids, status_id=status_id,
+    ).values_list('order_id', flat=True))
+    order_ids_to_be_updated = list(dict.fromkeys(
+        order_id for order_id in order_ids if order_id not in existing_order_ids
+    ))
+
+    order_times = await orders_get_local_times(order_ids_to_be_updated)
+    if len(order_times) != len(order_ids_to_be_updated):
+        raise DoesNotExist(
+            f'Orders with provided IDs: '
+            f'{set(order_ids_to_be_updated) - order_times.keys()} were not found',
+        )
+    order_statuses = [
+        OrderStatuses(order_id=order_id, status_id=status_id, created_at=order_times[order_id])
+        for order_id in order_ids_to_be_updated
+    ]
     if order_statuses:
         await OrderStatuses.bulk_create(order_statuses)
         await Order.filter(id__in=order_ids_to_be_updated).update(current_status_id=status_id)
         if status.slug in (StatusSlug.POST_CONTROL, StatusSlug.DELIVERED, StatusSlug.ISSUED):
-            await order_set_actual_delivery_datetime_bulk(*order_ids_to_be_updated)
+            await orders_bulk_set_datetime(
+                'actual_delivery_datetime', order_times, only_null=True,
+            )
 
     if status.slug == StatusSlug.ACCEPTED_BY_COURIER_SERVICE:
         await Order.filter(id__in=order_ids_to_be_updated).update(allow_courier_assign=True)
         current_time = now().replace(hour=23, minute=59, second=0, microsecond=0)
-        delivery_time = current_time + datetime.timedelta(days=1)
-        orders = await Order.select_for_update().filter(
-            id__in=order_ids,
-            delivery_datetime__isnull=True,
-        ).prefetch_related('item')
-        for order_obj in orders:
-            if order_obj.item.days_to_delivery is not None:
-                delivery_time = current_time + datetime.timedelta(order_obj.item.days_to_delivery)
-            order_obj.delivery_datetime = delivery_time
-            await order_obj.save()  # can't use bulk update with timestamp fields for now
-
-        # can't use bulk update with timestamp fields until tortoise version>=0.19.0
-        # if orders:
-        #     await Order.bulk_update(orders, ['delivery_datetime'])
+        async with in_transaction('default') as conn:
+            await conn.execute_query(
+                """
+                UPDATE "order"
+                SET "delivery_datetime" = $1::timestamptz
+                    + MAKE_INTERVAL(days => COALESCE("item"."days_to_delivery", 1))
+                FROM "item"
+                WHERE "item"."id" = "order"."item_id"
+                    AND "order"."id" = ANY($2::int[])
+                    AND "order"."delivery_datetime" IS NULL
+                    AND NOT "order"."archived"
+                """,
+                [current_time, list(order_ids)],
+            )
 
 
 async def order_status_bulk_rollback(
@@ -2031,19 +2173,22 @@ async def order_status_bulk_rollback(
     include=True,
     default_filter_args: list = None,
 ):
-    for idx in order_ids:
-        query = []
-        if last_order := await OrderStatuses.filter(
-            order_id=idx, status_id=status_id
-        ).first():
-            if include:
-                query.append(Q(id=last_order.id))
-            query.append(Q(order_id=idx, created_at__gt=last_order.created_at))
-            await OrderStatuses.filter(
-                Q(
-                    *query, join_type=Q.OR
+    """Deletes the given status of the orders with all statuses set after it."""
+    async with in_transaction('default') as conn:
+        await conn.execute_query(
+            """
+            DELETE FROM "order.statuses" AS "order_status"
+            USING "order.statuses" AS "rollback_status"
+            WHERE "rollback_status"."order_id" = ANY($1::int[])
+                AND "rollback_status"."status_id" = $2
+                AND "order_status"."order_id" = "rollback_status"."order_id"
+                AND (
+                    "order_status"."created_at" > "rollback_status"."created_at"
+                    OR ($3 AND "order_status"."id" = "rollback_status"."id")
                 )
-            ).delete()
+            """,
+            [list(order_ids), int(status_id), include],
+        )
 
 
 async def order_update_status_v2(
@@ -2051,7 +2196,7 @@ async def order_update_status_v2(
     status_id: Union[int, OrderStatus],
     default_filter_args: list = None,
 ):
-    status_obj = await models.Status.get(id=status_id)
+    status_obj = await models.catalog.status_get(status_id)
     if default_filter_args is None:
         default_filter_args = []
     try:
@@ -2066,7 +2211,7 @@ async def order_update_status_v2(
     except DoesNotExist:
         raise DoesNotExist(f'Order with given ID: {order_obj_or_id} was not found')
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     if status_obj.slug == StatusSlug.ACCEPTED_BY_COURIER:
         order_obj.delivery_status = {
@@ -2089,17 +2234,7 @@ async def order_update_status_v2(
                 pan = product.attributes.get('pan')
                 if pan is not None:
                     data = {'pan_card': pan}
-                    conn = redis_module.get_connection()
-                    await conn.publish(
-                        channel='send-to-celery',
-                        message=json.dumps({
-                            'task_name': 'send-pan',
-                            'kwargs': {
-                                'url': url,
-                                'data': data,
-                            }
-                        })
-                    )
+                    await call_task('send-pan', {'url': url, 'data': data})
 
         # В v2 отправлять SMS не нужно
         #
@@ -2174,7 +2309,7 @@ async def order_update_status(
     status_id: Union[int, OrderStatus],
     default_filter_args: list = None,
 ):
-    status_obj = await models.Status.get(id=status_id)
+    status_obj = await models.catalog.status_get(status_id)
     if default_filter_args is None:
         default_filter_args = []
     try:
@@ -2189,7 +2324,7 @@ async def order_update_status(
     except DoesNotExist:
         raise DoesNotExist(f'Order with given ID: {order_obj_or_id} was not found')
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     if status_obj.slug == StatusSlug.ACCEPTED_BY_COURIER:
         order_obj.delivery_status = {
@@ -2212,17 +2347,7 @@ async def order_update_status(
                 pan = product.attributes.get('pan')
                 if pan is not None:
                     data = {'pan_card': pan}
-                    conn = redis_module.get_connection()
-                    await conn.publish(
-                        channel='send-to-celery',
-                        message=json.dumps({
-                            'task_name': 'send-pan',
-                            'kwargs': {
-                                'url': url,
-                                'data': data,
-                            }
-                        })
-                    )
+                    await call_task('send-pan', {'url': url, 'data': data})
 
         if url := order_obj.callbacks.get('set_otp', None):
             stored_otp_objects = await order_obj.otp_set.filter(accepted_at__isnull=False)
@@ -2237,14 +2362,7 @@ async def order_update_status(
                         'datetime_otp': timestamp,
                     }
                 }
-                conn = redis_module.get_connection()
-                await conn.publish(
-                    channel='send-to-celery',
-                    message=json.dumps({
-                        'task_name': 'send-otp',
-                        'kwargs': data,
-                    })
-                )
+                await call_task('send-otp', data)
     if status_obj.slug == StatusSlug.ACCEPTED_BY_COURIER_SERVICE:
         order_obj.allow_courier_assign = True
 
@@ -2383,92 +2501,152 @@ async def get_order_history(history):
     return history_str
 
 
-async def order_report(query: schemas.ExportExcel, profile_type, **kwargs):
-    buffer = io.BytesIO()
-    with xlsxwriter.Workbook(buffer, options={'remove_timezone': True}) as workbook:
-        sheet = workbook.add_worksheet()
-        format_datetime = workbook.add_format(
-            {'num_format': 'yyyy-mm-dd hh:mm:ss', }
-        )
+ORDER_REPORT_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
+
+def _order_report_add_sheet(workbook: xlsxwriter.Workbook, profile_type) -> tuple:
+    sheet = workbook.add_worksheet()
+    format_datetime = workbook.add_format(
+        {'num_format': 'yyyy-mm-dd hh:mm:ss', }
+    )
+    field_names = [
+        'ID',
+        'ID заявки партнера',
+        'Дата создания',
+        'ФИО получателя',
+        'ИИН получателя',
+        'Номер получателя',
+        'Номер карты',
+        'Тип',
+        'Доставить до',
+        'Исходная дата доставки',
+        'Фактическая дата доставки',
+        'Город',
+        'Партнер',
+        'Продукт',
+        'Зона доставки',
+        'Курьер',
+        'Статус',
+        'Адрес доставки',
+        'История заявок',
+        'Комментарии',
+        'Coздавший последконтроль',
+        'Принявший последконтроль',
+        'Дата назначения курьера',
+        'Дата текущего статуса',
+        'Текущий статус',
+    ]
+    if profile_type == ProfileType.BANK_MANAGER:
         field_names = [
-            'ID',
-            'ID заявки партнера',
-            'Дата создания',
-            'ФИО получателя',
-            'ИИН получателя',
-            'Номер получателя',
-            'Номер карты',
-            'Тип',
-            'Доставить до',
-            'Исходная дата доставки',
-            'Фактическая дата доставки',
-            'Город',
-            'Партнер',
+            'ID заявки',
+            'ФИО',
             'Продукт',
-            'Зона доставки',
-            'Курьер',
-            'Статус',
+            'IDN карты',
+            'Номер телефона',
+            'ИИН',
             'Адрес доставки',
-            'История заявок',
-            'Комментарии',
-            'Coздавший последконтроль',
-            'Принявший последконтроль',
+            'Город доставки',
+            'Страна доставки',
+            'Менеджер',
+            'Партнёр',
+            'Дата создания',
             'Дата назначения курьера',
-            'Дата текущего статуса',
-            'Текущий статус',
+            'Дата доставки',
+            'Статус',
         ]
-        if profile_type == ProfileType.BANK_MANAGER:
-            field_names = [
-                'ID заявки',
-                'ФИО',
-                'Продукт',
-                'IDN карты',
-                'Номер телефона',
-                'ИИН',
-                'Адрес доставки',
-                'Город доставки',
-                'Страна доставки',
-                'Менеджер',
-                'Партнёр',
-                'Дата создания',
-                'Дата назначения курьера',
-                'Дата доставки',
-                'Статус',
-            ]
-        for col_num, field in enumerate(field_names):
-            cell_format = workbook.add_format(
-                {
-                    'bold': True,
-                    'font_color': 'white',
-                    'bg_color': 'green',
-                    'align': 'left',
-                }
-            )
-            sheet.write(0, col_num, str(field))
-            sheet.set_column(col_num, col_num, 10, cell_format)
-
-        filter_dict = query.filtering.dict(exclude_unset=True, exclude_none=True)
-        if partner_filter := filter_dict.pop('partner_id__in', None):
-            if 'partner_id__in' in kwargs:
-                intersection = set(partner_filter) & set(kwargs['partner_id__in'])
-                kwargs['partner_id__in'] = list(intersection)
+    for col_num, field in enumerate(field_names):
+        cell_format = workbook.add_format(
+            {
+                'bold': True,
+                'font_color': 'white',
+                'bg_color': 'green',
+                'align': 'left',
+            }
+        )
+        sheet.write(0, col_num, str(field))
+        sheet.set_column(col_num, col_num, 10, cell_format)
+    return sheet, format_datetime, field_names
+
+
+def _order_report_filters(query: schemas.ExportExcel, kwargs: dict) -> dict:
+    filter_dict = query.filtering.dict(exclude_unset=True, exclude_none=True)
+    if partner_filter := filter_dict.pop('partner_id__in', None):
+        if 'partner_id__in' in kwargs:
+            intersection = set(partner_filter) & set(kwargs['partner_id__in'])
+            kwargs['partner_id__in'] = list(intersection)
+    return filter_dict
+
+
+def _order_report_write_rows(sheet, first_row: int, orders: list, cell_format) -> None:
+    for row, order in enumerate(orders, first_row):
+        order.append(' ')
+        sheet.write_row(row=row, col=0, data=order, cell_format=cell_format)
+
+
+async def order_report(query: schemas.ExportExcel, profile_type, **kwargs):
+    buffer = io.BytesIO()
+    with xlsxwriter.Workbook(buffer, options={'remove_timezone': True}) as workbook:
+        sheet, format_datetime, field_names = _order_report_add_sheet(workbook, profile_type)
+        filter_dict = _order_report_filters(query, kwargs)
         orders = await prepare_orders_for_report(
             columns=field_names,
             **filter_dict,
             **kwargs,
         )
-        for row, order in enumerate(orders, 1):
-            order.append(' ')
-            sheet.write_row(row=row, col=0, data=order, cell_format=format_datetime)
+        _order_report_write_rows(sheet, 1, orders, format_datetime)
 
         workbook.read_only_recommended()
     buffer.seek(0)
     return buffer
 
 
+async def order_report_streaming(
+    query: schemas.ExportExcel,
+    profile_type,
+    progress: typing.Callable[[int, Optional[int]], typing.Awaitable] = None,
+    **kwargs,
+) -> SpooledTemporaryFile:
+    """
+    Builds the order report with constant memory usage.
+
+    Report rows are paged from the database and flushed by xlsxwriter row by row,
+    the workbook is written to a temporary file which spills to disk when large.
+    Worksheet writes run in a thread pool to keep the event loop free.
+    If ``progress`` is given it is awaited with the amount of written rows
+    after every page.
+    """
+    buffer = SpooledTemporaryFile(max_size=ORDER_REPORT_SPOOL_MAX_SIZE)
+    workbook = xlsxwriter.Workbook(
+        buffer, options={'remove_timezone': True, 'constant_memory': True},
+    )
+    try:
+        sheet, format_datetime, field_names = _order_report_add_sheet(workbook, profile_type)
+        filter_dict = _order_report_filters(query, kwargs)
+        first_row = 1
+        async for orders in iterate_orders_for_report(
+            columns=field_names,
+            **filter_dict,
+            **kwargs,
+        ):
+            await run_in_threadpool(
+                _order_report_write_rows, sheet, first_row, orders, format_datetime,
+            )
+            first_row += len(orders)
+            if progress is not None:
+                await progress(first_row - 1, None)
+
+        workbook.read_only_recommended()
+        await run_in_threadpool(workbook.close)
+    except Exception:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
+
+
 async def order_delivered_today(courier_id: int) -> int:
     courier_obj = await ProfileCourier.get(id=courier_id)
-    courier_time = await courier_obj.localtime
+    courier_time = courier_obj.localtime
     return await models.OrderStatuses.filter(
         order__courier_id=courier_id,
         status_id=OrderStatus.DELIVERED.value,
@@ -2511,7 +2689,8 @@ async def order_import_from_excel(file: UploadFile, **kwargs):
     processed_file, result = await services.excel_loader.service.get_models_from_excel(
         model_name='Order',
         file=file,
-        current_user=current_user
+        current_user=current_user,
+        progress=kwargs.get('progress', None),
     )
     resp = schemas.ImportExcelResponse(file=processed_file, result=result)
     return resp
@@ -2563,7 +2742,7 @@ async def order_sms_postcontrol(
         Используется для всех ОСТАЛЬНЫХ партнеров. Используется НАШ ОТП сервис.
     """
 
-    order_time = await order.localtime
+    order_time = order.localtime
 
     otp_code = await models.utils.create_otp()
     await models.SMSPostControl.create(
@@ -2654,7 +2833,7 @@ async def order_sms_postcontrol_check(
         code,
         code_sent_point: schemas.Coordinates,
 ):
-    order_time = await order.localtime
+    order_time = order.localtime
     stored_otp_objects = await order.otp_set
     if not stored_otp_objects:
         raise OrderSmsCheckError(
@@ -2762,7 +2941,7 @@ async def order_cancel_at_client(order_id, image, reason, current_user: schemas.
             type=PostControlType.CANCELED_AT_CLIENT.value,
         )
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     if callback_url := order_obj.callbacks.get('set_status', None):
         data = schemas.DeliveryStatusExternal(
@@ -2820,7 +2999,7 @@ async def order_reschedule(order_id, update, **kwargs):
         data = schemas.DeliveryStatusExternal(
             status=order_obj.delivery_status.get('status'),
             comment=order_obj.delivery_status.get('reason'),
-            status_datetime=str(await order_obj.localtime)).dict()
+            status_datetime=str(order_obj.localtime)).dict()
 
         # В зависимости от партнера, получаем HTTP заголовки для вызова callback метода
         headers = get_headers(order_obj.partner_id)
@@ -2831,7 +3010,7 @@ async def order_reschedule(order_id, update, **kwargs):
             headers=headers,
         )
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     await models.history_create(
         schemas.HistoryCreate(
@@ -2992,7 +3171,7 @@ async def order_mass_status_update(
                 'delivery_status': {'status': 'restored'},
             }
         if action_data:
-            order_time = await order_obj.localtime
+            order_time = order_obj.localtime
             await models.history_create(
                 schemas.HistoryCreate(
                     initiator_type=InitiatorType.USER,
@@ -3030,7 +3209,7 @@ async def order_distribution_selective(**kwargs) -> List:
         try:
             await router.order_distribution(orders, couriers)
             for courier_obj in couriers:
-                courier_time = await courier_obj.localtime
+                courier_time = courier_obj.localtime
                 orders = await get_current_orders_for_courier(courier_obj.id)
                 courier_orders = await models.Order.filter(
                     ~Q(delivery_status__filter={
@@ -3119,7 +3298,7 @@ async def order_address_update(
         delivery_service_partner_id
     )
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
     update_dict = update.dict()
     update_dict['old_places'] = [
         {
@@ -3206,7 +3385,7 @@ async def order_address_update_v2(
         delivery_service_partner_id
     )
 
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
 
     update_dict = update.dict()
     update_dict['old_delivery_point'] = old_delivery_point
@@ -3345,7 +3524,7 @@ async def external_order_create_v2(
                     except Exception as e:
                         logger.error(e)
 
-        order_time = await order_created.localtime
+        order_time = order_created.localtime
 
         await models.history_create(
             schemas.HistoryCreate(
@@ -3473,7 +3652,7 @@ async def external_order_create(
         result = schemas.OrderGet.from_orm(order_fetched)
         await order_fill_old_addresses_field(result)
 
-        order_time = await order_fetched.localtime
+        order_time = order_fetched.localtime
 
         await models.history_create(
             schemas.HistoryCreate(
@@ -3605,35 +3784,51 @@ async def order_pan_v2(order_id: int, pan_schema: schemas.OrderPAN, default_filt
     return await order_get_v2(order_id=order_id, profile_type=ProfileType.COURIER)
 
 
+def _new_order_push_kwargs(order, fcmdevice_ids: list) -> dict:
+    notification = {
+        'title': f'Новая заявка',
+        'body': f'На Вас назначена заявка № {order.id}',
+
+    }
+    data = {
+        'title': f'Новая заявка',
+        'description': f'На Вас назначена заявка № {order.id}',
+        'id': order.id,
+        'type': order.type,
+        'push_type': PushType.INFO.value,
+    }
+    return {
+        'registration_ids': fcmdevice_ids,
+        'notification': notification,
+        'data': data,
+    }
+
+
 async def send_new_order_to_courier(order):
     if fcmdevice_ids := await models.FCMDevice.filter(
         user__profile_courier=order.courier_id,
     ).values_list('id', flat=True):
-        notification = {
-            'title': f'Новая заявка',
-            'body': f'На Вас назначена заявка № {order.id}',
+        await call_task('firebase-send', _new_order_push_kwargs(order, fcmdevice_ids))
 
-        }
-        data = {
-            'title': f'Новая заявка',
-            'description': f'На Вас назначена заявка № {order.id}',
-            'id': order.id,
-            'type': order.type,
-            'push_type': PushType.INFO.value,
-        }
-        task_kwargs = {
-            'registration_ids': fcmdevice_ids,
-            'notification': notification,
-            'data': data,
-        }
-        conn = redis_module.get_connection()
-        await conn.publish(
-            channel='send-to-celery',
-            message=json.dumps({
-                'task_name': 'firebase-send',
-                'kwargs': task_kwargs,
-            })
-        )
+
+async def send_new_orders_to_couriers(orders: list) -> None:
+    """Sends pushes about many assigned orders with a single devices query."""
+    if not orders:
+        return
+    devices = await models.FCMDevice.filter(
+        user__profile_courier__id__in={order.courier_id for order in orders},
+    ).values('id', 'user__profile_courier__id')
+    courier_devices = {}
+    for device in devices:
+        courier_devices.setdefault(
+            device['user__profile_courier__id'], [],
+        ).append(device['id'])
+
+    await call_tasks('firebase-send', [
+        _new_order_push_kwargs(order, courier_devices[order.courier_id])
+        for order in orders
+        if order.courier_id in courier_devices
+    ])
 
 
 # TODO: кажется этот метод больше не нужен, как и сам ендпоинт вызывающий его
@@ -3694,7 +3889,7 @@ async def check_if_order_can_get_status(
 @atomic()
 async def order_change_status(default_filter_args, body):
     try:
-        status_obj = await models.Status.get(id=body.status_id)
+        status_obj = await models.catalog.status_get(body.status_id)
     except DoesNotExist:
         raise DoesNotExist('Status with given ID not found')
 
@@ -3714,7 +3909,7 @@ async def order_change_status(default_filter_args, body):
             order_ids.append(order_id)
         except DoesNotExist:
             raise DoesNotExist(f'Order with given ID: {order_id} was not found')
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
         order_statuses.append(
             OrderStatuses(order=order_obj, status=status_obj, created_at=order_time)
         )
@@ -3807,7 +4002,7 @@ async def order_set_actual_delivery_datetime(
 ):
     if order_obj.actual_delivery_datetime is not None:
         return
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
     order_obj.actual_delivery_datetime = order_time
     await order_obj.save()
     return
@@ -3816,11 +4011,7 @@ async def order_set_actual_delivery_datetime(
 async def order_set_actual_delivery_datetime_bulk(
     *order_ids,
 ):
-    for order_obj in await Order.filter(
-        id__in=order_ids,
-        actual_delivery_datetime__isnull=True,
-    ).select_related('city'):
-        order_time = await order_obj.localtime
-        order_obj.actual_delivery_datetime = order_time
-        await order_obj.save()
-
+    order_times = await orders_get_local_times(order_ids)
+    await orders_bulk_set_datetime(
+        'actual_delivery_datetime', order_times, only_null=True,
+    )
@@ -0,0 +1,334 @@
+import asyncio
+import functools
+import os
+import socket
+import time
+import typing
+
+import aioredis
+from loguru import logger
+from tortoise import BaseDBAsyncClient
+from tortoise import fields
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+
+from .. import redis_module
+from ..conf import conf
+
+
+class OutboxMessage(Model):
+    """
+    Message to be published to a Redis channel once the transaction
+    which created it is committed.
+    """
+
+    id = fields.BigIntField(pk=True)
+    channel = fields.CharField(max_length=128)
+    message = fields.JSONField()
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = 'outbox'
+
+
+SELECT_QUERY = """
+SELECT id, channel, message::text AS message
+FROM outbox
+ORDER BY id
+LIMIT $1
+FOR UPDATE SKIP LOCKED
+"""
+
+DELETE_QUERY = 'DELETE FROM outbox WHERE id = ANY($1::bigint[])'
+
+STATS_QUERY = """
+SELECT count(*) AS pending, extract(epoch FROM now() - min(created_at)) AS lag
+FROM outbox
+"""
+
+
+async def outbox_add(
+    channel: str,
+    message: dict,
+    using_db: typing.Optional[BaseDBAsyncClient] = None,
+) -> None:
+    """Adds the message to the outbox within the current transaction, if any."""
+    await OutboxMessage.create(channel=channel, message=message, using_db=using_db)
+
+
+async def outbox_add_many(messages: typing.Iterable[typing.Tuple[str, dict]]) -> None:
+    """Adds channel and message pairs to the outbox with one statement."""
+    await OutboxMessage.bulk_create([
+        OutboxMessage(channel=channel, message=message) for channel, message in messages
+    ])
+
+
+class OutboxRelay:
+    """
+    Moves outbox rows to the Redis stream.
+
+    Rows are locked with ``SKIP LOCKED``, so relays of several processes
+    share the work. Rows are deleted in the same transaction after the
+    batch is added to the stream, a failed commit makes the batch to be
+    added once more, so delivery is at least once.
+    """
+
+    # the longest delay between retries when Postgres or Redis are unavailable
+    MAX_BACKOFF = 30
+
+    def __init__(self, batch_size: int = None, poll_interval: float = None):
+        self.batch_size = batch_size or conf.outbox.batch_size
+        self.poll_interval = poll_interval or conf.outbox.poll_interval
+        self.stream = conf.outbox.stream
+        self.relayed = 0
+        self.failures = 0
+        self._task: typing.Optional[asyncio.Task] = None
+
+    @functools.cached_property
+    def _redis(self) -> aioredis.client.Redis:
+        return redis_module.get_connection()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def relay(self) -> int:
+        """Moves one batch of rows to the stream and returns its size."""
+        async with in_transaction() as connection:
+            _, rows = await connection.execute_query(SELECT_QUERY, [self.batch_size])
+            if not rows:
+                return 0
+
+            pipeline = self._redis.pipeline(transaction=False)
+            for row in rows:
+                # the stream is not capped, acknowledged entries are trimmed by dispatchers
+                pipeline.xadd(
+                    self.stream,
+                    {'outbox_id': row['id'], 'channel': row['channel'], 'message': row['message']},
+                )
+            await pipeline.execute()
+            await connection.execute_query(DELETE_QUERY, [[row['id'] for row in rows]])
+
+        self.relayed += len(rows)
+        return len(rows)
+
+    async def run(self) -> None:
+        backoff = self.poll_interval
+        while True:
+            try:
+                relayed = await self.relay()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f'Outbox relay failed, retrying in {backoff}s: {e}')
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+                continue
+
+            backoff = self.poll_interval
+            if relayed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def get_stats(self) -> dict:
+        _, rows = await OutboxMessage._meta.db.execute_query(STATS_QUERY)
+        return {
+            'relayed': self.relayed,
+            'failures': self.failures,
+            'pending': rows[0]['pending'],
+            'lag': float(rows[0]['lag'] or 0),
+        }
+
+
+class OutboxDispatcher:
+    """
+    Publishes messages of the outbox stream to their channels.
+
+    Messages are read by a consumer group and acknowledged only when the
+    channel had subscribers. Messages not acknowledged for ``retry_interval``
+    seconds are claimed again by any dispatcher, the ones delivered
+    ``max_deliveries`` times are moved to the dead letter stream.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = None,
+        retry_interval: float = None,
+        max_deliveries: int = None,
+    ):
+        self.batch_size = batch_size or conf.outbox.batch_size
+        self.retry_interval = retry_interval or conf.outbox.retry_interval
+        self.max_deliveries = max_deliveries or conf.outbox.max_deliveries
+        self.stream = conf.outbox.stream
+        self.dead_stream = f'{self.stream}:dead'
+        self.group = conf.outbox.group
+        self.consumer = f'{socket.gethostname()}-{os.getpid()}'
+        self.dispatched = 0
+        self.retried = 0
+        self.dead = 0
+        self._task: typing.Optional[asyncio.Task] = None
+        self._retried_at = 0.0
+
+    @functools.cached_property
+    def _redis(self) -> aioredis.client.Redis:
+        return redis_module.get_connection()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def group_ensure(self) -> None:
+        try:
+            # entries added before the group is created are dispatched as well
+            await self._redis.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except aioredis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    async def _publish(self, entries: typing.Sequence[typing.Tuple[str, dict]]) -> None:
+        entries = [(entry_id, entry_fields) for entry_id, entry_fields in entries if entry_fields]
+        if not entries:
+            return
+
+        receivers = await redis_module.publisher.publish_many(
+            (entry_fields['channel'], entry_fields['message']) for _, entry_fields in entries
+        )
+
+        delivered = [
+            entry_id for (entry_id, _), count in zip(entries, receivers) if count
+        ]
+        if delivered:
+            await self._redis.xack(self.stream, self.group, *delivered)
+            self.dispatched += len(delivered)
+        if len(delivered) < len(entries):
+            logger.warning(
+                f'{len(entries) - len(delivered)} outbox messages had no subscribers, '
+                f'retrying in {self.retry_interval}s',
+            )
+
+    async def dispatch(self, block: int = None) -> int:
+        """Publishes new messages of the stream and returns their number."""
+        response = await self._redis.xreadgroup(
+            self.group, self.consumer, {self.stream: '>'},
+            count=self.batch_size, block=block,
+        )
+        entries = response[0][1] if response else []
+        await self._publish(entries)
+        return len(entries)
+
+    async def retry(self) -> int:
+        """Publishes messages which were not acknowledged in time."""
+        idle = int(self.retry_interval * 1000)
+        pending = await self._redis.xpending_range(
+            self.stream, self.group, '-', '+', self.batch_size,
+        )
+        pending = [entry for entry in pending if entry['time_since_delivered'] >= idle]
+        if not pending:
+            return 0
+
+        dead = [entry['message_id'] for entry in pending if entry['times_delivered'] >= self.max_deliveries]
+        if dead:
+            await self._bury(dead)
+
+        retried = [entry['message_id'] for entry in pending if entry['times_delivered'] < self.max_deliveries]
+        if retried:
+            entries = await self._redis.xclaim(
+                self.stream, self.group, self.consumer, idle, retried,
+            )
+            await self._publish(entries)
+            self.retried += len(retried)
+        return len(retried)
+
+    async def _bury(self, entry_ids: typing.List[str]) -> None:
+        entries = await self._redis.xrange(self.stream, entry_ids[0], entry_ids[-1])
+        entry_ids = set(entry_ids)
+        pipeline = self._redis.pipeline(transaction=False)
+        for entry_id, entry_fields in entries:
+            if entry_id in entry_ids:
+                pipeline.xadd(self.dead_stream, entry_fields, maxlen=conf.outbox.stream_maxlen)
+        pipeline.xack(self.stream, self.group, *entry_ids)
+        await pipeline.execute()
+        self.dead += len(entry_ids)
+        logger.error(f'{len(entry_ids)} outbox messages were moved to {self.dead_stream}')
+
+    async def trim(self) -> None:
+        """
+        Removes entries of the stream which are acknowledged, the ones
+        pending or not read by the group yet are kept.
+        """
+        pending = await self._redis.xpending(self.stream, self.group)
+        if pending['pending']:
+            min_id = pending['min']
+        else:
+            groups = await self._redis.xinfo_groups(self.stream)
+            min_id = next(
+                group['last-delivered-id'] for group in groups if group['name'] == self.group
+            )
+        # aioredis doesn't support MINID of XTRIM yet
+        await self._redis.execute_command('XTRIM', self.stream, 'MINID', '~', min_id)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.group_ensure()
+                while True:
+                    if time.monotonic() - self._retried_at >= self.retry_interval:
+                        self._retried_at = time.monotonic()
+                        await self.retry()
+                        await self.trim()
+                    await self.dispatch(block=int(self.retry_interval * 1000))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'Outbox dispatcher failed: {e}')
+                await asyncio.sleep(self.retry_interval)
+
+    async def get_stats(self) -> dict:
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.xlen(self.stream)
+        pipeline.xpending(self.stream, self.group)
+        pipeline.xlen(self.dead_stream)
+        try:
+            length, pending, dead_length = await pipeline.execute()
+        except aioredis.ResponseError:
+            # the group is not created yet
+            length, pending, dead_length = 0, {'pending': 0}, 0
+        return {
+            'dispatched': self.dispatched,
+            'retried': self.retried,
+            'dead': self.dead,
+            'stream_length': length,
+            'unacknowledged': pending['pending'],
+            'dead_length': dead_length,
+        }
+
+
+outbox_relay = OutboxRelay()
+outbox_dispatcher = OutboxDispatcher()
+
+
+async def outbox_stats() -> dict:
+    """
+    Returns counters and lag of the outbox table and stream.
+
+    Counters are of the relay and dispatcher of this process, the pending
+    rows, lag and stream lengths are of the whole cluster.
+    """
+    return {
+        'relay': await outbox_relay.get_stats(),
+        'dispatcher': await outbox_dispatcher.get_stats(),
+    }
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 from datetime import datetime
 from typing import List
 
@@ -12,11 +11,11 @@ from tortoise.exceptions import IntegrityError
 from tortoise.expressions import Q
 from tortoise.transactions import atomic
 
-from api import redis_module
 from api.conf import conf
 from api.enums import OrderStatus, PostControlResolution
 from api.models.order import get_next_status_from_status
 from api.models.partner_callbacks import get_headers
+from api.models.publisher import call_task
 from api.models.publisher import publish_callback
 from . import fields as custom_fields
 from .mixins import DeleteFilesMixin
@@ -154,7 +153,7 @@ async def postcontrol_create(order_id: int, image, config_id, default_filter_arg
         config_id=config_id,
         type=config_obj.type,
     )
-    order_time = await order_obj.localtime
+    order_time = order_obj.localtime
     await models.history_create(
         schemas.HistoryCreate(
             initiator_type=enums.InitiatorType.USER,
@@ -277,7 +276,7 @@ async def postcontrol_make_resolution(resolutions, default_filter_args, user: sc
             action_data={
                 'action': 'post_control_declined_at_bank',
             },
-            created_at=await order_obj.localtime,
+            created_at=order_obj.localtime,
         ))
         await order_obj.save()
         return postcontrols
@@ -308,7 +307,7 @@ async def postcontrol_make_resolution(resolutions, default_filter_args, user: sc
         accepted_count = len(accepted_postcontrols)
         if len(config_ids) == accepted_count:
 
-            order_time = await order_obj.localtime
+            order_time = order_obj.localtime
             history_schema = schemas.HistoryCreate(
                 initiator_type=enums.InitiatorType.USER.value,
                 initiator_id=user.id,
@@ -389,7 +388,7 @@ async def postcontrol_accept(order_id: int, current_user, default_filter_args: l
             'datetime': None,
             'comment': None,
         }
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
         await order_obj.save()
 
         if order_obj.type == enums.OrderType.PICKUP:
@@ -492,14 +491,7 @@ async def send_photos(
             continue
         if send_photo_callback:
             files = {'user_photo': document.image}
-            conn = redis_module.get_connection()
-            await conn.publish(
-                channel='send-to-celery',
-                message=json.dumps({
-                    'task_name': 'send-photo',
-                    'kwargs': {'url': send_photo_callback, 'files': files},
-                })
-            )
+            await call_task('send-photo', {'url': send_photo_callback, 'files': files})
 
         files.append({
             'url': f'https://{conf.api.backend_domain}{document.image}',
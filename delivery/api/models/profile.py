@@ -4,12 +4,12 @@ from zoneinfo import ZoneInfo
 
 import dateutil.relativedelta as delta
 from pydantic import parse_obj_as
+from tortoise import Tortoise
 from tortoise import fields
 from tortoise.exceptions import DoesNotExist
 from tortoise.exceptions import IntegrityError
 from tortoise.models import MODEL
 from tortoise.models import Model
-from tortoise.models import Q
 from tortoise.timezone import now
 from tortoise.transactions import atomic
 from api.modules.shipment_point.schemas import CityGet
@@ -23,7 +23,9 @@ from .. import schemas
 from .. import times
 from .. import utils
 from ..modules.city.infrastructure.db_table import City
+from ..modules.city.infrastructure.db_table import city_zone_info
 from ..modules.shipment_point import PartnerShipmentPoint
+from ..services import principal
 from ..services.sms.notification import send_email_magic_link
 
 
@@ -135,18 +137,15 @@ class ProfileCourier(Model):
         return rate
 
     @property
-    async def city_tz(self) -> ZoneInfo:
-        if not isinstance(self.city, City):
-            await self.fetch_related('city')
-        if self.city is None:
-            return ZoneInfo('UTC')
-        return self.city.tz
+    def city_tz(self) -> ZoneInfo:
+        if isinstance(self.city, City):
+            return self.city.tz
+        return city_zone_info(self.city_id)
 
     @property
-    async def localtime(self) -> datetime.datetime:
+    def localtime(self) -> datetime.datetime:
         current_time = now()
-        city_tz = await self.city_tz
-        return current_time + city_tz.utcoffset(current_time)
+        return current_time + self.city_tz.utcoffset(current_time)
 
 
 class ProfileDispatcher(Model):
@@ -715,6 +714,7 @@ async def profile_create(profile: schemas.ProfileCreate, model, user_id):
 
     if profile.profile_type == enums.ProfileType.COURIER:
         await models.User.filter(id=user_id).update(is_active=False)
+    await principal.service.invalidate_user(user_id)
 
     as_dict = dict(profile_created)
 
@@ -813,6 +813,7 @@ async def profile_update(update, profile):
     redis_con = redis_module.get_connection()
     perm_cache_key = f"permissions:user_id:{profile.user_id}{'_profile:' + update.profile_type}"
     await redis_con.delete(perm_cache_key)
+    await principal.service.invalidate_user(profile.user_id)
 
     return await profile_get_by_profile_type(profile_id=profile.id,
                                              profile_type=update.profile_type)
@@ -875,6 +876,7 @@ async def profile_status_update(
             raise StatusAlreadySet('Courier profile status already changed')
         profile.status = status
         await profile.save(update_fields=['status'])
+        await principal.service.invalidate_user(user_id)
         if status == enums.InviteStatus.REFUSED:
             return {'status': enums.InviteStatus.REFUSED}
         return await profile_get(user_id)
@@ -902,6 +904,7 @@ async def profile_delete(user_id: int, delete: schemas.ProfileDelete) -> None:
     redis_con = redis_module.get_connection()
     perm_cache_key = f"permissions:user_id:{profile.user_id}{'_profile:' + delete.profile_type}"
     await redis_con.delete(perm_cache_key)
+    await principal.service.invalidate_user(profile.user_id)
 
 
 async def courier_list(default_filter_args: list, filter_args: list):
@@ -919,6 +922,7 @@ async def courier_start_work(user_id):
 
     profile.at_work = True
     await profile.save()
+    await principal.service.invalidate_user(user_id)
 
 
 async def courier_end_work(user_id):
@@ -929,6 +933,7 @@ async def courier_end_work(user_id):
 
     profile.at_work = False
     await profile.save()
+    await principal.service.invalidate_user(user_id)
 
 
 async def courier_stats(partner_id: int, date: datetime.date = None):
@@ -938,6 +943,7 @@ async def courier_stats(partner_id: int, date: datetime.date = None):
     ).select_related(
         'user', 'category',
     )
+    stats = await couriers_get_stats([courier.id for courier in couriers], date=date)
     result = []
     for courier in couriers:
         data = {'courier': {
@@ -952,7 +958,7 @@ async def courier_stats(partner_id: int, date: datetime.date = None):
                 'category_type': courier.category.item_type,
                 'category_name': courier.category.name,
             })
-        data.update(await get_stats(courier_id=courier.id, date=date))
+        data.update(stats.get((courier.id, None), _empty_stats()))
 
         result.append(data)
 
@@ -993,12 +999,13 @@ async def courier_stats_get(user_id: int, partner_id, date: datetime.date = None
             until=last_day_of_month.date(),
         ))
         dates.reverse()
+        stats = await couriers_get_stats([courier.id], monthly=True)
         for date in dates:
             monthly_stat = {'month': date}
-            monthly_stat.update(await get_stats(courier_id=courier.id, date=date))
+            monthly_stat.update(stats.get((courier.id, _month_key(date)), _empty_stats()))
             data['rates'].append(monthly_stat)
 
-        data['total'] = await get_stats(courier_id=courier.id)
+        data['total'] = stats.get((courier.id, None), _empty_stats())
         return data
 
     except DoesNotExist:
@@ -1007,48 +1014,112 @@ async def courier_stats_get(user_id: int, partner_id, date: datetime.date = None
         )
 
 
+COURIER_STATS_FIELDS = (
+    'rate', 'negative_feedbacks', 'positive_feedbacks', 'orders', 'late_delivery',
+)
+
+# Every source row is counted for its month and/or for the total (NULL period).
+# Rate is the last one of the period, the other metrics are counts.
+COURIER_STATS_SQL = """
+SELECT courier_id, period,
+    coalesce(max(rate), 0) AS rate,
+    sum(negative_feedbacks)::int AS negative_feedbacks,
+    sum(positive_feedbacks)::int AS positive_feedbacks,
+    sum(orders)::int AS orders,
+    sum(late_delivery)::int AS late_delivery
+FROM (
+    (
+        SELECT DISTINCT ON (r.courier_id, p.period)
+            r.courier_id, p.period, r.value AS rate,
+            0 AS negative_feedbacks, 0 AS positive_feedbacks, 0 AS orders, 0 AS late_delivery
+        FROM ratings r
+        CROSS JOIN LATERAL (VALUES {rate_periods}) AS p(period)
+        WHERE r.courier_id = ANY($1){rate_filter}
+        ORDER BY r.courier_id, p.period, r.created_at DESC
+    )
+    UNION ALL
+    SELECT o.courier_id, p.period, NULL,
+        count(*) FILTER (WHERE f.rate < 5), count(*) FILTER (WHERE f.rate = 5), 0, 0
+    FROM feedback f
+    JOIN "order" o ON o.id = f.order_id
+    CROSS JOIN LATERAL (VALUES {feedback_periods}) AS p(period)
+    WHERE o.courier_id = ANY($1) AND f.status = $2{feedback_filter}
+    GROUP BY o.courier_id, p.period
+    UNION ALL
+    SELECT o.courier_id, p.period, NULL, 0, 0,
+        count(*) FILTER (WHERE os.id = $3), count(*) FILTER (WHERE os.status_id = $3)
+    FROM "order.statuses" os
+    JOIN "order" o ON o.id = os.order_id
+    CROSS JOIN LATERAL (VALUES {status_periods}) AS p(period)
+    WHERE o.courier_id = ANY($1){status_filter}
+    GROUP BY o.courier_id, p.period
+) stats
+GROUP BY courier_id, period
+"""
+
+
+def _empty_stats() -> dict:
+    return dict.fromkeys(COURIER_STATS_FIELDS, 0)
+
+
+def _month_key(date: datetime.date) -> str:
+    return f'{date.year}-{date.month:02d}'
+
+
+async def couriers_get_stats(
+    courier_ids: typing.List[int],
+    date: datetime.date = None,
+    monthly: bool = False,
+) -> typing.Dict[typing.Tuple[int, typing.Optional[str]], dict]:
+    """
+    Returns stats of couriers with one query.
+
+    Stats are keyed by courier ID and period, which is None for the total
+    of all time or of the given month. When monthly is set, stats of every
+    month are returned besides the total, keyed by "YYYY-MM".
+    """
+    if not courier_ids:
+        return {}
+
+    params = [
+        courier_ids,
+        enums.FeedbackStatus.APPROVED.value,
+        enums.OrderStatus.DELIVERED.value,
+    ]
+    query_params = {}
+    for name, alias in (('rate', 'r'), ('feedback', 'f'), ('status', 'os')):
+        periods = ['(NULL::text)']
+        if monthly:
+            periods.append(f"(to_char({alias}.created_at, 'YYYY-MM'))")
+        query_params[f'{name}_periods'] = ', '.join(periods)
+        query_params[f'{name}_filter'] = ''
+        if date:
+            # the same month boundaries as created_at__startswith='YYYY-MM' gives
+            query_params[f'{name}_filter'] = (
+                f' AND {alias}.created_at >= $4::date'
+                f" AND {alias}.created_at < $4::date + interval '1 month'"
+            )
+    if date:
+        params.append(datetime.date(date.year, date.month, 1))
+
+    connection = Tortoise.get_connection('default')
+    _, rows = await connection.execute_query(
+        COURIER_STATS_SQL.format(**query_params), params,
+    )
+    return {
+        (row['courier_id'], row['period']): {
+            field: row[field] for field in COURIER_STATS_FIELDS
+        }
+        for row in rows
+    }
+
+
 async def get_stats(
     courier_id: int = None,
     date: datetime.date = None,
 ):
-    data = {}
-
-    query_objects = []
-    if date:
-        query_objects.append(
-            Q(created_at__startswith=f'{date.year}-{date.month:02d}')
-        )
-    data['rate'] = 0
-    rate = await models.Rate.filter(
-        *query_objects,
-        courier_id=courier_id,
-    ).first()
-    if rate:
-        data['rate'] = rate.value
-    data['negative_feedbacks'] = await models.Feedback.filter(
-        *query_objects,
-        rate__lt=5,
-        status=enums.FeedbackStatus.APPROVED.value,
-        order__courier_id=courier_id,
-    ).count()
-    data['positive_feedbacks'] = await models.Feedback.filter(
-        *query_objects,
-        rate=5,
-        status=enums.FeedbackStatus.APPROVED.value,
-        order__courier_id=courier_id,
-    ).count()
-    data['orders'] = await models.OrderStatuses.filter(
-        *query_objects,
-        id=enums.OrderStatus.DELIVERED.value,
-        order__courier_id=courier_id,
-    ).count()
-    data['late_delivery'] = await models.OrderStatuses.filter(
-        *query_objects,
-        status_id=enums.OrderStatus.DELIVERED.value,
-        order__courier_id=courier_id,
-    ).count()
-
-    return data
+    stats = await couriers_get_stats([courier_id], date=date)
+    return stats.get((courier_id, None), _empty_stats())
 
 
 async def profile_send_magic_link(inviter_id: int, profile_type: enums.ProfileType, profile_id: int):
@@ -1,10 +1,14 @@
 """
     Временно вынес публикацию событий сюда для удобства использования.
     Это не целевое решение.
+
+    Сообщения пишутся в outbox в текущей транзакции и публикуются
+    после её коммита, см. models.outbox.
 """
-import json
+import typing
 
-from api import redis_module
+from .outbox import outbox_add
+from .outbox import outbox_add_many
 
 
 async def publish_callback(
@@ -41,9 +45,31 @@ async def call_task(
     )
 
 
-async def __publish(channel: str, message: dict) -> None:
-    conn = redis_module.get_connection()
-    await conn.publish(
-        channel=channel,
-        message=json.dumps(message)
+async def call_tasks(
+        task_name: str,
+        data: typing.Iterable[dict],
+) -> None:
+    messages = [
+        {
+            'task_name': task_name,
+            'kwargs': kwargs,
+        }
+        for kwargs in data
+    ]
+    await __publish_many(
+        channel='send-to-celery',
+        messages=messages,
     )
+
+
+async def publish(channel: str, message: dict) -> None:
+    await __publish(channel=channel, message=message)
+
+
+async def __publish(channel: str, message: dict) -> None:
+    await outbox_add(channel, message)
+
+
+async def __publish_many(channel: str, messages: typing.List[dict]) -> None:
+    if messages:
+        await outbox_add_many((channel, message) for message in messages)
@@ -0,0 +1,249 @@
+import asyncio
+import functools
+import json
+import time
+import typing
+import uuid
+
+import aioredis
+from loguru import logger
+from tortoise import BaseDBAsyncClient
+from tortoise.exceptions import DoesNotExist
+from tortoise.signals import post_delete
+from tortoise.signals import post_save
+
+from .. import redis_module
+from ..conf import conf
+from ..domain.order import DeliveryGraph as DeliveryGraphSteps
+from ..modules.city.infrastructure.db_table import City
+from ..modules.city.infrastructure.db_table import city_zone_infos_load
+from ..utils.area.polygon import AreaIndex
+from ..utils.area.polygon import scope_to_polygon
+from .area import Area
+from .deliverygraph import DeliveryGraph
+from .outbox import outbox_add
+from .status import Status
+
+
+class ReferenceCatalog:
+    """
+    Process-wide catalog of statuses, delivery graphs and areas.
+
+    The tables are small and rarely changed, so they are loaded as a whole
+    and served from memory, delivery graphs are parsed once. Spatial indexes
+    of active areas are built on demand per partner and city and dropped on
+    every reload. Every change publishes a new version through the outbox,
+    i.e. once the transaction which made it is committed, catalogs of all
+    processes reload on the next lookup when they receive it. Listeners store
+    the version in Redis, catalogs compare it with the loaded one every
+    ``ttl`` seconds in case a notification was missed. City time zones are
+    reloaded on the same notification.
+
+    Processes not listening to the notifications reload the catalog after
+    ``ttl`` seconds. The returned objects are shared and must not be changed.
+    """
+
+    VERSION_KEY = 'catalog:version'
+    CHANNEL = 'catalog:invalidated'
+    # delay before resubscribing after the connection is lost
+    RECONNECT_DELAY = 1
+
+    def __init__(self, ttl: float = None):
+        self.ttl = ttl or conf.catalog.ttl
+        self.version: typing.Optional[str] = None
+        self._loaded_at: typing.Optional[float] = None
+        self._statuses: typing.Dict[int, Status] = {}
+        self._status_codes: typing.Dict[str, Status] = {}
+        self._status_slugs: typing.Dict[typing.Tuple[str, typing.Optional[int]], Status] = {}
+        self._deliverygraphs: typing.Dict[int, DeliveryGraph] = {}
+        self._deliverygraph_steps: typing.Dict[int, DeliveryGraphSteps] = {}
+        self._area_indexes: typing.Dict[typing.Tuple[int, int], AreaIndex] = {}
+        self._task: typing.Optional[asyncio.Task] = None
+
+    @functools.cached_property
+    def _redis(self) -> aioredis.client.Redis:
+        return redis_module.get_connection()
+
+    @property
+    def is_listening(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_at is None:
+            return False
+        return time.monotonic() - self._loaded_at < self.ttl
+
+    async def _get_version(self) -> typing.Optional[str]:
+        """Returns the version stored in Redis, None if Redis is not connected."""
+        try:
+            version = await self._redis.get(self.VERSION_KEY)
+        except redis_module.RedisConnectionDoesNotExist:
+            return None
+        return version or ''
+
+    async def _is_version_loaded(self) -> bool:
+        try:
+            version = await self._get_version()
+        except Exception as e:
+            logger.warning(f'Could not check catalog version: {e}')
+            return False
+        return version is not None and version == self.version
+
+    async def load(self) -> None:
+        # the version is taken first, so changes made while loading cause one more reload
+        version = await self._get_version()
+        statuses = await Status.all()
+        deliverygraphs = await DeliveryGraph.all()
+
+        self._statuses = {status.id: status for status in statuses}
+        self._status_codes = {status.code: status for status in statuses if status.code}
+        self._status_slugs = {}
+        for status in sorted(statuses, key=lambda status: status.id, reverse=True):
+            self._status_slugs[status.slug, status.partner_id] = status
+        self._deliverygraphs = {graph.id: graph for graph in deliverygraphs}
+        self._deliverygraph_steps = {}
+        self._area_indexes = {}
+        self.version = version
+        self._loaded_at = time.monotonic()
+
+    async def _ensure_loaded(self) -> None:
+        if self._is_fresh():
+            return
+        if self.is_listening and self._loaded_at is not None and await self._is_version_loaded():
+            # nothing was changed, notifications are received
+            self._loaded_at = time.monotonic()
+            return
+        await self.load()
+
+    async def status(self, status_id: typing.Union[int, str, None]) -> typing.Optional[Status]:
+        if status_id is None:
+            # e.g. current status of an order without statuses
+            return None
+        await self._ensure_loaded()
+        status_id = int(status_id)
+        if status_id not in self._statuses:
+            # the status may be created by another process just now
+            if status := await Status.get_or_none(id=status_id):
+                self._statuses[status_id] = status
+        return self._statuses.get(status_id)
+
+    async def status_get(self, status_id: typing.Union[int, str, None]) -> Status:
+        """Returns status with the ID like ``Status.get``."""
+        if status := await self.status(status_id):
+            return status
+        raise DoesNotExist(f'Status with given ID: {status_id} was not found')
+
+    async def status_by_code(self, code: str) -> typing.Optional[Status]:
+        await self._ensure_loaded()
+        return self._status_codes.get(code)
+
+    async def status_by_slug(
+        self, slug: str, partner_id: typing.Optional[int] = None,
+    ) -> typing.Optional[Status]:
+        """Returns status of the partner with the slug, the default one if partner is not given."""
+        await self._ensure_loaded()
+        return self._status_slugs.get((slug, partner_id))
+
+    async def deliverygraph(self, deliverygraph_id: int) -> typing.Optional[DeliveryGraph]:
+        await self._ensure_loaded()
+        if deliverygraph_id not in self._deliverygraphs:
+            if deliverygraph := await DeliveryGraph.get_or_none(id=deliverygraph_id):
+                self._deliverygraphs[deliverygraph_id] = deliverygraph
+        return self._deliverygraphs.get(deliverygraph_id)
+
+    async def deliverygraph_steps(self, deliverygraph_id: int) -> DeliveryGraphSteps:
+        """Returns parsed steps of the delivery graph."""
+        if steps := self._deliverygraph_steps.get(deliverygraph_id):
+            if self._is_fresh():
+                return steps
+
+        deliverygraph = await self.deliverygraph(deliverygraph_id)
+        if deliverygraph is None:
+            raise DoesNotExist(f'Delivery graph with given ID: {deliverygraph_id} was not found')
+        steps = self._deliverygraph_steps[deliverygraph_id] = DeliveryGraphSteps(deliverygraph.graph)
+        return steps
+
+    async def area_index(self, partner_id: int, city_id: int) -> AreaIndex:
+        """Returns spatial index of active areas of the partner in the city."""
+        await self._ensure_loaded()
+        key = (partner_id, city_id)
+        indexes = self._area_indexes
+        if (index := indexes.get(key)) is None:
+            areas = await Area.filter(
+                partner_id=partner_id, city_id=city_id, archived=False,
+            ).order_by('id').values_list('id', 'scope')
+            # indexes of a catalog reloaded meanwhile are dropped with it
+            index = indexes[key] = AreaIndex(
+                (area_id, scope_to_polygon(scope)) for area_id, scope in areas
+            )
+        return index
+
+    def expire(self) -> None:
+        self._loaded_at = None
+
+    async def invalidate(self, using_db: typing.Optional[BaseDBAsyncClient] = None) -> None:
+        """
+        Expires catalogs of all processes once the current transaction is
+        committed, the notification is added to the outbox within it.
+        """
+        self.expire()
+        await outbox_add(self.CHANNEL, {'version': uuid.uuid4().hex}, using_db=using_db)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _receive(self, version: typing.Optional[str]) -> None:
+        # the version is stored only after the change is committed,
+        # so the catalog loaded with it has the change already
+        if version is not None and version == self.version:
+            return
+        self.expire()
+        await city_zone_infos_load()
+
+    async def _notified(self, version: str) -> None:
+        # every listener stores the version, so processes which missed the
+        # notification see the change on the next version check
+        await self._redis.set(self.VERSION_KEY, version)
+        await self._receive(version)
+
+    async def _listen(self) -> None:
+        while True:
+            subscription = self._redis.pubsub()
+            try:
+                await subscription.subscribe(self.CHANNEL)
+                # notifications may be missed while the subscription was lost
+                await self._receive(await self._get_version())
+                async for record in subscription.listen():
+                    if record['type'] == 'message':
+                        await self._notified(json.loads(record['data'])['version'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'Catalog subscription is lost: {e}')
+                await asyncio.sleep(self.RECONNECT_DELAY)
+            finally:
+                try:
+                    await asyncio.shield(subscription.close())
+                except Exception:
+                    pass
+
+
+catalog = ReferenceCatalog()
+
+
+@post_save(Status, DeliveryGraph, City, Area)
+async def catalog_invalidate_on_save(sender, instance, created, using_db, update_fields) -> None:
+    await catalog.invalidate(using_db)
+
+
+@post_delete(Status, DeliveryGraph, City, Area)
+async def catalog_invalidate_on_delete(sender, instance, using_db) -> None:
+    await catalog.invalidate(using_db)
@@ -1,22 +1,33 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
 from datetime import timedelta
 from typing import List
+from typing import Optional
+from typing import Tuple
 
-import tortoise
 from api.schemas.statistics import HeatmapResponse, HeatmapResponseItem
+from loguru import logger
 from pydantic import parse_obj_as
 from tortoise import fields
 from tortoise.exceptions import DoesNotExist
 from tortoise.expressions import RawSQL, Subquery, F
 from tortoise.functions import Count
 from tortoise.models import Model
+from tortoise.models import Q
 from tortoise.transactions import in_transaction
 
 from api.context_vars import locale_context
 from .. import models
 from .. import schemas
-from ..database import database_connection
+from ..conf import conf
+from ..database import read_connection
+from ..database import read_fetch
 
 from ..enums.statistics import ProgressInterval, progress_interval_to_query_map
+from ..enums.statistics import StatisticsMetric
+from ..modules.city.infrastructure.db_table import City
+from ..modules.city.infrastructure.db_table import get_zone_info
 
 
 
@@ -54,11 +65,10 @@ async def courier_stat_get(filter_string: str):
     {filter_string}
     group by courier_id;
     """
-    async with in_transaction('default') as conn:
-        count, result = await conn.execute_query(query)
-        if not count:
-            return {}
-        return schemas.CourierStatGet(**result[0])
+    result = await read_fetch(query)
+    if not result:
+        return {}
+    return schemas.CourierStatGet(**result[0])
 
 
 async def courier_progress_get(courier_id: int, default_filter_args: list,
@@ -81,17 +91,326 @@ async def courier_progress_get(courier_id: int, default_filter_args: list,
     group by {interval_query}
     order by {interval_query};
     """
-    async with in_transaction('default') as conn:
-        count, result = await conn.execute_query(query)
-        return parse_obj_as(List[schemas.CourierProgressGet], result)
+    result = await read_fetch(query)
+    return parse_obj_as(List[schemas.CourierProgressGet], result)
+
+
+STATISTICS_STATUSES = [
+    'all', 'new', 'others', 'cancelled', 'postponed', 'on-the-way-to-call-point', 'is_delivered',
+]
+
+# filters of orders which rollups can be filtered by, and the rollup field
+ROLLUP_FILTERS = {
+    'partner_id': 'partner_id',
+    'partner_id__in': 'partner_id',
+    'city_id': 'city_id',
+    'city_id__in': 'city_id',
+    'city__country_id': 'country_id',
+    'city__country_id__in': 'country_id',
+}
+ROLLUP_FILTER_CONDITIONS = {
+    'partner_id': 'order_statistics.partner_id = ANY({})',
+    'city_id': 'order_statistics.city_id = ANY({})',
+    'country_id': 'order_statistics.city_id IN (SELECT id FROM city WHERE country_id = ANY({}))',
+}
+# local time differs from UTC by 14 hours at most
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+# changes not merged by the compactor yet are read as well
+ROLLUP_QUERY = """
+WITH stats AS (
+    SELECT order_statistics.city_id, order_statistics.metric, order_statistics.status,
+           order_statistics.count, order_statistics.hour,
+           order_statistics.hour AT TIME ZONE COALESCE(tz.name, 'UTC') AS local_hour
+    FROM (
+        SELECT partner_id, city_id, hour, metric, status, count FROM order_statistics
+        UNION ALL
+        SELECT partner_id, city_id, hour, metric, status, count FROM order_statistics_delta
+    ) AS order_statistics
+    LEFT JOIN unnest($1::int[], $2::text[]) AS tz(city_id, name) ON tz.city_id = order_statistics.city_id
+    WHERE order_statistics.metric = ANY($3::text[]){conditions}
+)
+{query}
+"""
+
+
+class OrderStatistics(Model):
+    """
+    Hourly counters of orders, kept up to date by triggers on order and
+    order statuses tables. Triggers append changes to OrderStatisticsDelta,
+    which are merged into the counters by OrderStatisticsCompactor.
+
+    STATUS metric counts status transitions by status ID, STATE counts orders
+    by creation hour and current delivery status, DELIVERY_STATUS counts
+    delivery status transitions.
+    """
+    id = fields.BigIntField(pk=True)
+    partner_id = fields.IntField()
+    city_id = fields.IntField(default=0)
+    hour = fields.DatetimeField()
+    metric = fields.CharEnumField(**StatisticsMetric.to_kwargs())
+    status = fields.CharField(max_length=32)
+    count = fields.IntField(default=0)
+
+    class Meta:
+        table = 'order_statistics'
+        unique_together = ('partner_id', 'city_id', 'hour', 'metric', 'status')
+
+
+class OrderStatisticsDelta(Model):
+    """Change of an OrderStatistics counter appended by triggers."""
+    id = fields.BigIntField(pk=True)
+    partner_id = fields.IntField()
+    city_id = fields.IntField(default=0)
+    hour = fields.DatetimeField()
+    metric = fields.CharEnumField(**StatisticsMetric.to_kwargs())
+    status = fields.CharField(max_length=32)
+    count = fields.IntField()
+
+    class Meta:
+        table = 'order_statistics_delta'
+
+
+def _rollup_filters(filter_params: dict, default_filter_args: list) -> Optional[List[tuple]]:
+    """
+    Returns (field, values) filters of rollups equal to filters of orders.
+
+    None is returned when orders are filtered by anything rollups do not keep,
+    e.g. by courier, then statistics are calculated from orders.
+    """
+    filters = []
+
+    def add(key, value) -> bool:
+        field = ROLLUP_FILTERS.get(key)
+        if field is None:
+            return False
+        filters.append((field, list(value) if key.endswith('__in') else [value]))
+        return True
+
+    def add_q(q: Q) -> bool:
+        if q._is_negated or q.join_type != Q.AND:
+            return False
+        return (
+            all(add(key, value) for key, value in q.filters.items())
+            and all(add_q(child) for child in q.children)
+        )
+
+    for key, value in filter_params.items():
+        if key != 'created_at__range' and not add(key, value):
+            return None
+    if not all(add_q(arg) for arg in default_filter_args):
+        return None
+    return filters
+
+
+async def _city_time_zones() -> Tuple[List[int], List[str]]:
+    cities = await City.all().values_list('id', 'timezone')
+    return (
+        [city_id for city_id, _ in cities],
+        [get_zone_info(timezone).key for _, timezone in cities],
+    )
+
+
+async def _statistics_rollup_fetch(
+    query: str,
+    metrics: List[StatisticsMetric],
+    filters: List[tuple],
+    created_at_range: Optional[list],
+) -> list:
+    params = [*await _city_time_zones(), [metric.value for metric in metrics]]
+
+    def param(value) -> str:
+        params.append(value)
+        return f'${len(params)}'
+
+    conditions = [
+        ROLLUP_FILTER_CONDITIONS[field].format(param(values))
+        for field, values in filters
+    ]
+    range_conditions = []
+    for operator, value, offset in zip(('>=', '<='), created_at_range or [], (-1, 1)):
+        if value.tzinfo is not None:
+            range_conditions.append(f'stats.hour {operator} {param(value)}')
+            continue
+        # naive bounds are local time of cities
+        range_conditions.append(f'stats.local_hour {operator} date_trunc(\'hour\', {param(value)}::timestamp)')
+        conditions.append(f'order_statistics.hour {operator} {param(value + offset * MAX_UTC_OFFSET)}')
+
+    sql = ROLLUP_QUERY.format(
+        conditions=''.join(f' AND {condition}' for condition in conditions),
+        query=query.format(range=' AND '.join(range_conditions) or 'TRUE'),
+    )
+    return await read_fetch(sql, *params)
 
 
 async def statistics_get(filter_params, default_filter_args) -> schemas.StatisticsBase:
+    filters = _rollup_filters(filter_params, default_filter_args)
+    if filters is None:
+        return await _statistics_get_from_orders(filter_params, default_filter_args)
+
+    locale = locale_context.get()
+    rows = await _statistics_rollup_fetch(
+        f"""
+        SELECT COALESCE(city.name_{locale}, city.name_en, city.name_ru) AS city_name,
+               stats.status,
+               SUM(stats.count)::int AS count
+        FROM stats
+        LEFT JOIN city ON city.id = stats.city_id
+        WHERE {{range}}
+        GROUP BY city_name, stats.status
+        HAVING SUM(stats.count) <> 0
+        ORDER BY city_name
+        """,
+        metrics=[StatisticsMetric.STATE],
+        filters=filters,
+        created_at_range=filter_params.get('created_at__range'),
+    )
+    total = Counter()
+    cities = {}
+    for row in rows:
+        city = cities.setdefault(row['city_name'], Counter())
+        for counter in (total, city):
+            counter[row['status']] += row['count']
+            counter['all'] += row['count']
+
+    return schemas.StatisticsBase(
+        statuses=[{'name': status, 'count': total[status]} for status in STATISTICS_STATUSES],
+        cities=[
+            {
+                'name': name,
+                'statuses': [{'name': status, 'count': city[status]} for status in STATISTICS_STATUSES],
+            }
+            for name, city in cities.items()
+        ],
+    )
+
+
+ORDER_STATISTICS_BACKFILL_SQL = """
+INSERT INTO order_statistics (partner_id, city_id, hour, metric, status, count)
+SELECT o.partner_id, COALESCE(o.city_id, 0), date_trunc('hour', os.created_at), '{status}',
+       os.status_id::text, COUNT(*)
+FROM "order.statuses" os
+JOIN "order" o ON o.id = os.order_id
+WHERE os.created_at >= $1
+GROUP BY 1, 2, 3, 5
+UNION ALL
+SELECT o.partner_id, COALESCE(o.city_id, 0), date_trunc('hour', o.created_at), '{state}',
+       order_delivery_status_bucket(o.delivery_status), COUNT(*)
+FROM "order" o
+WHERE o.created_at >= $1
+GROUP BY 1, 2, 3, 5
+UNION ALL
+-- previous transitions are not kept, orders are cancelled at their last change
+SELECT partner_id, city_id, date_trunc('hour', changed_at), '{delivery_status}', 'cancelled', COUNT(*)
+FROM (
+    SELECT o.partner_id, COALESCE(o.city_id, 0) AS city_id, COALESCE((
+        SELECT MAX(h.created_at) FROM history h
+        WHERE h.model_type = 'Order' AND h.model_id = o.id
+    ), o.created_at) AS changed_at
+    FROM "order" o
+    WHERE o.delivery_status->>'status' = 'cancelled'
+) cancelled
+WHERE changed_at >= $1
+GROUP BY 1, 2, 3
+"""
+
+
+async def order_statistics_backfill(from_date: datetime = None) -> int:
+    """
+    Recalculates order statistics since the date from orders, their statuses
+    and history, returns the number of rollup rows.
+    """
+    from_date = from_date or datetime.min
+    query = ORDER_STATISTICS_BACKFILL_SQL.format(
+        status=StatisticsMetric.STATUS,
+        state=StatisticsMetric.STATE,
+        delivery_status=StatisticsMetric.DELIVERY_STATUS,
+    )
+    async with in_transaction('default') as conn:
+        # triggers of concurrent writes and the compactor wait until the rollups are recalculated
+        await conn.execute_query(
+            'LOCK TABLE order_statistics, order_statistics_delta IN EXCLUSIVE MODE',
+        )
+        await conn.execute_query('DELETE FROM order_statistics WHERE hour >= $1', [from_date])
+        await conn.execute_query('DELETE FROM order_statistics_delta WHERE hour >= $1', [from_date])
+        count, _ = await conn.execute_query(query, [from_date])
+    return count
+
+
+# any constant, the lock only keeps compactions of several processes from running at once
+ORDER_STATISTICS_COMPACT_LOCK = 224013
+
+ORDER_STATISTICS_COMPACT_SQL = """
+WITH moved AS (
+    DELETE FROM order_statistics_delta
+    RETURNING partner_id, city_id, hour, metric, status, count
+), merged AS (
+    INSERT INTO order_statistics AS s (partner_id, city_id, hour, metric, status, count)
+    SELECT partner_id, city_id, hour, metric, status, SUM(count)
+    FROM moved
+    GROUP BY partner_id, city_id, hour, metric, status
+    ON CONFLICT (partner_id, city_id, hour, metric, status) DO UPDATE SET count = s.count + EXCLUDED.count
+)
+SELECT COUNT(*) AS count FROM moved
+"""
+
+
+async def order_statistics_compact() -> int:
+    """
+    Merges changes appended by triggers into the rollups, returns their number.
+
+    Only one compaction runs at a time, the others return 0 immediately.
+    """
+    async with in_transaction('default') as conn:
+        _, rows = await conn.execute_query(
+            'SELECT pg_try_advisory_xact_lock($1) AS locked', [ORDER_STATISTICS_COMPACT_LOCK],
+        )
+        if not rows[0]['locked']:
+            return 0
+        _, rows = await conn.execute_query(ORDER_STATISTICS_COMPACT_SQL)
+    return rows[0]['count']
+
+
+class OrderStatisticsCompactor:
+    """Merges changes of the rollups every ``interval`` seconds."""
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or conf.statistics.compact_interval
+        self.compacted = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run(self) -> None:
+        while True:
+            try:
+                self.compacted += await order_statistics_compact()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f'Order statistics compaction failed: {e}')
+            await asyncio.sleep(self.interval)
+
+
+order_statistics_compactor = OrderStatisticsCompactor()
+
+
+async def _statistics_get_from_orders(filter_params, default_filter_args) -> schemas.StatisticsBase:
     locale = locale_context.get()
     orders = models.Order.all_objects.filter(*default_filter_args, **filter_params)
     orders_query = orders.as_query()
-    statuses = ['all', 'new', 'others', 'cancelled', 'postponed', 'on-the-way-to-call-point',
-                'is_delivered']
+    statuses = STATISTICS_STATUSES
     order_status_raw_query = """ 
             SELECT
                 COUNT(*) AS "all",
@@ -125,9 +444,9 @@ async def statistics_get(filter_params, default_filter_args) -> schemas.Statisti
     """
     city_order_status_query = city_order_status_raw_query % {'locale': locale, 'filter_query': orders_query}
 
-    async with tortoise.transactions.in_transaction('default') as conn:
-        _, order_counts = await conn.execute_query(order_status_query)
-        _, city_order_counts = await conn.execute_query(city_order_status_query)
+    async with read_connection() as conn:
+        order_counts = await conn.fetch(order_status_query)
+        city_order_counts = await conn.fetch(city_order_status_query)
     status_list, cities_list = [], []
     for status in statuses:
         status_list.append(
@@ -146,9 +465,63 @@ async def daterange(start_date, end_date):
         dates.append(start_date.strftime("%Y-%m-%d"))
     return dates
 
+
 async def statistics_get_by_date(filter_params, default_filter_args):
+    """
+    Daily counts of new, delivered and cancelled orders.
+
+    ``created_at__range`` applies to the time of status changes, not to the
+    creation of orders, so an order created before the range and delivered
+    within it is counted as delivered.
+    """
+    filters = _rollup_filters(filter_params, default_filter_args)
+    if filters is None:
+        return await _statistics_get_by_date_from_orders(filter_params, default_filter_args)
+
     created_at_range = filter_params.get('created_at__range')
-    orders = models.Order.all_objects.filter(*default_filter_args, **filter_params)
+    rows = await _statistics_rollup_fetch(
+        f"""
+        SELECT
+            DATE(stats.local_hour) AS status_date,
+            -- 1: Новая заявка
+            COALESCE(SUM(stats.count) FILTER (
+                WHERE stats.metric = '{StatisticsMetric.STATUS}' AND stats.status = '1'
+            ), 0)::int AS new,
+            -- 7: Доставлено 27: Выдано
+            COALESCE(SUM(stats.count) FILTER (
+                WHERE stats.metric = '{StatisticsMetric.STATUS}' AND stats.status IN ('7', '27')
+            ), 0)::int AS is_delivered,
+            COALESCE(SUM(stats.count) FILTER (
+                WHERE stats.metric = '{StatisticsMetric.DELIVERY_STATUS}' AND stats.status = 'cancelled'
+            ), 0)::int AS cancelled
+        FROM stats
+        WHERE {{range}}
+        GROUP BY status_date
+        """,
+        metrics=[StatisticsMetric.STATUS, StatisticsMetric.DELIVERY_STATUS],
+        filters=filters,
+        created_at_range=created_at_range,
+    )
+
+    dates = await daterange(created_at_range[0], created_at_range[1])
+    result = {f'{i}': {
+        'date': f'{i}', 'new': 0, 'is_delivered': 0, 'cancelled': 0
+    } for i in dates}
+    for row in rows:
+        if date := result.get(str(row['status_date'])):
+            date.update(new=row['new'], is_delivered=row['is_delivered'], cancelled=row['cancelled'])
+    return list(result.values())
+
+
+def _orders_without_range(filter_params, default_filter_args):
+    # the range is applied to status changes, as rollups do
+    filter_params = {key: value for key, value in filter_params.items() if key != 'created_at__range'}
+    return models.Order.all_objects.filter(*default_filter_args, **filter_params)
+
+
+async def _statistics_get_by_date_from_orders(filter_params, default_filter_args):
+    created_at_range = filter_params.get('created_at__range')
+    orders = _orders_without_range(filter_params, default_filter_args)
     subquery = Subquery(orders.filter(delivery_status__filter={'status':'cancelled'}).values_list('id', flat=True))
     history = models.History.filter(model_id__in=subquery, model_type='Order')
     get_new_and_delivered_count = f"""
@@ -173,12 +546,12 @@ async def statistics_get_by_date(filter_params, default_filter_args):
                 status_date,
                 COUNT(*) AS cancelled
             FROM CancelledOrders
-            WHERE row_num = 1
+            WHERE row_num = 1 AND status_date between DATE('{created_at_range[0]}') and DATE('{created_at_range[1]}')
             GROUP BY status_date;
     """
-    async with tortoise.transactions.in_transaction('default') as conn:
-        _, new_and_delivered_count = await conn.execute_query(get_new_and_delivered_count)
-        _, cancelled_count = await conn.execute_query(get_cancelled_count)
+    async with read_connection() as conn:
+        new_and_delivered_count = await conn.fetch(get_new_and_delivered_count)
+        cancelled_count = await conn.fetch(get_cancelled_count)
 
     dates = await daterange(created_at_range[0], created_at_range[1])
     result = {f'{i}': {
@@ -197,27 +570,70 @@ async def convert_to_hour_format(hour):
 
 
 async def statistics_get_by_hour(filter_params, default_filter_args):
-    orders = models.Order.all_objects.filter(*default_filter_args, **filter_params)
+    """
+    Counts of new and delivered orders by local hour of the day.
+
+    ``created_at__range`` applies to the time of status changes, as in
+    statistics_get_by_date.
+    """
+    filters = _rollup_filters(filter_params, default_filter_args)
+    if filters is None:
+        return await _statistics_get_by_hour_from_orders(filter_params, default_filter_args)
+
+    rows = await _statistics_rollup_fetch(
+        """
+        SELECT
+            EXTRACT(HOUR FROM stats.local_hour)::int AS hour,
+            COALESCE(SUM(stats.count) FILTER (WHERE s.slug = 'novaia-zaiavka'), 0)::int AS new,
+            COALESCE(SUM(stats.count) FILTER (WHERE s.slug = 'dostavleno'), 0)::int AS is_delivered
+        FROM stats
+        JOIN status AS s ON s.id::text = stats.status AND s.slug IN ('novaia-zaiavka', 'dostavleno')
+        WHERE {range}
+        GROUP BY hour
+        """,
+        metrics=[StatisticsMetric.STATUS],
+        filters=filters,
+        created_at_range=filter_params.get('created_at__range'),
+    )
+    result = {f'{hour:02d}:00': {
+        'hour': f'{hour:02d}:00', 'new': 0, 'is_delivered': 0
+    } for hour in range(24)}
+    for row in rows:
+        result[await convert_to_hour_format(row['hour'])].update(
+            new=row['new'], is_delivered=row['is_delivered'],
+        )
+    return list(result.values())
+
+
+async def _statistics_get_by_hour_from_orders(filter_params, default_filter_args):
+    orders = _orders_without_range(filter_params, default_filter_args)
     statuses = ['new', 'is_delivered']
+    params = [*await _city_time_zones()]
+    range_conditions = []
+    for operator, value in zip(('>=', '<='), filter_params.get('created_at__range') or []):
+        params.append(value)
+        range_conditions.append(f' AND os.created_at {operator} ${len(params)}')
 
     query = f"""
             SELECT
-                EXTRACT(HOUR FROM os.created_at AT TIME ZONE 'UTC' + INTERVAL '6 hours') AS hour,
+                EXTRACT(HOUR FROM os.created_at AT TIME ZONE COALESCE(tz.name, 'UTC')) AS hour,
                 SUM(CASE WHEN s.slug = 'novaia-zaiavka' THEN 1 ELSE 0 END) AS new,
                 SUM(CASE WHEN s.slug = 'dostavleno' THEN 1 ELSE 0 END) AS is_delivered
             FROM ({orders.as_query()}) AS o
-            LEFT JOIN "order.statuses" AS os ON os.order_id = o.id
+            LEFT JOIN unnest($1::int[], $2::text[]) AS tz(city_id, name) ON tz.city_id = o.city_id
+            LEFT JOIN "order.statuses" AS os ON os.order_id = o.id{''.join(range_conditions)}
             LEFT JOIN status AS s ON os.status_id = s.id AND s.slug IN ('novaia-zaiavka', 'dostavleno')
             GROUP BY hour;
             """
 
-    async with in_transaction("default") as tconn:
-        _, new_counts = await tconn.execute_query(query)
+    new_counts = await read_fetch(query, *params)
     result = {f'{hour:02d}:00': {
         'hour': f'{hour:02d}:00', 'new': 0, 'is_delivered': 0
     } for hour in range(24)}
 
     for hour in new_counts:
+        if hour['hour'] is None:
+            continue
         result_hour = await convert_to_hour_format(int(hour['hour']))
         for sts in statuses:
             result[result_hour][sts] = hour[sts]
@@ -253,7 +669,7 @@ async def statistics_heatmap_get_by_date(filter_params, default_filter_args) ->
 
     # noinspection PyUnusedLocal
     result_list = []
-    async with database_connection() as conn:
+    async with read_connection() as conn:
         data = await conn.fetch(query)
         result_list = parse_obj_as(List[HeatmapResponseItem], data)
 
@@ -1,8 +1,10 @@
 from tortoise import fields
+from tortoise import timezone
 from tortoise.exceptions import IntegrityError
 from tortoise.models import Model
 from .. import models, security
 from ..schemas import RevokedTokenCreate
+from ..services import principal
 
 
 class RevokedToken(Model):
@@ -32,6 +34,14 @@ async def token_revoke(token: str):
         await RevokedToken.create(**payload.dict(exclude_unset=True))
     except IntegrityError:
         pass
+    await principal.service.revoke(token, payload.exp.timestamp())
+    await principal.service.invalidate_user(payload.client_id)
+
+
+async def token_revoked_sync():
+    """Loads not expired revoked tokens into the principal cache."""
+    tokens = await RevokedToken.filter(exp__gt=timezone.now()).values_list('token', 'exp')
+    await principal.service.revoke_many((token, exp.timestamp()) for token, exp in tokens)
 
 
 async def token_get(token: str) -> RevokedToken | None:
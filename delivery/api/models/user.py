@@ -17,6 +17,7 @@ from ..conf import conf
 from . import fields as custom_fields
 from . import mixins
 from ..exceptions import HTTPBadRequestException
+from ..services import principal
 from ..services import sms
 from ..services.sms.notification import send_confirm_email_otp
 
@@ -346,6 +347,7 @@ async def user_change_photo(user_id, photo):
         user.photo = photo
         await user.save()
         await user.refresh_from_db()
+        await principal.service.invalidate_user(user_id)
         return {'photo': user.photo}
     except tortoise.exceptions.DoesNotExist as e:
         raise UserNotFound(
@@ -395,6 +397,7 @@ async def user_update(user_id: int, update: schemas.UserUpdate) -> dict:
                     f'User with given iin: {update.iin} already exists',
                 )
 
+    await principal.service.invalidate_user(user_id)
     return await user_get(id=user_id)
 
 
@@ -407,6 +410,7 @@ async def user_delete(user_id: int) -> None:
         ) from e
 
     await user.delete()
+    await principal.service.invalidate_user(user_id)
 
 
 async def user_permission_add(user_id: int, permission_slug: str):
@@ -415,6 +419,7 @@ async def user_permission_add(user_id: int, permission_slug: str):
         permission_slug=permission_slug)
 
     await instance.permissions.add(permission)
+    await principal.service.invalidate_user(user_id)
 
     user = utils.as_dict(record=instance)
     user['permissions'] = await models.Permission.filter(users=user_id).values(
@@ -430,6 +435,7 @@ async def user_permission_remove(user_id: int, permission_slug: str):
         permission_slug=permission_slug)
 
     await instance.permissions.remove(permission)
+    await principal.service.invalidate_user(user_id)
 
     user = utils.as_dict(record=instance)
     user['permissions'] = await models.Permission.filter(
@@ -462,6 +468,7 @@ async def user_set_password(user_id, email, password, token):
     if 'email' in security.unsign_token(token):
         await models.token_revoke(token)
     await user_obj.save()
+    await principal.service.invalidate_user(user_id)
 
 
 @atomic()
@@ -473,3 +480,4 @@ async def user_set_password_v2(user_id, password, token):
     if 'email' in security.unsign_token(token).get('email'):
         await models.token_revoke(token)
     await user_obj.save()
+    await principal.service.invalidate_user(user_id)
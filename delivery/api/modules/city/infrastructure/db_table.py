@@ -1,13 +1,111 @@
+import asyncio
 from datetime import datetime
+from typing import Iterable
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from loguru import logger
 from tortoise import Model, fields
+from tortoise.signals import post_delete, post_save
 from tortoise.timezone import now
 
 from api import models
 from api.context_vars import locale_context
 
 
+def get_zone_info(timezone: str | None) -> ZoneInfo:
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, TypeError, ValueError):
+        pass
+    return ZoneInfo('UTC')
+
+
+def get_localtime(tz: ZoneInfo) -> datetime:
+    current_time = now()
+    return current_time + tz.utcoffset(current_time)
+
+
+# time zones of cities by ID, loaded at startup and kept up to date on save
+_city_zone_infos: dict[int, ZoneInfo] = {}
+_city_zone_infos_loading: asyncio.Task | None = None
+
+
+async def city_zone_infos_load() -> None:
+    """Loads time zones of all cities into the cache."""
+    cities = await City.all().values_list('id', 'timezone')
+    _city_zone_infos.clear()
+    _city_zone_infos.update(
+        (city_id, get_zone_info(timezone)) for city_id, timezone in cities
+    )
+
+
+def _city_zone_infos_reload() -> None:
+    global _city_zone_infos_loading
+
+    if _city_zone_infos_loading is not None and not _city_zone_infos_loading.done():
+        return
+    try:
+        _city_zone_infos_loading = asyncio.get_running_loop().create_task(city_zone_infos_load())
+    except RuntimeError:
+        pass
+
+
+async def city_zone_infos_ensure(city_ids: Iterable[int | None]) -> None:
+    """
+    Loads time zones of the cities missing in the cache, e.g. created by
+    another process after the cache was loaded.
+    """
+    missing = {
+        city_id for city_id in city_ids
+        if city_id is not None and city_id not in _city_zone_infos
+    }
+    if not missing:
+        return
+    cities = await City.filter(id__in=missing).values_list('id', 'timezone')
+    _city_zone_infos.update(
+        (city_id, get_zone_info(timezone)) for city_id, timezone in cities
+    )
+
+
+def city_zone_info(city_id: int | None) -> ZoneInfo:
+    """
+    Returns time zone of the city from the cache, without database access.
+
+    UTC is returned for unknown cities and the cache is reloaded in
+    background, async code loads missing cities with city_zone_infos_ensure
+    or cities_localtime_get beforehand.
+    """
+    if city_id is None:
+        return ZoneInfo('UTC')
+    try:
+        return _city_zone_infos[city_id]
+    except KeyError:
+        logger.warning(f'Time zone of city {city_id} is not cached')
+        _city_zone_infos_reload()
+    return ZoneInfo('UTC')
+
+
+def city_zone_info_set(city: 'City') -> ZoneInfo:
+    tz = _city_zone_infos[city.id] = city.tz
+    return tz
+
+
+def cities_localtime(city_ids: Iterable[int | None]) -> dict[int | None, datetime]:
+    """Returns local time of many cities at once, the current time is taken once."""
+    current_time = now()
+    return {
+        city_id: current_time + city_zone_info(city_id).utcoffset(current_time)
+        for city_id in set(city_ids)
+    }
+
+
+async def cities_localtime_get(city_ids: Iterable[int | None]) -> dict[int | None, datetime]:
+    """Same as cities_localtime, cities missing in the cache are loaded first."""
+    city_ids = set(city_ids)
+    await city_zone_infos_ensure(city_ids)
+    return cities_localtime(city_ids)
+
+
 class City(Model):
     id = fields.IntField(pk=True)
     name_en = fields.CharField(max_length=255, null=True)
@@ -45,13 +143,18 @@ class City(Model):
 
     @property
     def tz(self):
-        try:
-            return ZoneInfo(self.timezone)
-        except ZoneInfoNotFoundError:
-            pass
-        return ZoneInfo('UTC')
+        return get_zone_info(self.timezone)
 
     @property
     def localtime(self) -> datetime:
-        current_time = now()
-        return current_time + self.tz.utcoffset(current_time)
+        return get_localtime(self.tz)
+
+
+@post_save(City)
+async def city_zone_info_update(sender, instance: City, created, using_db, update_fields) -> None:
+    city_zone_info_set(instance)
+
+
+@post_delete(City)
+async def city_zone_info_delete(sender, instance: City, using_db) -> None:
+    _city_zone_infos.pop(instance.id, None)
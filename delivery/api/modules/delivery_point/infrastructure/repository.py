@@ -6,6 +6,7 @@ from fastapi_pagination.ext.tortoise import paginate
 from pydantic import parse_obj_as
 from tortoise.exceptions import DoesNotExist
 from tortoise.models import MODEL
+from tortoise.transactions import in_transaction
 
 from ..errors import *
 from api.common.repository_base import BaseRepository, TABLE, SCHEMA, IN_SCHEMA
@@ -60,6 +61,22 @@ class DeliveryPointRepository(BaseRepository):
         entity = await self._table.create(**jsonable_encoder(in_schema))
         return entity
 
-    async def bulk_create(self, entities: List[IN_SCHEMA]):
-        for delivery_point in entities:
-            await self.create(delivery_point)
+    async def bulk_create(self, entities: List[IN_SCHEMA]) -> List[int]:
+        """Creates all delivery points with a single INSERT, returns their IDs in order."""
+        if not entities:
+            return []
+        query = f"""
+            INSERT INTO "{self._table.Meta.table}" ("address", "latitude", "longitude")
+            SELECT "address", "latitude", "longitude"
+            FROM UNNEST($1::varchar[], $2::numeric[], $3::numeric[])
+                WITH ORDINALITY AS "new_values" ("address", "latitude", "longitude", "position")
+            ORDER BY "position"
+            RETURNING "id"
+        """
+        async with in_transaction('default') as conn:
+            _, rows = await conn.execute_query(query, [
+                [entity.address for entity in entities],
+                [entity.latitude for entity in entities],
+                [entity.longitude for entity in entities],
+            ])
+        return [row['id'] for row in rows]
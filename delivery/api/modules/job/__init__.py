@@ -0,0 +1,2 @@
+from .infrastructure.repository import JobRepository  # noqa: F401
+from .worker import JobWorker  # noqa: F401
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+from fastapi import UploadFile
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from api import schemas
+from .enums import JobStatus
+from .enums import JobType
+from .errors import *
+from .handlers import IMPORT_SOURCE_FILENAME
+from .infrastructure.repository import JobRepository
+from .infrastructure.repository import get_artifacts_dir
+from .schemas import JobGet
+from ...common.action_base import BaseAction
+
+
+def _write_file(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+class JobActions(BaseAction):
+    def __init__(self, current_user: schemas.UserCurrent):
+        self.user = current_user
+        self.repo = JobRepository()
+
+    async def enqueue_order_report(
+        self, query: schemas.ExportExcel, profile_type: str, filters: dict,
+    ) -> JobGet:
+        return await self.repo.create(
+            job_type=JobType.ORDER_REPORT,
+            user_id=self.user.id,
+            payload=jsonable_encoder({
+                'query': query,
+                'profile_type': profile_type,
+                'filters': filters,
+            }),
+        )
+
+    async def enqueue_order_import(self, file: UploadFile) -> JobGet:
+        job_id = self.repo.new_id()
+        await run_in_threadpool(
+            _write_file,
+            get_artifacts_dir(job_id) / IMPORT_SOURCE_FILENAME,
+            await file.read(),
+        )
+        return await self.repo.create(
+            job_type=JobType.ORDER_IMPORT,
+            user_id=self.user.id,
+            payload=jsonable_encoder({
+                'filename': file.filename,
+                'current_user': self.user,
+            }),
+            job_id=job_id,
+        )
+
+    async def get(self, job_id: str) -> JobGet:
+        job = await self.repo.get(job_id)
+        # jobs of other users are hidden
+        if job.user_id != self.user.id and not self.user.is_superuser:
+            raise JobNotFoundError(
+                table='job', detail=f'Job with given ID: {job_id} was not found',
+            )
+        return job
+
+    async def get_file(self, job_id: str) -> tuple[Path, str]:
+        job = await self.get(job_id)
+        if job.status != JobStatus.SUCCEEDED or not job.has_file:
+            raise JobResultNotReadyError(
+                table='job', detail=f'Job with given ID: {job_id} has no result file yet',
+            )
+        filename = await self.repo.get_filename(job_id)
+        return get_artifacts_dir(job_id) / filename, filename
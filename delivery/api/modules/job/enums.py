@@ -0,0 +1,13 @@
+from api import enums
+
+
+class JobType(enums.Descriptor):
+    ORDER_REPORT = 'order_report'
+    ORDER_IMPORT = 'order_import'
+
+
+class JobStatus(enums.Descriptor):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
@@ -0,0 +1,20 @@
+from api.common.error_base import BaseIntegrityError
+from api.common.error_base import BaseNotFoundError
+
+
+class JobNotFoundError(BaseNotFoundError):
+    """Raises when job with provided ID does not exist or has expired."""
+
+    code = 'jb1'
+
+
+class JobResultNotReadyError(BaseIntegrityError):
+    """Raises when result of the job is requested before it has succeeded."""
+
+    code = 'jb2'
+
+
+__all__ = (
+    'JobNotFoundError',
+    'JobResultNotReadyError',
+)
@@ -0,0 +1,65 @@
+import shutil
+import typing
+from pathlib import Path
+
+import slugify
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from tortoise.timezone import now
+
+from api import models
+from api import schemas
+from .enums import JobType
+from .infrastructure.repository import get_artifacts_dir
+
+IMPORT_SOURCE_FILENAME = 'source.xlsx'
+
+Progress = typing.Callable[[int, typing.Optional[int]], typing.Awaitable]
+
+
+class JobResult(typing.NamedTuple):
+    result: str | None = None
+    filename: str | None = None
+
+
+def _save_file(file: typing.BinaryIO, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        file.seek(0)
+        with open(path, 'wb') as destination:
+            shutil.copyfileobj(file, destination)
+    finally:
+        file.close()
+
+
+async def order_report(job_id: str, payload: dict, progress: Progress) -> JobResult:
+    report = await models.order_report_streaming(
+        schemas.ExportExcel.parse_obj(payload['query']),
+        payload['profile_type'],
+        progress=progress,
+        **payload['filters'],
+    )
+    filename = f'Report from {now().date()}.xlsx'
+    await run_in_threadpool(_save_file, report, get_artifacts_dir(job_id) / filename)
+    return JobResult(filename=filename)
+
+
+async def order_import(job_id: str, payload: dict, progress: Progress) -> JobResult:
+    source = get_artifacts_dir(job_id) / IMPORT_SOURCE_FILENAME
+    with open(source, 'rb') as file:
+        result = await models.order_import_from_excel(
+            UploadFile(file, filename=payload['filename']),
+            current_user=schemas.UserCurrent.parse_obj(payload['current_user']),
+            progress=progress,
+        )
+    source.unlink(missing_ok=True)
+
+    filename = f"{slugify.slugify(payload['filename'].split('.', 2)[0])}.xlsx"
+    await run_in_threadpool(_save_file, result.file, get_artifacts_dir(job_id) / filename)
+    return JobResult(result=result.result, filename=filename)
+
+
+handlers: typing.Dict[JobType, typing.Callable[..., typing.Awaitable[JobResult]]] = {
+    JobType.ORDER_REPORT: order_report,
+    JobType.ORDER_IMPORT: order_import,
+}
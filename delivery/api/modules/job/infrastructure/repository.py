@@ -0,0 +1,237 @@
+import functools
+import json
+import shutil
+import time
+import typing
+import uuid
+from pathlib import Path
+
+import aioredis
+from tortoise.timezone import now
+
+from api import redis_module
+from api.conf import conf
+from ..enums import JobStatus
+from ..enums import JobType
+from ..errors import *
+from ..schemas import *
+
+
+QUEUE_STREAM = 'jobs:stream'
+QUEUE_GROUP = 'jobs'
+ARTIFACTS_DIRNAME = 'jobs'
+
+
+def get_artifacts_root() -> Path:
+    return conf.media.root / ARTIFACTS_DIRNAME
+
+
+def get_artifacts_dir(job_id: str) -> Path:
+    return get_artifacts_root() / job_id
+
+
+def delete_expired_artifacts(ttl: int) -> int:
+    """Removes artifact directories of the jobs older than ``ttl`` seconds."""
+    root = get_artifacts_root()
+    if not root.exists():
+        return 0
+
+    deleted = 0
+    expired_at = time.time() - ttl
+    for path in root.iterdir():
+        if path.is_dir() and path.stat().st_mtime < expired_at:
+            shutil.rmtree(path, ignore_errors=True)
+            deleted += 1
+    return deleted
+
+
+class JobEntry(typing.NamedTuple):
+    entry_id: str
+    job_id: str
+    # how many times the job was taken by workers, including this one
+    deliveries: int
+
+
+class JobRepository:
+    """
+    Stores jobs in Redis.
+
+    Every job is a hash expiring after ``ttl`` seconds, ids of queued jobs
+    are added to a stream which is consumed by the workers group. A job
+    stays pending in the group until it is acknowledged, so jobs of crashed
+    workers are claimed again by the others.
+    """
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl or conf.jobs.ttl
+
+    @functools.cached_property
+    def _redis(self) -> aioredis.client.Redis:
+        return redis_module.get_connection()
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f'job:{job_id}'
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def _to_schema(job_id: str, job: dict) -> JobGet:
+        total = job.get('total')
+        return JobGet(
+            id=job_id,
+            type=job['type'],
+            status=job['status'],
+            user_id=job['user_id'],
+            progress=JobProgress(
+                processed=job.get('processed', 0),
+                total=int(total) if total else None,
+            ),
+            result=job.get('result') or None,
+            error=job.get('error') or None,
+            has_file=bool(job.get('filename')),
+            created_at=job['created_at'],
+            started_at=job.get('started_at') or None,
+            finished_at=job.get('finished_at') or None,
+        )
+
+    async def _update(self, job_id: str, **fields) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job_id), mapping=fields)
+            pipe.expire(self._key(job_id), self.ttl)
+            await pipe.execute()
+
+    async def _get_hash(self, job_id: str) -> dict:
+        job = await self._redis.hgetall(self._key(job_id))
+        if not job:
+            raise JobNotFoundError(
+                table='job', detail=f'Job with given ID: {job_id} was not found',
+            )
+        return job
+
+    async def create(
+        self,
+        job_type: JobType,
+        user_id: int,
+        payload: dict,
+        job_id: str = None,
+    ) -> JobGet:
+        job_id = job_id or self.new_id()
+        job = {
+            'type': job_type.value,
+            'status': JobStatus.QUEUED.value,
+            'user_id': user_id,
+            'payload': json.dumps(payload),
+            'processed': 0,
+            'created_at': now().isoformat(),
+        }
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job_id), mapping=job)
+            pipe.expire(self._key(job_id), self.ttl)
+            pipe.xadd(QUEUE_STREAM, {'job_id': job_id})
+            await pipe.execute()
+        return self._to_schema(job_id, job)
+
+    async def get(self, job_id: str) -> JobGet:
+        return self._to_schema(job_id, await self._get_hash(job_id))
+
+    async def get_task(self, job_id: str) -> typing.Tuple[JobType, dict]:
+        job = await self._get_hash(job_id)
+        return JobType(job['type']), json.loads(job['payload'])
+
+    async def get_filename(self, job_id: str) -> str | None:
+        return await self._redis.hget(self._key(job_id), 'filename')
+
+    async def group_ensure(self) -> None:
+        try:
+            await self._redis.xgroup_create(QUEUE_STREAM, QUEUE_GROUP, id='0', mkstream=True)
+        except aioredis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    async def dequeue(self, consumer: str, timeout: int = 5) -> JobEntry | None:
+        """Waits for the next queued job, returns None on timeout."""
+        response = await self._redis.xreadgroup(
+            QUEUE_GROUP, consumer, {QUEUE_STREAM: '>'}, count=1, block=timeout * 1000,
+        )
+        if not response:
+            return None
+        (entry_id, fields), = response[0][1]
+        return JobEntry(entry_id=entry_id, job_id=fields['job_id'], deliveries=1)
+
+    async def claim_stale(self, consumer: str, idle: int) -> JobEntry | None:
+        """Claims a job not acknowledged nor touched for ``idle`` seconds."""
+        idle = idle * 1000
+        pending = await self._redis.xpending_range(QUEUE_STREAM, QUEUE_GROUP, '-', '+', 10)
+        for entry in pending:
+            if entry['time_since_delivered'] < idle:
+                continue
+            claimed = await self._redis.xclaim(
+                QUEUE_STREAM, QUEUE_GROUP, consumer, idle, [entry['message_id']],
+            )
+            if not claimed:
+                # claimed by another worker in the meantime
+                continue
+            (entry_id, fields), = claimed
+            if not fields:
+                # the entry was deleted, e.g. the stream was trimmed manually
+                await self.ack(entry_id)
+                continue
+            return JobEntry(
+                entry_id=entry_id,
+                job_id=fields['job_id'],
+                deliveries=entry['times_delivered'] + 1,
+            )
+        return None
+
+    async def touch(self, consumer: str, entry_id: str) -> None:
+        """Resets idle time of the job being processed, so it is not claimed."""
+        await self._redis.xclaim(
+            QUEUE_STREAM, QUEUE_GROUP, consumer, 0, [entry_id], justid=True,
+        )
+
+    async def ack(self, entry_id: str) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.xack(QUEUE_STREAM, QUEUE_GROUP, entry_id)
+            pipe.xdel(QUEUE_STREAM, entry_id)
+            await pipe.execute()
+
+    async def mark_running(self, job_id: str) -> None:
+        await self._update(
+            job_id,
+            status=JobStatus.RUNNING.value,
+            started_at=now().isoformat(),
+        )
+
+    async def set_progress(self, job_id: str, processed: int, total: int | None) -> None:
+        await self._update(job_id, processed=processed, total=total or '')
+
+    async def mark_succeeded(
+        self, job_id: str, result: str | None, filename: str | None,
+    ) -> None:
+        await self._update(
+            job_id,
+            status=JobStatus.SUCCEEDED.value,
+            result=result or '',
+            filename=filename or '',
+            finished_at=now().isoformat(),
+        )
+
+    async def mark_failed(self, job_id: str, error: str) -> None:
+        await self._update(
+            job_id,
+            status=JobStatus.FAILED.value,
+            error=error,
+            finished_at=now().isoformat(),
+        )
+
+
+__all__ = (
+    'JobEntry',
+    'JobRepository',
+    'delete_expired_artifacts',
+    'get_artifacts_dir',
+    'get_artifacts_root',
+)
@@ -0,0 +1,61 @@
+import fastapi
+from starlette.responses import FileResponse
+
+from api import auth
+from api import exceptions
+from api import schemas
+from .actions import JobActions
+from .errors import *
+from .schemas import JobGet
+
+router = fastapi.APIRouter()
+
+
+@router.get(
+    '/job/{job_id}',
+    summary='Get background job status',
+    response_description='Background job status and progress',
+    response_model=JobGet,
+)
+async def job_get(
+    job_id: str,
+    current_user: schemas.UserCurrent = fastapi.Security(auth.get_current_user),
+):
+    """Get status, progress and result of the background job.
+
+    Returns 404 NOT FOUND if the job does not exist, has expired
+    or belongs to another user.
+    """
+    actions = JobActions(current_user)
+    try:
+        return await actions.get(job_id)
+    except JobNotFoundError as e:
+        raise exceptions.HTTPNotFoundException(e.detail) from e
+
+
+@router.get(
+    '/job/{job_id}/file',
+    summary='Download background job result file',
+    response_description='Result file of the job',
+)
+async def job_get_file(
+    job_id: str,
+    current_user: schemas.UserCurrent = fastapi.Security(auth.get_current_user),
+) -> FileResponse:
+    """Download the file produced by the succeeded job.
+
+    Returns 400 BAD REQUEST if the job has not succeeded yet.
+    """
+    actions = JobActions(current_user)
+    try:
+        path, filename = await actions.get_file(job_id)
+    except JobNotFoundError as e:
+        raise exceptions.HTTPNotFoundException(e.detail) from e
+    except JobResultNotReadyError as e:
+        raise exceptions.HTTPBadRequestException(e.detail) from e
+
+    return FileResponse(
+        path=path,
+        media_type='application/octet-stream',
+        filename=filename,
+    )
@@ -0,0 +1,31 @@
+import datetime
+
+from api.common.schema_base import BaseOutSchema
+
+from .enums import JobStatus
+from .enums import JobType
+
+
+class JobProgress(BaseOutSchema):
+    processed: int = 0
+    total: int | None
+
+
+class JobGet(BaseOutSchema):
+    id: str
+    type: JobType
+    status: JobStatus
+    user_id: int
+    progress: JobProgress
+    result: str | None
+    error: str | None
+    has_file: bool = False
+    created_at: datetime.datetime
+    started_at: datetime.datetime | None
+    finished_at: datetime.datetime | None
+
+
+__all__ = (
+    'JobGet',
+    'JobProgress',
+)
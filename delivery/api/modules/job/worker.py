@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import os
+import socket
+
+from loguru import logger
+
+from api.conf import conf
+from .errors import JobNotFoundError
+from .handlers import handlers
+from .infrastructure.repository import JobEntry
+from .infrastructure.repository import JobRepository
+
+
+class JobWorker:
+    """
+    Consumes the job queue and runs handlers of the dequeued jobs.
+
+    A job is acknowledged once it succeeded or failed. While the handler
+    runs the job is touched every third of ``visibility_timeout``, jobs of
+    crashed workers are not touched and are claimed again after the timeout,
+    up to ``max_attempts`` times.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = None,
+        dequeue_timeout: int = 5,
+        visibility_timeout: int = None,
+        max_attempts: int = None,
+    ):
+        self.concurrency = concurrency or conf.jobs.concurrency
+        self.dequeue_timeout = dequeue_timeout
+        self.visibility_timeout = visibility_timeout or conf.jobs.visibility_timeout
+        self.max_attempts = max_attempts or conf.jobs.max_attempts
+        self.consumer = f'{socket.gethostname()}-{os.getpid()}'
+        self.repo = JobRepository()
+
+    async def run(self) -> None:
+        await self.repo.group_ensure()
+        await asyncio.gather(*(self._consume() for _ in range(self.concurrency)))
+
+    async def _consume(self) -> None:
+        while True:
+            entry = await self.repo.claim_stale(self.consumer, self.visibility_timeout)
+            if entry is None:
+                entry = await self.repo.dequeue(self.consumer, timeout=self.dequeue_timeout)
+            if entry is not None:
+                await self.process_entry(entry)
+
+    async def _keep_alive(self, entry: JobEntry) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                await self.repo.touch(self.consumer, entry.entry_id)
+            except Exception as e:
+                logger.warning(f'Job {entry.job_id} was not touched: {e}')
+
+    async def process_entry(self, entry: JobEntry) -> None:
+        if entry.deliveries > self.max_attempts:
+            logger.error(f'Job {entry.job_id} was interrupted {self.max_attempts} times')
+            await self.repo.mark_failed(entry.job_id, 'Job was interrupted too many times')
+            await self.repo.ack(entry.entry_id)
+            return
+
+        if entry.deliveries > 1:
+            logger.warning(f'Job {entry.job_id} is retried, attempt {entry.deliveries}')
+        keep_alive = asyncio.create_task(self._keep_alive(entry))
+        try:
+            await self.process(entry.job_id)
+        finally:
+            keep_alive.cancel()
+            await asyncio.gather(keep_alive, return_exceptions=True)
+        await self.repo.ack(entry.entry_id)
+
+    async def process(self, job_id: str) -> None:
+        try:
+            job_type, payload = await self.repo.get_task(job_id)
+        except JobNotFoundError:
+            logger.warning(f'Job {job_id} has expired before processing')
+            return
+
+        logger.info(f'Job {job_id} of type {job_type} started')
+        await self.repo.mark_running(job_id)
+        try:
+            result = await handlers[job_type](
+                job_id, payload, functools.partial(self.repo.set_progress, job_id),
+            )
+        except Exception as e:
+            logger.exception(f'Job {job_id} of type {job_type} failed')
+            await self.repo.mark_failed(job_id, str(e))
+            return
+
+        await self.repo.mark_succeeded(job_id, result.result, result.filename)
+        logger.info(f'Job {job_id} of type {job_type} succeeded')
@@ -1,27 +1,35 @@
-from typing import List
+import datetime
+import typing
 
 from fastapi.encoders import jsonable_encoder
+from tortoise.timezone import now
 
 from api.controllers.websocket_managers import websocket_manager
 
+from ... import enums
 from ... import models
 from ... import services
 from ... import schemas
 
+from .errors import *
+from .infrastructure.repository import GeolocationRepository
 from .schemas import (
-    GeolocationPut
+    CourierLocation,
+    CourierLocationsFilter,
+    GeolocationBatch,
+    GeolocationBatchResult,
+    GeolocationPut,
+    GeolocationTrack,
+    GeolocationTrackFilter,
 )
 
 from ...common.action_base import BaseAction
+from ...conf import conf
 
 
 class GeolocationActions(BaseAction):
     __MESSAGE_TYPE = 'location'
 
-    def __init__(self):
-        self.__active_monitors = websocket_manager.active_monitors
-        self.__active_clients = websocket_manager.active_clients
-
     async def geolocation_put(
         self, geolocation: GeolocationPut
     ):
@@ -49,24 +57,110 @@ class GeolocationActions(BaseAction):
             }
         })
 
-        await self.__send_location_to_managers(
-            courier_partner_id=geolocation.courier_partner_id, message=message
+        order_ids = await (
+            models.order_get_couriers_current_executable_orders(geolocation.courier_id)
+        )
+        await websocket_manager.send_location_message(
+            courier_service_id=geolocation.courier_partner_id,
+            order_ids=order_ids,
+            message=message,
         )
 
-        if order_ids := await (
-            models.order_get_couriers_current_executable_orders(geolocation.courier_id)
-        ):
-            await self.__send_location_to_clients(
-                order_ids=order_ids, message=message
+    async def locations_get(
+        self, current_user: schemas.UserCurrent, filters: CourierLocationsFilter,
+    ) -> typing.List[CourierLocation]:
+        """Returns fresh locations of couriers of the service, optionally within the area."""
+        courier_service_id = filters.courier_service_id
+        if not current_user.is_superuser and courier_service_id not in current_user.partners:
+            raise MonitoringCourierServiceNotFoundError(
+                table='partner',
+                detail=f'Courier service with given ID: {courier_service_id} was not found',
+            )
+
+        service = services.ws_monitoring.service
+        if filters.radius is not None:
+            locations = await service.get_locations_in_radius(
+                courier_service_id, filters.latitude, filters.longitude, filters.radius,
+            )
+        elif filters.south is not None:
+            locations = await service.get_locations_in_box(
+                courier_service_id, filters.south, filters.west, filters.north, filters.east,
+            )
+        else:
+            locations = await service.get_locations(courier_service_id)
+        return [CourierLocation(**location) for location in locations]
+
+
+class GeolocationStoreActions(BaseAction):
+    # devices may send points recorded slightly ahead of the server clock
+    __CLOCK_SKEW = datetime.timedelta(minutes=5)
+
+    def __init__(self, current_user: schemas.UserCurrent):
+        self.user = current_user
+        self.repo = GeolocationRepository()
+
+    async def create_many(
+        self, courier_id: int, batch: GeolocationBatch,
+    ) -> GeolocationBatchResult:
+        """Stores points of the courier, points outside the accepted time window are rejected."""
+        current_time = now()
+        recorded_at_min = current_time - datetime.timedelta(seconds=conf.geolocation.max_age)
+        recorded_at_max = current_time + self.__CLOCK_SKEW
+        points = [
+            point for point in batch.points
+            if recorded_at_min <= point.recorded_at <= recorded_at_max
+        ]
+
+        order_ids = {point.order_id for point in points if point.order_id is not None}
+        if order_ids:
+            found = await models.Order.filter(
+                id__in=order_ids, courier_id=courier_id,
+            ).values_list('id', flat=True)
+            missing = order_ids.difference(found)
+            if missing:
+                raise GeolocationOrderNotFoundError(
+                    table='order',
+                    detail=f'Orders with given IDs: {sorted(missing)} were not found',
+                )
+
+        accepted = await self.repo.create_many(courier_id, points)
+        return GeolocationBatchResult(
+            accepted=accepted,
+            rejected=len(batch.points) - accepted,
+        )
+
+    async def get_track(
+        self, filters: GeolocationTrackFilter, default_filter_args: list,
+    ) -> GeolocationTrack:
+        if filters.order_id is not None:
+            exists = await models.Order.filter(
+                *default_filter_args, id=filters.order_id,
+            ).exists()
+            if not exists:
+                raise GeolocationOrderNotFoundError(
+                    table='order',
+                    detail=f'Order with given ID: {filters.order_id} was not found',
+                )
+        if filters.courier_id is not None and not await self._courier_available(filters.courier_id):
+            raise GeolocationCourierNotFoundError(
+                table='profile_courier',
+                detail=f'Courier with given ID: {filters.courier_id} was not found',
             )
 
-    async def __send_location_to_managers(self, courier_partner_id: int, message: dict) -> None:
-        for active_monitor in self.__active_monitors.get(courier_partner_id, []):
-            await active_monitor.send_json(message)
+        return await self.repo.get_track(
+            recorded_at_from=filters.recorded_at_from,
+            recorded_at_to=filters.recorded_at_to,
+            max_points=filters.max_points,
+            courier_id=filters.courier_id,
+            order_id=filters.order_id,
+        )
 
-    async def __send_location_to_clients(
-        self, order_ids: List[int], message: dict) -> None:
-        for order_id in order_ids:
-            if str(order_id) in list(self.__active_clients.keys()):
-                for socket in self.__active_clients.get(str(order_id)):
-                    await socket.send_json(message)
\ No newline at end of file
+    async def _courier_available(self, courier_id: int) -> bool:
+        if self.user.is_superuser:
+            return True
+        profile = self.user.profile
+        if profile['profile_type'] == enums.ProfileType.COURIER:
+            return profile.get('id') == courier_id
+        return await models.ProfileCourier.filter(
+            id=courier_id, partner_id__in=self.user.partners,
+        ).exists()
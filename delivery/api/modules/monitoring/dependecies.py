@@ -1,4 +1,4 @@
-from api import auth, schemas
+from api import auth, enums, exceptions, schemas
 from .schemas import Geolocation, GeolocationPut
 from fastapi import Security
 
@@ -16,3 +16,12 @@ async def geolocation_validate_payload(
         courier_id=profile.get('id')
     )
 
+
+
+async def geolocation_courier_id(
+    current_user: schemas.UserCurrent = Security(auth.get_current_user, scopes=['gp:p']),
+) -> int:
+    profile = current_user.profile
+    if profile['profile_type'] != enums.ProfileType.COURIER:
+        raise exceptions.HTTPUnauthorizedException('Only couriers can send geolocation')
+    return profile.get('id')
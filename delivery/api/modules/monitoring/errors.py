@@ -0,0 +1,26 @@
+from api.common.error_base import BaseNotFoundError
+
+
+class GeolocationOrderNotFoundError(BaseNotFoundError):
+    """Raises when geolocation refers to the order not available to the user."""
+
+    code = 'mn1'
+
+
+class GeolocationCourierNotFoundError(BaseNotFoundError):
+    """Raises when geolocation of the courier not available to the user is requested."""
+
+    code = 'mn2'
+
+
+class MonitoringCourierServiceNotFoundError(BaseNotFoundError):
+    """Raises when locations of the courier service not available to the user are requested."""
+
+    code = 'mn3'
+
+
+__all__ = (
+    'GeolocationCourierNotFoundError',
+    'GeolocationOrderNotFoundError',
+    'MonitoringCourierServiceNotFoundError',
+)
@@ -1 +1,166 @@
-pass
+import datetime
+import math
+import re
+import typing
+
+from loguru import logger
+from tortoise import Tortoise
+
+from api import database
+from ..schemas import GeolocationPoint
+from ..schemas import GeolocationTrack
+from ..schemas import GeolocationTrackPoint
+
+
+TABLE = 'courier_geolocation'
+PARTITION_NAME_RE = re.compile(rf'^{TABLE}_(\d{{4}})_(\d{{2}})$')
+
+INSERT_QUERY = f"""
+WITH inserted AS (
+    INSERT INTO {TABLE} (courier_id, order_id, recorded_at, latitude, longitude)
+    SELECT $1, * FROM unnest($2::int[], $3::timestamptz[], $4::float8[], $5::float8[])
+    ON CONFLICT DO NOTHING
+    RETURNING 1
+)
+SELECT count(*) FROM inserted
+"""
+
+# the last point of every time bucket is kept, so the track always ends
+# with the latest known position
+TRACK_QUERY = f"""
+SELECT DISTINCT ON (bucket)
+    floor(extract(epoch FROM recorded_at) / $3)::bigint AS bucket,
+    courier_id, order_id, recorded_at, latitude, longitude
+FROM {TABLE}
+WHERE recorded_at >= $1 AND recorded_at < $2{{conditions}}
+ORDER BY bucket, recorded_at DESC
+"""
+
+PARTITIONS_QUERY = f"""
+SELECT c.relname
+FROM pg_inherits i
+JOIN pg_class c ON c.oid = i.inhrelid
+JOIN pg_class p ON p.oid = i.inhparent
+WHERE p.relname = '{TABLE}'
+"""
+
+# months whose partitions are known to exist
+_partitions: typing.Set[datetime.date] = set()
+
+
+def month_start(value: datetime.datetime) -> datetime.date:
+    value = value.astimezone(datetime.timezone.utc)
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def track_step(
+    recorded_at_from: datetime.datetime,
+    recorded_at_to: datetime.datetime,
+    max_points: int,
+) -> int:
+    """Returns the bucket width in seconds for the track to fit ``max_points``."""
+    seconds = (recorded_at_to - recorded_at_from).total_seconds()
+    return max(1, math.ceil(seconds / max_points))
+
+
+class GeolocationRepository:
+    """
+    Stores courier geolocation pings in the ``courier_geolocation`` table.
+
+    The table is append-only and partitioned by month of ``recorded_at``,
+    partitions are created on demand before writes and old ones are
+    dropped as a whole instead of deleting rows.
+    """
+
+    @staticmethod
+    def _connection():
+        return Tortoise.get_connection('default')
+
+    async def partitions_ensure(self, months: typing.Iterable[datetime.date]) -> None:
+        connection = self._connection()
+        for month in sorted(set(months) - _partitions):
+            try:
+                await connection.execute_query(
+                    'SELECT courier_geolocation_partition_create($1)', [month],
+                )
+            except Exception as e:
+                # a concurrent writer may be creating the same partition
+                logger.warning(f'Could not create {TABLE} partition for {month}: {e}')
+                continue
+            _partitions.add(month)
+
+    async def create_many(
+        self, courier_id: int, points: typing.Sequence[GeolocationPoint],
+    ) -> int:
+        """Writes points of the courier with one statement, duplicates are skipped."""
+        if not points:
+            return 0
+
+        await self.partitions_ensure(month_start(point.recorded_at) for point in points)
+        _, rows = await self._connection().execute_query(
+            INSERT_QUERY,
+            [
+                courier_id,
+                [point.order_id for point in points],
+                [point.recorded_at for point in points],
+                [float(point.latitude) for point in points],
+                [float(point.longitude) for point in points],
+            ],
+        )
+        return rows[0][0]
+
+    async def get_track(
+        self,
+        recorded_at_from: datetime.datetime,
+        recorded_at_to: datetime.datetime,
+        max_points: int,
+        courier_id: int = None,
+        order_id: int = None,
+    ) -> GeolocationTrack:
+        """Returns track of the courier or of the order downsampled to ``max_points``."""
+        step = track_step(recorded_at_from, recorded_at_to, max_points)
+        args = [recorded_at_from, recorded_at_to, step]
+        conditions = ''
+        for column, value in (('courier_id', courier_id), ('order_id', order_id)):
+            if value is not None:
+                args.append(value)
+                conditions += f' AND {column} = ${len(args)}'
+
+        rows = await database.read_fetch(TRACK_QUERY.format(conditions=conditions), *args)
+        return GeolocationTrack(
+            step=step,
+            points=[
+                GeolocationTrackPoint(
+                    courier_id=row['courier_id'],
+                    order_id=row['order_id'],
+                    recorded_at=row['recorded_at'],
+                    latitude=row['latitude'],
+                    longitude=row['longitude'],
+                )
+                for row in rows
+            ],
+        )
+
+    async def partitions_drop(self, before: datetime.date) -> typing.List[str]:
+        """Drops partitions of the months earlier than ``before``."""
+        connection = self._connection()
+        _, rows = await connection.execute_query(PARTITIONS_QUERY)
+
+        dropped = []
+        for row in rows:
+            name = row['relname']
+            match = PARTITION_NAME_RE.match(name)
+            if match is None:
+                continue
+            month = datetime.date(int(match[1]), int(match[2]), 1)
+            if month >= before:
+                continue
+            await connection.execute_script(f'DROP TABLE IF EXISTS "{name}"')
+            _partitions.discard(month)
+            dropped.append(name)
+        return sorted(dropped)
@@ -1,10 +1,19 @@
 from typing import List
 
 import fastapi
-from api import schemas, auth
+from api import schemas, auth, dependencies, exceptions
 
 from .actions import GeolocationActions
+from .actions import GeolocationStoreActions
+from .errors import *
+from .schemas import CourierLocation
+from .schemas import CourierLocationsFilter
 from .schemas import Geolocation
+from .schemas import GeolocationBatch
+from .schemas import GeolocationBatchResult
+from .schemas import GeolocationTrack
+from .schemas import GeolocationTrackFilter
+from .dependecies import geolocation_courier_id
 from .dependecies import geolocation_validate_payload
 
 router = fastapi.APIRouter()
@@ -33,3 +42,79 @@ async def geolocation_put(
     actions = GeolocationActions()
     await actions.geolocation_put(geolocation, )
     return fastapi.responses.Response(status_code=201)
+
+
+@router.post(
+    '/monitoring/geolocation/batch',
+    summary='Store courier geolocation points in bulk',
+    response_description='Number of accepted and rejected points',
+    response_model=GeolocationBatchResult,
+)
+async def geolocation_batch_create(
+    batch: GeolocationBatch,
+    courier_id: int = fastapi.Depends(geolocation_courier_id),
+    current_user: schemas.UserCurrent = fastapi.Security(auth.get_current_user),
+):
+    """Store geolocation points recorded by the current courier.
+
+    Points recorded too long ago or in the future are rejected,
+    points already stored are skipped.
+
+    Returns 404 NOT FOUND if a point refers to the order
+    not assigned to the courier.
+    """
+    actions = GeolocationStoreActions(current_user)
+    try:
+        return await actions.create_many(courier_id, batch)
+    except GeolocationOrderNotFoundError as e:
+        raise exceptions.HTTPNotFoundException(e.detail) from e
+
+
+@router.get(
+    '/monitoring/geolocation/track',
+    summary='Get courier or order track',
+    response_description='Track points in chronological order',
+    response_model=GeolocationTrack,
+)
+async def geolocation_track_get(
+    filters: GeolocationTrackFilter = fastapi.Depends(),
+    current_user: schemas.UserCurrent = fastapi.Security(auth.get_current_user),
+    default_filter_args: list = fastapi.Security(dependencies.OrderDefaultFilterV2()),
+):
+    """Get track of the courier or of the order for the given period.
+
+    The track is downsampled to at most `max_points` points,
+    the last point of every `step` seconds is kept.
+
+    Returns 404 NOT FOUND if the courier or the order is not available.
+    """
+    actions = GeolocationStoreActions(current_user)
+    try:
+        return await actions.get_track(filters, default_filter_args)
+    except (GeolocationOrderNotFoundError, GeolocationCourierNotFoundError) as e:
+        raise exceptions.HTTPNotFoundException(e.detail) from e
+
+
+@router.get(
+    '/monitoring/locations',
+    summary='Get last known locations of couriers',
+    response_description='Locations of couriers updated recently',
+    response_model=List[CourierLocation],
+)
+async def locations_get(
+    filters: CourierLocationsFilter = fastapi.Depends(),
+    current_user: schemas.UserCurrent = fastapi.Security(auth.get_current_user),
+):
+    """Get last known locations of couriers of the courier service.
+
+    Locations can be limited to `radius` meters around `latitude` and
+    `longitude`, nearest first, or to the box bounded by `south`, `west`,
+    `north` and `east`. Couriers without updates for a while are omitted.
+
+    Returns 404 NOT FOUND if the courier service is not available.
+    """
+    actions = GeolocationActions()
+    try:
+        return await actions.locations_get(current_user, filters)
+    except MonitoringCourierServiceNotFoundError as e:
+        raise exceptions.HTTPNotFoundException(e.detail) from e
@@ -1,8 +1,14 @@
+import datetime
 import decimal
 import typing
 
+import pydantic
+
+from api.common.schema_base import BaseFilterSchema
 from api.common.schema_base import BaseInSchema
+from api.common.schema_base import BaseOutSchema
 from api.common import validators
+from api.conf import conf
 
 
 class Geolocation(BaseInSchema):
@@ -17,6 +23,114 @@ class GeolocationPut(Geolocation):
     courier_partner_id: int
     courier_id: int
 
+
+class GeolocationPoint(BaseInSchema):
+    latitude: pydantic.confloat(ge=-90, le=90)
+    longitude: pydantic.confloat(ge=-180, le=180)
+    recorded_at: datetime.datetime
+    order_id: typing.Optional[int]
+
+    @pydantic.validator('recorded_at')
+    def recorded_at_aware(cls, value: datetime.datetime) -> datetime.datetime:
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+        return value
+
+
+class GeolocationBatch(BaseInSchema):
+    points: typing.List[GeolocationPoint]
+
+    @pydantic.validator('points')
+    def points_size(cls, value: list) -> list:
+        if not value:
+            raise ValueError('At least one point is required')
+        if len(value) > conf.geolocation.batch_size:
+            raise ValueError(
+                f'At most {conf.geolocation.batch_size} points are accepted per request',
+            )
+        return value
+
+
+class GeolocationBatchResult(BaseOutSchema):
+    accepted: int
+    rejected: int
+
+
+class GeolocationTrackFilter(BaseFilterSchema):
+    courier_id: typing.Optional[int]
+    order_id: typing.Optional[int]
+    recorded_at_from: datetime.datetime
+    recorded_at_to: datetime.datetime
+    max_points: pydantic.conint(ge=2, le=10000) = conf.geolocation.track_max_points
+
+    @pydantic.root_validator(skip_on_failure=True)
+    def track_owner(cls, values: dict) -> dict:
+        if values['courier_id'] is None and values['order_id'] is None:
+            raise ValueError('Either courier_id or order_id must be provided')
+        if values['recorded_at_from'] >= values['recorded_at_to']:
+            raise ValueError('recorded_at_from must be less than recorded_at_to')
+        return values
+
+
+class GeolocationTrackPoint(BaseOutSchema):
+    courier_id: int
+    order_id: typing.Optional[int]
+    recorded_at: datetime.datetime
+    latitude: float
+    longitude: float
+
+
+class GeolocationTrack(BaseOutSchema):
+    step: int
+    points: typing.List[GeolocationTrackPoint]
+
+
+class CourierLocationsFilter(BaseFilterSchema):
+    courier_service_id: int
+    latitude: typing.Optional[pydantic.confloat(ge=-90, le=90)]
+    longitude: typing.Optional[pydantic.confloat(ge=-180, le=180)]
+    radius: typing.Optional[pydantic.confloat(gt=0, le=500000)]
+    south: typing.Optional[pydantic.confloat(ge=-90, le=90)]
+    west: typing.Optional[pydantic.confloat(ge=-180, le=180)]
+    north: typing.Optional[pydantic.confloat(ge=-90, le=90)]
+    east: typing.Optional[pydantic.confloat(ge=-180, le=180)]
+
+    @pydantic.root_validator(skip_on_failure=True)
+    def area(cls, values: dict) -> dict:
+        radius = [values[name] is not None for name in ('latitude', 'longitude', 'radius')]
+        box = [values[name] is not None for name in ('south', 'west', 'north', 'east')]
+        if any(radius) and not all(radius):
+            raise ValueError('latitude, longitude and radius must be provided together')
+        if any(box) and not all(box):
+            raise ValueError('south, west, north and east must be provided together')
+        if all(radius) and all(box):
+            raise ValueError('Either radius or box can be provided')
+        if all(box) and (values['south'] > values['north'] or values['west'] > values['east']):
+            raise ValueError('south must not exceed north and west must not exceed east')
+        return values
+
+
+class CourierLocationPoint(BaseOutSchema):
+    latitude: typing.Optional[float]
+    longitude: typing.Optional[float]
+
+
+class CourierLocation(BaseOutSchema):
+    courier_id: int
+    location: CourierLocationPoint
+    is_active: bool
+
+
 __all__ = (
-    'Geolocation', 'GeolocationPut'
+    'CourierLocation',
+    'CourierLocationPoint',
+    'CourierLocationsFilter',
+    'Geolocation',
+    'GeolocationBatch',
+    'GeolocationBatchResult',
+    'GeolocationPoint',
+    'GeolocationPut',
+    'GeolocationTrack',
+    'GeolocationTrackFilter',
+    'GeolocationTrackPoint',
 )
@@ -312,15 +312,16 @@ class OrderGroupActions(BaseAction):
 
     async def set_revise_state_in_orders(self, order_group, revise=False):
         order_ids = [item.id for item in await order_group.orders]
-        orders = await models.Order.filter(id__in=order_ids).select_related('city')
+        orders = await models.Order.filter(id__in=order_ids)
+        order_times = await models.orders_local_times(orders)
+        histories = []
         for order in orders:
             updated_data = {
                 'revised': False
             }
             await order.update_from_dict(updated_data).save()
 
-            order_time = await order.localtime
-            await models.history_create(
+            histories.append(
                 HistoryCreate(
                     initiator_type=InitiatorType.USER,
                     initiator_id=self.user.id,
@@ -329,9 +330,10 @@ class OrderGroupActions(BaseAction):
                     model_id=order.id,
                     request_method=RequestMethods.PATCH,
                     action_data=updated_data,
-                    created_at=order_time,
+                    created_at=order_times[order.id],
                 )
             )
+        await models.history_bulk_create(histories)
 
     @staticmethod
     async def change_status_in_order_bulk(order_status, order_group):
@@ -345,7 +347,9 @@ class OrderGroupActions(BaseAction):
         order_group, delivery_status: OrderDeliveryStatus | None
     ):
         order_ids = [item.id for item in await order_group.orders]
-        orders = await models.Order.filter(id__in=order_ids).select_related('city')
+        orders = await models.Order.filter(id__in=order_ids)
+        order_times = await models.orders_local_times(orders)
+        histories = []
         for order in orders:
             new_delivery_status = {
                 'status': delivery_status.value if delivery_status else None,
@@ -353,10 +357,9 @@ class OrderGroupActions(BaseAction):
                 'datetime': None,
                 'comment': None,
             }
-            order_time = await order.localtime
             order.delivery_status = new_delivery_status
             await order.save()
-            await models.history_create(
+            histories.append(
                 HistoryCreate(
                     initiator_type=InitiatorType.USER,
                     initiator_id=self.user.id,
@@ -365,9 +368,10 @@ class OrderGroupActions(BaseAction):
                     model_id=order.id,
                     request_method=RequestMethods.PATCH,
                     action_data={'delivery_status': delivery_status},
-                    created_at=order_time,
+                    created_at=order_times[order.id],
                 )
             )
+        await models.history_bulk_create(histories)
 
     async def order_group_act(self, default_filter_args, order_group_id):
         entity = await self.repo.get_for_act(default_filter_args, entity_id=order_group_id)
@@ -1,4 +1,3 @@
-import json
 from datetime import datetime
 from typing import Optional, Iterable
 
@@ -7,11 +6,11 @@ from tortoise.models import Model
 from tortoise.timezone import now
 
 from ...shipment_point.infrastructure.db_table import PartnerShipmentPoint
-from .... import redis_module
 from .... import models
 from ....enums import PushType
 from ....models import fields as custom_fields
 from ....models import mixins
+from ....models.publisher import call_task
 
 
 async def send_new_order_group_to_courier(order_group):
@@ -34,14 +33,7 @@ async def send_new_order_group_to_courier(order_group):
             'notification': notification,
             'data': data,
         }
-        conn = redis_module.get_connection()
-        await conn.publish(
-            channel='send-to-celery',
-            message=json.dumps({
-                'task_name': 'firebase-send',
-                'kwargs': task_kwargs,
-            })
-        )
+        await call_task('firebase-send', task_kwargs)
 
 
 class OrderGroup(mixins.DeleteFilesMixin, Model):
@@ -172,7 +172,7 @@ class OrderChainStageRepository(BaseRepository):
 
     async def create(self, in_schema: IN_SCHEMA) -> TABLE:
         order_obj = await Order.get(id=in_schema['order_id']).select_related('city')
-        order_time = await order_obj.localtime
+        order_time = order_obj.localtime
         return await self._table.create(
             created_at=order_time,
             updated_at=order_time,
@@ -1,11 +1,13 @@
 import asyncio
+import collections
 import enum
 import functools
 import json
+import time
 import typing
 
 import aioredis
-import cacheout
+from loguru import logger
 
 from .conf import conf
 from . import redis_module
@@ -13,119 +15,139 @@ from . import schemas
 
 
 _service = None
-_cache = cacheout.Cache()
 
 
 class MonitoringServiceUninitialized(Exception):
     """Raises if Monitor service was not initialized."""
 
 
-class MonitoringSubscriptionsDoNotExist(Exception):
-    """Raises if there was no any subscriptions during an attempt to read messages."""
-
-
 class ChannelType(str, enum.Enum):
     ORDER = 'order'
     COURIER = 'courier'
 
 
 class Monitor:
+    # delay before resubscribing after the connection is lost
+    RECONNECT_DELAY = 1
+
     @functools.cached_property
     def _connection(self) -> aioredis.client.Redis:
         return redis_module.get_connection()
 
-    @functools.cached_property
-    def _subscription(self) -> aioredis.client.PubSub:
-        return self._connection.pubsub()
-
     def _build_channel(self, channel_type: ChannelType, channel_id: int) -> str:
-        return f'{channel_type}:{channel_id}'
-
-    async def _receive_record(self) -> typing.Optional[dict]:
-        return await self._subscription.get_message(ignore_subscribe_messages=True)
+        return f'{channel_type.value}:{channel_id}'
 
-    async def close(self) -> None:
-        await self._subscription.unsubscribe()
-        await self._subscription.close()
+    def _build_pattern(self, channel_type: ChannelType) -> str:
+        return f'{channel_type.value}:*'
 
 
 class CourierMonitor(Monitor):
-    def __init__(self):
-        self._latest_courier_id = None
-        self._lock = asyncio.Lock()
-
-    def _filter_couriers(self, couriers: list) -> list:
-        ids_to_objects = {}
-
-        for courier in couriers:
-            _id = courier['id']
-            if _id not in ids_to_objects:
-                ids_to_objects[_id] = courier
-            else:
-                if courier['ts'] > ids_to_objects[_id]['ts']:
-                    ids_to_objects[_id] = courier
-
-        try:
-            return list(ids_to_objects.values())
-        finally:
-            couriers.clear()
-
-    @_cache.memoize(ttl=conf.monitoring.ttl)
-    async def _retrieve_filtered_couriers(self) -> list:
-        """All published couriers must be filtered by `city_id` and cached at first request."""
-        couriers = []
+    """
+    Keeps a snapshot of the latest published courier of every ID by city.
+
+    Couriers are published to per courier channels and received by one
+    background task over a pattern subscription, so every worker sees
+    couriers published by the others. Reads are served from memory and
+    never wait for Redis. Couriers not published for ``ttl`` seconds are
+    evicted, as well as the least recently published ones when there are
+    more than ``max_size`` of them.
+    """
+
+    def __init__(self, ttl: float = None, max_size: int = None):
+        self.ttl = ttl or conf.monitoring.snapshot_ttl
+        self.max_size = max_size or conf.monitoring.max_couriers
+        self._cities: typing.Dict[int, typing.Dict[int, dict]] = {}
+        # courier ID to city ID and receiving time, the least recent first
+        self._received: typing.OrderedDict[int, typing.Tuple[int, float]] = collections.OrderedDict()
+        self._task: typing.Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
 
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _listen(self) -> None:
+        pattern = self._build_pattern(ChannelType.COURIER)
         while True:
-            record = await self._receive_record()
-            if isinstance(record, dict):
-                if record['type'] == 'message':
-                    courier = json.loads(record['data'])
-                    couriers.append(courier)
-
-                    if courier['id'] == self._latest_courier_id:
-                        break
+            subscription = self._connection.pubsub()
+            try:
+                await subscription.psubscribe(pattern)
+                async for record in subscription.listen():
+                    if record['type'] == 'pmessage':
+                        self._receive(record['data'])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'Courier monitoring subscription is lost: {e}')
+                await asyncio.sleep(self.RECONNECT_DELAY)
+            finally:
+                await asyncio.shield(self._close_subscription(subscription))
+
+    @staticmethod
+    async def _close_subscription(subscription: aioredis.client.PubSub) -> None:
+        try:
+            await subscription.close()
+        except Exception:
+            pass
 
-        return self._filter_couriers(couriers)
+    def _receive(self, data: str) -> None:
+        try:
+            courier = json.loads(data)
+            courier_id, city_id, ts = courier['id'], courier['city_id'], courier['ts']
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f'Skipping malformed monitored courier: {e}')
+            return
+
+        received = self._received.get(courier_id)
+        if received is not None:
+            previous_city_id, _ = received
+            previous = self._cities[previous_city_id][courier_id]
+            if previous['ts'] > ts:
+                return
+            self._discard(courier_id)
+
+        self._cities.setdefault(city_id, {})[courier_id] = courier
+        self._received[courier_id] = (city_id, time.monotonic())
+        self._evict()
+
+    def _discard(self, courier_id: int) -> None:
+        city_id, _ = self._received.pop(courier_id)
+        couriers = self._cities[city_id]
+        del couriers[courier_id]
+        if not couriers:
+            del self._cities[city_id]
+
+    def _evict(self) -> None:
+        expired_at = time.monotonic() - self.ttl
+        while self._received:
+            courier_id, (_, received_at) = next(iter(self._received.items()))
+            if received_at >= expired_at and len(self._received) <= self.max_size:
+                break
+            self._discard(courier_id)
 
     async def get_couriers(self, city_id: int) -> list:
         """Get and return a list of couriers related to the city."""
-        couriers = []
-        # Prior to caching we need to make sure
-        # at least 1 courier has sent metadata.
-        try:
-            filtered = await asyncio.wait_for(
-                self._retrieve_filtered_couriers(),
-                timeout=conf.monitoring.timeout,
-            )
-        except RuntimeError as e:
-            raise MonitoringSubscriptionsDoNotExist(
-                'Currently there is no existing subscriptions yet',
-            ) from e
-
-        for courier in filtered:
-            if courier['city_id'] == city_id:
-                couriers.append(courier)
-
-        return couriers
+        self._evict()
+        return list(self._cities.get(city_id, {}).values())
 
     async def add_courier(self, courier: schemas.MonitoringCourierAdd) -> None:
-        courier_id = courier.id
-
-        channel = self._build_channel(ChannelType.COURIER, courier_id)
-        if channel not in self._subscription.channels:
-            await self._subscription.subscribe(channel)
-
-        serialized_courier = json.dumps(courier.dict())
-        await self._connection.publish(channel, serialized_courier)
-
-        async with self._lock:
-            self._latest_courier_id = courier_id
+        channel = self._build_channel(ChannelType.COURIER, courier.id)
+        await redis_module.publisher.publish(channel, json.dumps(courier.dict()))
 
 
 class Monitoring:
     def __init__(self) -> None:
         self._courier_monitor = CourierMonitor()
 
+    def start(self) -> None:
+        self._courier_monitor.start()
+
     async def terminate(self) -> None:
         await self._courier_monitor.close()
 
@@ -137,12 +159,14 @@ class Monitoring:
 
 
 def initialize() -> None:
+    """Creates the service and starts receiving couriers, Redis must be connected."""
     global _service
 
     if _service is not None:
         return
 
     _service = Monitoring()
+    _service.start()
 
 
 async def shutdown() -> None:
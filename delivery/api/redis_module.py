@@ -1,7 +1,12 @@
+import asyncio
+import collections
+import time
 import typing
 
 import aioredis
 
+from .conf import conf
+
 
 _connection: typing.Union[aioredis.client.Redis, None] = None
 
@@ -10,6 +15,98 @@ class RedisConnectionDoesNotExist(Exception):
     """Raises if Redis connection was not instantiated."""
 
 
+class Publisher:
+    """
+    Publishes messages over the shared connection pool.
+
+    Messages published while the previous batch is being sent are queued
+    and sent together in one pipeline on the next loop iteration, so a
+    burst of publishes takes a few round trips and one connection instead
+    of a round trip and a connection per message.
+    """
+
+    def __init__(self, batch_size: int = None):
+        self.batch_size = batch_size or conf.redis.publish_batch_size
+        self.stats = collections.Counter()
+        self.latency_max = 0.0
+        self._latency_total = 0.0
+        self._queue: typing.List[typing.Tuple[str, str, asyncio.Future]] = []
+        self._flushing: typing.Optional[asyncio.Task] = None
+
+    async def publish(self, channel: str, message: str) -> int:
+        """Publishes the message and returns the number of its receivers."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((channel, message, future))
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.create_task(self._flush())
+        return await future
+
+    async def publish_many(
+        self, messages: typing.Iterable[typing.Tuple[str, str]],
+    ) -> typing.List[int]:
+        return list(await asyncio.gather(*(
+            self.publish(channel, message) for channel, message in messages
+        )))
+
+    async def _flush(self) -> None:
+        while self._queue:
+            batch = self._queue[:self.batch_size]
+            del self._queue[:self.batch_size]
+            await self._send(batch)
+
+    async def _send(self, batch: typing.List[typing.Tuple[str, str, asyncio.Future]]) -> None:
+        started_at = time.monotonic()
+        try:
+            pipeline = get_connection().pipeline(transaction=False)
+            for channel, message, _ in batch:
+                pipeline.publish(channel, message)
+            receivers = await pipeline.execute()
+        except Exception as e:
+            self.stats['failed'] += len(batch)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        latency = time.monotonic() - started_at
+        self._latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+        self.stats['batches'] += 1
+        self.stats['published'] += len(batch)
+        for (_, _, future), count in zip(batch, receivers):
+            if not future.done():
+                future.set_result(count)
+
+    async def close(self) -> None:
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+            self._flushing = None
+
+    def get_stats(self) -> dict:
+        """
+        Returns publishing counters, batch latency in ms and connections of
+        the pool. All of them are of this process only.
+        """
+        batches = self.stats['batches']
+        stats = {
+            'published': self.stats['published'],
+            'failed': self.stats['failed'],
+            'batches': batches,
+            'latency_avg': round(self._latency_total / batches * 1000, 3) if batches else 0,
+            'latency_max': round(self.latency_max * 1000, 3),
+        }
+        if _connection is not None:
+            pool = _connection.connection_pool
+            stats.update(
+                connections=pool._created_connections,
+                connections_in_use=len(pool._in_use_connections),
+            )
+        return stats
+
+
+publisher = Publisher()
+
+
 async def connect(uri: str) -> typing.Optional[aioredis.client.Redis]:
     global _connection
 
@@ -26,6 +123,7 @@ async def disconnect() -> None:
     if _connection is None:
         return
 
+    await publisher.close()
     await _connection.close()
 
     _connection = None
@@ -105,6 +105,8 @@ from .otp import Message  # noqa: F401
 from .otp import OTP  # noqa: F401
 from .otp import OTPCreate  # noqa: F401
 from .otp import OTPGet  # noqa: F401
+from .pagination import CursorPage  # noqa: F401
+from .pagination import CursorParams  # noqa: F401
 from .pagination import Page  # noqa: F401
 from .pagination import Params  # noqa: F401
 from .partner import DeliveryServiceCreate  # noqa: F401
@@ -1,12 +1,17 @@
 from __future__ import annotations
+import base64
+import json
+from datetime import datetime
 from math import ceil
-from typing import TypeVar, Generic, Sequence
+from typing import TypeVar, Generic, Optional, Sequence, Tuple
 
 from fastapi import Query
 from fastapi_pagination.bases import AbstractParams, AbstractPage
 from fastapi_pagination.bases import RawParams
 from pydantic import BaseModel, parse_obj_as
 
+from .. import exceptions
+
 T = TypeVar("T")
 
 
@@ -48,3 +53,65 @@ class Page(AbstractPage[T], Generic[T]):
             total_pages=total_pages,
             total=total,
         )
+
+
+def encode_cursor(created_at: datetime, id_: int) -> str:
+    value = json.dumps([created_at.isoformat(), id_], separators=(',', ':'))
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, id_ = json.loads(value)
+        return datetime.fromisoformat(created_at), int(id_)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+class CursorParams(BaseModel, AbstractParams):
+    cursor: Optional[str] = Query(None, description="Continuation token from the previous page")
+    page_limit: int = Query(50, ge=1, le=500, description="Page size")
+    with_total: bool = Query(False, description="Include estimated total")
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        # checked here and not by a validator, its ValidationError would not be
+        # converted to a response when the params are used as a dependency
+        if self.cursor is not None:
+            try:
+                decode_cursor(self.cursor)
+            except ValueError as e:
+                raise exceptions.HTTPBadRequestException('Invalid cursor') from e
+
+    def to_raw_params(self) -> RawParams:
+        return RawParams(limit=self.page_limit, offset=0)
+
+    def to_keyset(self) -> Optional[Tuple[datetime, int]]:
+        if self.cursor is None:
+            return None
+        return decode_cursor(self.cursor)
+
+
+class CursorPage(AbstractPage[T], Generic[T]):
+    items: Sequence[T]
+    next_cursor: Optional[str]
+    total: Optional[int]
+
+    __params_type__ = CursorParams
+
+    @classmethod
+    def create(
+        cls,
+        items: Sequence[T],
+        params: CursorParams,
+        **kwargs
+    ) -> CursorPage[T]:
+        if items and not isinstance(items[0], dict):
+            items = parse_obj_as(cls.__annotations__['items'], items)
+
+        return cls(
+            items=items,
+            next_cursor=kwargs.get('next_cursor'),
+            total=kwargs.get('total'),
+        )
@@ -6,6 +6,7 @@ from . import dataloader  # noqa: F401
 from . import excel_loader  # noqa: F401
 from . import firebase  # noqa: F401
 from . import geocoder  # noqa: F401
+from . import principal  # noqa: F401
 from . import sms  # noqa: F401
 from . import router  # noqa: F401
 from . import ws_monitoring  # noqa: F401
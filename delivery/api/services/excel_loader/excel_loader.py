@@ -1,20 +1,26 @@
+import asyncio
 import time
 from datetime import datetime
 from datetime import timedelta
 from io import BytesIO
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
 
 import loguru
 import pandas as pd
-import tortoise
 from fastapi import UploadFile
 from loguru import logger
 from starlette.concurrency import run_in_threadpool
+from tortoise.exceptions import IntegrityError
 from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
 
 import api
-from ..geocoder import GeocoderRemoteServiceRequestError, GeocoderRemoteServiceResponseError
+from ..geocoder import to_coordinates_many
 from ..router.router import TIMEZONE
 
+from ... import database
 from ... import schemas
 from ... import models
 from ... import enums
@@ -25,11 +31,19 @@ from ...modules.city.infrastructure.db_table import City
 from ...modules.delivery_point import DeliveryPointRepository
 from ...modules.delivery_point.schemas import DeliveryPointCreate
 from ...modules.shipment_point import ShipmentPointRepository
+from ...modules.shipment_point.errors import PartnerShipmentPointNotFoundError
 from ...reports.queries import get_time_with_timezone, order_report_query_builder
 from ...schemas import DeliveryStatus
 from ...services.geocoder import service
 
 
+ADDRESS_NOT_FOUND_ERROR = 'Адрес вывоза или Адрес доставки не найден'
+ORDER_ALREADY_EXISTS_ERROR = 'Заявка с таким ID заявки партнера уже существует'
+IMPORT_BATCH_SIZE = 50
+# orders created at the same time, each of them holds a connection of the pool
+IMPORT_CONCURRENCY = 5
+
+
 class ExcelLoaderFieldsError(Exception):
     """Raises when the model fields are not correct."""
 
@@ -179,67 +193,13 @@ class ExcelLoader:
                 for hidden_field in hidden_fields:
                     data[idx].pop(hidden_field)
 
-    @staticmethod
-    async def _get_address(
-        address_type: enums.AddressType,
-        address
-    ):
-        try:
-            cords = await service.to_coordinates(address)
-        except (
-            GeocoderRemoteServiceRequestError,
-            GeocoderRemoteServiceResponseError,
-        ) as e:
-            logger.debug(e)
-            logger.debug(f'address: {address}')
-            logger.debug(f'address-type: {address_type}')
-            raise e
-        if address_type == enums.AddressType.SHIPMENT_POINT:
-            sp_repo = ShipmentPointRepository()
-            sp_id = await sp_repo.get_id_by_geolocations(**cords.dict())
-            return {
-                'place_id': sp_id,
-                'position': 0,
-                'type': address_type
-            }
-        dp_repo = DeliveryPointRepository()
-        create_schema = DeliveryPointCreate(
-            **cords.dict(),
-            address=address,
-        )
-        dp = await dp_repo.create(create_schema)
-        return {
-            'place_id': dp.id,
-            'position': 1,
-            'type': address_type,
-        }
-
-    async def _parse_points(self, shipment_point: str, delivery_point: str):
-
-        result_addresses = []
-        if shipment_point is not None:
-            result_addresses.append(
-                await self._get_address(
-                    address_type=enums.AddressType.SHIPMENT_POINT,
-                    address=shipment_point
-                )
-            )
-        result_addresses.append(
-            await self._get_address(
-                address_type=enums.AddressType.DELIVERY_POINT,
-                address=delivery_point
-            )
-        )
-
-        return result_addresses
-
     async def get_models_from_excel(
         self,
         model_name: str,
         file: UploadFile,
-        current_user: schemas.UserCurrent = None
+        current_user: schemas.UserCurrent = None,
+        progress: Callable[[int, int], Awaitable] = None,
     ) -> tuple[BytesIO, str]:
-        wrong_address = 0
         description_cols, *_ = enums.order_descriptions.values()
 
         content = await file.read()
@@ -248,8 +208,10 @@ class ExcelLoader:
         _, cols, values = (await run_in_threadpool(df.to_dict, orient='split')).values()
 
         self._translate_cols_to_eng(cols, description_cols)
+        wrong_address = 0
         item_counter = 0
         error_rows = []
+        rows_to_create = []
         for item in values:
             item_counter += 1
             data_to_create = dict(zip(cols, item))
@@ -259,22 +221,15 @@ class ExcelLoader:
                 data_to_create['created_by'] = enums.CreatedType.IMPORT
                 if errors:
                     item.append(errors)
-                    error_rows.append(item)
+                    error_rows.append((item_counter, item))
                 else:
-                    order = schemas.OrderCreate(**data_to_create)
-                    created_order = await models.order_create(
-                        create=order,
-                        user=current_user,
-                        courier_service_id=current_user.partners[0],
-                    )
-                    address_long = created_order.addresses[0].place.longitude
-                    address_lat = created_order.addresses[0].place.latitude
-                    order_time = await created_order.localtime
-                    created_order.initial_delivery_datetime = order_time + timedelta(hours=2)
-                    created_order.delivery_datetime = order_time + timedelta(hours=2)
-                    await created_order.save()
-                    if address_long is None and address_lat is None:
-                        wrong_address += 1
+                    rows_to_create.append((item_counter, item, data_to_create))
+
+        if rows_to_create:
+            wrong_address = await self._orders_create_from_excel(
+                rows_to_create, error_rows, current_user, progress, len(values),
+            )
+        error_rows = [item for _, item in sorted(error_rows, key=lambda row: row[0])]
 
         _, cols, values = df.to_dict(orient='split').values()
         cols.append('Ошибки')
@@ -486,25 +441,166 @@ class ExcelLoader:
             delivery_point = delivery_point.replace(';', ',')
             if city_obj.name not in delivery_point:
                 delivery_point += ', ' + city_obj.name
-            data_to_create['addresses'] = await self._parse_points(
-                shipment_point,
-                delivery_point,
-            )
         except Exception as e:
             logger.debug(e)
-            return 'Адрес вывоза или Адрес доставки не найден'
+            return ADDRESS_NOT_FOUND_ERROR
 
+        # addresses are geocoded later for all rows at once
+        data_to_create['shipment_point'] = shipment_point
+        data_to_create['delivery_point'] = delivery_point
         return error_order
 
+    @staticmethod
+    async def _get_shipment_point_ids(
+        coordinates: dict,
+    ) -> dict[str, int | None]:
+        sp_repo = ShipmentPointRepository()
+
+        async def _get_id(cords) -> int | None:
+            if isinstance(cords, Exception):
+                return None
+            try:
+                return await sp_repo.get_id_by_geolocations(**cords.dict())
+            except PartnerShipmentPointNotFoundError:
+                return None
 
-async def prepare_orders_for_report(columns: list[str], **kwargs) -> list[list[str]]:
-    description_cols, *_ = enums.order_descriptions.values()
-    original_columns = ExcelLoader.translate_fields(columns, description_cols)
-    start = time.time()
-    async with tortoise.transactions.in_transaction('default') as conn:
-        count, orders = await conn.execute_query(
-            order_report_query_builder(**kwargs)
-        )
+        ids = await asyncio.gather(*(_get_id(cords) for cords in coordinates.values()))
+        return dict(zip(coordinates.keys(), ids))
+
+    async def _orders_create_from_excel(
+        self,
+        rows: list,
+        error_rows: list,
+        current_user: schemas.UserCurrent,
+        progress: Callable[[int, int], Awaitable] | None,
+        total: int,
+    ) -> int:
+        """
+        Creates orders of the validated excel rows.
+
+        Addresses of all rows are deduplicated and geocoded concurrently through
+        the address cache. Every order is created with its delivery point in one
+        transaction, ``IMPORT_CONCURRENCY`` orders at a time. Rows with not found
+        addresses or repeated partner order IDs are moved to ``error_rows``.
+        Returns amount of orders created with empty coordinates.
+        """
+        coordinates = await to_coordinates_many(service, {
+            address
+            for _, _, data in rows
+            for address in (data['shipment_point'], data['delivery_point'])
+            if address
+        })
+        shipment_point_ids = await self._get_shipment_point_ids({
+            data['shipment_point']: coordinates[data['shipment_point']]
+            for _, _, data in rows
+            if data['shipment_point']
+        })
+
+        wrong_address = 0
+        prepared = []
+        partner_order_ids = set()
+        for item_counter, item, data in rows:
+            shipment_point = data.pop('shipment_point')
+            delivery_point = data.pop('delivery_point')
+            delivery_cords = coordinates[delivery_point]
+            try:
+                if isinstance(delivery_cords, Exception):
+                    raise delivery_cords
+                if shipment_point and shipment_point_ids[shipment_point] is None:
+                    raise PartnerShipmentPointNotFoundError(
+                        table='partner_shipment_point',
+                        detail=f'Shipment point {shipment_point} was not found',
+                    )
+                delivery_point_schema = DeliveryPointCreate(
+                    **delivery_cords.dict(),
+                    address=delivery_point,
+                )
+            except Exception as e:
+                logger.debug(e)
+                item.append(ADDRESS_NOT_FOUND_ERROR)
+                error_rows.append((item_counter, item))
+                continue
+
+            if data.get('partner_order_id') is not None:
+                partner_order_id = (data.get('partner_id'), data['partner_order_id'])
+                if partner_order_id in partner_order_ids:
+                    item.append(ORDER_ALREADY_EXISTS_ERROR)
+                    error_rows.append((item_counter, item))
+                    continue
+                partner_order_ids.add(partner_order_id)
+
+            cords = coordinates[shipment_point] if shipment_point else delivery_cords
+            if cords.latitude is None and cords.longitude is None:
+                wrong_address += 1
+            prepared.append((
+                item_counter,
+                item,
+                shipment_point_ids.get(shipment_point),
+                delivery_point_schema,
+                data,
+            ))
+
+        dp_repo = DeliveryPointRepository()
+        semaphore = asyncio.Semaphore(IMPORT_CONCURRENCY)
+
+        async def _create(sp_id, delivery_point_schema, data):
+            async with semaphore, in_transaction('default'):
+                delivery_point_obj = await dp_repo.create(delivery_point_schema)
+                data['addresses'] = [{
+                    'place_id': delivery_point_obj.id,
+                    'position': 1,
+                    'type': enums.AddressType.DELIVERY_POINT,
+                }]
+                if sp_id is not None:
+                    data['addresses'].insert(0, {
+                        'place_id': sp_id,
+                        'position': 0,
+                        'type': enums.AddressType.SHIPMENT_POINT,
+                    })
+                return await models.order_create(
+                    create=schemas.OrderCreate(**data),
+                    user=current_user,
+                    courier_service_id=current_user.partners[0],
+                )
+
+        processed = total - len(prepared)
+        for start in range(0, len(prepared), IMPORT_BATCH_SIZE):
+            batch = prepared[start:start + IMPORT_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(_create(sp_id, dp, data) for _, _, sp_id, dp, data in batch),
+                return_exceptions=True,
+            )
+            created_orders = []
+            for (item_counter, item, *_), result in zip(batch, results):
+                if isinstance(result, IntegrityError):
+                    # the partner order ID is already used by an existing order
+                    logger.debug(result)
+                    item.append(ORDER_ALREADY_EXISTS_ERROR)
+                    error_rows.append((item_counter, item))
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    created_orders.append(result)
+
+            local_times = await models.orders_local_times(created_orders)
+            delivery_datetimes = {
+                order_id: order_time + timedelta(hours=2)
+                for order_id, order_time in local_times.items()
+            }
+            await models.orders_bulk_set_datetime('initial_delivery_datetime', delivery_datetimes)
+            await models.orders_bulk_set_datetime('delivery_datetime', delivery_datetimes)
+
+            processed += len(batch)
+            if progress is not None:
+                await progress(processed, total)
+
+        return wrong_address
+
+
+REPORT_PAGE_SIZE = 2000
+
+
+def _report_timezone_offset(kwargs: dict) -> timedelta:
     fact_delivery_time = kwargs.get('fact_delivery_time__range', None)
     current_status_range = kwargs.get('current_status__created_at__range', None)
     created_at_range = kwargs.get('created_at__range', None)
@@ -515,25 +611,64 @@ async def prepare_orders_for_report(columns: list[str], **kwargs) -> list[list[s
         timezone_offset = created_at_range[0].utcoffset()
     if current_status_range:
         timezone_offset = current_status_range[0].utcoffset()
+    return timezone_offset
+
+
+def _report_row(order, original_columns: list[str], timezone_offset: timedelta) -> list:
+    order_data = []
+    for column in original_columns:
+        if isinstance(order.get(column), datetime):
+            order_data.append(get_time_with_timezone(order[column], timezone_offset))
+            continue
+
+        if column == 'pan' and order.get(column):
+            pan = Pan(value=order[column])
+            order_data.append(pan.get_masked())
+            continue
+
+        order_data.append(order.get(column, ''))
+    return order_data
+
+
+async def prepare_orders_for_report(columns: list[str], **kwargs) -> list[list[str]]:
+    description_cols, *_ = enums.order_descriptions.values()
+    original_columns = ExcelLoader.translate_fields(columns, description_cols)
+    start = time.time()
+    orders = await database.read_fetch(order_report_query_builder(**kwargs))
+    timezone_offset = _report_timezone_offset(kwargs)
     end = time.time() - start
     loguru.logger.debug("Query: ", end)
     start = time.time()
-    result = []
-    for order in orders:
-        order_data = []
-        for column in original_columns:
-            if isinstance(order.get(column), datetime):
-                order_data.append(get_time_with_timezone(order[column], timezone_offset))
-                continue
-
-            if column == 'pan' and order.get(column):
-                pan = Pan(value=order[column])
-                order_data.append(pan.get_masked())
-                continue
-
-            order_data.append(order.get(column, ''))
-        result.append(order_data)
+    result = [
+        _report_row(order, original_columns, timezone_offset)
+        for order in orders
+    ]
 
     end = time.time() - start
     loguru.logger.debug("Deserialization: ", end)
     return result
+
+
+async def iterate_orders_for_report(
+    columns: list[str],
+    page_size: int = REPORT_PAGE_SIZE,
+    **kwargs,
+) -> AsyncIterator[list[list]]:
+    """
+    Yields report rows page by page.
+
+    Rows are read through a server-side cursor, so only one page is kept in memory.
+    """
+    description_cols, *_ = enums.order_descriptions.values()
+    original_columns = ExcelLoader.translate_fields(columns, description_cols)
+    timezone_offset = _report_timezone_offset(kwargs)
+    query = order_report_query_builder(**kwargs).strip().rstrip(';')
+
+    async with database.read_connection() as connection:
+        async with connection.transaction(readonly=True):
+            cursor = await connection.cursor(query)
+            while orders := await cursor.fetch(page_size):
+                yield [
+                    _report_row(order, original_columns, timezone_offset)
+                    for order in orders
+                ]
@@ -1,8 +1,13 @@
-from .geocoder import Geocoder2GIS
-from .geocoder import GeocoderOSM
-from .geocoder import GeocoderRemoteServiceRequestError
-from .geocoder import GeocoderRemoteServiceResponseError
+from .batch import to_coordinates_many  # noqa: F401
+from .cache import CachedGeocoder  # noqa: F401
+from .cache import GeocoderCache  # noqa: F401
+from .cache import get_cache_stats  # noqa: F401
+from .geocoder import Geocoder2GIS  # noqa: F401
+from .geocoder import GeocoderAddressNotFoundError  # noqa: F401
+from .geocoder import GeocoderOSM  # noqa: F401
+from .geocoder import GeocoderRemoteServiceRequestError  # noqa: F401
+from .geocoder import GeocoderRemoteServiceResponseError  # noqa: F401
 
 
-service = Geocoder2GIS()
-geocoder_osm = GeocoderOSM()
+service = CachedGeocoder(Geocoder2GIS())
+geocoder_osm = CachedGeocoder(GeocoderOSM())
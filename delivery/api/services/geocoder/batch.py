@@ -0,0 +1,44 @@
+import asyncio
+import typing
+
+from loguru import logger
+
+from ... import schemas
+from ...conf import conf
+from .cache import normalize_address
+
+
+async def to_coordinates_many(
+    geocoder,
+    addresses: typing.Iterable[str],
+    concurrency: int = None,
+) -> typing.Dict[str, typing.Union[schemas.Coordinates, Exception]]:
+    """
+    Geocodes many addresses at once.
+
+    Addresses are deduplicated and requested concurrently with no more than
+    ``concurrency`` requests in flight. Failed addresses are mapped to the
+    raised exception.
+    """
+    addresses = list(addresses)
+    semaphore = asyncio.Semaphore(concurrency or conf.geocoder.concurrency)
+
+    unique = {}
+    for address in addresses:
+        unique.setdefault(normalize_address(address), address)
+
+    async def _to_coordinates(address: str) -> schemas.Coordinates:
+        async with semaphore:
+            return await geocoder.to_coordinates(address)
+
+    results = await asyncio.gather(
+        *(_to_coordinates(address) for address in unique.values()),
+        return_exceptions=True,
+    )
+    resolved = {}
+    for key, result in zip(unique.keys(), results):
+        if isinstance(result, Exception):
+            logger.debug(f'address: {unique[key]}, error: {result}')
+        resolved[key] = result
+
+    return {address: resolved[normalize_address(address)] for address in addresses}
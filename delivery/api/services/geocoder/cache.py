@@ -0,0 +1,132 @@
+import asyncio
+import collections
+import typing
+
+import aioredis
+from loguru import logger
+
+from ... import redis_module
+from ... import schemas
+from ...conf import conf
+from .. import common
+from .geocoder import Geocoder
+from .geocoder import GeocoderAddressNotFoundError
+
+KEY_PREFIX = 'geocoder'
+STATS_KEY = f'{KEY_PREFIX}:stats'
+# stored instead of coordinates for addresses which geocoder could not find
+NOT_FOUND = 'not_found'
+
+
+def normalize_address(address: str) -> str:
+    """Makes the same address written differently produce the same cache key."""
+    return ' '.join(address.replace(';', ',').lower().split())
+
+
+async def get_cache_stats() -> dict:
+    """Returns hit/miss counters of every cached geocoder."""
+    stats = collections.defaultdict(dict)
+    for field, value in (await redis_module.get_connection().hgetall(STATS_KEY)).items():
+        namespace, counter = field.split(':', 1)
+        stats[namespace][counter] = int(value)
+    return dict(stats)
+
+
+class GeocoderCache(common.RedisService):
+    """
+    Address -> coordinates cache kept in Redis.
+
+    Not found addresses are cached too, with their own shorter TTL.
+    Redis errors are logged and treated as cache misses.
+    """
+
+    def __init__(self, namespace: str, ttl: int = None, negative_ttl: int = None):
+        super().__init__(ttl=ttl or conf.geocoder.cache_ttl)
+        self.namespace = namespace
+        self.negative_ttl = negative_ttl or conf.geocoder.negative_cache_ttl
+
+    def _key(self, address: str) -> str:
+        return f'{KEY_PREFIX}:{self.namespace}:{normalize_address(address)}'
+
+    async def coordinates_get(
+        self, address: str,
+    ) -> typing.Tuple[bool, typing.Optional[schemas.Coordinates]]:
+        """Returns whether address is cached and its coordinates, None if not found."""
+        try:
+            value = await self._redis.get(self._key(address))
+        except aioredis.RedisError as e:
+            logger.warning(f'Geocoder cache is unavailable: {e}')
+            return False, None
+        if value is None:
+            return False, None
+        if value == NOT_FOUND:
+            return True, None
+        return True, schemas.Coordinates.parse_raw(value)
+
+    async def coordinates_set(self, address: str, coordinates: typing.Optional[schemas.Coordinates]) -> None:
+        try:
+            if coordinates is None:
+                await self._redis.set(self._key(address), NOT_FOUND, ex=self.negative_ttl)
+            else:
+                await self._redis.set(self._key(address), coordinates.json(), ex=self.ttl)
+        except aioredis.RedisError as e:
+            logger.warning(f'Geocoder cache is unavailable: {e}')
+
+    async def incr(self, counter: str) -> None:
+        try:
+            await self._redis.hincrby(STATS_KEY, f'{self.namespace}:{counter}', 1)
+        except aioredis.RedisError as e:
+            logger.warning(f'Geocoder cache is unavailable: {e}')
+
+
+class CachedGeocoder:
+    """
+    Caching layer in front of a geocoder backend.
+
+    Concurrent lookups of the same address share a single request to the cache
+    and to the backend. Other attributes are proxied to the backend.
+    """
+
+    def __init__(self, backend: Geocoder, cache: GeocoderCache = None):
+        self.backend = backend
+        self.cache = cache or GeocoderCache(backend.name)
+        self._in_flight: typing.Dict[str, asyncio.Future] = {}
+
+    def __getattr__(self, name: str):
+        return getattr(self.backend, name)
+
+    async def to_coordinates(self, address: str) -> schemas.Coordinates:
+        key = normalize_address(address)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._to_coordinates(address))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            await self.cache.incr('coalesced')
+        # shielded, so a cancelled caller does not cancel the lookup of the others
+        return await asyncio.shield(future)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not future.cancelled():
+            # marks exception as retrieved when every caller has gone
+            future.exception()
+
+    async def _to_coordinates(self, address: str) -> schemas.Coordinates:
+        found, coordinates = await self.cache.coordinates_get(address)
+        if found:
+            if coordinates is None:
+                await self.cache.incr('negative_hits')
+                raise GeocoderAddressNotFoundError(f'Address {address} was not found')
+            await self.cache.incr('hits')
+            return coordinates
+
+        await self.cache.incr('misses')
+        try:
+            coordinates = await self.backend.to_coordinates(address)
+        except GeocoderAddressNotFoundError:
+            await self.cache.coordinates_set(address, None)
+            raise
+        await self.cache.coordinates_set(address, coordinates)
+        return coordinates
@@ -1,3 +1,4 @@
+import asyncio
 import typing
 from datetime import datetime
 
@@ -17,15 +18,49 @@ class GeocoderRemoteServiceResponseError(Exception):
     """Raises when remote geocoder (2gis) service returns response with `ERROR` status."""
 
 
+class GeocoderAddressNotFoundError(GeocoderRemoteServiceResponseError):
+    """Raises when remote geocoder service has found nothing by the address."""
+
+
 class Geocoder(common.AsyncHTTPSession):
+    name = ''
+
     async def to_string_address(self, coordinates: schemas.Coordinates) -> str:
         pass
 
     def to_coordinates(self, address: str) -> schemas.Coordinates:
         pass
 
+    async def _get_json(self, query: str) -> typing.Any:
+        """
+        Sends GET request and returns decoded response.
+
+        Empty responses and connection errors are retried with exponential backoff.
+        Empty list is a valid response meaning nothing was found.
+        """
+        error = None
+        for attempt in range(conf.geocoder.retries + 1):
+            if attempt:
+                await asyncio.sleep(conf.geocoder.backoff * 2 ** (attempt - 1))
+            try:
+                resp = await self._async_session.get(query)
+                data = await resp.json()
+            except aiohttp.client_exceptions.ClientError as e:
+                logger.debug(e)
+                error = e
+                continue
+            if data or isinstance(data, list):
+                return data
+            error = f'status code: {resp.status}'
+
+        raise GeocoderRemoteServiceRequestError(
+            f'Cannot get response from geocoder due to {error}',
+        )
+
 
 class Geocoder2GIS(Geocoder):
+    name = '2gis'
+
     def __init__(self):
         self.url = conf.geocoder.url_2gis + '3.0/items/geocode'
         self.key = conf.geocoder.key_2gis
@@ -37,23 +72,21 @@ class Geocoder2GIS(Geocoder):
 
     async def to_coordinates(self, address: str) -> schemas.Coordinates:
         query = f"{self.url}?q={address}&fields=items.point&key={self.key}"
-        resp = await self._async_session.get(query)
-        data = await resp.json()
-        if not data:
-            resp = await self._async_session.get(query)
-            data = await resp.json()
-            if not data:
-                raise GeocoderRemoteServiceRequestError(
-                    f'Cannot send message due to status code: {resp.status_code}',
-                )
+        data = await self._get_json(query)
 
-        if data.get('meta').get('error'):
+        meta = data.get('meta') or {}
+        if meta.get('code') == 404:
+            raise GeocoderAddressNotFoundError(f'Address {address} was not found')
+        if meta.get('error'):
             raise GeocoderRemoteServiceResponseError(
                 'Cannot proceed response due to remote service '
                 f'internal status code: {data["meta"]["code"]}. '
                 f'Message: {data["meta"]["error"]["message"]}',
             )
-        coordinates = data['result']['items'][0]['point']
+        items = (data.get('result') or {}).get('items')
+        if not items or 'point' not in items[0]:
+            raise GeocoderAddressNotFoundError(f'Address {address} was not found')
+        coordinates = items[0]['point']
         return schemas.Coordinates(
             latitude=coordinates['lat'],
             longitude=coordinates['lon']
@@ -82,6 +115,8 @@ class Geocoder2GIS(Geocoder):
 
 
 class GeocoderOSM(Geocoder):
+    name = 'osm'
+
     def __init__(self):
         self.url = conf.geocoder.url_osm
         super().__init__()
@@ -89,17 +124,8 @@ class GeocoderOSM(Geocoder):
     async def to_coordinates(self, address: str) -> schemas.Coordinates:
 
         query = f'{self.url}?q={address}&format=json'
-        resp = await self._async_session.get(query)
-        data = await resp.json()
+        data = await self._get_json(query)
 
-        if not data:
-            resp = await self._async_session.get(query)
-            data = await resp.json()
-            if not data:
-                raise GeocoderRemoteServiceRequestError(
-                    f'Cannot send message due to status code: {resp}'
-                    f'or place cannot be found',
-                )
         if isinstance(data, dict) and data.get('error'):
             error = data.get('error')
             raise GeocoderRemoteServiceResponseError(
@@ -107,6 +133,8 @@ class GeocoderOSM(Geocoder):
                 f'internal status code: {error["code"]}. '
                 f'Message: {error["message"]}',
             )
+        if not data:
+            raise GeocoderAddressNotFoundError(f'Address {address} was not found')
 
         data = data[0]
         return schemas.Coordinates(
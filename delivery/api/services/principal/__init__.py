@@ -0,0 +1,4 @@
+from .cache import PrincipalCache
+
+
+service = PrincipalCache()
@@ -0,0 +1,125 @@
+import hashlib
+import time
+import typing
+
+import aioredis
+from loguru import logger
+from pydantic import parse_obj_as
+
+from ... import schemas
+from ...conf import conf
+from ...modules.shipment_point.schemas import CityGet
+from .. import common
+
+KEY_PREFIX = 'auth'
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _seconds_left(exp: typing.Union[int, float, None], ttl: int) -> int:
+    """Limits ``ttl`` by the expiration timestamp of the token."""
+    if exp is None:
+        return ttl
+    return max(min(ttl, int(exp - time.time())), 1)
+
+
+# schemas of the profile content which are read by attribute, JSON keeps them as dicts
+PROFILE_CONTENT_SCHEMAS = {
+    'cities': typing.List[CityGet],
+    'shipment_point': schemas.ShipmentPointGet,
+}
+
+
+def _principal_load(value: str) -> schemas.UserCurrent:
+    principal = schemas.UserCurrent.parse_raw(value)
+    profile_content = (principal.profile or {}).get('profile_content')
+    if isinstance(profile_content, dict):
+        for field, schema in PROFILE_CONTENT_SCHEMAS.items():
+            if profile_content.get(field) is not None:
+                profile_content[field] = parse_obj_as(schema, profile_content[field])
+    return principal
+
+
+class PrincipalCache(common.RedisService):
+    """
+    Caches authenticated users by access token and keeps revoked tokens.
+
+    Cached users are indexed by user ID, so every cached token of the user
+    is dropped when the user, its profile or permissions change.
+    Revoked tokens are kept until their expiration, so revocation can be
+    checked without a database query.
+    """
+
+    def __init__(self, ttl: int = None):
+        super().__init__(ttl=ttl or conf.token.principal_cache_ttl)
+
+    @staticmethod
+    def _principal_key(user_id: int, token: str) -> str:
+        return f'{KEY_PREFIX}:principal:{user_id}:{_token_hash(token)}'
+
+    @staticmethod
+    def _index_key(user_id: int) -> str:
+        return f'{KEY_PREFIX}:principals:{user_id}'
+
+    @staticmethod
+    def _revoked_key(token: str) -> str:
+        return f'{KEY_PREFIX}:revoked:{_token_hash(token)}'
+
+    async def get(
+        self, token: str, user_id: int,
+    ) -> typing.Tuple[bool, typing.Optional[schemas.UserCurrent]]:
+        """Returns whether token is revoked and the cached user of the token."""
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.exists(self._revoked_key(token))
+            pipe.get(self._principal_key(user_id, token))
+            revoked, principal = await pipe.execute()
+        if principal is not None:
+            principal = _principal_load(principal)
+        return bool(revoked), principal
+
+    async def set(
+        self, token: str, principal: schemas.UserCurrent, exp: float = None,
+    ) -> None:
+        key = self._principal_key(principal.id, token)
+        ttl = _seconds_left(exp, self.ttl)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, principal.json(), ex=ttl)
+            pipe.sadd(self._index_key(principal.id), key)
+            pipe.expire(self._index_key(principal.id), self.ttl)
+            await pipe.execute()
+
+    async def revoke(self, token: str, exp: float) -> None:
+        await self.revoke_many([(token, exp)])
+
+    async def revoke_many(self, tokens: typing.Iterable[typing.Tuple[str, float]]) -> None:
+        now = time.time()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for token, exp in tokens:
+                # expired tokens are rejected anyway
+                if exp > now:
+                    pipe.set(self._revoked_key(token), 1, ex=max(int(exp - now), 1))
+            await pipe.execute()
+
+    async def is_revoked(self, token: str) -> bool:
+        return bool(await self._redis.exists(self._revoked_key(token)))
+
+    async def invalidate_user(self, user_id: int) -> None:
+        index_key = self._index_key(user_id)
+        try:
+            keys = await self._redis.smembers(index_key)
+            await self._redis.delete(index_key, *keys)
+        except aioredis.RedisError as e:
+            # cached principals expire after the TTL anyway
+            logger.warning(f'Principal cache of user {user_id} was not invalidated: {e}')
+
+    async def invalidate_all(self) -> None:
+        keys = []
+        async for key in self._redis.scan_iter(match=f'{KEY_PREFIX}:principal*', count=1000):
+            keys.append(key)
+            if len(keys) >= 1000:
+                await self._redis.unlink(*keys)
+                keys = []
+        if keys:
+            await self._redis.unlink(*keys)
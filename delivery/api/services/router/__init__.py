@@ -1,3 +1,3 @@
-from .router import order_distribution
-from .router import run_algo
-from .router import set_courier_to_order
+from .router import order_distribution  # noqa: F401
+from .router import run_algo  # noqa: F401
+from .router import set_couriers_to_orders  # noqa: F401
@@ -0,0 +1,91 @@
+import typing
+
+import numpy as np
+
+from ... import models
+
+EARTH_RADIUS = 6371000
+STOCK_POINT = (43.26130, 76.92920)
+
+
+def _haversine(
+        lat_first: np.ndarray,
+        long_first: np.ndarray,
+        lat_second: np.ndarray,
+        long_second: np.ndarray,
+) -> np.ndarray:
+    sq_sin_dlat = np.sin((lat_second - lat_first) / 2) ** 2
+    sq_sin_dlong = np.sin((long_second - long_first) / 2) ** 2
+    to_root = sq_sin_dlat + np.cos(lat_first) * np.cos(lat_second) * sq_sin_dlong
+    return 2 * np.arcsin(np.sqrt(np.minimum(to_root, 1.0))) * EARTH_RADIUS
+
+
+def haversine_matrix(origins, destinations=None) -> np.ndarray:
+    """Returns great-circle distances in meters as int32 array.
+
+    Without ``destinations`` the square matrix of ``origins`` is built, only
+    the upper triangle is computed and mirrored. Otherwise the rectangular
+    origins x destinations matrix is returned.
+    """
+    origins = np.radians(np.asarray(origins, dtype=np.float64).reshape(-1, 2))
+
+    if destinations is None:
+        length = len(origins)
+        distances = np.zeros(shape=(length, length), dtype=np.int32)
+        rows, cols = np.triu_indices(length, k=1)
+        upper = _haversine(
+            origins[rows, 0], origins[rows, 1],
+            origins[cols, 0], origins[cols, 1],
+        ).astype(np.int32)
+        distances[rows, cols] = upper
+        distances[cols, rows] = upper
+        return distances
+
+    destinations = np.radians(
+        np.asarray(destinations, dtype=np.float64).reshape(-1, 2),
+    )
+    return _haversine(
+        origins[:, 0, np.newaxis], origins[:, 1, np.newaxis],
+        destinations[np.newaxis, :, 0], destinations[np.newaxis, :, 1],
+    ).astype(np.int32)
+
+
+async def get_route_points(orders) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Returns coordinates of the stock point followed by delivery points
+    and indexes of the orders the delivery points belong to.
+
+    The first found shipment point is used as a stock point of the route,
+    delivery points keep the order of the given orders. An order may have
+    any number of delivery points, route node ``i`` is a delivery point of
+    ``orders[node_orders[i - 1]]``.
+    """
+    if not orders:
+        raise models.NotDistributionOrdersError('Not orders for distribution')
+
+    coordinates = await models.order_coordinates_get_list(
+        [order.id for order in orders],
+    )
+    stock_point = None
+    delivery_points = []
+    node_orders = []
+    for order_index, order in enumerate(orders):
+        order_coordinates = coordinates.get(order.id)
+        if not order_coordinates:
+            continue
+        if stock_point is None:
+            stock_point = order_coordinates['shipment_point']
+        delivery_points.extend(order_coordinates['delivery_points'])
+        node_orders.extend([order_index] * len(order_coordinates['delivery_points']))
+
+    points = np.array(
+        [stock_point or STOCK_POINT] + delivery_points, dtype=np.float64,
+    )
+    return points, np.array(node_orders, dtype=np.int64)
+
+
+async def build_distance_matrix(orders) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """Returns distance matrix of the route nodes and indexes of their orders."""
+    points, node_orders = await get_route_points(orders)
+    if np.isnan(points).any():
+        raise models.DistanceMatrixError('Some orders have no coordinates')
+    return haversine_matrix(points), node_orders
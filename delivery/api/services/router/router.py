@@ -1,4 +1,6 @@
+import functools
 import math
+import typing
 from datetime import datetime
 
 import numpy as np
@@ -6,10 +8,15 @@ import pytz
 import tortoise
 
 from loguru import logger
+from tortoise.functions import Count
+from tortoise.transactions import in_transaction
 
+from . import solver
+from .distance_matrix import build_distance_matrix
 from .distribution_service import DistributionService, couriers_prepare, orders_prepare, get_stock_place_prepare
-from ... import models, enums
-from .utils import distribute_orders
+from ... import executors, models, enums
+from ...conf import conf
+from ...enums import RouterBackend
 
 ONE_DEGREE = math.pi / 180
 TIMEZONE = pytz.timezone("Asia/Almaty")
@@ -45,69 +52,94 @@ def get_distance(
     return int(2 * math.asin(math.sqrt(to_root)) * 6371000)
 
 
-async def set_courier_to_order(orders, order_index, couriers, key_courier,
-                               position_key):
-    if not couriers:
-        raise models.NotDistributionCouriersError('Not couriers for distribution')
-    if not orders:
-        raise models.NotDistributionOrdersError('Not orders for distribution')
+def node_order_index(node: int, node_orders: typing.Optional[list]) -> typing.Optional[int]:
+    """Returns index of the order of the route node, None for the stock point."""
+    if node_orders is None:
+        return node - 1 if node > 0 else None
+    if not 0 < node <= len(node_orders):
+        return None
+    return node_orders[node - 1]
 
-    order_obj = orders[order_index]
-    await order_obj.update_from_dict({
-        'courier_id': couriers[key_courier].id,
-        'position': position_key,
-    }).save()
-
-    order_statuses = await models.OrderStatuses.filter(order_id=order_obj.id)
-    if len(order_statuses) == 1:
-        if status := await models.Status.filter(
-                partner_id__isnull=True,
-                slug=enums.StatusSlug.COURIER_ASSIGNED.value,
-        ).first():
-            order_time = await order_obj.localtime
-            await models.OrderStatuses.create(
-                order_id=order_obj.id,
-                status_id=status.id,
-                created_at=order_time,
-            )
-            order_obj.current_status = status
-            await order_obj.save()
 
-    return order_obj
+async def set_couriers_to_orders(orders, couriers, algo_result: dict) -> list:
+    """
+    Applies the whole distribution result in a constant number of queries.
 
+    Courier and position of every routed order are written with one bulk update,
+    orders having only the initial status get COURIER_ASSIGNED status rows and
+    ``current_status`` within the same transaction.
 
-async def get_distance_matrix(orders):
+    Route nodes are mapped to orders by ``node_orders`` of the result, every
+    node is a separate order when it is not given.
+    """
+    if not couriers:
+        raise models.NotDistributionCouriersError('Not couriers for distribution')
     if not orders:
         raise models.NotDistributionOrdersError('Not orders for distribution')
-    delivery_points = []
-    shipment_points = []
-    for order in orders:
-        for address in await models.order_address_get_list(order.id):
-            address = address.dict()
-            if address['type'] == enums.AddressType.SHIPMENT_POINT:
-                if not shipment_points:
-                    shipment_points.append([address['place']['latitude'],
-                                            address['place']['longitude']])
-
-            if address['type'] == enums.AddressType.DELIVERY_POINT:
-                delivery_points.append([address['place']['latitude'],
-                                        address['place']['longitude']])
-    if not shipment_points:
-        shipment_points.append([43.26130, 76.92920])
-    points = shipment_points + delivery_points
-    length = len(points)
-    distances = np.zeros(shape=(length, length), dtype=np.long)
-
-    for i in range(length):
-        for j in range(length):
-            dist = get_distance(
-                points[i][0],
-                points[i][1],
-                points[j][0],
-                points[j][1],
+
+    node_orders = algo_result.get('node_orders')
+    assigned_orders = []
+    reassigned_orders = []
+    routed = set()
+    for key_courier, result in enumerate(algo_result.get('couriers')):
+        position = 0
+        for node in result.get('path')[1:]:
+            order_index = node_order_index(node, node_orders)
+            if order_index is None or order_index >= len(orders) or key_courier >= len(couriers):
+                logger.info(f'Route node {node} is out of range')
+                continue
+            if order_index in routed:
+                # the next delivery point of the same order
+                continue
+            routed.add(order_index)
+            order_obj = orders[order_index]
+            if order_obj.courier_id != couriers[key_courier].id:
+                reassigned_orders.append(order_obj)
+            order_obj.courier_id = couriers[key_courier].id
+            order_obj.position = position
+            position += 1
+            assigned_orders.append(order_obj)
+
+    if not assigned_orders:
+        return assigned_orders
+
+    order_ids = [order_obj.id for order_obj in assigned_orders]
+    async with in_transaction('default'):
+        await models.Order.bulk_update(
+            assigned_orders, fields=['courier_id', 'position'],
+        )
+        statuses_count = await models.OrderStatuses.filter(
+            order_id__in=order_ids,
+        ).annotate(
+            count=Count('id'),
+        ).group_by('order_id').values_list('order_id', 'count')
+        new_order_ids = {
+            order_id for order_id, count in statuses_count if count == 1
+        }
+        status = None
+        if new_order_ids:
+            status = await models.catalog.status_by_slug(
+                enums.StatusSlug.COURIER_ASSIGNED.value,
+            )
+        if status:
+            order_times = await models.orders_local_times(assigned_orders)
+            order_statuses = []
+            for order_obj in assigned_orders:
+                if order_obj.id not in new_order_ids:
+                    continue
+                order_statuses.append(models.OrderStatuses(
+                    order_id=order_obj.id,
+                    status_id=status.id,
+                    created_at=order_times[order_obj.id],
+                ))
+                order_obj.current_status = status
+            await models.OrderStatuses.bulk_create(order_statuses)
+            await models.Order.filter(id__in=new_order_ids).update(
+                current_status_id=status.id,
             )
-            distances[i][j] = dist
-    return distances.tolist()
+
+    await models.send_new_orders_to_couriers(reassigned_orders)
+    return assigned_orders
 
 
 async def get_courier_info(couriers):
@@ -129,18 +161,19 @@ async def get_courier_info(couriers):
     return couriers_info_list
 
 
-async def get_can_delivery(orders, couriers):
+async def get_can_delivery(nodes_amount, couriers):
     can_delivery = []
     for _ in couriers:
         courier_can_delivery = [1]
-        for _ in orders:
+        for _ in range(nodes_amount):
             courier_can_delivery.append(1)
         can_delivery.append(courier_can_delivery)
 
     return can_delivery
 
 
-async def get_order_info(orders):
+async def get_order_info(orders, node_orders):
+    """Returns orders info rows of the route nodes."""
     orders_info_list = []
     priority = 1
     for key, order in enumerate(orders):
@@ -158,73 +191,87 @@ async def get_order_info(orders):
             ],
         )
 
-    return orders_info_list
+    return [orders_info_list[order_index] for order_index in node_orders]
 
 
 async def check_orders(orders):
-    for key, order in enumerate(orders):
-        for address in await models.order_address_get_list(order.id):
-            address = address.dict()
-            if not address['place']['latitude'] or not address['place']['longitude']:
-                orders.pop(key)
+    coordinates = await models.order_coordinates_get_list(
+        [order.id for order in orders],
+    )
+    orders[:] = [
+        order for order in orders
+        if all(
+            latitude and longitude
+            for latitude, longitude in _order_points(coordinates.get(order.id))
+        )
+    ]
+
+
+def _order_points(order_coordinates: dict | None) -> list:
+    if not order_coordinates:
+        return []
+    points = list(order_coordinates['delivery_points'])
+    if order_coordinates['shipment_point']:
+        points.append(order_coordinates['shipment_point'])
+    return points
+
 
 async def run_algo(orders, couriers) -> dict:
     await check_orders(orders)
-    distance_matrix = await get_distance_matrix(orders[-15:])
-    # logger.info(distance_matrix)
-    couriers_info = await get_courier_info(couriers[:4])
-    # logger.info(couriers_info)
-    orders_info = await get_order_info(orders[-15:])
-    # logger.info(orders_info)
-    can_delivery = await get_can_delivery(orders[-15:], couriers[:4])
-    # logger.info(can_delivery)
-    # resp_json = distribute_orders(
-    #     0,
-    #     len(orders),
-    #     len(couriers),
-    #     distance_matrix,
-    #     couriers_info,
-    #     orders_info,
-    #     can_delivery,
-    # )
-    # print(resp_json, 1)
+    if conf.router.backend == RouterBackend.SERVICE:
+        return await run_service_algo(orders, couriers)
+
+    distance_matrix, node_orders = await build_distance_matrix(orders)
+    couriers_info = np.array(await get_courier_info(couriers), dtype=np.float64)
+    orders_info = np.array(
+        await get_order_info(orders, node_orders), dtype=np.int64,
+    ).reshape(-1, 4)
+    can_delivery = np.array(
+        await get_can_delivery(len(node_orders), couriers), dtype=np.int8,
+    )
+
+    result = await executors.executors_run(
+        functools.partial(
+            solver.solve,
+            distance_matrix,
+            couriers_info,
+            orders_info,
+            can_delivery,
+            time_limit=conf.router.time_limit,
+            node_orders=node_orders,
+        ),
+        executors.ExecutorType.ROUTER,
+    )
+    result['node_orders'] = node_orders.tolist()
+    return result
+
+
+async def run_service_algo(orders, couriers) -> dict:
+    distance_matrix, node_orders = await build_distance_matrix(orders)
+    couriers_info = await get_courier_info(couriers)
+    orders_info = await get_order_info(orders, node_orders)
+    can_delivery = await get_can_delivery(len(node_orders), couriers)
     service = DistributionService()
     result = await service.distribute(dict(
         {
             "is_cycle": 0,
-            "orders_amount": len(orders[:15]),
-            "couriers_amount": len(couriers[:4]),
-            "distance_matrix": distance_matrix,
+            "orders_amount": len(node_orders),
+            "couriers_amount": len(couriers),
+            "distance_matrix": distance_matrix.tolist(),
             "couriers_info": couriers_info,
             "orders_info": orders_info,
             "can_delivery_info": can_delivery,
         }
     ))
+    result['node_orders'] = node_orders.tolist()
 
     return result
 
 
 async def order_distribution(orders: list, couriers: list, algo_result: dict = None) -> None:
     if len(orders) == 1:
-        await set_courier_to_order(
-            orders, 0, couriers, 0, 0,
-        )
-        return
+        algo_result = {'couriers': [{'path': [0, 1]}]}
 
     if not algo_result:
         algo_result = await run_algo(orders, couriers)
-    for key_courier, result in enumerate(algo_result.get('couriers')):
-        path = result.get('path')
-        path.pop(0)
-
-        for position, order_index in enumerate(path):
-            try:
-                await set_courier_to_order(
-                    orders=orders,
-                    order_index=order_index - 1,
-                    couriers=couriers,
-                    key_courier=key_courier,
-                    position_key=position,
-                )
-            except IndexError as e:
-                logger.info(e)
+    await set_couriers_to_orders(orders, couriers, algo_result)
@@ -0,0 +1,172 @@
+import numpy as np
+
+from ortools.constraint_solver import pywrapcp
+from ortools.constraint_solver import routing_enums_pb2
+
+DEPOT = 0
+# Lateness is weighted far above distance so that the solver minimizes
+# violations first and distance second, as the legacy algorithm does.
+VIOLATION_COST = 1000000
+DROP_PENALTY = 1000000000
+
+
+def _transit_matrix(distance_matrix: np.ndarray, speed: float) -> np.ndarray:
+    return np.rint(distance_matrix / speed).astype(np.int64)
+
+
+def solve(
+        distance_matrix: np.ndarray,
+        couriers_info: np.ndarray,
+        orders_info: np.ndarray,
+        can_delivery: np.ndarray,
+        is_cycle: int = 0,
+        time_limit: int = 10,
+        node_orders: np.ndarray = None,
+) -> dict:
+    """
+    Solves the courier routing problem with OR-Tools inside the current process.
+
+    Inputs have the same layout as for the external algorithm, but are passed
+    as arrays: distance matrix of (nodes + 1)X(nodes + 1) size with the stock
+    point at index 0, couriers info rows of [speed, distance limit, start,
+    finish], orders info rows of [time_l, time_r, priority, ...] per node and
+    can delivery matrix of couriers X (nodes + 1) size. Nodes of the same
+    order in ``node_orders`` are delivered by the same courier, every node is
+    a separate order when it is not given.
+    Result has the same shape as the external algorithm response.
+    """
+    distance_matrix = np.array(distance_matrix, dtype=np.int64)
+    couriers_info = np.asarray(couriers_info, dtype=np.float64).reshape(-1, 4)
+    orders_info = np.asarray(orders_info, dtype=np.int64)
+    can_delivery = np.asarray(can_delivery, dtype=np.int64)
+
+    if not is_cycle:
+        distance_matrix[:, DEPOT] = 0
+
+    nodes_amount = len(distance_matrix)
+    couriers_amount = len(couriers_info)
+    manager = pywrapcp.RoutingIndexManager(nodes_amount, couriers_amount, DEPOT)
+    routing = pywrapcp.RoutingModel(manager)
+
+    distances = distance_matrix.tolist()
+
+    def distance_callback(from_index, to_index):
+        return distances[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
+
+    distance_index = routing.RegisterTransitCallback(distance_callback)
+    routing.SetArcCostEvaluatorOfAllVehicles(distance_index)
+    routing.AddDimensionWithVehicleCapacity(
+        distance_index,
+        0,
+        [int(limit) for limit in couriers_info[:, 1]],
+        True,
+        'Distance',
+    )
+
+    time_indexes = []
+    for speed in couriers_info[:, 0]:
+        transits = _transit_matrix(distance_matrix, speed).tolist()
+
+        def time_callback(from_index, to_index, transits=transits):
+            return transits[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
+
+        time_indexes.append(routing.RegisterTransitCallback(time_callback))
+
+    horizon = int(max(couriers_info[:, 3].max(initial=0), orders_info[:, 1].max(initial=0)))
+    routing.AddDimensionWithVehicleTransits(
+        time_indexes,
+        horizon,
+        horizon,
+        False,
+        'Time',
+    )
+    time_dimension = routing.GetDimensionOrDie('Time')
+
+    for courier_index, (_, _, start_time, finish_time) in enumerate(couriers_info):
+        time_dimension.CumulVar(routing.Start(courier_index)).SetRange(
+            int(start_time), int(finish_time),
+        )
+        time_dimension.CumulVar(routing.End(courier_index)).SetMax(int(finish_time))
+
+    for node in range(1, nodes_amount):
+        index = manager.NodeToIndex(node)
+        time_l, time_r, priority = (int(value) for value in orders_info[node - 1][:3])
+        time_dimension.CumulVar(index).SetMin(time_l)
+        time_dimension.SetCumulVarSoftUpperBound(
+            index, time_r, max(priority, 1) * VIOLATION_COST,
+        )
+        routing.AddDisjunction([index], DROP_PENALTY)
+
+        for courier_index in range(couriers_amount):
+            if not can_delivery[courier_index][node]:
+                routing.VehicleVar(index).RemoveValue(courier_index)
+
+    if node_orders is not None:
+        order_indexes = {}
+        for node, order_index in enumerate(node_orders, start=1):
+            order_indexes.setdefault(int(order_index), []).append(manager.NodeToIndex(node))
+        for indexes in order_indexes.values():
+            # dropped nodes have vehicle -1, so an order is delivered or dropped as a whole
+            for index in indexes[1:]:
+                routing.solver().Add(
+                    routing.VehicleVar(indexes[0]) == routing.VehicleVar(index),
+                )
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = (
+        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    )
+    search_parameters.local_search_metaheuristic = (
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    )
+    search_parameters.time_limit.FromSeconds(time_limit)
+
+    solution = routing.SolveWithParameters(search_parameters)
+    if solution is None:
+        return {
+            'total_violation': 0,
+            'max_distance': 0.0,
+            'total_distance': 0,
+            'couriers': [
+                {'path': [DEPOT], 'distance': 0, 'violation': 0, 'time': 0}
+                for _ in range(couriers_amount)
+            ],
+        }
+
+    couriers_result = []
+    for courier_index in range(couriers_amount):
+        path = []
+        distance = violation = 0
+        index = routing.Start(courier_index)
+        while not routing.IsEnd(index):
+            node = manager.IndexToNode(index)
+            path.append(node)
+            if node != DEPOT:
+                time_r, priority = orders_info[node - 1][1:3]
+                if solution.Value(time_dimension.CumulVar(index)) > time_r:
+                    violation += int(priority)
+            next_index = solution.Value(routing.NextVar(index))
+            distance += distances[node][manager.IndexToNode(next_index)]
+            index = next_index
+        if is_cycle and len(path) > 1:
+            path.append(DEPOT)
+
+        couriers_result.append({
+            'path': path,
+            'distance': distance,
+            'violation': violation,
+            'time': solution.Value(time_dimension.CumulVar(index)),
+        })
+
+    return {
+        'total_violation': sum(courier['violation'] for courier in couriers_result),
+        'max_distance': float(max(
+            (
+                courier['distance'] / speed
+                for courier, speed in zip(couriers_result, couriers_info[:, 0])
+            ),
+            default=0.0,
+        )),
+        'total_distance': sum(courier['distance'] for courier in couriers_result),
+        'couriers': couriers_result,
+    }
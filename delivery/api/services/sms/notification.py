@@ -1,11 +1,11 @@
 import asyncio
 import json
 
-import aioredis
 import loguru
 from .sms import get_sms_service
 from .. import common
 from ...conf import conf
+from ...models import publisher
 from ... import schemas, enums
 
 
@@ -31,9 +31,8 @@ class SMSNotification:
 
 
 async def send_message_to_notification_service(channel, data):
-    """Send message to notification service"""
-    redis = aioredis.from_url(conf.redis.uri)
-    await redis.publish(channel, json.dumps(data))
+    """Send message to notification service after the current transaction is committed"""
+    await publisher.publish(channel, data)
     loguru.logger.debug({'channel': channel, 'data': data})
 
 
@@ -125,7 +124,7 @@ async def send_confirm_email_otp(
     language=enums.LanguageType.RU.value,
 ):
     """Send otp code for confirm email through notification service"""
-    channel = enums.ChannelType.SEND_EMAIL_OTP
+    channel = enums.ChannelType.SEND_EMAIL_OTP.value
     data = {
         'email': email,
         'otp_code': otp_code,
@@ -157,7 +156,7 @@ async def send_email_magic_link(
     language=enums.LanguageType.RU.value,
 ):
     """Send otp code for confirm email through notification service"""
-    channel = enums.ChannelType.SEND_EMAIL_MAGIC_LINK
+    channel = enums.ChannelType.SEND_EMAIL_MAGIC_LINK.value
     data = {
         'email': email,
         'magic_link': magic_link,
@@ -176,7 +175,7 @@ async def send_email_otp(
     language=enums.LanguageType.RU.value,
 ):
     """Send otp code for confirm email through notification service"""
-    channel = enums.ChannelType.SEND_EMAIL_OTP
+    channel = enums.ChannelType.SEND_EMAIL_OTP.value
     data = {
         'email': email,
         'otp_code': otp_code,
@@ -1,36 +1,138 @@
-# TODO: it needs to be refactor
-
-
 import json
+import math
+import time
+import typing
 
 from fastapi.encoders import jsonable_encoder
 
 from .. import common
+from ...conf import conf
+
+# the one Redis uses for geo commands
+EARTH_RADIUS = 6372797.560856
 
 
 class MonitoringService(common.RedisService):
-    def _get_key(self, courier_service_id: int, courier_id: int) -> str:
-        return f'locations_{courier_service_id}_{courier_id}'
+    """
+    Keeps the last known locations of couriers per courier service.
+
+    Every courier service has a hash of location messages by courier ID,
+    a geo set of coordinates for radius and box queries and a sorted set
+    of update timestamps. Couriers not updated for ``ttl`` seconds are
+    stale, they are removed on reads. Keys of the service expire as a
+    whole when none of its couriers is updated.
+    """
+
+    def __init__(self, ttl: int = None):
+        super().__init__(ttl=ttl or conf.monitoring.location_ttl)
+
+    def _get_key(self, courier_service_id: int) -> str:
+        return f'locations:{courier_service_id}'
+
+    def _get_geo_key(self, courier_service_id: int) -> str:
+        return f'locations:{courier_service_id}:geo'
+
+    def _get_updated_key(self, courier_service_id: int) -> str:
+        return f'locations:{courier_service_id}:updated'
 
-    def _get_key_pattern(self, courier_service_id: int) -> str:
-        return f'locations_{courier_service_id}_*'
+    def _get_keys_of(self, courier_service_id: int) -> typing.Tuple[str, str, str]:
+        return (
+            self._get_key(courier_service_id),
+            self._get_geo_key(courier_service_id),
+            self._get_updated_key(courier_service_id),
+        )
 
     async def update_courier_location(self, courier_service_id, courier_id, location):
-        await self._put_to_redis(key=self._get_key(courier_service_id, courier_id),
-                                 value=json.dumps(
-                                         jsonable_encoder({
-                                             'courier_id': courier_id,
-                                             'location': location,
-                                             'is_active': True
-                                          })
-                                     )
-                                 )
+        message = jsonable_encoder({
+            'courier_id': courier_id,
+            'location': location,
+            'is_active': True,
+        })
+        latitude = message['location'].get('latitude')
+        longitude = message['location'].get('longitude')
+
+        key, geo_key, updated_key = self._get_keys_of(courier_service_id)
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.hset(key, courier_id, json.dumps(message))
+        pipeline.zadd(updated_key, {courier_id: time.time()})
+        if latitude is not None and longitude is not None:
+            pipeline.geoadd(geo_key, longitude, latitude, courier_id)
+        else:
+            pipeline.zrem(geo_key, courier_id)
+        for name in (key, geo_key, updated_key):
+            pipeline.expire(name, self.ttl)
+        await pipeline.execute()
+
+    async def _expire_stale(self, courier_service_id: int) -> None:
+        key, geo_key, updated_key = self._get_keys_of(courier_service_id)
+        stale = await self._redis.zrangebyscore(
+            updated_key, '-inf', f'({time.time() - self.ttl}',
+        )
+        if not stale:
+            return
+
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.hdel(key, *stale)
+        pipeline.zrem(geo_key, *stale)
+        pipeline.zrem(updated_key, *stale)
+        await pipeline.execute()
+
+    async def _get_messages(
+        self, courier_service_id: int, courier_ids: typing.Sequence[str],
+    ) -> typing.List[dict]:
+        if not courier_ids:
+            return []
+        messages = await self._redis.hmget(self._get_key(courier_service_id), courier_ids)
+        return [json.loads(message) for message in messages if message]
 
     async def get_locations(self, courier_service_id):
-        pattern = self._get_key_pattern(courier_service_id)
-        result = await self._get_many_from_redis(await self._get_keys(pattern))
-        return result
+        await self._expire_stale(courier_service_id)
+        messages = await self._redis.hvals(self._get_key(courier_service_id))
+        return [json.loads(message) for message in messages]
+
+    async def get_location(self, courier_service_id, courier_id):
+        key, _, updated_key = self._get_keys_of(courier_service_id)
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.hget(key, courier_id)
+        pipeline.zscore(updated_key, courier_id)
+        message, updated_at = await pipeline.execute()
+        if updated_at is None or updated_at < time.time() - self.ttl:
+            return None
+        return message
+
+    async def get_locations_in_radius(
+        self, courier_service_id: int, latitude: float, longitude: float, radius: float,
+    ) -> typing.List[dict]:
+        """Returns locations within ``radius`` meters from the point, nearest first."""
+        await self._expire_stale(courier_service_id)
+        courier_ids = await self._redis.execute_command(
+            'GEOSEARCH', self._get_geo_key(courier_service_id),
+            'FROMLONLAT', longitude, latitude,
+            'BYRADIUS', radius, 'm', 'ASC',
+        )
+        return await self._get_messages(courier_service_id, courier_ids)
+
+    async def get_locations_in_box(
+        self, courier_service_id: int,
+        south: float, west: float, north: float, east: float,
+    ) -> typing.List[dict]:
+        """Returns locations within the box bounded by the latitudes and longitudes."""
+        await self._expire_stale(courier_service_id)
+        latitude = (south + north) / 2
+        longitude = (west + east) / 2
+        # the box is the widest at the latitude nearest to the equator
+        widest_latitude = 0 if south <= 0 <= north else min(abs(south), abs(north))
+        width = EARTH_RADIUS * math.radians(east - west) * math.cos(math.radians(widest_latitude))
+        height = EARTH_RADIUS * math.radians(north - south)
 
-    async def get_location(self, city_id, courier_id):
-        pattern = self._get_key(city_id, courier_id)
-        return await self._get_from_redis_by_key(pattern)
+        found = await self._redis.execute_command(
+            'GEOSEARCH', self._get_geo_key(courier_service_id),
+            'FROMLONLAT', longitude, latitude,
+            'BYBOX', width * 1.01, height * 1.01, 'm', 'WITHCOORD',
+        )
+        # geohash precision makes the search approximate, the bounds are checked exactly
+        courier_ids = [
+            courier_id for courier_id, (found_longitude, found_latitude) in found
+            if south <= float(found_latitude) <= north and west <= float(found_longitude) <= east
+        ]
+        return await self._get_messages(courier_service_id, courier_ids)
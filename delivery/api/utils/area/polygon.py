@@ -1,7 +1,22 @@
+import functools
+import numbers
+import typing
+import warnings
+
+from loguru import logger
+from shapely.errors import ShapelyDeprecationWarning
 from shapely.geometry import(
     Point,
     Polygon,
 )
+from shapely.prepared import PreparedGeometry
+from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+
+@functools.lru_cache(maxsize=1024)
+def _prepared_polygon(polygon: typing.Tuple[tuple, ...]) -> PreparedGeometry:
+    return prep(Polygon(polygon))
 
 
 async def contains_point(latitude: float, longitude: float, polygon: list[tuple]) -> bool:
@@ -23,5 +38,68 @@ async def contains_point(latitude: float, longitude: float, polygon: list[tuple]
     """
 
     point = Point(latitude, longitude)
-    polygon = Polygon(polygon)
-    return polygon.covers(point)
+    return _prepared_polygon(tuple(map(tuple, polygon))).covers(point)
+
+
+def scope_to_polygon(scope: list[dict]) -> list[tuple]:
+    """Точки периметра полигона из scope зоны доставки"""
+    return [tuple(map(float, point.values())) for point in scope]
+
+
+class AreaIndex:
+    """
+    Поиск зон доставки, содержащих точки
+
+    Прямоугольники зон хранятся в R-дереве (STRtree), поэтому для точки
+    проверяются только зоны, в прямоугольник которых она попала. Полигоны
+    подготовлены (prepared) один раз при построении индекса.
+    Если точка попала в несколько зон, возвращается первая из переданных.
+    """
+
+    def __init__(self, areas: typing.Iterable[typing.Tuple[int, list[tuple]]]):
+        self.area_ids: typing.List[int] = []
+        self._prepared: typing.List[PreparedGeometry] = []
+        polygons = []
+        for area_id, points in areas:
+            try:
+                polygon = Polygon(points)
+            except (ValueError, TypeError) as e:
+                logger.warning(f'Area {area_id} is skipped, its scope is not a polygon: {e}')
+                continue
+            self.area_ids.append(area_id)
+            self._prepared.append(prep(polygon))
+            polygons.append(polygon)
+
+        # polygons are kept, so their IDs are not reused while the index exists
+        self._polygons = polygons
+        self._indexes = {id(polygon): index for index, polygon in enumerate(polygons)}
+        with warnings.catch_warnings():
+            # shapely 1.8 warns about the interface changed in 2.0, the both are supported
+            warnings.simplefilter('ignore', ShapelyDeprecationWarning)
+            self._tree = STRtree(polygons) if polygons else None
+
+    def __len__(self) -> int:
+        return len(self.area_ids)
+
+    def _candidates(self, point: Point) -> typing.List[int]:
+        # shapely 2 returns indexes of geometries, 1.8 returns geometries themselves
+        return sorted(
+            found if isinstance(found, numbers.Integral) else self._indexes[id(found)]
+            for found in self._tree.query(point)
+        )
+
+    def find(self, latitude: float, longitude: float) -> typing.Optional[int]:
+        """ID зоны, внутри которой находится точка"""
+        if self._tree is None:
+            return None
+        point = Point(latitude, longitude)
+        for index in self._candidates(point):
+            if self._prepared[index].contains(point):
+                return self.area_ids[index]
+        return None
+
+    def find_many(
+        self, points: typing.Iterable[typing.Tuple[float, float]],
+    ) -> typing.List[typing.Optional[int]]:
+        """ID зон для каждой точки (широта, долгота)"""
+        return [self.find(latitude, longitude) for latitude, longitude in points]
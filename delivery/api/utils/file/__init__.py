@@ -1 +1,2 @@
-from .file import File
\ No newline at end of file
+from .file import File  # noqa: F401
+from .file import iterate_file  # noqa: F401
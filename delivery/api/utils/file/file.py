@@ -14,3 +14,12 @@ class File:
     @property
     def ext(self):
         return self._name.split('.')[-1]
+
+
+def iterate_file(file, chunk_size: int = 64 * 1024):
+    """Yields file content by chunks and closes the file afterwards."""
+    try:
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
@@ -0,0 +1,52 @@
+import json
+import typing
+
+from fastapi_pagination.api import create_page
+from tortoise import Tortoise
+from tortoise.queryset import Q
+from tortoise.queryset import QuerySet
+
+from ..schemas import CursorParams
+from ..schemas.pagination import encode_cursor
+
+
+async def estimate_count(query: QuerySet, using: str = 'default') -> int:
+    """Returns the number of rows estimated by the Postgres planner, without COUNT."""
+    connection = Tortoise.get_connection(using)
+    _, rows = await connection.execute_query(f'EXPLAIN (FORMAT JSON) {query.sql()}')
+    plan = rows[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+async def paginate_by_cursor(
+    query: QuerySet,
+    params: CursorParams,
+    count_query: typing.Optional[QuerySet] = None,
+):
+    """
+    Paginates query by (created_at, id) in descending order.
+
+    The page is fetched with one extra row to know whether the next page
+    exists, so neither COUNT nor OFFSET are used. The total is estimated
+    by the planner on ``count_query`` only when requested.
+    """
+    keyset = params.to_keyset()
+    if keyset is not None:
+        created_at, id_ = keyset
+        query = query.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=id_),
+        )
+    items = await query.order_by('-created_at', '-id').limit(params.page_limit + 1)
+
+    next_cursor = None
+    if len(items) > params.page_limit:
+        items = items[:params.page_limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+
+    total = None
+    if params.with_total:
+        total = await estimate_count(query if count_query is None else count_query)
+
+    return create_page(items, params=params, next_cursor=next_cursor, total=total)
@@ -14,6 +14,7 @@ from starlette.websockets import WebSocket
 from tortoise.timezone import now
 
 from api import exceptions, models
+from api.utils.file import iterate_file
 from api.common import schema_base
 from api.controllers.get_order_product import OrderProductNotFoundError
 from api.controllers.handle_order_status_transition.handlers import (
@@ -30,6 +31,8 @@ from ... import dependencies
 from ... import responses
 from ... import schemas
 from ...enums import ProfileType
+from ...modules.job.actions import JobActions
+from ...modules.job.schemas import JobGet
 from ...modules.order.dependecies import order_group_default_filter_args
 
 router = fastapi.APIRouter()
@@ -52,17 +55,7 @@ async def order_change_status(
     await controllers.order_change_status(default_filter_args, body)
 
 
-@router.post(
-    '/order/report',
-    summary='Get order report',
-)
-async def order_report(
-    query: schemas.ExportExcel,
-    current_user: schemas.UserCurrent = fastapi.Security(
-        auth.get_current_user,
-        scopes=['o:r'],
-    ),
-):
+def _order_report_kwargs(current_user: schemas.UserCurrent) -> dict:
     profile_type = current_user.profile['profile_type']
     profile_content = current_user.profile['profile_content']
     kwargs = {}
@@ -83,9 +76,30 @@ async def order_report(
         kwargs['partner_id__in'] = current_user.partners
         kwargs['city__country_id'] = profile_content['country_id']
     kwargs['is_superuser'] = current_user.is_superuser
+    return kwargs
+
+
+@router.post(
+    '/order/report',
+    summary='Get order report',
+)
+async def order_report(
+    query: schemas.ExportExcel,
+    streaming: bool = fastapi.Query(
+        False,
+        description='Build the report with constant memory usage',
+    ),
+    current_user: schemas.UserCurrent = fastapi.Security(
+        auth.get_current_user,
+        scopes=['o:r'],
+    ),
+):
+    profile_type = current_user.profile['profile_type']
+    kwargs = _order_report_kwargs(current_user)
     report = await controllers.order_report(
         query=query,
         profile_type=profile_type,
+        streaming=streaming,
         **kwargs,
     )
     current = now()
@@ -94,12 +108,37 @@ async def order_report(
         'Content-Disposition': f'attachment; filename="{filename} {current.date()}.xlsx"'
     }
     return fastapi.responses.StreamingResponse(
-        content=report,
+        content=iterate_file(report),
         media_type='application/ms-excel',
         headers=headers,
     )
 
 
+@router.post(
+    '/order/report/job',
+    summary='Enqueue order report building',
+    response_description='Background job of the report',
+    response_model=JobGet,
+    status_code=202,
+)
+async def order_report_job(
+    query: schemas.ExportExcel,
+    current_user: schemas.UserCurrent = fastapi.Security(
+        auth.get_current_user,
+        scopes=['o:r'],
+    ),
+):
+    """Build order report in background.
+
+    Progress and the report file are available by `/job/{job_id}`.
+    """
+    return await JobActions(current_user).enqueue_order_report(
+        query=query,
+        profile_type=current_user.profile['profile_type'],
+        filters=_order_report_kwargs(current_user),
+    )
+
+
 @router.get(
     '/order/list',
     summary='Get list of orders',
@@ -133,6 +172,36 @@ async def order_get_list(
     return JSONResponse(jsonable_encoder(result))
 
 
+@router.get(
+    '/order/list/cursor',
+    summary='Get list of orders by cursor',
+    response_model=schemas.CursorPage[schemas.OrderList],
+    response_description='List of orders',
+)
+async def order_get_list_by_cursor(
+    filter_args: list = fastapi.Depends(dependencies.order_get_filter_args),
+    pagination_params: schemas.CursorParams = fastapi.Depends(schemas.CursorParams),
+    _: schemas.UserCurrent = fastapi.Security(
+        auth.get_current_user,
+        scopes=['o:l'],
+    ),
+    default_filter_args: list = fastapi.Security(dependencies.OrderDefaultFilter()),
+):
+    """
+    Get a list of orders from the newest to the oldest.
+
+    Pass `next_cursor` of the response as `cursor` to get the next page,
+    `next_cursor` is null on the last page. `with_total` adds an estimated
+    total of orders.
+    """
+    result = await controllers.order_get_list(
+        pagination_params,
+        default_filter_args=default_filter_args,
+        filter_params=filter_args,
+    )
+    return JSONResponse(jsonable_encoder(result))
+
+
 @router.get(
     '/order/count',
     summary='Check orders count',
@@ -636,6 +705,29 @@ async def order_get_list_my_mobile(
     return JSONResponse(jsonable_encoder(result))
 
 
+@router.get(
+    '/order/list/my/mobile/cursor',
+    summary='Get list of orders for mobile app by cursor',
+    response_model=schemas.CursorPage[schemas.OrderListMobile],
+    response_description='List of orders',
+)
+async def order_get_list_my_mobile_by_cursor(
+    pagination_params: schemas.CursorParams = fastapi.Depends(schemas.CursorParams),
+    filter_args: list = fastapi.Depends(dependencies.order_get_filter_args),
+    _: schemas.UserCurrent = fastapi.Security(
+        auth.get_current_user,
+        scopes=['o:l'],
+    ),
+    default_filter_args: list = fastapi.Security(dependencies.OrderDefaultFilter()),
+):
+    result = await controllers.order_get_list_mobile(
+        pagination_params=pagination_params,
+        default_filter_args=default_filter_args,
+        filter_args=filter_args,
+    )
+    return JSONResponse(jsonable_encoder(result))
+
+
 @router.options(
     '/order/import/sample',
     summary='Get sample excel for import',
@@ -682,6 +774,28 @@ async def order_import_from_excel(
     return response
 
 
+@router.post(
+    '/order/import/job',
+    summary='Enqueue orders import from excel',
+    response_description='Background job of the import',
+    response_model=JobGet,
+    status_code=202,
+)
+async def order_import_from_excel_job(
+    excel: fastapi.UploadFile = fastapi.File(...),
+    current_user: schemas.UserCurrent = fastapi.Security(
+        auth.get_current_user,
+        scopes=['o:c']
+    )
+):
+    """Import orders from excel in background.
+
+    Progress, the result and the file with rejected rows are available
+    by `/job/{job_id}`.
+    """
+    return await JobActions(current_user).enqueue_order_import(excel)
+
+
 @router.post(
     '/order/{order_id}/sms-postcontrol',
     summary='Send sms to receiver',
@@ -40,6 +40,7 @@ from ..modules.monitoring import routes as monitoring_module
 from ..modules.order import routes as order_module
 from ..modules.partner_settings import routes as partner_setting
 from ..modules.order_chain import v1 as order_chain
+from ..modules.job import routes as job
 
 
 api_router = fastapi.APIRouter(prefix='/v1')
@@ -84,3 +85,4 @@ api_router.include_router(order_module.router, tags=['order_group'])
 api_router.include_router(partner_setting.router, tags=['partner_settings'])
 api_router.include_router(statistics.router, tags=['statistics'])
 api_router.include_router(order_chain.router, tags=['order_chain'])
+api_router.include_router(job.router, tags=['job'])
@@ -80,6 +80,30 @@ async def order_get_list_v2(
     return JSONResponse(jsonable_encoder(result))
 
 
+@router.get(
+    '/order/list/cursor',
+    summary='Get list of orders by cursor',
+    response_model=schemas.CursorPage[schemas.OrderListV2],
+    response_description='List of orders',
+)
+async def order_get_list_v2_by_cursor(
+    filter_args: list = fastapi.Depends(dependencies.order_get_filter_args_v2),
+    pagination_params: schemas.CursorParams = fastapi.Depends(schemas.CursorParams),
+    user: schemas.UserCurrent = fastapi.Security(
+        auth.get_current_user,
+        scopes=['o:l'],
+    ),
+    default_filter_args: list = fastapi.Security(dependencies.OrderDefaultFilterV2()),
+):
+    result = await controllers.order_get_list_v2(
+        pagination_params,
+        default_filter_args=default_filter_args,
+        filter_params=filter_args,
+        profile_type=user.profile['profile_type'],
+    )
+    return JSONResponse(jsonable_encoder(result))
+
+
 @router.get(
     '/order/{order_id}',
     summary='Get Order',
@@ -9,39 +9,6 @@ from api.schemas import pagination
 from api.schemas.mobile.get_history import GetHistoryResponse, HistoryImage
 
 
-# TODO: нужен рефакторинг, тут N+1 проблема
-async def __serialize_initiator_info(queryset):
-    for history in queryset:
-        if history.initiator_type in [
-            enums.InitiatorType.USER.value, enums.InitiatorType.IMPORT.value
-        ]:
-            try:
-                initiator = await models.user_get(with_history=False,
-                                                  id=history.initiator_id)
-                profiles = await models.get_all_user_profiles(initiator['id'])
-                profile_types = ([history.initiator_role, ] if history.initiator_role
-                                 else [value['type'] for value in profiles])
-                history.initiator = {
-                    'id': initiator['id'],
-                    'profile_types': profile_types,
-                    'first_name': initiator['first_name'],
-                    'last_name': initiator['last_name'],
-                    'middle_name': initiator['middle_name'],
-                }
-            except models.UserNotFound:
-                history.initiator = {}
-        else:
-            initiator = await models.partner_get(
-                partner_id=history.initiator_id, with_info=False
-            )
-            history.initiator = {
-                'id': initiator.get('id', None),
-                'name_en': initiator.get('name_en', None),
-                'name_kk': initiator.get('name_kk', None),
-                'name_ru': initiator.get('name_ru', None),
-                'name_zh': initiator.get('name_zh', None),
-            }
-
 async def __add_images_to_comments(history_records: typing.List[GetHistoryResponse]) -> None:
     """
         Добавление значения в поле images к записям истории связанными с созданием комментария.
@@ -110,7 +77,7 @@ async def get_history_list(
     ).order_by('-created_at')
 
     result = await paginate(qs, params=pagination_params)
-    await __serialize_initiator_info(result.items)
+    await models.serialize_initiator_info(result.items)
     await __add_images_to_comments(result.items)
 
     return result
@@ -4,6 +4,10 @@ from . import fixtures
 from . import otp
 from . import user
 from . import area
+from . import job
+from . import statistics
+from . import geolocation
+from . import outbox
 
 
 commands = click.Group()
@@ -11,3 +15,7 @@ commands.add_command(fixtures.commands)
 commands.add_command(otp.commands)
 commands.add_command(user.commands)
 commands.add_command(area.commands)
+commands.add_command(job.commands)
+commands.add_command(statistics.commands)
+commands.add_command(geolocation.commands)
+commands.add_command(outbox.commands)
@@ -4,11 +4,13 @@ import asyncio
 import api
 import cli
 from api.conf import conf
+from api.modules.city.infrastructure.db_table import city_zone_infos_load
 
 
 def main() -> None:
     loop = asyncio.get_event_loop()
     loop.run_until_complete(api.database.initialize())
+    loop.run_until_complete(city_zone_infos_load())
     loop.run_until_complete(api.redis_module.connect(conf.redis.uri))
 
     cli.commands()
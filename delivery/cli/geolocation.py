@@ -0,0 +1,44 @@
+import asyncio
+
+import click
+from tortoise.timezone import now
+
+from api.conf import conf
+from api.modules.monitoring.infrastructure.repository import GeolocationRepository
+from api.modules.monitoring.infrastructure.repository import add_months
+from api.modules.monitoring.infrastructure.repository import month_start
+
+
+@click.command(
+    name='partitions',
+    help='Create upcoming and drop expired courier geolocation partitions',
+)
+@click.option(
+    '--retention-months',
+    type=int,
+    default=conf.geolocation.retention_months,
+    show_default=True,
+    help='Number of months to keep, including the current one',
+)
+@click.option(
+    '--ahead-months',
+    type=int,
+    default=2,
+    show_default=True,
+    help='Number of upcoming months to create partitions for',
+)
+def geolocation_partitions(retention_months, ahead_months) -> None:
+    repository = GeolocationRepository()
+    current_month = month_start(now())
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(repository.partitions_ensure(
+        add_months(current_month, months) for months in range(ahead_months + 1)
+    ))
+    dropped = loop.run_until_complete(
+        repository.partitions_drop(add_months(current_month, 1 - retention_months)),
+    )
+    click.secho(f'Geolocation partitions dropped: {", ".join(dropped) or "none"}', fg='green')
+
+
+commands = click.Group('geolocation')
+commands.add_command(geolocation_partitions)
@@ -0,0 +1,42 @@
+import asyncio
+
+import click
+
+from api.conf import conf
+from api.modules.job import JobWorker
+from api.modules.job.infrastructure.repository import delete_expired_artifacts
+
+
+@click.command(
+    name='worker',
+    help='Run background jobs worker',
+)
+@click.option(
+    '--concurrency',
+    type=int,
+    default=None,
+    help='Amount of jobs processed at the same time',
+)
+def job_worker(concurrency: int) -> None:
+    worker = JobWorker(concurrency=concurrency)
+    click.secho(f'Worker started with concurrency {worker.concurrency}', fg='green')
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(worker.run())
+    except KeyboardInterrupt:
+        click.secho('Worker stopped', fg='yellow')
+
+
+@click.command(
+    name='cleanup',
+    help='Delete files of expired background jobs',
+)
+def job_cleanup() -> None:
+    deleted = delete_expired_artifacts(conf.jobs.ttl)
+    click.secho(f'Deleted files of {deleted} jobs', fg='green')
+
+
+commands = click.Group('job')
+commands.add_command(job_worker)
+commands.add_command(job_cleanup)
@@ -0,0 +1,31 @@
+import asyncio
+
+import click
+
+from api import models
+
+
+@click.command(
+    name='run',
+    help='Relay outbox messages to the stream and publish them to their channels',
+)
+@click.option(
+    '--batch-size',
+    type=int,
+    default=None,
+    help='Amount of messages relayed and published at once',
+)
+def outbox_run(batch_size: int) -> None:
+    relay = models.OutboxRelay(batch_size=batch_size)
+    dispatcher = models.OutboxDispatcher(batch_size=batch_size)
+    click.secho(f'Outbox started with batch size {relay.batch_size}', fg='green')
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(asyncio.gather(relay.run(), dispatcher.run()))
+    except KeyboardInterrupt:
+        click.secho('Outbox stopped', fg='yellow')
+
+
+commands = click.Group('outbox')
+commands.add_command(outbox_run)
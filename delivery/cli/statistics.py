@@ -0,0 +1,48 @@
+import asyncio
+
+import click
+
+from api.models import OrderStatisticsCompactor
+from api.models import order_statistics_backfill
+
+
+@click.command(
+    name='backfill',
+    help='Recalculate order statistics rollups',
+)
+@click.option(
+    '--from-date',
+    type=click.DateTime(),
+    default=None,
+    help='Recalculate rollups since the date, all of them by default',
+)
+def statistics_backfill(from_date) -> None:
+    loop = asyncio.get_event_loop()
+    count = loop.run_until_complete(order_statistics_backfill(from_date))
+    click.secho(f'Order statistics recalculated, {count} rollups', fg='green')
+
+
+@click.command(
+    name='compact',
+    help='Merge changes of order statistics into the rollups periodically',
+)
+@click.option(
+    '--interval',
+    type=float,
+    default=None,
+    help='Seconds between compactions',
+)
+def statistics_compact(interval: float) -> None:
+    compactor = OrderStatisticsCompactor(interval=interval)
+    click.secho(f'Compactor started with interval {compactor.interval}s', fg='green')
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(compactor.run())
+    except KeyboardInterrupt:
+        click.secho('Compactor stopped', fg='yellow')
+
+
+commands = click.Group('statistics')
+commands.add_command(statistics_backfill)
+commands.add_command(statistics_compact)
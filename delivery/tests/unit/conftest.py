@@ -0,0 +1,370 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakePipeline:
+    """Records commands and runs them on the fake Redis on execute."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        def command(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return command
+
+    async def execute(self):
+        # lets concurrent callers add their commands to the next batch
+        await asyncio.sleep(0)
+        if self.redis.error is not None:
+            raise self.redis.error
+        self.redis.pipelines.append(self.commands)
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+class FakePubSub:
+    """Yields ``records`` and waits for more like a real subscription."""
+
+    def __init__(self, records=()):
+        self.records = list(records)
+        self.channels = []
+        self.patterns = []
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        self.channels.extend(channels)
+
+    async def psubscribe(self, *patterns):
+        self.patterns.extend(patterns)
+
+    async def listen(self):
+        for record in self.records:
+            yield record
+        await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeRedis:
+    """
+    In-memory Redis of the commands used by the code under test.
+
+    Streams have a single consumer group named by the first read, its
+    pending entries are kept in ``pending`` by entry ID. ``subscribers`` is
+    the number of receivers of published messages by channel. Commands of
+    ``execute_command`` are recorded, the ones other than XTRIM are answered
+    by ``command_handlers``. Pipelines fail with ``error`` when it is set.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+        self.sets = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.streams = {}
+        self.group = None
+        self.pending = {}
+        self.delivered = set()
+        self.acked = set()
+        self.subscribers = {}
+        self.published = []
+        self.subscription = FakePubSub()
+        self.commands = []
+        self.command_handlers = {}
+        self.pipelines = []
+        self.error = None
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self):
+        return self.subscription
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return self.subscribers.get(channel, 0)
+
+    async def execute_command(self, *args):
+        self.commands.append(args)
+        if args[0] == 'XTRIM':
+            assert args[2:4] == ('MINID', '~')
+            name, min_id = args[1], args[4]
+            self.streams[name] = [entry for entry in self.streams[name] if entry[0] >= min_id]
+            return
+        return self.command_handlers[args[0]](*args)
+
+    # keys and strings
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = str(value)
+        self.ttls[key] = ex
+
+    async def exists(self, key):
+        return int(key in self.values or key in self.sets)
+
+    async def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+    async def keys(self, pattern):
+        raise AssertionError('KEYS must not be used')
+
+    # sets
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    # hashes
+
+    async def hset(self, name, key=None, value=None, mapping=None):
+        fields = self.hashes.setdefault(name, {})
+        if key is not None:
+            fields[str(key)] = value
+        fields.update({str(key): str(value) for key, value in (mapping or {}).items()})
+
+    async def hget(self, name, key):
+        return self.hashes.get(name, {}).get(str(key))
+
+    async def hmget(self, name, keys):
+        return [self.hashes.get(name, {}).get(str(key)) for key in keys]
+
+    async def hvals(self, name):
+        return list(self.hashes.get(name, {}).values())
+
+    async def hdel(self, name, *keys):
+        for key in keys:
+            self.hashes.get(name, {}).pop(str(key), None)
+
+    # sorted sets, members of geo sets are scored by (longitude, latitude)
+
+    async def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update({str(member): score for member, score in mapping.items()})
+
+    async def geoadd(self, name, longitude, latitude, member):
+        self.zsets.setdefault(name, {})[str(member)] = (longitude, latitude)
+
+    async def zrem(self, name, *members):
+        for member in members:
+            self.zsets.get(name, {}).pop(str(member), None)
+
+    async def zscore(self, name, member):
+        return self.zsets.get(name, {}).get(str(member))
+
+    async def zrangebyscore(self, name, minimum, maximum):
+        maximum = float(maximum.lstrip('('))
+        return [member for member, score in self.zsets.get(name, {}).items() if score < maximum]
+
+    # streams
+
+    async def xadd(self, name, fields, maxlen=None):
+        stream = self.streams.setdefault(name, [])
+        entry_id = f'{len(stream) + 1}-0'
+        stream.append((entry_id, {key: str(value) for key, value in fields.items()}))
+        return entry_id
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        (name, _), = streams.items()
+        self.group = self.group or group
+        entries = [
+            entry for entry in self.streams.get(name, [])
+            if entry[0] not in self.delivered
+        ][:count]
+        for entry_id, _ in entries:
+            self.delivered.add(entry_id)
+            self.pending[entry_id] = {'consumer': consumer, 'time_since_delivered': 0, 'times_delivered': 1}
+        return [[name, entries]] if entries else []
+
+    async def xpending(self, name, group):
+        return {'pending': len(self.pending), 'min': min(self.pending, default=None)}
+
+    async def xpending_range(self, name, group, min, max, count):
+        return [
+            {'message_id': entry_id, **pending}
+            for entry_id, pending in sorted(self.pending.items())
+        ][:count]
+
+    async def xclaim(self, name, group, consumer, min_idle_time, message_ids, justid=False):
+        claimed = []
+        for entry_id in message_ids:
+            pending = self.pending[entry_id]
+            if pending['time_since_delivered'] < min_idle_time:
+                continue
+            pending.update(consumer=consumer, time_since_delivered=0)
+            if not justid:
+                pending['times_delivered'] += 1
+            claimed.append(entry_id)
+        if justid:
+            return claimed
+        return [entry for entry in self.streams[name] if entry[0] in claimed]
+
+    async def xack(self, name, group, *entry_ids):
+        for entry_id in entry_ids:
+            self.pending.pop(entry_id, None)
+            self.acked.add(entry_id)
+        return len(entry_ids)
+
+    async def xdel(self, name, *entry_ids):
+        self.streams[name] = [entry for entry in self.streams[name] if entry[0] not in entry_ids]
+
+    async def xrange(self, name, min, max):
+        return list(self.streams.get(name, []))
+
+    async def xinfo_groups(self, name):
+        delivered = [entry_id for entry_id, _ in self.streams[name] if entry_id in self.delivered]
+        return [{'name': self.group, 'last-delivered-id': delivered[-1] if delivered else '0-0'}]
+
+
+@pytest.fixture
+def redis() -> FakeRedis:
+    return FakeRedis()
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetched = []
+
+    async def fetch(self, size):
+        page, self.rows = self.rows[:size], self.rows[size:]
+        self.fetched.append(size)
+        return page
+
+
+class FakeConnection:
+    """
+    Database connection, transaction or asyncpg connection of read replicas.
+
+    Queries and their values are recorded in ``queries``. A query containing
+    a key of ``results`` returns its rows, the value may be a function of the
+    query values, other queries return ``rows``.
+    """
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.results = {}
+        self.queries = []
+        self.scripts = []
+        self.transactions = []
+        self.cursor_obj = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    @property
+    def statements(self) -> list:
+        """Recorded queries with whitespace collapsed."""
+        return [(' '.join(query.split()), values) for query, values in self.queries]
+
+    def _rows(self, query, values) -> list:
+        for key, rows in self.results.items():
+            if key in query:
+                return rows(values) if callable(rows) else rows
+        return self.rows
+
+    async def execute_query(self, query, values=None):
+        self.queries.append((query, values))
+        rows = self._rows(query, values)
+        return len(rows), rows
+
+    async def execute_script(self, query):
+        self.scripts.append(query)
+
+    async def fetch(self, query, *values):
+        self.queries.append((query, list(values)))
+        return self._rows(query, list(values))
+
+    def transaction(self, **kwargs):
+        self.transactions.append(kwargs)
+        return contextlib.AsyncExitStack()
+
+    async def cursor(self, query):
+        self.queries.append((query, None))
+        self.cursor_obj = FakeCursor(self.rows)
+        return self.cursor_obj
+
+
+class FakeQuery:
+    """
+    Query set recording calls of its methods, awaiting it returns ``result``
+    or raises it. Methods named in ``returns`` return the given values.
+    """
+
+    def __init__(self, result=None, returns=None):
+        self.result = result
+        self.returns = returns or {}
+        self.calls = []
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self.returns.get(name, self)
+        return method
+
+    def __await__(self):
+        async def result():
+            if isinstance(self.result, Exception):
+                raise self.result
+            return self.result
+        return result().__await__()
+
+
+class FakeOrderStatuses:
+    """OrderStatuses model, filter returns ``query`` and created rows are kept in ``created``."""
+
+    def __init__(self, result=None):
+        self.query = FakeQuery(result)
+        self.created = []
+
+    def __call__(self, **kwargs):
+        return SimpleNamespace(**kwargs)
+
+    def filter(self, *args, **kwargs):
+        return self.query.filter(*args, **kwargs)
+
+    async def bulk_create(self, statuses, **kwargs):
+        self.created.extend(statuses)
+
+
+@pytest.fixture
+def db_connection() -> FakeConnection:
+    return FakeConnection()
+
+
+@pytest.fixture
+def fake_query():
+    """Returns the FakeQuery class, tests create as many queries as they need."""
+    return FakeQuery
+
+
+@pytest.fixture
+def order_statuses() -> FakeOrderStatuses:
+    return FakeOrderStatuses()
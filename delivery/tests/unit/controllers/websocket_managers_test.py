@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from api.controllers.websocket_managers import BroadcastHub
+from api.controllers.websocket_managers import TRY_AGAIN_LATER
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.sent = []
+        self.closed_with = None
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+@pytest.fixture
+async def hub():
+    hub = BroadcastHub(queue_size=2, send_timeout=0.05, max_dropped=2)
+    yield hub
+    await hub.shutdown()
+
+
+async def test_publish_serializes_once_and_dedupes_sockets(hub):
+    first, second = FakeWebSocket(), FakeWebSocket()
+    hub.subscribe(('monitor', 1), first)
+    hub.subscribe(('client', '10'), first)
+    hub.subscribe(('client', '10'), second)
+
+    sent_to = hub.publish([('monitor', 1), ('client', '10'), ('client', '11')], {'a': 1})
+    await asyncio.sleep(0.01)
+
+    assert sent_to == 2
+    assert first.sent == ['{"a":1}']
+    assert second.sent == ['{"a":1}']
+
+
+async def test_slow_socket_does_not_block_others(hub):
+    slow, fast = FakeWebSocket(delay=1), FakeWebSocket()
+    hub.subscribe('topic', slow)
+    hub.subscribe('topic', fast)
+
+    hub.publish(['topic'], 'first')
+    await asyncio.sleep(0.1)
+
+    assert fast.sent == ['first']
+    assert slow.sent == []
+    # timed out socket is evicted and closed
+    assert hub.subscribers('topic') == [fast]
+    assert slow.closed_with == TRY_AGAIN_LATER
+    assert hub.stats['evicted'] == 1
+
+
+async def test_full_queue_drops_oldest_then_evicts(hub):
+    hub.send_timeout = 10
+    websocket = FakeWebSocket(delay=1)
+    hub.subscribe('topic', websocket)
+
+    for i in range(5):
+        hub.publish(['topic'], str(i))
+        await asyncio.sleep(0)
+
+    assert hub.stats['dropped'] == 2
+    assert hub.subscribers('topic') == [websocket]
+
+    hub.publish(['topic'], 'last')
+    assert hub.subscribers('topic') == []
+    assert hub.stats['evicted'] == 1
+
+
+async def test_unsubscribe(hub):
+    websocket = FakeWebSocket()
+    hub.subscribe('first', websocket)
+    hub.subscribe('second', websocket)
+
+    hub.unsubscribe(websocket, 'first')
+    assert hub.subscribers('first') == []
+    assert hub.subscribers('second') == [websocket]
+
+    hub.unsubscribe(websocket)
+    assert hub.publish(['second'], 'message') == 0
+    assert hub._subscribers == {}
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from api import database
+
+
+class FakePool:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+        self.terminated = False
+
+    async def close(self):
+        self.closed = True
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    pools = []
+
+    async def create_pool(**kwargs):
+        await asyncio.sleep(0)
+        pools.append(FakePool(**kwargs))
+        return pools[-1]
+
+    monkeypatch.setattr(database.asyncpg, 'create_pool', create_pool)
+    monkeypatch.setattr(database, '_read_pool', None)
+    monkeypatch.setattr(database, '_read_pool_loop', None)
+    return pools
+
+
+async def test_read_pool_is_shared(pools, monkeypatch):
+    monkeypatch.setattr(database.conf.postgres, 'read_uri', 'postgres://replica/db')
+
+    first, second = await asyncio.gather(database.read_pool_open(), database.read_pool_open())
+
+    assert first is second
+    assert len(pools) == 1
+    assert pools[0].kwargs['dsn'] == 'postgres://replica/db'
+    assert pools[0].kwargs['max_size'] == database.conf.postgres.read_pool_max_size
+
+    await database.read_pool_close()
+    assert pools[0].closed
+    assert await database.read_pool_open() is pools[1]
+
+
+async def test_read_pool_defaults_to_primary(pools, monkeypatch):
+    monkeypatch.setattr(database.conf.postgres, 'read_uri', None)
+
+    await database.read_pool_open()
+
+    assert pools[0].kwargs['dsn'] == database.conf.postgres.uri
+
+
+async def test_read_pool_of_another_loop_is_terminated(pools, monkeypatch):
+    previous = FakePool()
+    previous_loop = asyncio.new_event_loop()
+    previous_loop.close()
+    monkeypatch.setattr(database, '_read_pool', previous)
+    monkeypatch.setattr(database, '_read_pool_loop', previous_loop)
+
+    assert await database.read_pool_open() is pools[0]
+    assert previous.terminated
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+from tortoise.exceptions import DoesNotExist
+
+from api import models
+from api.models import area
+from api.models import order
+
+
+class FakeArea:
+    def __init__(self):
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+
+async def test_area_delete_deletes_instance(monkeypatch, fake_query):
+    instance = FakeArea()
+    monkeypatch.setattr(area.Area, 'all_objects', fake_query(instance))
+
+    await area.area_delete(1)
+
+    # deleting through a queryset would not send post_delete signals
+    assert instance.deleted
+
+
+async def test_area_delete_requires_existing_area(monkeypatch, fake_query):
+    monkeypatch.setattr(area.Area, 'all_objects', fake_query(DoesNotExist()))
+
+    with pytest.raises(DoesNotExist, match='area with given ID: 1 was not found'):
+        await area.area_delete(1)
+
+
+async def test_orders_area_assign_skips_deleted_areas(monkeypatch, fake_query):
+    orders_query = fake_query()
+
+    class AreaIndex:
+        @staticmethod
+        def find_many(points):
+            return [{1.0: 10, 2.0: 20}.get(latitude) for latitude, _ in points]
+
+    async def area_index(partner_id, city_id):
+        return AreaIndex
+
+    async def in_bulk(area_ids, field_name):
+        return {10: SimpleNamespace(id=10)}
+
+    monkeypatch.setattr(order.DeliveryPoint, 'filter', lambda **kwargs: fake_query(
+        [(1, 1.0, 0.0), (2, 2.0, 0.0), (3, 3.0, 0.0)],
+    ))
+    monkeypatch.setattr(models.catalog, 'area_index', area_index)
+    monkeypatch.setattr(models.Area, 'all_objects', SimpleNamespace(in_bulk=in_bulk))
+    monkeypatch.setattr(order.Order, 'all_objects', orders_query)
+    orders = [
+        SimpleNamespace(id=order_id, delivery_point_id=point_id, city_id=1)
+        for order_id, point_id in ((100, 1), (101, 2), (102, 3), (103, None))
+    ]
+
+    assigned = await order.orders_area_assign(orders, courier_partner_id=5)
+
+    # area 20 was deleted after the catalog index was built
+    assert assigned == {100: 10}
+    assert orders[0].area.id == 10
+    assert not hasattr(orders[1], 'area')
+    assert orders_query.calls == [
+        ('filter', (), {'id__in': [100]}),
+        ('update', (), {'area_id': 10}),
+    ]
@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+
+from api import enums
+from api import schemas
+from api.models import history
+from api.modules.order_chain.infrastructure.db_table import OrderChainHistory
+
+
+def _history(model_id: int, model_type=enums.HistoryModelName.ORDER) -> schemas.HistoryCreate:
+    return schemas.HistoryCreate(
+        initiator_type=enums.InitiatorType.USER,
+        initiator_id=1,
+        request_method=enums.RequestMethods.PATCH,
+        model_type=model_type,
+        model_id=model_id,
+        action_data={'revised': False},
+    )
+
+
+@pytest.fixture
+def connection(monkeypatch, db_connection):
+    monkeypatch.setattr(history, 'in_transaction', lambda name: db_connection)
+    return db_connection
+
+
+async def test_history_bulk_create(connection, monkeypatch):
+    monkeypatch.setattr(history, 'HISTORY_INSERT_BATCH_SIZE', 2)
+
+    count = await history.history_bulk_create([_history(i) for i in range(3)])
+
+    assert count == 3
+    assert len(connection.queries) == 2
+    query, values = connection.queries[0]
+    assert query.startswith('INSERT INTO "history" ("initiator_id", ')
+    assert query.endswith('VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9), ($10, $11, $12, $13, $14, $15, $16, $17, $18)')
+    assert values[:5] == [1, 'User', 'PATCH', 'Order', 0]
+    # created_at is set as by create
+    assert values[7] is not None
+    assert len(connection.queries[1][1]) == 9
+
+
+async def test_history_bulk_create_without_entries(connection):
+    assert await history.history_bulk_create([]) == 0
+    assert connection.queries == []
+
+
+def test_history_model():
+    assert history._history_model(enums.HistoryModelName.ORDER_CHAIN.value) is OrderChainHistory
+    assert history._history_model(enums.HistoryModelName.ORDER.value) is history.History
+
+
+async def test_history_buffer_flushes_when_full(monkeypatch):
+    written = []
+
+    async def history_bulk_create(entries):
+        written.append(list(entries))
+
+    monkeypatch.setattr(history, 'history_bulk_create', history_bulk_create)
+    buffer = history.HistoryBuffer(size=2, flush_interval=60)
+    buffer.start()
+
+    await buffer.add(_history(1))
+    assert written == []
+    await buffer.add(_history(2))
+    await asyncio.sleep(0)
+    assert [entry.model_id for entry in written[0]] == [1, 2]
+
+    await buffer.add(_history(3))
+    await buffer.shutdown()
+    assert [entry.model_id for entry in written[1]] == [3]
+
+
+async def test_history_buffer_flushes_after_interval(monkeypatch):
+    written = []
+
+    async def history_bulk_create(entries):
+        written.extend(entries)
+
+    monkeypatch.setattr(history, 'history_bulk_create', history_bulk_create)
+    buffer = history.HistoryBuffer(size=10, flush_interval=0.01)
+    buffer.start()
+
+    await buffer.add(_history(1))
+    await asyncio.sleep(0.05)
+
+    assert len(written) == 1
+
+
+async def test_history_buffer_writes_immediately_until_started(monkeypatch):
+    created = []
+
+    async def history_create(schema):
+        created.append(schema)
+
+    monkeypatch.setattr(history, 'history_create', history_create)
+
+    await history.HistoryBuffer().add(_history(1))
+
+    assert len(created) == 1
+
+
+class FakeQuerySet:
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+
+    def filter(self, id__in):
+        self.calls.append(set(id__in))
+        self.ids = id__in
+        return self
+
+    async def values(self, *fields):
+        return [
+            {field: row.get(field) for field in fields}
+            for row in self.rows if row['id'] in self.ids
+        ]
+
+
+@pytest.fixture
+def initiators(monkeypatch, db_connection):
+    calls = {'users': [], 'partners': []}
+    users = FakeQuerySet([
+        {'id': 1, 'first_name': 'Ivan', 'last_name': 'Ivanov', 'middle_name': None},
+        {'id': 2, 'first_name': 'Anna', 'last_name': 'Petrova', 'middle_name': None},
+    ], calls['users'])
+    partners = FakeQuerySet([{'id': 5, 'name_en': 'Partner', 'name_ru': 'Партнер'}], calls['partners'])
+    profiles = [{'position': 1, 'user_id': 2}, {'position': 4, 'user_id': 2}]
+    db_connection.results = {
+        'AS "profiles"': lambda values: [row for row in profiles if row['user_id'] in values[0]],
+    }
+    monkeypatch.setattr(history.models, 'User', users)
+    monkeypatch.setattr(history.models, 'Partner', partners)
+    monkeypatch.setattr(history.tortoise.Tortoise, 'get_connection', lambda name: db_connection)
+    calls['profiles'] = db_connection.queries
+    return calls
+
+
+class Entry:
+    def __init__(self, initiator_type, initiator_id, initiator_role=None):
+        self.initiator_type = initiator_type
+        self.initiator_id = initiator_id
+        self.initiator_role = initiator_role
+
+
+async def test_initiator_resolver(initiators):
+    entries = [
+        Entry(enums.InitiatorType.USER.value, 1, enums.ProfileType.COURIER.value),
+        Entry(enums.InitiatorType.USER.value, 2),
+        Entry(enums.InitiatorType.IMPORT.value, 3),
+        Entry(enums.InitiatorType.EXTERNAL_SERVICE.value, 5),
+        Entry(enums.InitiatorType.USER.value, 1, enums.ProfileType.COURIER.value),
+    ]
+
+    await history.InitiatorResolver().resolve(entries)
+
+    assert initiators['users'] == [{1, 2, 3}]
+    assert initiators['partners'] == [{5}]
+    assert len(initiators['profiles']) == 1
+    assert initiators['profiles'][0][1] == [[2]]
+    assert entries[0].initiator['profile_types'] == [enums.ProfileType.COURIER.value]
+    types = list(history.models.profile_types_to_models)
+    assert entries[1].initiator == {
+        'id': 2, 'profile_types': [types[1], types[4]],
+        'first_name': 'Anna', 'last_name': 'Petrova', 'middle_name': None,
+    }
+    assert entries[2].initiator == {}
+    assert entries[3].initiator == {
+        'id': 5, 'name_en': 'Partner', 'name_kk': None, 'name_ru': 'Партнер', 'name_zh': None,
+    }
+
+
+async def test_initiator_resolver_memoizes(initiators):
+    memo = {}
+    entries = [Entry(enums.InitiatorType.USER.value, 1), Entry(enums.InitiatorType.EXTERNAL_SERVICE.value, 5)]
+
+    await history.InitiatorResolver(memo).resolve(entries)
+    await history.InitiatorResolver(memo).resolve(entries + [Entry(enums.InitiatorType.USER.value, 2)])
+
+    assert initiators['users'] == [{1}, {2}]
+    assert initiators['partners'] == [{5}]
+    assert [values for _, values in initiators['profiles']] == [[[1]], [[2]]]
@@ -0,0 +1,107 @@
+import pytest
+from tortoise import Model
+from tortoise import Tortoise
+from tortoise import fields
+
+from api.models.mixins import TrackChangesMixin
+
+
+class TrackedParent(Model):
+    id = fields.IntField(pk=True)
+
+
+class Tracked(TrackChangesMixin, Model):
+    id = fields.IntField(pk=True)
+    name = fields.CharField(max_length=32)
+    count = fields.IntField(default=0)
+    data = fields.JSONField(default={})
+    parent = fields.ForeignKeyField('models.TrackedParent', null=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+
+@pytest.fixture
+async def db():
+    await Tortoise.init(db_url='sqlite://:memory:', modules={'models': [__name__]})
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise._drop_databases()
+
+
+async def test_changed_fields(db):
+    await Tracked.create(name='first')
+    tracked = await Tracked.get(name='first')
+
+    assert tracked.is_tracked
+    assert tracked.changed_fields == []
+
+    tracked.count = 2
+    tracked.data['key'] = 'value'
+    tracked.parent = await TrackedParent.create()
+
+    assert sorted(tracked.changed_fields) == ['count', 'data', 'parent_id']
+    assert tracked.has_changed('parent_id')
+    assert tracked.initial_value('data') == {}
+
+
+async def test_save_updates_changed_fields_only(db):
+    await Tracked.create(name='first')
+    first = await Tracked.get(name='first')
+    second = await Tracked.get(name='first')
+    updated_at = first.updated_at
+
+    first.count = 2
+    await first.save()
+    second.name = 'second'
+    await second.save()
+
+    tracked = await Tracked.get(id=first.id)
+    assert (tracked.name, tracked.count) == ('second', 2)
+    assert tracked.updated_at > updated_at
+    assert first.changed_fields == [] and second.changed_fields == []
+
+
+async def test_save_without_changes_is_skipped(db, monkeypatch):
+    tracked = await Tracked.create(name='first')
+    queries = []
+    connection = Tortoise.get_connection('default')
+    execute_query = connection.execute_query
+
+    async def execute_query_logged(query, values=None):
+        queries.append(query)
+        return await execute_query(query, values)
+
+    monkeypatch.setattr(connection, 'execute_query', execute_query_logged)
+
+    await tracked.save()
+    assert queries == []
+
+    tracked.count = 3
+    await tracked.save()
+    assert len(queries) == 1
+    assert '"name"' not in queries[0]
+
+
+async def test_partial_instance(db):
+    await Tracked.create(name='first')
+    tracked = await Tracked.get(name='first').only('id', 'count')
+
+    assert tracked.changed_fields == []
+    tracked.count = 5
+    await tracked.save()
+
+    assert (await Tracked.get(name='first')).count == 5
+
+
+@pytest.mark.parametrize('refreshed_fields', [None, ['count']])
+async def test_refresh_from_db_takes_snapshot(db, refreshed_fields):
+    await Tracked.create(name='first')
+    tracked = await Tracked.get(name='first')
+    await Tracked.filter(id=tracked.id).update(count=7)
+
+    await tracked.refresh_from_db(refreshed_fields)
+
+    assert tracked.count == 7
+    assert tracked.changed_fields == []
+    tracked.name = 'second'
+    await tracked.save()
+    assert (await Tracked.get(id=tracked.id)).count == 7
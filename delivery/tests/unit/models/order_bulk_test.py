@@ -0,0 +1,97 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from tortoise.exceptions import DoesNotExist
+
+from api import enums
+from api import models
+from api.models import order
+
+
+TIME = datetime.datetime(2026, 1, 1, 10, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def connection(monkeypatch, db_connection):
+    monkeypatch.setattr(order, 'in_transaction', lambda *_: db_connection)
+    return db_connection
+
+
+@pytest.fixture
+def statuses(monkeypatch, order_statuses, fake_query):
+    """Fakes queries of order_status_bulk_update, existing status rows are set by tests."""
+    order_statuses.query.result = []
+    state = SimpleNamespace(statuses=order_statuses, orders=fake_query())
+
+    async def status_get(status_id):
+        slugs = {1: enums.StatusSlug.NEW, 2: enums.StatusSlug.DELIVERED, 3: enums.StatusSlug.ACCEPTED_BY_COURIER_SERVICE}
+        return SimpleNamespace(id=status_id, slug=slugs[status_id])
+
+    async def orders_get_local_times(order_ids):
+        return {order_id: TIME for order_id in order_ids if order_id < 100}
+
+    monkeypatch.setattr(models.catalog, 'status_get', status_get)
+    monkeypatch.setattr(order, 'orders_get_local_times', orders_get_local_times)
+    monkeypatch.setattr(order, 'OrderStatuses', state.statuses)
+    monkeypatch.setattr(order.Order, 'filter', lambda **kwargs: state.orders.filter(**kwargs))
+    return state
+
+
+async def test_orders_bulk_set_datetime(connection):
+    await order.orders_bulk_set_datetime('actual_delivery_datetime', {1: TIME, 2: TIME}, only_null=True)
+    await order.orders_bulk_set_datetime('delivery_datetime', {})
+
+    (query, values), = connection.statements
+    assert query.startswith('UPDATE "order" SET "actual_delivery_datetime" = "new_values"."value"')
+    assert query.endswith('AND "order"."actual_delivery_datetime" IS NULL')
+    assert values == [[1, 2], [TIME, TIME]]
+
+
+async def test_order_status_bulk_update_skips_existing_statuses(connection, statuses):
+    statuses.statuses.query.result = [2]
+
+    await order.order_status_bulk_update([1, 2, 3, 1], 1)
+
+    assert [(status.order_id, status.status_id) for status in statuses.statuses.created] == [(1, 1), (3, 1)]
+    assert statuses.orders.calls == [
+        ('filter', (), {'id__in': [1, 3]}),
+        ('update', (), {'current_status_id': 1}),
+    ]
+    assert connection.statements == []
+
+
+async def test_order_status_bulk_update_sets_actual_delivery_datetime(connection, statuses):
+    await order.order_status_bulk_update([1, 2], 2)
+
+    (query, values), = connection.statements
+    assert '"actual_delivery_datetime" IS NULL' in query
+    assert values == [[1, 2], [TIME, TIME]]
+
+
+async def test_order_status_bulk_update_sets_delivery_datetime(connection, statuses):
+    statuses.statuses.query.result = [1, 2]
+
+    await order.order_status_bulk_update([1, 2], 3)
+
+    assert statuses.statuses.created == []
+    (query, values), = connection.statements
+    assert 'MAKE_INTERVAL(days => COALESCE("item"."days_to_delivery", 1))' in query
+    assert values[0].hour == 23 and values[0].minute == 59
+    assert values[1] == [1, 2]
+
+
+async def test_order_status_bulk_update_requires_existing_orders(connection, statuses):
+    with pytest.raises(DoesNotExist, match=r'\{100\}'):
+        await order.order_status_bulk_update([1, 100], 1)
+
+    assert statuses.statuses.created == []
+
+
+@pytest.mark.parametrize('include', [True, False])
+async def test_order_status_bulk_rollback(connection, include):
+    await order.order_status_bulk_rollback((1, 2), enums.OrderStatus.DELIVERED, include=include)
+
+    (query, values), = connection.statements
+    assert query.startswith('DELETE FROM "order.statuses" AS "order_status"')
+    assert values == [[1, 2], 7, include]
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from api import redis_module
+from api.models import outbox
+from api.models import publisher
+from api.models.outbox import OutboxDispatcher
+from api.models.outbox import OutboxMessage
+
+
+@pytest.fixture
+async def db():
+    await Tortoise.init(db_url='sqlite://:memory:', modules={'models': ['api.models.outbox']})
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise._drop_databases()
+
+
+@pytest.fixture
+def dispatcher_with(monkeypatch, redis):
+    monkeypatch.setattr(redis_module, '_connection', redis)
+
+    def dispatcher_with(**kwargs) -> OutboxDispatcher:
+        dispatcher = OutboxDispatcher(batch_size=10, retry_interval=1, **kwargs)
+        dispatcher.__dict__['_redis'] = redis
+        return dispatcher
+    return dispatcher_with
+
+
+def _published(redis):
+    return [(channel, json.loads(message)) for channel, message in redis.published]
+
+
+async def test_messages_are_added_within_transaction(db):
+    await publisher.call_task('firebase-send', {'registration_ids': [1]})
+    with pytest.raises(RuntimeError):
+        async with in_transaction():
+            await publisher.publish_callback('send-status', 'https://partner/callback', {})
+            raise RuntimeError
+
+    messages = await OutboxMessage.all().values('channel', 'message')
+    assert messages == [{
+        'channel': 'send-to-celery',
+        'message': {'task_name': 'firebase-send', 'kwargs': {'registration_ids': [1]}},
+    }]
+
+
+async def test_messages_are_added_in_bulk(db):
+    await publisher.call_tasks('firebase-send', [{'id': 1}, {'id': 2}])
+    await publisher.call_tasks('firebase-send', [])
+
+    messages = await OutboxMessage.all().order_by('id').values_list('message', flat=True)
+    assert [message['kwargs'] for message in messages] == [{'id': 1}, {'id': 2}]
+
+
+async def test_dispatch_acknowledges_delivered_messages(dispatcher_with, redis):
+    redis.subscribers = {'send-to-celery': 1}
+    await redis.xadd(outbox.conf.outbox.stream, {'channel': 'send-to-celery', 'message': '{"id": 1}'})
+    await redis.xadd(outbox.conf.outbox.stream, {'channel': 'notifications', 'message': '{"id": 2}'})
+    dispatcher = dispatcher_with()
+
+    assert await dispatcher.dispatch() == 2
+
+    assert _published(redis) == [('send-to-celery', {'id': 1}), ('notifications', {'id': 2})]
+    assert list(redis.pending) == ['2-0']
+    assert dispatcher.dispatched == 1
+
+
+async def test_retry_publishes_again_and_buries_exhausted_messages(dispatcher_with, redis):
+    await redis.xadd(outbox.conf.outbox.stream, {'channel': 'notifications', 'message': '{"id": 1}'})
+    dispatcher = dispatcher_with(max_deliveries=2)
+    await dispatcher.dispatch()
+
+    redis.pending['1-0']['time_since_delivered'] = 1000
+    redis.subscribers['notifications'] = 1
+    assert await dispatcher.retry() == 1
+    assert _published(redis) == [('notifications', {'id': 1})] * 2
+    assert redis.pending == {}
+
+    await redis.xadd(outbox.conf.outbox.stream, {'channel': 'notifications', 'message': '{"id": 2}'})
+    redis.subscribers['notifications'] = 0
+    await dispatcher.dispatch()
+    redis.pending['2-0'].update(time_since_delivered=1000, times_delivered=2)
+    assert await dispatcher.retry() == 0
+
+    assert redis.pending == {}
+    assert [fields['message'] for _, fields in redis.streams[dispatcher.dead_stream]] == ['{"id": 2}']
+    assert dispatcher.dead == 1
+
+
+async def test_trim_keeps_unacknowledged_entries(dispatcher_with, redis):
+    redis.subscribers = {'send-to-celery': 1}
+    stream = outbox.conf.outbox.stream
+    for channel in ('send-to-celery', 'notifications', 'send-to-celery', 'send-to-celery'):
+        await redis.xadd(stream, {'channel': channel, 'message': '{}'})
+    dispatcher = dispatcher_with(max_deliveries=2)
+    dispatcher.batch_size = 3
+    await dispatcher.dispatch()
+
+    await dispatcher.trim()
+    assert [entry_id for entry_id, _ in redis.streams[stream]] == ['2-0', '3-0', '4-0']
+
+    redis.subscribers['notifications'] = 1
+    redis.pending['2-0']['time_since_delivered'] = 1000
+    await dispatcher.retry()
+    await dispatcher.trim()
+    # the last entry is not read by the group yet
+    assert [entry_id for entry_id, _ in redis.streams[stream]] == ['3-0', '4-0']
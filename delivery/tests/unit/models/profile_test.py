@@ -0,0 +1,55 @@
+import datetime
+
+import pytest
+
+from api.models import profile
+
+
+@pytest.fixture
+def connection(monkeypatch, db_connection):
+    db_connection.rows = [
+        {'courier_id': 1, 'period': None, 'rate': 90, 'negative_feedbacks': 1,
+         'positive_feedbacks': 3, 'orders': 0, 'late_delivery': 4},
+        {'courier_id': 1, 'period': '2024-05', 'rate': 95, 'negative_feedbacks': 0,
+         'positive_feedbacks': 2, 'orders': 0, 'late_delivery': 1},
+    ]
+    monkeypatch.setattr(profile.Tortoise, 'get_connection', lambda name: db_connection)
+    return db_connection
+
+
+async def test_couriers_get_stats_monthly(connection):
+    stats = await profile.couriers_get_stats([1, 2], monthly=True)
+
+    assert len(connection.queries) == 1
+    query, values = connection.queries[0]
+    assert "to_char(r.created_at, 'YYYY-MM')" in query
+    assert '$4' not in query
+    assert values[0] == [1, 2]
+    assert stats[(1, None)]['late_delivery'] == 4
+    assert stats[(1, '2024-05')] == {
+        'rate': 95, 'negative_feedbacks': 0, 'positive_feedbacks': 2,
+        'orders': 0, 'late_delivery': 1,
+    }
+    assert (2, None) not in stats
+
+
+async def test_couriers_get_stats_for_month(connection):
+    await profile.couriers_get_stats([1], date=datetime.date(2024, 5, 17))
+
+    query, values = connection.queries[0]
+    assert 'to_char' not in query
+    assert values[-1] == datetime.date(2024, 5, 1)
+
+
+async def test_couriers_get_stats_without_couriers(connection):
+    assert await profile.couriers_get_stats([]) == {}
+    assert connection.queries == []
+
+
+async def test_get_stats_defaults_to_zeros(connection):
+    connection.rows = []
+
+    assert await profile.get_stats(courier_id=3) == {
+        'rate': 0, 'negative_feedbacks': 0, 'positive_feedbacks': 0,
+        'orders': 0, 'late_delivery': 0,
+    }
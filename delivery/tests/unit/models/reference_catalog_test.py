@@ -0,0 +1,187 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from tortoise.exceptions import DoesNotExist
+
+from api.models import reference_catalog as catalog_module
+
+
+GRAPH = [
+    {
+        'id': 1, 'status': 'new', 'icon': 'new', 'slug': 'novaia', 'name_en': 'New', 'name_ru': 'Новая',
+        'transitions': [{'source': 'new', 'dest': 'courier_assigned', 'trigger': 'assign'}],
+    },
+    {
+        'id': 2, 'status': 'courier_assigned', 'icon': 'courier', 'slug': 'kurer-naznachen',
+        'name_en': 'Courier assigned', 'name_ru': 'Курьер назначен',
+    },
+]
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = 0
+
+    async def all(self):
+        self.loads += 1
+        return list(self.rows)
+
+    async def get_or_none(self, id):
+        return next((row for row in self.rows if row.id == id), None)
+
+
+class FakeAreas:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def filter(self, **kwargs):
+        self.queries.append(kwargs)
+        return self
+
+    def order_by(self, *fields):
+        return self
+
+    async def values_list(self, *fields):
+        return [(row['id'], row['scope']) for row in self.rows]
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    statuses = FakeTable([
+        SimpleNamespace(id=1, code='new', slug='novaia', partner_id=None),
+        SimpleNamespace(id=2, code=None, slug='kurer-naznachen', partner_id=None),
+        SimpleNamespace(id=3, code=None, slug='kurer-naznachen', partner_id=5),
+    ])
+    graphs = FakeTable([SimpleNamespace(id=1, graph=GRAPH)])
+    monkeypatch.setattr(catalog_module, 'Status', statuses)
+    monkeypatch.setattr(catalog_module, 'DeliveryGraph', graphs)
+    return statuses, graphs
+
+
+@pytest.fixture
+def catalog(redis):
+    catalog = catalog_module.ReferenceCatalog(ttl=60)
+    catalog.__dict__['_redis'] = redis
+    return catalog
+
+
+async def test_status_lookups(tables, catalog):
+    statuses, _ = tables
+
+    assert (await catalog.status_get(1)).code == 'new'
+    assert (await catalog.status('2')).slug == 'kurer-naznachen'
+    assert (await catalog.status_by_code('new')).id == 1
+    assert (await catalog.status_by_slug('kurer-naznachen')).id == 2
+    assert (await catalog.status_by_slug('kurer-naznachen', partner_id=5)).id == 3
+    assert await catalog.status_by_code('unknown') is None
+    assert await catalog.status(None) is None
+    with pytest.raises(DoesNotExist):
+        await catalog.status_get(10)
+    with pytest.raises(DoesNotExist):
+        await catalog.status_get(None)
+    assert statuses.loads == 1
+
+
+async def test_deliverygraph_steps_are_parsed_once(tables, catalog):
+    steps = await catalog.deliverygraph_steps(1)
+
+    assert steps.get_statuses() == ['new', 'courier_assigned']
+    assert await catalog.deliverygraph_steps(1) is steps
+    with pytest.raises(DoesNotExist):
+        await catalog.deliverygraph_steps(2)
+
+
+async def test_catalog_expires_without_listener(tables, catalog, monkeypatch):
+    statuses, _ = tables
+    clock = [1000.0]
+    monkeypatch.setattr(catalog_module.time, 'monotonic', lambda: clock[0])
+
+    await catalog.status(1)
+    clock[0] += 59
+    await catalog.status(1)
+    assert statuses.loads == 1
+
+    clock[0] += 2
+    await catalog.status(1)
+    assert statuses.loads == 2
+
+
+@pytest.fixture
+def zones_reloaded(monkeypatch):
+    zones_reloaded = []
+
+    async def city_zone_infos_load():
+        zones_reloaded.append(True)
+
+    monkeypatch.setattr(catalog_module, 'city_zone_infos_load', city_zone_infos_load)
+    return zones_reloaded
+
+
+async def test_invalidate_publishes_through_outbox(tables, catalog, monkeypatch, zones_reloaded):
+    statuses, _ = tables
+    messages = []
+
+    async def outbox_add(channel, message, using_db=None):
+        messages.append((channel, message, using_db))
+
+    monkeypatch.setattr(catalog_module, 'outbox_add', outbox_add)
+    await catalog.status(1)
+    assert catalog.version == ''
+
+    await catalog.invalidate('connection')
+    (channel, message, using_db), = messages
+    assert (channel, using_db) == (catalog.CHANNEL, 'connection')
+    # nothing is published to Redis before the transaction is committed
+    assert catalog._redis.published == [] and catalog._redis.values == {}
+    await catalog.status(1)
+    assert (statuses.loads, catalog.version) == (2, '')
+
+    # the notification delivered after the commit stores the version and expires the catalog
+    await catalog._notified(message['version'])
+    assert catalog._redis.values[catalog.VERSION_KEY] == message['version']
+    assert not catalog._is_fresh() and zones_reloaded
+    await catalog.status(1)
+    assert (statuses.loads, catalog.version) == (3, message['version'])
+
+    # notifications of the loaded version are ignored
+    await catalog._receive(message['version'])
+    assert catalog._is_fresh() and len(zones_reloaded) == 1
+
+
+async def test_listening_catalog_checks_version_after_ttl(tables, catalog, monkeypatch):
+    statuses, _ = tables
+    clock = [1000.0]
+    monkeypatch.setattr(catalog_module.time, 'monotonic', lambda: clock[0])
+    catalog._task = asyncio.get_running_loop().create_future()
+
+    await catalog.status(1)
+    clock[0] += 61
+    await catalog.status(1)
+    assert statuses.loads == 1
+
+    # the notification of the change was missed
+    catalog._redis.values[catalog.VERSION_KEY] = 'changed'
+    clock[0] += 61
+    await catalog.status(1)
+    assert (statuses.loads, catalog.version) == (2, 'changed')
+    catalog._task.cancel()
+
+
+async def test_area_index_is_built_once_per_load(tables, catalog, monkeypatch):
+    scope = [
+        {'lat': 0, 'lon': 0}, {'lat': 0, 'lon': 10}, {'lat': 10, 'lon': 10}, {'lat': 10, 'lon': 0},
+    ]
+    areas = FakeAreas([{'id': 7, 'scope': scope}])
+    monkeypatch.setattr(catalog_module, 'Area', areas)
+
+    index = await catalog.area_index(5, 1)
+    assert index.find(5, 5) == 7
+    assert await catalog.area_index(5, 1) is index
+    assert areas.queries == [{'partner_id': 5, 'city_id': 1, 'archived': False}]
+
+    catalog.expire()
+    assert await catalog.area_index(5, 1) is not index
+    assert len(areas.queries) == 2
@@ -0,0 +1,148 @@
+import datetime
+
+import pytest
+from tortoise.expressions import Q
+
+from api.context_vars import locale_context
+from api.models import statistics
+
+
+@pytest.fixture
+def connection(monkeypatch, db_connection):
+    async def city_time_zones():
+        return [1], ['Asia/Almaty']
+
+    monkeypatch.setattr(statistics, 'read_fetch', db_connection.fetch)
+    monkeypatch.setattr(statistics, '_city_time_zones', city_time_zones)
+    return db_connection
+
+
+@pytest.fixture
+def transaction(monkeypatch, db_connection):
+    monkeypatch.setattr(statistics, 'in_transaction', lambda *_: db_connection)
+    return db_connection
+
+
+def test_rollup_filters():
+    filters = statistics._rollup_filters(
+        {'city_id': 1, 'created_at__range': []},
+        [Q(partner_id__in=[2, 3], city__country_id=4)],
+    )
+
+    assert sorted(filters) == [('city_id', [1]), ('country_id', [4]), ('partner_id', [2, 3])]
+
+
+@pytest.mark.parametrize('filter_params, default_filter_args', [
+    ({'courier_id': 1}, []),
+    ({}, [Q(partner_id__in=[1], idn__isnull=False)]),
+    ({}, [~Q(partner_id=1)]),
+    ({}, [Q(partner_id=1) | Q(city_id=2)]),
+])
+def test_rollup_filters_not_supported(filter_params, default_filter_args):
+    assert statistics._rollup_filters(filter_params, default_filter_args) is None
+
+
+async def test_statistics_get(connection):
+    locale_context.set('ru')
+    connection.rows = [
+        {'city_name': 'Almaty', 'status': 'new', 'count': 2},
+        {'city_name': 'Almaty', 'status': 'is_delivered', 'count': 3},
+        {'city_name': 'Astana', 'status': 'cancelled', 'count': 1},
+    ]
+
+    result = await statistics.statistics_get(
+        {'created_at__range': [datetime.datetime(2024, 5, 1), datetime.datetime(2024, 5, 2, 23, 59)]},
+        [Q(partner_id__in=[7])],
+    )
+
+    query, values = connection.queries[0]
+    assert 'order_statistics.partner_id = ANY($4)' in query
+    assert values[:4] == [[1], ['Asia/Almaty'], ['state'], [7]]
+    # naive bounds are compared with local time
+    assert 'stats.local_hour >=' in query
+    assert values[-1] == datetime.datetime(2024, 5, 3, 13, 59)
+    statuses = {status.name: status.count for status in result.statuses}
+    assert statuses['all'] == 6
+    assert statuses['is_delivered'] == 3
+    assert [city.name for city in result.cities] == ['Almaty', 'Astana']
+    assert result.cities[0].statuses[0].count == 5
+
+
+async def test_statistics_get_by_date(connection):
+    connection.rows = [
+        {'status_date': datetime.date(2024, 5, 2), 'new': 4, 'is_delivered': 1, 'cancelled': 2},
+        {'status_date': datetime.date(2024, 4, 30), 'new': 1, 'is_delivered': 0, 'cancelled': 0},
+    ]
+    created_at_range = [
+        datetime.datetime(2024, 5, 1, tzinfo=datetime.timezone.utc),
+        datetime.datetime(2024, 5, 2, 12, tzinfo=datetime.timezone.utc),
+    ]
+
+    result = await statistics.statistics_get_by_date({'created_at__range': created_at_range}, [])
+
+    query, values = connection.queries[0]
+    assert 'stats.hour >= $4' in query
+    assert 'local_hour >=' not in query
+    assert values[2] == ['status', 'delivery_status']
+    dates = {date['date']: date for date in result}
+    assert dates['2024-05-01'] == {'date': '2024-05-01', 'new': 0, 'is_delivered': 0, 'cancelled': 0}
+    assert dates['2024-05-02'] == {'date': '2024-05-02', 'new': 4, 'is_delivered': 1, 'cancelled': 2}
+    # dates out of the range are skipped
+    assert '2024-04-30' not in dates
+
+
+async def test_statistics_get_by_hour(connection):
+    connection.rows = [{'hour': 9, 'new': 3, 'is_delivered': 2}]
+
+    result = await statistics.statistics_get_by_hour({'partner_id': 1}, [])
+
+    assert len(result) == 24
+    assert result[9] == {'hour': '09:00', 'new': 3, 'is_delivered': 2}
+    assert result[10] == {'hour': '10:00', 'new': 0, 'is_delivered': 0}
+
+
+async def test_rollups_include_changes_not_compacted(connection):
+    await statistics.statistics_get_by_hour({'partner_id': 1}, [])
+
+    query, _ = connection.queries[0]
+    assert 'FROM order_statistics UNION ALL' in ' '.join(query.split())
+    assert 'FROM order_statistics_delta' in query
+
+
+async def test_statistics_get_by_hour_from_orders_filters_statuses_by_range(connection, monkeypatch, fake_query):
+    orders = fake_query(returns={'as_query': 'SELECT * FROM "order"'})
+    monkeypatch.setattr(statistics.models.Order, 'all_objects', orders)
+    created_at_range = [datetime.datetime(2024, 5, 1), datetime.datetime(2024, 5, 2)]
+
+    await statistics.statistics_get_by_hour({'courier_id': 1, 'created_at__range': created_at_range}, [])
+
+    # orders created before the range are counted by their statuses changed within it
+    assert orders.calls == [('filter', (), {'courier_id': 1}), ('as_query', (), {})]
+    query, values = connection.queries[0]
+    assert 'os.created_at >= $3 AND os.created_at <= $4' in query
+    assert values[2:] == created_at_range
+
+
+@pytest.mark.parametrize('locked, compacted', [(True, 5), (False, 0)])
+async def test_order_statistics_compact(transaction, locked, compacted):
+    transaction.results = {
+        'pg_try_advisory_xact_lock': [{'locked': locked}],
+        'RETURNING': [{'count': 5}],
+    }
+
+    assert await statistics.order_statistics_compact() == compacted
+
+    assert transaction.statements[0] == (
+        'SELECT pg_try_advisory_xact_lock($1) AS locked', [statistics.ORDER_STATISTICS_COMPACT_LOCK],
+    )
+    assert len(transaction.statements) == (2 if locked else 1)
+
+
+async def test_order_statistics_backfill_clears_changes(transaction):
+    from_date = datetime.datetime(2024, 5, 1)
+
+    await statistics.order_statistics_backfill(from_date)
+
+    queries = [query for query, _ in transaction.statements]
+    assert queries[0] == 'LOCK TABLE order_statistics, order_statistics_delta IN EXCLUSIVE MODE'
+    assert 'DELETE FROM order_statistics_delta WHERE hour >= $1' in queries
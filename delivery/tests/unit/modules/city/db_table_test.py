@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from api.models import orders_local_times
+from api.modules.city.infrastructure import db_table
+
+
+@pytest.fixture
+def zone_infos(monkeypatch):
+    zone_infos = {1: ZoneInfo('Asia/Almaty'), 2: ZoneInfo('Europe/Moscow')}
+    monkeypatch.setattr(db_table, '_city_zone_infos', zone_infos)
+    monkeypatch.setattr(db_table, '_city_zone_infos_reload', lambda: None)
+    return zone_infos
+
+
+def test_city_zone_info(zone_infos):
+    assert db_table.city_zone_info(1) == ZoneInfo('Asia/Almaty')
+    assert db_table.city_zone_info(None) == ZoneInfo('UTC')
+    assert db_table.city_zone_info(3) == ZoneInfo('UTC')
+
+
+def test_city_zone_info_set(zone_infos):
+    db_table.city_zone_info_set(SimpleNamespace(id=3, tz=ZoneInfo('Asia/Tokyo')))
+
+    assert db_table.city_zone_info(3) == ZoneInfo('Asia/Tokyo')
+
+
+class FakeCities:
+    def __init__(self, cities):
+        self.cities = cities
+        self.queried = []
+
+    def filter(self, id__in):
+        self.queried.append(set(id__in))
+        return self
+
+    async def values_list(self, *fields):
+        return [(city_id, self.cities[city_id]) for city_id in self.queried[-1] if city_id in self.cities]
+
+
+@pytest.fixture
+def cities(monkeypatch):
+    cities = FakeCities({3: 'Asia/Tokyo'})
+    monkeypatch.setattr(db_table, 'City', cities)
+    return cities
+
+
+async def test_orders_local_times(zone_infos, cities):
+    orders = [
+        SimpleNamespace(id=10, city_id=1),
+        SimpleNamespace(id=11, city_id=2),
+        SimpleNamespace(id=12, city_id=None),
+    ]
+
+    local_times = await orders_local_times(orders)
+
+    assert local_times[10] - local_times[12] == ZoneInfo('Asia/Almaty').utcoffset(local_times[12])
+    assert local_times[11] - local_times[12] == ZoneInfo('Europe/Moscow').utcoffset(local_times[12])
+    assert cities.queried == []
+
+
+async def test_cities_localtime_get_loads_missing_cities(zone_infos, cities):
+    local_times = await db_table.cities_localtime_get([1, 3, 4, None])
+
+    assert cities.queried == [{3, 4}]
+    assert zone_infos[3] == ZoneInfo('Asia/Tokyo')
+    assert local_times[3] - local_times[None] == ZoneInfo('Asia/Tokyo').utcoffset(local_times[None])
+    # cities which don't exist are not cached
+    assert 4 not in zone_infos
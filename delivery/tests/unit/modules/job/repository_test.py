@@ -0,0 +1,38 @@
+import pytest
+
+from api.modules.job.enums import JobType
+from api.modules.job.infrastructure import repository
+from api.modules.job.infrastructure.repository import JobEntry
+from api.modules.job.infrastructure.repository import JobRepository
+
+
+@pytest.fixture
+def repo(redis) -> JobRepository:
+    repo = JobRepository(ttl=60)
+    repo.__dict__['_redis'] = redis
+    return repo
+
+
+async def test_dequeue_and_ack(repo, redis):
+    job = await repo.create(JobType.ORDER_REPORT, user_id=1, payload={})
+
+    entry = await repo.dequeue('worker-1')
+
+    assert entry == JobEntry(entry_id='1-0', job_id=job.id, deliveries=1)
+    assert await repo.dequeue('worker-1') is None
+    await repo.ack(entry.entry_id)
+    assert redis.pending == {} and redis.streams[repository.QUEUE_STREAM] == []
+
+
+async def test_claim_stale_takes_jobs_of_crashed_workers(repo, redis):
+    job = await repo.create(JobType.ORDER_REPORT, user_id=1, payload={})
+    entry = await repo.dequeue('worker-1')
+
+    assert await repo.claim_stale('worker-2', idle=60) is None
+    await repo.touch('worker-1', entry.entry_id)
+    redis.pending[entry.entry_id]['time_since_delivered'] = 60000
+
+    assert await repo.claim_stale('worker-2', idle=60) == JobEntry(
+        entry_id=entry.entry_id, job_id=job.id, deliveries=2,
+    )
+    assert redis.pending[entry.entry_id]['consumer'] == 'worker-2'
@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from api.modules.job import worker as job_worker
+from api.modules.job.enums import JobType
+from api.modules.job.errors import JobNotFoundError
+from api.modules.job.handlers import JobResult
+from api.modules.job.infrastructure.repository import JobEntry
+
+
+@pytest.fixture
+def worker() -> job_worker.JobWorker:
+    worker = job_worker.JobWorker(concurrency=1)
+    worker.repo = AsyncMock()
+    worker.repo.get_task.return_value = (JobType.ORDER_REPORT, {'key': 'value'})
+    return worker
+
+
+async def test_process_reports_progress_and_result(worker, monkeypatch):
+    async def handler(job_id, payload, progress):
+        assert payload == {'key': 'value'}
+        await progress(10, None)
+        return JobResult(filename='report.xlsx')
+
+    monkeypatch.setitem(job_worker.handlers, JobType.ORDER_REPORT, handler)
+
+    await worker.process('job-id')
+
+    worker.repo.mark_running.assert_awaited_once_with('job-id')
+    worker.repo.set_progress.assert_awaited_once_with('job-id', 10, None)
+    worker.repo.mark_succeeded.assert_awaited_once_with('job-id', None, 'report.xlsx')
+    worker.repo.mark_failed.assert_not_awaited()
+
+
+async def test_process_marks_failed_job(worker, monkeypatch):
+    async def handler(job_id, payload, progress):
+        raise ValueError('Invalid filter')
+
+    monkeypatch.setitem(job_worker.handlers, JobType.ORDER_REPORT, handler)
+
+    await worker.process('job-id')
+
+    worker.repo.mark_failed.assert_awaited_once_with('job-id', 'Invalid filter')
+    worker.repo.mark_succeeded.assert_not_awaited()
+
+
+async def test_process_skips_expired_job(worker):
+    worker.repo.get_task.side_effect = JobNotFoundError(table='job', detail='expired')
+
+    await worker.process('job-id')
+
+    worker.repo.mark_running.assert_not_awaited()
+
+
+async def test_process_entry_acknowledges_job(worker, monkeypatch):
+    async def handler(job_id, payload, progress):
+        await asyncio.sleep(0.05)
+        return JobResult(result='done')
+
+    monkeypatch.setitem(job_worker.handlers, JobType.ORDER_REPORT, handler)
+    worker.visibility_timeout = 0.03
+
+    await worker.process_entry(JobEntry(entry_id='1-0', job_id='job-id', deliveries=1))
+
+    worker.repo.mark_succeeded.assert_awaited_once_with('job-id', 'done', None)
+    worker.repo.touch.assert_awaited_with(worker.consumer, '1-0')
+    worker.repo.ack.assert_awaited_once_with('1-0')
+
+
+async def test_process_entry_fails_job_interrupted_too_many_times(worker):
+    worker.max_attempts = 2
+
+    await worker.process_entry(JobEntry(entry_id='1-0', job_id='job-id', deliveries=3))
+
+    worker.repo.get_task.assert_not_awaited()
+    worker.repo.mark_failed.assert_awaited_once_with('job-id', 'Job was interrupted too many times')
+    worker.repo.ack.assert_awaited_once_with('1-0')
+
+
+async def test_process_entry_leaves_job_pending_on_crash(worker):
+    worker.repo.mark_running.side_effect = ConnectionError
+
+    with pytest.raises(ConnectionError):
+        await worker.process_entry(JobEntry(entry_id='1-0', job_id='job-id', deliveries=1))
+
+    worker.repo.ack.assert_not_awaited()
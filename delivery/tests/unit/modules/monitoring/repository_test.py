@@ -0,0 +1,99 @@
+import datetime
+
+import pytest
+
+from api.modules.monitoring.infrastructure import repository
+from api.modules.monitoring.schemas import GeolocationPoint
+
+
+UTC = datetime.timezone.utc
+
+
+@pytest.fixture
+def connection(monkeypatch, db_connection):
+    db_connection.results = {repository.INSERT_QUERY: lambda values: [(len(values[1]),)]}
+    monkeypatch.setattr(repository.GeolocationRepository, '_connection', staticmethod(lambda: db_connection))
+    monkeypatch.setattr(repository, '_partitions', set())
+    return db_connection
+
+
+def test_add_months():
+    assert repository.add_months(datetime.date(2026, 11, 1), 2) == datetime.date(2027, 1, 1)
+    assert repository.add_months(datetime.date(2026, 1, 1), -1) == datetime.date(2025, 12, 1)
+
+
+def test_track_step():
+    start = datetime.datetime(2026, 10, 1, tzinfo=UTC)
+
+    assert repository.track_step(start, start + datetime.timedelta(hours=1), 500) == 8
+    assert repository.track_step(start, start + datetime.timedelta(seconds=10), 500) == 1
+
+
+async def test_create_many(connection):
+    points = [
+        GeolocationPoint(
+            latitude=43.25, longitude=76.92, order_id=1,
+            recorded_at=datetime.datetime(2026, 9, 30, 23, 59, tzinfo=UTC),
+        ),
+        GeolocationPoint(
+            latitude=43.26, longitude=76.93,
+            recorded_at=datetime.datetime(2026, 10, 1, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=6))),
+        ),
+    ]
+
+    count = await repository.GeolocationRepository().create_many(7, points)
+
+    assert count == 2
+    partitions = [values[0] for query, values in connection.queries[:-1]]
+    # the second point was recorded at 23:00 UTC of September
+    assert partitions == [datetime.date(2026, 9, 1)]
+    query, values = connection.queries[-1]
+    assert query == repository.INSERT_QUERY
+    assert values[0] == 7
+    assert values[1] == [1, None]
+    assert values[3] == [43.25, 43.26]
+
+    await repository.GeolocationRepository().create_many(7, points)
+    # partitions are created once per process
+    assert len(connection.queries) == 3
+
+
+async def test_get_track(monkeypatch):
+    calls = []
+
+    async def read_fetch(query, *args):
+        calls.append((query, args))
+        return [{
+            'courier_id': 7,
+            'order_id': 1,
+            'recorded_at': datetime.datetime(2026, 10, 1, tzinfo=UTC),
+            'latitude': 43.25,
+            'longitude': 76.92,
+        }]
+
+    monkeypatch.setattr(repository.database, 'read_fetch', read_fetch)
+    start = datetime.datetime(2026, 10, 1, tzinfo=UTC)
+
+    track = await repository.GeolocationRepository().get_track(
+        start, start + datetime.timedelta(hours=1), 100, order_id=1,
+    )
+
+    assert track.step == 36
+    assert track.points[0].courier_id == 7
+    query, args = calls[0]
+    assert 'AND order_id = $4' in query
+    assert 'courier_id = $' not in query
+    assert args == (start, start + datetime.timedelta(hours=1), 36, 1)
+
+
+async def test_partitions_drop(connection):
+    connection.results[repository.PARTITIONS_QUERY] = [
+        {'relname': 'courier_geolocation_2026_03'},
+        {'relname': 'courier_geolocation_2026_04'},
+        {'relname': 'courier_geolocation_default'},
+    ]
+
+    dropped = await repository.GeolocationRepository().partitions_drop(datetime.date(2026, 4, 1))
+
+    assert dropped == ['courier_geolocation_2026_03']
+    assert connection.scripts == ['DROP TABLE IF EXISTS "courier_geolocation_2026_03"']
@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from api import monitoring
+from api import redis_module
+from api import schemas
+
+
+def _courier(courier_id, city_id, ts):
+    return {
+        'id': courier_id, 'city_id': city_id, 'ts': ts,
+        'first_name': 'Courier', 'last_name': str(courier_id),
+        'latitude': 43.25, 'longitude': 76.92,
+    }
+
+
+@pytest.fixture
+def monitor():
+    return monitoring.CourierMonitor(ttl=60, max_size=3)
+
+
+async def test_get_couriers_by_city(monitor):
+    monitor._receive(json.dumps(_courier(1, 10, 100)))
+    monitor._receive(json.dumps(_courier(2, 10, 100)))
+    monitor._receive(json.dumps(_courier(3, 20, 100)))
+
+    assert [courier['id'] for courier in await monitor.get_couriers(10)] == [1, 2]
+    assert [courier['id'] for courier in await monitor.get_couriers(20)] == [3]
+    assert await monitor.get_couriers(30) == []
+
+
+async def test_latest_courier_wins(monitor):
+    monitor._receive(json.dumps(_courier(1, 10, 100)))
+    monitor._receive(json.dumps(_courier(1, 20, 200)))
+    monitor._receive(json.dumps(_courier(1, 30, 150)))
+    monitor._receive('not a courier')
+
+    assert await monitor.get_couriers(10) == []
+    assert [courier['ts'] for courier in await monitor.get_couriers(20)] == [200]
+    assert await monitor.get_couriers(30) == []
+
+
+async def test_couriers_are_evicted(monitor, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(monitoring.time, 'monotonic', lambda: clock[0])
+    for courier_id in range(1, 5):
+        monitor._receive(json.dumps(_courier(courier_id, 10, 100)))
+
+    # the least recently received courier is evicted over max_size
+    assert [courier['id'] for courier in await monitor.get_couriers(10)] == [2, 3, 4]
+
+    clock[0] += 30
+    monitor._receive(json.dumps(_courier(2, 10, 101)))
+    clock[0] += 31
+
+    assert [courier['id'] for courier in await monitor.get_couriers(10)] == [2]
+
+
+async def test_listen_and_add_courier(monitor, monkeypatch, redis):
+    courier = schemas.MonitoringCourierAdd(**_courier(1, 10, 100))
+    redis.subscription.records = [
+        {'type': 'psubscribe', 'data': 1},
+        {'type': 'pmessage', 'channel': 'courier:1', 'data': json.dumps(_courier(1, 10, 100))},
+    ]
+    monitor.__dict__['_connection'] = redis
+    monkeypatch.setattr(redis_module.publisher, 'publish', redis.publish)
+
+    await monitor.add_courier(courier)
+    monitor.start()
+    await asyncio.sleep(0)
+    couriers = await monitor.get_couriers(10)
+    await monitor.close()
+
+    assert redis.published[0][0] == 'courier:1'
+    assert redis.subscription.patterns == ['courier:*']
+    assert [courier['id'] for courier in couriers] == [1]
+    assert redis.subscription.closed
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from api import redis_module
+
+
+@pytest.fixture
+def connection(monkeypatch, redis):
+    redis.subscribers = {'otp': 2}
+    monkeypatch.setattr(redis_module, '_connection', redis)
+    return redis
+
+
+def _batches(redis):
+    return [[args for _, args, _ in commands] for commands in redis.pipelines]
+
+
+async def test_concurrent_publishes_are_sent_in_batches(connection):
+    publisher = redis_module.Publisher(batch_size=2)
+
+    receivers = await asyncio.gather(
+        publisher.publish('otp', '1'),
+        publisher.publish('feedback', '2'),
+        publisher.publish('otp', '3'),
+    )
+
+    assert receivers == [2, 0, 2]
+    assert _batches(connection) == [[('otp', '1'), ('feedback', '2')], [('otp', '3')]]
+    assert await publisher.publish_many([('otp', '4'), ('otp', '5')]) == [2, 2]
+    assert _batches(connection)[-1] == [('otp', '4'), ('otp', '5')]
+    assert publisher.stats['batches'] == 3 and publisher.stats['published'] == 5
+
+
+async def test_failed_batch_raises_for_every_message(connection):
+    publisher = redis_module.Publisher()
+    connection.error = ConnectionError('Connection refused')
+
+    results = await asyncio.gather(
+        publisher.publish('otp', '1'),
+        publisher.publish('otp', '2'),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert publisher.stats['failed'] == 2
+    connection.error = None
+    assert await publisher.publish('otp', '3') == 2
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from api import auth
+
+PATHS = [
+    '/api/v1/service/geocoder',
+    '/api/v1/service/outbox',
+    '/api/v1/service/redis',
+]
+
+
+@pytest.fixture
+def current_user():
+    user = SimpleNamespace(is_superuser=False)
+    api.app.dependency_overrides[auth.get_current_user] = lambda: user
+    yield user
+    api.app.dependency_overrides.pop(auth.get_current_user)
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_service_stats_require_authentication(path):
+    client = TestClient(api.app)
+
+    assert client.get(path).status_code == 401
+
+
+@pytest.mark.parametrize('path', PATHS)
+def test_service_stats_require_superuser(path, current_user):
+    client = TestClient(api.app)
+
+    assert client.get(path).status_code == 403
+
+
+def test_service_stats_for_superuser(current_user):
+    current_user.is_superuser = True
+    client = TestClient(api.app)
+
+    response = client.get('/api/v1/service/redis')
+
+    assert response.status_code == 200
+    assert 'published' in response.json()
@@ -0,0 +1,108 @@
+import asyncio
+import contextlib
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from tortoise.exceptions import IntegrityError
+
+from api import models
+from api import schemas
+from api.services.excel_loader import excel_loader
+from api.services.excel_loader.excel_loader import ExcelLoader
+
+
+class FakeDeliveryPointRepository:
+    created = []
+
+    async def create(self, in_schema):
+        self.created.append(in_schema.address)
+        return SimpleNamespace(id=len(self.created))
+
+
+@pytest.fixture
+def importer(monkeypatch):
+    state = SimpleNamespace(orders=[], running=0, max_running=0, transactions=0)
+    FakeDeliveryPointRepository.created = []
+
+    async def to_coordinates_many(service, addresses):
+        return {
+            address: schemas.Coordinates(latitude=43.2, longitude=76.9)
+            for address in addresses
+        }
+
+    async def order_create(create, user, courier_service_id):
+        state.running += 1
+        state.max_running = max(state.max_running, state.running)
+        await asyncio.sleep(0)
+        state.running -= 1
+        if create['partner_order_id'] == 'existing':
+            raise IntegrityError('duplicate key value violates unique constraint')
+        order = SimpleNamespace(id=len(state.orders) + 1, **create)
+        state.orders.append(order)
+        return order
+
+    @contextlib.asynccontextmanager
+    async def in_transaction(connection_name):
+        state.transactions += 1
+        yield
+
+    async def orders_bulk_set_datetime(field, values, only_null=False):
+        pass
+
+    async def orders_local_times(orders):
+        return {order.id: datetime.datetime(2026, 1, 1) for order in orders}
+
+    monkeypatch.setattr(excel_loader, 'to_coordinates_many', to_coordinates_many)
+    monkeypatch.setattr(excel_loader, 'DeliveryPointRepository', FakeDeliveryPointRepository)
+    monkeypatch.setattr(excel_loader, 'in_transaction', in_transaction)
+    monkeypatch.setattr(excel_loader, 'IMPORT_CONCURRENCY', 2)
+    monkeypatch.setattr(models, 'order_create', order_create)
+    monkeypatch.setattr(models, 'orders_local_times', orders_local_times)
+    monkeypatch.setattr(models, 'orders_bulk_set_datetime', orders_bulk_set_datetime)
+    monkeypatch.setattr(schemas, 'OrderCreate', dict)
+    return state
+
+
+def _rows(*partner_order_ids):
+    return [
+        (counter, [counter], {
+            'partner_id': 1,
+            'partner_order_id': partner_order_id,
+            'shipment_point': None,
+            'delivery_point': f'Address {counter}',
+        })
+        for counter, partner_order_id in enumerate(partner_order_ids, 1)
+    ]
+
+
+async def test_orders_are_created_with_bounded_concurrency(importer):
+    error_rows = []
+
+    await ExcelLoader()._orders_create_from_excel(
+        _rows('1', '2', '3', '4', '5'), error_rows, SimpleNamespace(partners=[1]), None, 5,
+    )
+
+    assert error_rows == []
+    assert importer.max_running == 2
+    assert importer.transactions == 5
+    assert sorted(order.addresses[0]['place_id'] for order in importer.orders) == [1, 2, 3, 4, 5]
+
+
+async def test_repeated_partner_order_ids_are_row_errors(importer):
+    error_rows = []
+    progress = []
+
+    async def on_progress(processed, total):
+        progress.append((processed, total))
+
+    await ExcelLoader()._orders_create_from_excel(
+        _rows('1', '1', 'existing', None, None), error_rows, SimpleNamespace(partners=[1]), on_progress, 5,
+    )
+
+    assert sorted(error_rows) == [
+        (2, [2, excel_loader.ORDER_ALREADY_EXISTS_ERROR]),
+        (3, [3, excel_loader.ORDER_ALREADY_EXISTS_ERROR]),
+    ]
+    assert [order.partner_order_id for order in importer.orders] == ['1', None, None]
+    assert progress == [(5, 5)]
@@ -0,0 +1,75 @@
+import contextlib
+import datetime
+import io
+
+import openpyxl
+import pytest
+
+from api import schemas
+from api.models import order
+from api.services.excel_loader import excel_loader
+
+
+@pytest.fixture
+def connection(monkeypatch, db_connection):
+    db_connection.rows = [
+        {'id': i, 'pan': '4400430000001234', 'created_at': datetime.datetime(2026, 1, 1, 10)}
+        for i in range(1, 6)
+    ]
+
+    @contextlib.asynccontextmanager
+    async def read_connection():
+        yield db_connection
+
+    monkeypatch.setattr(excel_loader.database, 'read_connection', read_connection)
+    monkeypatch.setattr(excel_loader, 'order_report_query_builder', lambda **kwargs: 'SELECT 1;\n')
+    return db_connection
+
+
+async def test_iterate_orders_for_report_pages_through_cursor(connection):
+    pages = [
+        page async for page in excel_loader.iterate_orders_for_report(
+            columns=['ID', 'Номер карты', 'Дата создания'], page_size=2,
+        )
+    ]
+
+    assert [[row[0] for row in page] for page in pages] == [[1, 2], [3, 4], [5]]
+    assert pages[0][0][1] == '4400********1234'
+    assert connection.queries == [('SELECT 1', None)]
+    assert connection.transactions == [{'readonly': True}]
+    assert connection.cursor_obj.fetched == [2, 2, 2, 2]
+
+
+async def test_order_report_streaming_writes_all_pages(monkeypatch):
+    async def iterate_orders_for_report(columns, **kwargs):
+        yield [[1, 'first'], [2, 'second']]
+        yield [[3, 'third']]
+
+    progress = []
+
+    async def on_progress(written, total):
+        progress.append((written, total))
+
+    monkeypatch.setattr(order, 'iterate_orders_for_report', iterate_orders_for_report)
+
+    buffer = await order.order_report_streaming(
+        schemas.ExportExcel(filtering={}), None, progress=on_progress,
+    )
+
+    sheet = openpyxl.load_workbook(io.BytesIO(buffer.read())).active
+    assert [row[1] for row in sheet.iter_rows(min_row=2, values_only=True)] == [
+        'first', 'second', 'third',
+    ]
+    assert sheet.cell(row=1, column=1).value == 'ID'
+    assert progress == [(2, None), (3, None)]
+
+
+async def test_order_report_streaming_closes_buffer_on_error(monkeypatch):
+    async def iterate_orders_for_report(columns, **kwargs):
+        raise RuntimeError
+        yield
+
+    monkeypatch.setattr(order, 'iterate_orders_for_report', iterate_orders_for_report)
+
+    with pytest.raises(RuntimeError):
+        await order.order_report_streaming(schemas.ExportExcel(filtering={}), None)
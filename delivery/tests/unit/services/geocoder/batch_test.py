@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from api import schemas
+from api.services.geocoder import GeocoderRemoteServiceResponseError
+from api.services.geocoder import to_coordinates_many
+
+
+class FakeGeocoder:
+    def __init__(self):
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def to_coordinates(self, address):
+        self.requested.append(address)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        if address.startswith('unknown'):
+            raise GeocoderRemoteServiceResponseError(address)
+        return schemas.Coordinates(latitude=43.2, longitude=76.9)
+
+
+@pytest.fixture
+def geocoder() -> FakeGeocoder:
+    return FakeGeocoder()
+
+
+async def test_to_coordinates_many_dedupes_addresses(geocoder):
+    result = await to_coordinates_many(
+        geocoder,
+        ['Abay 1, Almaty', 'abay 1,  almaty', 'Abay 2, Almaty'],
+    )
+
+    assert sorted(geocoder.requested) == ['Abay 1, Almaty', 'Abay 2, Almaty']
+    assert set(result) == {'Abay 1, Almaty', 'abay 1,  almaty', 'Abay 2, Almaty'}
+    assert result['Abay 1, Almaty'] == result['abay 1,  almaty']
+
+
+async def test_to_coordinates_many_limits_concurrency_and_keeps_errors(geocoder):
+    addresses = [f'street {i}' for i in range(10)] + ['unknown street']
+
+    result = await to_coordinates_many(geocoder, addresses, concurrency=3)
+
+    assert geocoder.max_in_flight <= 3
+    assert isinstance(result['unknown street'], GeocoderRemoteServiceResponseError)
+    assert isinstance(result['street 0'], schemas.Coordinates)
@@ -0,0 +1,80 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from api import schemas
+from api.services.geocoder import CachedGeocoder
+from api.services.geocoder import GeocoderAddressNotFoundError
+from api.services.geocoder.cache import normalize_address
+
+
+class FakeCache:
+    def __init__(self):
+        self.stored = {}
+        self.stats = Counter()
+
+    async def coordinates_get(self, address):
+        key = normalize_address(address)
+        if key not in self.stored:
+            return False, None
+        return True, self.stored[key]
+
+    async def coordinates_set(self, address, coordinates):
+        self.stored[normalize_address(address)] = coordinates
+
+    async def incr(self, counter):
+        self.stats[counter] += 1
+
+
+class FakeBackend:
+    name = 'fake'
+
+    def __init__(self):
+        self.requested = []
+
+    async def to_coordinates(self, address):
+        self.requested.append(address)
+        await asyncio.sleep(0.01)
+        if address.startswith('unknown'):
+            raise GeocoderAddressNotFoundError(address)
+        return schemas.Coordinates(latitude=43.2, longitude=76.9)
+
+
+@pytest.fixture
+def backend() -> FakeBackend:
+    return FakeBackend()
+
+
+@pytest.fixture
+def geocoder(backend) -> CachedGeocoder:
+    return CachedGeocoder(backend, cache=FakeCache())
+
+
+async def test_cached_geocoder_requests_backend_once(geocoder, backend):
+    first = await geocoder.to_coordinates('Abay 1, Almaty')
+    second = await geocoder.to_coordinates('ABAY 1,   Almaty')
+
+    assert first == second
+    assert backend.requested == ['Abay 1, Almaty']
+    assert geocoder.cache.stats == {'misses': 1, 'hits': 1}
+
+
+async def test_cached_geocoder_caches_not_found(geocoder, backend):
+    for _ in range(2):
+        with pytest.raises(GeocoderAddressNotFoundError):
+            await geocoder.to_coordinates('unknown street')
+
+    assert backend.requested == ['unknown street']
+    assert geocoder.cache.stats == {'misses': 1, 'negative_hits': 1}
+
+
+async def test_cached_geocoder_coalesces_concurrent_lookups(geocoder, backend):
+    results = await asyncio.gather(
+        *(geocoder.to_coordinates('Abay 1, Almaty') for _ in range(5)),
+    )
+
+    assert all(result == results[0] for result in results)
+    assert backend.requested == ['Abay 1, Almaty']
+    assert geocoder.cache.stats == {'misses': 1, 'coalesced': 4}
+    assert geocoder._in_flight == {}
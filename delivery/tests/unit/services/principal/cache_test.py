@@ -0,0 +1,88 @@
+import time
+
+import aioredis
+import pytest
+
+from api import schemas
+from api.modules.shipment_point.schemas import CityGet
+from api.services.principal import PrincipalCache
+
+
+@pytest.fixture
+def cache(redis) -> PrincipalCache:
+    cache = PrincipalCache(ttl=60)
+    cache.__dict__['_redis'] = redis
+    return cache
+
+
+def _principal(user_id: int = 1) -> schemas.UserCurrent:
+    return schemas.UserCurrent(
+        id=user_id,
+        phone_number='+77001234567',
+        is_superuser=False,
+        has_password=True,
+        is_active=True,
+    )
+
+
+async def test_principal_cache_set_and_get(cache):
+    principal = _principal()
+
+    await cache.set('token', principal, exp=time.time() + 10)
+
+    revoked, cached = await cache.get('token', principal.id)
+    assert not revoked
+    assert cached == principal
+    assert await cache.get('another', principal.id) == (False, None)
+    # ttl is limited by token expiration
+    assert max(ttl for ttl in cache._redis.ttls.values()) == 60
+    assert min(ttl for ttl in cache._redis.ttls.values()) <= 10
+
+
+async def test_principal_cache_invalidate_user(cache):
+    await cache.set('first', _principal(1))
+    await cache.set('second', _principal(1))
+    await cache.set('third', _principal(2))
+
+    await cache.invalidate_user(1)
+
+    assert await cache.get('first', 1) == (False, None)
+    assert await cache.get('second', 1) == (False, None)
+    assert (await cache.get('third', 2))[1] is not None
+
+
+async def test_principal_cache_revoke(cache):
+    now = time.time()
+
+    await cache.revoke_many([('active', now + 100), ('expired', now - 100)])
+
+    assert await cache.is_revoked('active')
+    assert not await cache.is_revoked('expired')
+    assert (await cache.get('active', 1))[0]
+
+
+async def test_principal_cache_restores_profile_schemas(cache):
+    principal = _principal()
+    principal.profile = {
+        'id': 1,
+        'profile_type': 'branch_manager',
+        'profile_content': {
+            'cities': [CityGet(id=3, name='Almaty', country={'id': 1, 'name': 'Kazakhstan'})],
+            'partner_id': 2,
+        },
+    }
+
+    await cache.set('token', principal)
+
+    _, cached = await cache.get('token', principal.id)
+    assert cached == principal
+    assert [city.id for city in cached.profile['profile_content']['cities']] == [3]
+
+
+async def test_principal_cache_invalidate_user_ignores_redis_errors(cache):
+    async def smembers(key):
+        raise aioredis.ConnectionError('Connection refused')
+
+    cache._redis.smembers = smembers
+
+    await cache.invalidate_user(1)
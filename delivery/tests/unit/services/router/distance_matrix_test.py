@@ -0,0 +1,87 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from types import SimpleNamespace
+
+from api.services.router import distance_matrix
+from api.services.router.distance_matrix import haversine_matrix
+from api.services.router.router import get_distance
+from api.services.router.router import get_order_info
+from api.services.router.router import node_order_index
+
+
+POINTS = [
+    (43.26130, 76.92920),
+    (43.23820, 76.94580),
+    (43.25670, 76.92860),
+    (43.22210, 76.85120),
+    (43.26130, 76.92920),
+]
+
+
+def test_haversine_matrix_matches_get_distance():
+    distances = haversine_matrix(POINTS)
+
+    assert distances.dtype == np.int32
+    assert distances.shape == (len(POINTS), len(POINTS))
+    for i, first in enumerate(POINTS):
+        for j, second in enumerate(POINTS):
+            expected = get_distance(*first, *second)
+            assert abs(int(distances[i][j]) - expected) <= 1
+
+
+def test_haversine_matrix_is_symmetric():
+    distances = haversine_matrix(POINTS)
+
+    assert (distances == distances.T).all()
+    assert (np.diag(distances) == 0).all()
+
+
+@pytest.mark.parametrize('origins_amount, destinations_amount', [(1, 5), (3, 2)])
+def test_haversine_matrix_rectangular(origins_amount, destinations_amount):
+    origins = POINTS[:origins_amount]
+    destinations = POINTS[-destinations_amount:]
+
+    distances = haversine_matrix(origins, destinations)
+
+    assert distances.shape == (origins_amount, destinations_amount)
+    for i, first in enumerate(origins):
+        for j, second in enumerate(destinations):
+            assert abs(int(distances[i][j]) - get_distance(*first, *second)) <= 1
+
+
+async def test_route_points_map_nodes_to_orders(monkeypatch):
+    coordinates = {
+        1: {'shipment_point': POINTS[0], 'delivery_points': [POINTS[1], POINTS[2]]},
+        3: {'shipment_point': None, 'delivery_points': [POINTS[3]]},
+    }
+
+    async def order_coordinates_get_list(order_ids):
+        return coordinates
+
+    monkeypatch.setattr(
+        distance_matrix.models, 'order_coordinates_get_list', order_coordinates_get_list,
+    )
+    orders = [SimpleNamespace(id=1), SimpleNamespace(id=2), SimpleNamespace(id=3)]
+
+    distances, node_orders = await distance_matrix.build_distance_matrix(orders)
+
+    assert distances.shape == (4, 4)
+    assert node_orders.tolist() == [0, 0, 2]
+    assert [node_order_index(node, node_orders.tolist()) for node in range(5)] == [None, 0, 0, 2, None]
+    assert [node_order_index(node, None) for node in range(3)] == [None, 0, 1]
+
+
+async def test_order_info_is_built_per_node():
+    delivery_datetime = datetime.datetime(2026, 10, 18, 12, 0)
+    orders = [
+        SimpleNamespace(delivery_datetime=delivery_datetime),
+        SimpleNamespace(delivery_datetime=delivery_datetime + datetime.timedelta(hours=1)),
+    ]
+
+    orders_info = await get_order_info(orders, [1, 0, 1])
+
+    assert [row[3] for row in orders_info] == [-1, 0, -1]
+    assert orders_info[0][1] - orders_info[1][1] == 60
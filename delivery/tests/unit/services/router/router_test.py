@@ -0,0 +1,138 @@
+import contextlib
+import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from api import models
+from api.services.router import router
+
+
+class FakeModels:
+    NotDistributionCouriersError = models.NotDistributionCouriersError
+    NotDistributionOrdersError = models.NotDistributionOrdersError
+
+    def __init__(self, orders_query, order_statuses):
+        self.bulk_updated = []
+        self.orders_query = orders_query
+        self.sent = []
+        self.Order = SimpleNamespace(
+            bulk_update=self.bulk_update,
+            filter=lambda **kwargs: self.orders_query.filter(**kwargs),
+        )
+        self.OrderStatuses = order_statuses
+        self.catalog = SimpleNamespace(status_by_slug=self.status_by_slug)
+
+    async def bulk_update(self, orders, fields):
+        self.bulk_updated.append(([order.id for order in orders], fields))
+
+    @staticmethod
+    async def status_by_slug(slug):
+        return SimpleNamespace(id=3, slug=slug)
+
+    @staticmethod
+    async def orders_local_times(orders):
+        return {order.id: datetime.datetime(2026, 1, 1) for order in orders}
+
+    async def send_new_orders_to_couriers(self, orders):
+        self.sent.extend(order.id for order in orders)
+
+
+@pytest.fixture
+def fake_models(monkeypatch, fake_query, order_statuses):
+    def fake_models(statuses_count=()):
+        order_statuses.query.result = list(statuses_count)
+        fake = FakeModels(fake_query(), order_statuses)
+        monkeypatch.setattr(router, 'models', fake)
+        monkeypatch.setattr(router, 'in_transaction', lambda *_: contextlib.AsyncExitStack())
+        return fake
+    return fake_models
+
+
+def _orders(amount, courier_id=None):
+    return [SimpleNamespace(id=i + 1, courier_id=courier_id) for i in range(amount)]
+
+
+def _couriers(amount):
+    return [SimpleNamespace(id=10 * (i + 1)) for i in range(amount)]
+
+
+async def test_set_couriers_to_orders_updates_in_bulk(fake_models):
+    fake = fake_models(statuses_count=[(1, 1), (2, 2), (3, 1)])
+    orders = _orders(3, courier_id=20)
+    couriers = _couriers(2)
+
+    assigned = await router.set_couriers_to_orders(
+        orders, couriers, {'couriers': [{'path': [0, 3, 1, 0]}, {'path': [0, 2, 0]}]},
+    )
+
+    assert [order.id for order in assigned] == [3, 1, 2]
+    assert [(order.courier_id, order.position) for order in orders] == [(10, 1), (20, 0), (10, 0)]
+    assert fake.bulk_updated == [([3, 1, 2], ['courier_id', 'position'])]
+    assert [(status.order_id, status.status_id) for status in fake.OrderStatuses.created] == [(3, 3), (1, 3)]
+    assert ('update', (), {'current_status_id': 3}) in fake.orders_query.calls
+    assert fake.sent == [3, 1]
+
+
+async def test_set_couriers_to_orders_skips_repeated_order_nodes(fake_models):
+    fake = fake_models()
+    orders = _orders(2)
+
+    assigned = await router.set_couriers_to_orders(
+        orders, _couriers(1),
+        {'couriers': [{'path': [0, 1, 3, 2, 7]}], 'node_orders': [0, 1, 0]},
+    )
+
+    assert [(order.id, order.position) for order in assigned] == [(1, 0), (2, 1)]
+    assert fake.OrderStatuses.created == []
+    assert fake.bulk_updated == [([1, 2], ['courier_id', 'position'])]
+
+
+async def test_set_couriers_to_orders_without_routed_orders(fake_models):
+    fake = fake_models()
+
+    assigned = await router.set_couriers_to_orders(
+        _orders(1), _couriers(1), {'couriers': [{'path': [0]}]},
+    )
+
+    assert assigned == []
+    assert fake.bulk_updated == []
+
+
+@pytest.mark.parametrize('orders, couriers, error', [
+    (_orders(1), [], models.NotDistributionCouriersError),
+    ([], _couriers(1), models.NotDistributionOrdersError),
+])
+async def test_set_couriers_to_orders_requires_orders_and_couriers(fake_models, orders, couriers, error):
+    fake_models()
+
+    with pytest.raises(error):
+        await router.set_couriers_to_orders(orders, couriers, {'couriers': []})
+
+
+async def test_run_service_algo_sends_route_nodes(monkeypatch):
+    requests = []
+
+    async def build_distance_matrix(orders):
+        return np.zeros((4, 4), dtype=np.int32), np.array([0, 0, 1])
+
+    class DistributionService:
+        async def distribute(self, data):
+            requests.append(data)
+            return {'couriers': [{'path': [0, 1, 2, 3]}]}
+
+    monkeypatch.setattr(router, 'build_distance_matrix', build_distance_matrix)
+    monkeypatch.setattr(router, 'DistributionService', DistributionService)
+    delivery_datetime = datetime.datetime(2026, 1, 1, 12)
+    orders = [SimpleNamespace(id=i, delivery_datetime=delivery_datetime) for i in (1, 2)]
+
+    result = await router.run_service_algo(orders, _couriers(2))
+
+    assert result['node_orders'] == [0, 0, 1]
+    request, = requests
+    assert request['orders_amount'] == 3
+    assert request['couriers_amount'] == 2
+    assert request['distance_matrix'] == [[0] * 4] * 4
+    assert [info[3] for info in request['orders_info']] == [0, 0, -1]
+    assert request['can_delivery_info'] == [[1] * 4] * 2
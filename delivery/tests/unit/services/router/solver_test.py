@@ -0,0 +1,83 @@
+import numpy as np
+
+from api.services.router import solver
+from api.services.router.distance_matrix import haversine_matrix
+
+
+POINTS = [
+    (43.26130, 76.92920),
+    (43.23820, 76.94580),
+    (43.25670, 76.92860),
+    (43.22210, 76.85120),
+    (43.24150, 76.90030),
+]
+START_TIME = 29000000
+FINISH_TIME = START_TIME + 660
+
+
+def _solve(can_delivery=None, couriers_amount=2):
+    orders_amount = len(POINTS) - 1
+    couriers_info = np.array(
+        [[30.0, 1000000000, START_TIME, FINISH_TIME]] * couriers_amount,
+    )
+    orders_info = np.array(
+        [[START_TIME, FINISH_TIME, 1, -1]] * orders_amount,
+    )
+    if can_delivery is None:
+        can_delivery = np.ones((couriers_amount, orders_amount + 1), dtype=np.int8)
+
+    return solver.solve(
+        haversine_matrix(POINTS),
+        couriers_info,
+        orders_info,
+        can_delivery,
+        time_limit=1,
+    )
+
+
+def test_solve_assigns_every_order_once():
+    result = _solve()
+
+    assert len(result['couriers']) == 2
+    assigned = [node for courier in result['couriers'] for node in courier['path'][1:]]
+    assert sorted(assigned) == [1, 2, 3, 4]
+    for courier in result['couriers']:
+        assert courier['path'][0] == solver.DEPOT
+    assert result['total_violation'] == 0
+    assert result['total_distance'] == sum(
+        courier['distance'] for courier in result['couriers']
+    )
+
+
+def test_solve_respects_can_delivery():
+    can_delivery = np.array([
+        [1, 1, 1, 1, 1],
+        [1, 0, 0, 0, 0],
+    ], dtype=np.int8)
+
+    result = _solve(can_delivery=can_delivery)
+
+    assert result['couriers'][1]['path'] == [solver.DEPOT]
+    assert sorted(result['couriers'][0]['path'][1:]) == [1, 2, 3, 4]
+
+
+def test_solve_keeps_nodes_of_order_with_one_courier():
+    can_delivery = np.array([
+        [1, 1, 0, 1, 1],
+        [1, 0, 1, 1, 1],
+    ], dtype=np.int8)
+    couriers_info = np.array([[30.0, 1000000000, START_TIME, FINISH_TIME]] * 2)
+    orders_info = np.array([[START_TIME, FINISH_TIME, 1, -1]] * 4)
+
+    result = solver.solve(
+        haversine_matrix(POINTS),
+        couriers_info,
+        orders_info,
+        can_delivery,
+        time_limit=1,
+        # nodes 1 and 2 are delivery points of the same order, but no courier can deliver both
+        node_orders=np.array([0, 0, 1, 2]),
+    )
+
+    assigned = [node for courier in result['couriers'] for node in courier['path'][1:]]
+    assert sorted(assigned) == [3, 4]
@@ -0,0 +1,99 @@
+import functools
+import json
+import math
+import time
+
+import pytest
+
+from api.services.ws_monitoring import ws_monitoring
+
+
+def _distance(latitude, longitude, other_latitude, other_longitude):
+    dlat = math.radians(other_latitude - latitude)
+    dlon = math.radians(other_longitude - longitude)
+    a = (
+        math.sin(dlat / 2) ** 2 +
+        math.cos(math.radians(latitude)) * math.cos(math.radians(other_latitude)) * math.sin(dlon / 2) ** 2
+    )
+    return 2 * ws_monitoring.EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def _geosearch(redis, command, name, _, longitude, latitude, shape, *size):
+    members = redis.zsets.get(name, {})
+    if shape == 'BYRADIUS':
+        distances = {
+            member: _distance(latitude, longitude, member_latitude, member_longitude)
+            for member, (member_longitude, member_latitude) in members.items()
+        }
+        return sorted(
+            (member for member, distance in distances.items() if distance <= size[0]),
+            key=distances.get,
+        )
+    return [[member, [str(lon), str(lat)]] for member, (lon, lat) in members.items()]
+
+
+@pytest.fixture
+def service(redis):
+    redis.command_handlers['GEOSEARCH'] = functools.partial(_geosearch, redis)
+    service = ws_monitoring.MonitoringService(ttl=60)
+    service.__dict__['_redis'] = redis
+    return service
+
+
+async def _update(service, courier_id, latitude, longitude):
+    await service.update_courier_location(
+        courier_service_id=1,
+        courier_id=courier_id,
+        location={'latitude': latitude, 'longitude': longitude},
+    )
+
+
+async def test_update_and_get_locations(service):
+    await _update(service, 10, 43.25, 76.92)
+    await _update(service, 11, 43.26, 76.93)
+    await _update(service, 11, 43.27, 76.94)
+
+    locations = await service.get_locations(1)
+
+    assert sorted(location['courier_id'] for location in locations) == [10, 11]
+    assert json.loads(await service.get_location(1, 11))['location'] == {
+        'latitude': 43.27, 'longitude': 76.94,
+    }
+    assert set(service._redis.ttls.values()) == {60}
+
+
+async def test_stale_locations_are_expired(service):
+    await _update(service, 10, 43.25, 76.92)
+    await _update(service, 11, 43.26, 76.93)
+    service._redis.zsets['locations:1:updated']['10'] = time.time() - 61
+
+    locations = await service.get_locations(1)
+
+    assert [location['courier_id'] for location in locations] == [11]
+    assert '10' not in service._redis.zsets['locations:1:geo']
+    assert await service.get_location(1, 10) is None
+
+
+async def test_get_locations_in_radius(service):
+    await _update(service, 10, 43.2500, 76.9200)
+    await _update(service, 11, 43.2400, 76.9200)
+    await _update(service, 12, 43.3500, 76.9200)
+
+    locations = await service.get_locations_in_radius(1, 43.2390, 76.9200, 2000)
+
+    assert [location['courier_id'] for location in locations] == [11, 10]
+
+
+async def test_get_locations_in_box(service):
+    await _update(service, 10, 43.25, 76.92)
+    await _update(service, 11, 43.30, 76.92)
+    await _update(service, 12, 43.25, 77.10)
+
+    locations = await service.get_locations_in_box(1, 43.20, 76.80, 43.28, 77.00)
+
+    assert [location['courier_id'] for location in locations] == [10]
+    command = service._redis.commands[0]
+    assert command[5] == 'BYBOX'
+    # the box is wide enough to cover its bounds
+    assert command[6] >= _distance(43.20, 76.80, 43.20, 77.00)
+    assert command[7] >= _distance(43.20, 76.80, 43.28, 76.80)
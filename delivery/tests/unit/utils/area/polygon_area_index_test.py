@@ -0,0 +1,32 @@
+from api.utils.area import polygon
+
+
+SQUARE = [(0, 0), (0, 10), (10, 10), (10, 0)]
+INNER = [(2, 2), (2, 4), (4, 4), (4, 2)]
+FAR = [(50, 50), (50, 60), (60, 60), (60, 50)]
+
+
+def test_area_index_find():
+    index = polygon.AreaIndex([(1, SQUARE), (2, INNER), (3, FAR), (4, [(0, 0)])])
+
+    assert len(index) == 3
+    assert index.find(5, 5) == 1
+    # the first of overlapping areas is returned
+    assert index.find(3, 3) == 1
+    assert index.find(55, 55) == 3
+    assert index.find(20, 20) is None
+    # points on the border are not within the area
+    assert index.find(0, 5) is None
+
+
+def test_area_index_find_many():
+    index = polygon.AreaIndex([(2, INNER), (1, SQUARE)])
+
+    assert index.find_many([(3, 3), (8, 8), (-1, -1)]) == [2, 1, None]
+    assert polygon.AreaIndex([]).find_many([(3, 3)]) == [None]
+
+
+def test_scope_to_polygon():
+    scope = [{'lat': '43.25', 'lon': 76.9}, {'lat': 43.3, 'lon': '76.95'}]
+
+    assert polygon.scope_to_polygon(scope) == [(43.25, 76.9), (43.3, 76.95)]
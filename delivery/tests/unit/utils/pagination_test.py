@@ -0,0 +1,98 @@
+import datetime
+
+import fastapi
+import pydantic
+import pytest
+from fastapi.testclient import TestClient
+from fastapi_pagination.api import set_page
+
+from api import schemas
+from api.schemas.pagination import decode_cursor
+from api.schemas.pagination import encode_cursor
+from api.utils.pagination import paginate_by_cursor
+
+
+class Row(pydantic.BaseModel):
+    id: int
+    created_at: datetime.datetime
+
+    class Config:
+        orm_mode = True
+
+
+class FakeQuerySet:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+        self._limit = None
+
+    def filter(self, *args, **kwargs):
+        self.filters.append(args)
+        return self
+
+    def order_by(self, *fields):
+        self.rows = sorted(self.rows, key=lambda row: (row.created_at, row.id), reverse=True)
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def __await__(self):
+        async def result():
+            return self.rows[:self._limit]
+        return result().__await__()
+
+
+START = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+ROWS = [Row(id=i, created_at=START + datetime.timedelta(hours=i // 2)) for i in range(1, 6)]
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor(START, 10)
+
+    assert decode_cursor(cursor) == (START, 10)
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
+
+
+async def test_paginate_by_cursor_first_page():
+    query = FakeQuerySet(ROWS)
+
+    with set_page(schemas.CursorPage[Row]):
+        page = await paginate_by_cursor(query, schemas.CursorParams(page_limit=2))
+
+    assert [item.id for item in page.items] == [5, 4]
+    assert decode_cursor(page.next_cursor) == (ROWS[3].created_at, 4)
+    assert page.total is None
+    assert query.filters == []
+
+
+async def test_paginate_by_cursor_last_page():
+    query = FakeQuerySet(ROWS[:2])
+    params = schemas.CursorParams(cursor=encode_cursor(START, 3), page_limit=2)
+
+    with set_page(schemas.CursorPage[Row]):
+        page = await paginate_by_cursor(query, params)
+
+    assert [item.id for item in page.items] == [2, 1]
+    assert page.next_cursor is None
+    assert len(query.filters) == 1
+
+
+@pytest.mark.parametrize('cursor, status_code', [
+    (encode_cursor(START, 10), 200),
+    ('not a cursor', 400),
+])
+def test_cursor_params_dependency(cursor, status_code):
+    app = fastapi.FastAPI()
+
+    @app.get('/')
+    async def route(params: schemas.CursorParams = fastapi.Depends(schemas.CursorParams)):
+        return {'keyset': params.to_keyset(), 'page_limit': params.page_limit}
+
+    response = TestClient(app).get('/', params={'cursor': cursor, 'page_limit': 5})
+
+    assert response.status_code == status_code
+    if status_code == 200:
+        assert response.json() == {'keyset': [START.isoformat(), 10], 'page_limit': 5}